@@ -43,6 +43,18 @@ def parse_args():
 
     utility_group = parser.add_argument_group(title = 'Utility Parameters')
 
+    utility_group.add_argument('--astcache',
+                               dest = 'ast_cache_directory',
+                               metavar = 'PATH',
+                               help = 'The directory where parsed programs are cached. (Default: "~/.pysleuth/ast_cache")',
+                               default = os.path.join(os.path.expanduser('~'), '.pysleuth', 'ast_cache'))
+
+    utility_group.add_argument('--noastcache',
+                               action = 'store_const',
+                               const = None,
+                               dest = 'ast_cache_directory',
+                               help = 'Disable the cache of parsed programs.')
+
     utility_group.add_argument('--dot',
                                dest = 'dot_executable',
                                metavar = 'PATH',
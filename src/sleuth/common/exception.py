@@ -51,3 +51,9 @@ class NestedException(Exception):
         return super(NestedException, self).__str__()
 class TypeException(NestedException):
     pass
+class LingoException(NestedException):
+    pass
+class LingoLexingException(LingoException):
+    pass
+class LingoParsingException(LingoException):
+    pass
@@ -0,0 +1,20 @@
+from contextlib import contextmanager
+import gc
+
+
+@contextmanager
+def garbage_collection_paused():
+    '''Pause the garbage collector while building (or taking apart) a large program.
+
+    Encoding, decoding, flattening and building programs allocate a lot of
+    objects (and building makes a cyclic graph) without creating any
+    garbage, so there's no point in letting the garbage collector scan them
+    over and over again.
+    '''
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
@@ -180,6 +180,15 @@ class AnalysisInterface(object):
         lookup of a particular node and also allows an analysis simple
         access to all the nodes in the program if necessary.
         
+        Interprocedural analyses can get the Supergraph of the program
+        from program_block.get_supergraph(): the CFGs of the program and
+        its functions joined by call, return and call to return edges, with
+        the entry and exit nodes of every function. It's built once, and
+        shared by every analysis of the program block.
+        program_block.get_call_graph() likewise gives the CallGraph, with
+        the functions in bottom up order (callees before callers) for
+        summary based analyses.
+        
         This method should return a list of nodes that form 
         the initial worklist for the analysis.
         '''
@@ -1,6 +1,7 @@
 from sleuth.common.exception import NestedException, TypeException
 from sleuth.common.signal import Signal
 from sleuth.desk.analysis import AnalysisInterface, WorklistInfo, NodeInfo
+from sleuth.lingo.cache import ProgramCache
 from sleuth.lingo.parser import LingoParser, LingoException
 from sleuth.lingo.typecheck import TypeCheck
 from sleuth.tracks.cfg import ProgramBlock
@@ -158,7 +159,7 @@ class AnalysisController(object):
         assert module_file_path
 
         # Parse the source code to be analyzed
-        self._parse_source_file(source_file_path)
+        self._parse_source_file(source_file_path, arguments.ast_cache_directory)
         if arguments.typecheck_enabled:
             self._type_check_ast(arguments.annotate_types_enabled)
         self.get_cfg_edge_pairs()
@@ -170,21 +171,43 @@ class AnalysisController(object):
         self._client_analysis__prepare_analysis(self.program_block, self.node_id_map)
 
 
-    def _parse_source_file(self, source_file_path):
+    def _parse_source_file(self, source_file_path, ast_cache_directory = None):
+        '''Parse the source file to be analyzed.
+        
+        If an AST cache directory is given, the program is looked up in the 
+        cache (by the hash of its source) and only parsed if it isn't found.
+        '''
         parser = LingoParser()
+        program_cache = self._get_program_cache(ast_cache_directory)
 
         try:
             with open(source_file_path, 'r') as source_file:
                 self.program_source = source_file.read()
-                self.program_component = parser.parse(self.program_source)
         except IOError as e:
             raise CannotOpenSourceFile(source_file_path).from_exception(e)
 
+        try:
+            if program_cache is not None:
+                self.program_component = program_cache.parse(self.program_source, parser)
+            else:
+                self.program_component = parser.parse(self.program_source)
+
         except LingoException as e:
             raise CannotParseSource(source_file_path).from_exception(e)
 
         self.program_block = ProgramBlock(self.program_component)
 
+    def _get_program_cache(self, ast_cache_directory):
+        '''Get the AST cache in the given directory, or None if it can't be used.'''
+        if ast_cache_directory is None:
+            return None
+
+        try:
+            return ProgramCache(ast_cache_directory)
+        except OSError as e:
+            logger.warning('Unable to use the AST cache in {0}: {1}'.format(ast_cache_directory, e))
+            return None
+
     def _type_check_ast(self, annotate_types):
         try:
             typecheck = TypeCheck(annotate_types)
@@ -248,12 +271,16 @@ class AnalysisController(object):
             return self.cfg_edge_pairs
 
         assert self.program_block is not None, 'Call setup_analysis first.'
-        edge_pairs = self._get_edge_pairs_for_block(self.program_block)
+        self.cfg_edge_pairs = self.program_block.get_edge_pairs()
 
-        for function_block in self.program_block.functions.values():
-            edge_pairs.extend(self._get_edge_pairs_for_block(function_block))
+        # Since we know we'll see every node of the program block in the "edge pairs",
+        # we can build some canonical maps here.
+
+        # Build a map of "id" to node and "label" to node
+        for node in self.program_block.nodes:
+            self.node_id_map[node.get_identifier()] = node
+            self.node_label_map[str(node)] = node
 
-        self.cfg_edge_pairs = edge_pairs
         return self.cfg_edge_pairs
 
     def get_node_id_map(self):
@@ -261,24 +288,6 @@ class AnalysisController(object):
         assert self.node_id_map is not None, 'Call get_cfg_edge_pairs first.'
         return self.node_id_map
 
-    def _get_edge_pairs_for_block(self, block):
-        '''Recursively gather edge pairs for the given block.'''
-        edge_pairs = list(block.command_node.get_paths())
-
-        # Since we know we're going to see every "connected" node in the "edge pairs",
-        # we can build some canonical maps here.
-
-        # Build a map of "id" to node and "label" to node
-        for src, dst in edge_pairs:
-            self.node_id_map[src.get_identifier()] = src
-            self.node_label_map[str(src)] = src
-
-            if dst is not None:
-                self.node_id_map[dst.get_identifier()] = dst
-                self.node_label_map[str(dst)] = dst
-
-        return edge_pairs
-
 
     #
     # Client Analysis Method Calls
@@ -0,0 +1,139 @@
+'''
+Provide bulk parsing of Lingo source files on a pool of processes.
+
+parse_many parses any number of source files (or directory trees of them)
+and streams back a (path, result) pair for every file as soon as it has been
+parsed, where the result is either the parsed Program or the exception that
+kept it from being parsed.
+
+Every worker process builds its parser once and keeps it for all the files
+it parses. Programs are sent back to the calling process in the compact
+encoding of the AST cache, which (unlike pickle) doesn't recurse through
+long command sequences. Decoding them is still serial work for the calling
+process, so when only a summary of every program is needed, it should be
+computed in the workers by passing a process function.
+'''
+
+from sleuth.lingo.cache import encode_program, decode_program
+from sleuth.lingo.parser import LingoParser, TOKENIZER_PLY, BACKEND_YACC
+import multiprocessing
+import os
+
+
+# The extension of Lingo source files
+SOURCE_EXTENSION = '.lingo'
+
+# The parser and process function of a worker process, set by _initialize_worker
+_worker_parser = None
+_worker_process = None
+
+
+def find_sources(root, extension = SOURCE_EXTENSION):
+    '''Find the source files in the directory tree at root, in sorted order.'''
+    for directory, directory_names, file_names in os.walk(root):
+        directory_names.sort()
+
+        for file_name in sorted(file_names):
+            if file_name.endswith(extension):
+                yield os.path.join(directory, file_name)
+
+
+def read_source(path):
+    '''Read a source file.'''
+    with open(path, 'rb') as source_file:
+        return source_file.read()
+
+
+def parse_file(parser, path, process = None):
+    '''Parse a single source file.
+
+    Returns the parsed Program (or, if a process function is given, its
+    result for the path and the Program), or the exception raised while
+    reading, parsing or processing the file.
+    '''
+    try:
+        program = parser.parse(read_source(path))
+        if process is not None:
+            return process(path, program)
+        return program
+    except Exception as e:
+        return e
+
+
+def _initialize_worker(tokenizer, backend, track_positions, process):
+    global _worker_parser, _worker_process
+    _worker_parser = LingoParser(tokenizer = tokenizer,
+                                 backend = backend,
+                                 track_positions = track_positions)
+    _worker_process = process
+
+def _parse_in_worker(path):
+    result = parse_file(_worker_parser, path, _worker_process)
+
+    if _worker_process is not None or isinstance(result, Exception):
+        return path, False, result
+
+    try:
+        return path, True, encode_program(result)
+    except Exception as e:
+        return path, False, e
+
+
+def _expand_paths(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for source_path in find_sources(path):
+                yield source_path
+        else:
+            yield path
+
+
+def parse_many(paths,
+               workers = None,
+               tokenizer = TOKENIZER_PLY,
+               backend = BACKEND_YACC,
+               track_positions = True,
+               process = None,
+               chunk_size = 8):
+    '''Parse many source files in parallel.
+
+    paths may name source files and directories; directories are searched
+    (recursively) for Lingo source files. The files are parsed by a pool of
+    the given number of worker processes (by default, one per CPU), or in
+    this process if workers is 1. The remaining arguments configure the
+    LingoParser of each worker.
+
+    Yields a (path, result) pair for every file, in the order the files are
+    finished, where the result is the parsed Program or the exception raised
+    while reading, parsing or processing the file. An exception never stops
+    the other files from being parsed.
+
+    If a process function is given, it is called (in the worker) with the
+    path and the Program of every file that was parsed, and its result takes
+    the place of the Program. It must be picklable (a module-level function),
+    and so must its results.
+    '''
+    paths = _expand_paths(paths)
+    workers = workers or multiprocessing.cpu_count()
+
+    if workers == 1:
+        parser = LingoParser(tokenizer = tokenizer,
+                             backend = backend,
+                             track_positions = track_positions)
+        for path in paths:
+            yield path, parse_file(parser, path, process)
+        return
+
+    pool = multiprocessing.Pool(workers,
+                                initializer = _initialize_worker,
+                                initargs = (tokenizer, backend, track_positions, process))
+    try:
+        for path, encoded, result in pool.imap_unordered(_parse_in_worker, paths, chunk_size):
+            yield path, decode_program(result) if encoded else result
+
+        pool.close()
+
+    finally:
+        # Stop the workers if the caller stops early (or something fails)
+        pool.terminate()
+        pool.join()
@@ -0,0 +1,372 @@
+'''
+Provide an on-disk cache of parsed Lingo programs.
+
+Parsing a large program costs far more than reading it back in a compact
+form, so the ProgramCache stores every parsed Program in a file named after
+the hash of the source text (and of the grammar that parsed it). Looking up
+a program is a single file read; the source is only parsed on a miss.
+
+Programs are stored as a flat table of records, one per component, which is
+written with marshal and compressed with zlib. Flattening the tree keeps the
+encoding compact (attribute names are only stored once per kind of
+component) and lets arbitrarily long command sequences be stored without
+recursing.
+
+The cache directory may be shared by any number of processes: entries are
+written to a temporary file and renamed into place, so readers only ever see
+complete entries, and unreadable entries are treated as misses. The total
+size of the cache is capped, and the least recently used entries are evicted
+when it grows past the cap.
+'''
+
+from sleuth.common.memory import garbage_collection_paused
+from sleuth.lingo import components, symbols, types
+from sleuth.lingo.parser import LingoParser
+from itertools import izip
+import errno
+import hashlib
+import logging
+import marshal
+import os
+import tempfile
+import zlib
+
+
+logger = logging.getLogger(__name__)
+
+# The version of the encoding below. Bump this whenever the encoding or the
+# attributes of the components change, so old entries are no longer found.
+FORMAT_VERSION = 5
+
+# The default cap on the total size of the cache (in bytes)
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+# Modules that may provide the classes of cached objects
+COMPONENT_MODULES = dict((module.__name__, module) for module in (components, symbols, types))
+
+# Kinds of attribute values in the encoding
+VALUE = 0
+REFERENCE = 1
+REFERENCE_LIST = 2
+
+ENTRY_SUFFIX = '.ast'
+
+
+def grammar_signature(parser_class = LingoParser):
+    '''Get a signature of the grammar (and encoding) of cached programs.
+
+    The signature covers the tokens, keywords and productions of the parser,
+    so changing the grammar invalidates every cached program.
+    '''
+    signature = hashlib.sha1()
+    signature.update(str(FORMAT_VERSION))
+    signature.update(' '.join(sorted(parser_class.tokens)))
+    signature.update(' '.join(sorted(parser_class.keywords)))
+
+    for name in sorted(dir(parser_class)):
+        if name.startswith('p_'):
+            signature.update(name)
+            signature.update(getattr(parser_class, name).__doc__ or '')
+
+    return signature.hexdigest()
+
+
+def _get_node_classes():
+    '''Get the classes of the objects encoded as nodes (and not as values).'''
+    node_classes = set()
+    for module in COMPONENT_MODULES.values():
+        for value in vars(module).values():
+            if isinstance(value, type) and issubclass(value, (components.LingoComponent, types.Type, symbols.SymbolTable)):
+                node_classes.add(value)
+
+    return node_classes
+
+NODE_CLASSES = _get_node_classes()
+
+
+def encode_program(program):
+    '''Encode a Program (or any component tree) as a compact string.'''
+    with garbage_collection_paused():
+        return _encode_program(program)
+
+
+def _encode_program(program):
+    node_classes = NODE_CLASSES
+    indices = {id(program) : 0}
+    nodes = [program]
+    shapes = []
+    shape_indices = {}
+    records = []
+
+    # Nodes are numbered as they are first referenced, and every node is
+    # encoded after all of the nodes before it, so this visits the whole
+    # graph without recursing.
+    position = 0
+    while position < len(nodes):
+        node = nodes[position]
+        position += 1
+
+        if isinstance(node, components.LingoComponent):
+            attributes = components.get_attributes(node)
+        else:
+            attributes = vars(node)
+        names = sorted(attributes)
+        kinds = []
+        record = [None]
+
+        for name in names:
+            value = attributes[name]
+
+            if value.__class__ in node_classes:
+                kind = REFERENCE
+                items = (value,)
+            elif value.__class__ is list and value and value[0].__class__ in node_classes:
+                kind = REFERENCE_LIST
+                items = value
+            else:
+                kinds.append(VALUE)
+                record.append(value)
+                continue
+
+            item_indices = []
+            for item in items:
+                index = indices.get(id(item))
+                if index is None:
+                    index = indices[id(item)] = len(nodes)
+                    nodes.append(item)
+                item_indices.append(index)
+
+            kinds.append(kind)
+            record.append(item_indices[0] if kind == REFERENCE else tuple(item_indices))
+
+        shape = (node.__class__.__module__,
+                 node.__class__.__name__,
+                 tuple(names),
+                 tuple(kinds))
+
+        shape_index = shape_indices.get(shape)
+        if shape_index is None:
+            shape_index = shape_indices[shape] = len(shapes)
+            shapes.append(shape)
+
+        record[0] = shape_index
+        records.append(tuple(record))
+
+    return zlib.compress(marshal.dumps((FORMAT_VERSION, tuple(shapes), tuple(records))), 1)
+
+
+def decode_program(data):
+    '''Decode a component tree encoded by encode_program.
+
+    Raises ValueError if the data is not a valid encoding.
+    '''
+    try:
+        version, shapes, records = marshal.loads(zlib.decompress(data))
+    except (zlib.error, EOFError, TypeError, ValueError) as e:
+        raise ValueError('Invalid program encoding: {0}'.format(e))
+
+    if version != FORMAT_VERSION:
+        raise ValueError('Unsupported program encoding version: {0}'.format(version))
+
+    # For every shape, the class to create, the attribute names and the
+    # positions of the references in the record (which starts with the shape
+    # index).
+    layouts = []
+    for module_name, class_name, names, kinds in shapes:
+        try:
+            node_class = getattr(COMPONENT_MODULES[module_name], class_name)
+        except (KeyError, AttributeError):
+            raise ValueError('Unknown component class: {0}.{1}'.format(module_name, class_name))
+
+        layouts.append((node_class,
+                        names,
+                        [index + 1 for index, kind in enumerate(kinds) if kind == REFERENCE],
+                        [index + 1 for index, kind in enumerate(kinds) if kind == REFERENCE_LIST]))
+
+    try:
+        with garbage_collection_paused():
+            # Create every node before filling them in, since nodes refer to
+            # nodes anywhere in the table (including themselves).
+            new = object.__new__
+            nodes = [new(layouts[record[0]][0]) for record in records]
+
+            for node, record in izip(nodes, records):
+                _, names, references, reference_lists = layouts[record[0]]
+
+                values = list(record)
+                for index in references:
+                    values[index] = nodes[values[index]]
+                for index in reference_lists:
+                    values[index] = [nodes[item] for item in values[index]]
+
+                # Components keep their attributes in slots, so they have
+                # to be set one by one.
+                for name, value in izip(names, values[1:]):
+                    setattr(node, name, value)
+
+    except (IndexError, TypeError) as e:
+        raise ValueError('Invalid program encoding: {0}'.format(e))
+
+    return nodes[0]
+
+
+class ProgramCache(object):
+    '''A content-addressed, size-capped, on-disk cache of parsed programs.'''
+
+    def __init__(self, directory, max_size = DEFAULT_MAX_SIZE, parser_class = LingoParser):
+        '''Create a cache stored in the given directory.
+
+        The directory is created if it doesn't exist. When the total size of
+        the entries exceeds max_size bytes, the least recently used entries
+        are removed.
+        '''
+        self.directory = directory
+        self.max_size = max_size
+        self.signature = grammar_signature(parser_class)
+
+        # The size of the entries, as of the last scan plus what this cache
+        # has stored since (other processes may have stored more).
+        self._size = None
+
+        try:
+            os.makedirs(directory)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+
+    def get_key(self, source_text):
+        '''Get the cache key of the given source text.'''
+        key = hashlib.sha1(self.signature)
+        key.update(source_text.replace('\r\n', '\n'))
+        return key.hexdigest()
+
+    def get_path(self, key):
+        return os.path.join(self.directory, key + ENTRY_SUFFIX)
+
+    def get(self, source_text):
+        '''Get the cached Program for the given source text, or None.'''
+        path = self.get_path(self.get_key(source_text))
+
+        try:
+            with open(path, 'rb') as entry_file:
+                data = entry_file.read()
+
+            program = decode_program(data)
+
+        except (IOError, OSError):
+            return None
+
+        except ValueError as e:
+            logger.warning('Discarding unreadable cache entry {0}: {1}'.format(path, e))
+            self._remove(path)
+            return None
+
+        # Mark the entry as recently used
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+        return program
+
+    def put(self, source_text, program):
+        '''Store the Program parsed from the given source text.'''
+        path = self.get_path(self.get_key(source_text))
+
+        try:
+            data = encode_program(program)
+        except ValueError as e:
+            # The program holds something that can't be encoded (like a
+            # component class defined outside of the lingo package).
+            logger.warning('Unable to encode the program for {0}: {1}'.format(path, e))
+            return
+
+        # Write the entry to a temporary file and rename it into place, so
+        # that other processes never see a partially written entry.
+        try:
+            handle, temporary_path = tempfile.mkstemp(dir = self.directory, suffix = '.tmp')
+        except OSError as e:
+            logger.warning('Unable to store cache entry {0}: {1}'.format(path, e))
+            return
+
+        try:
+            with os.fdopen(handle, 'wb') as entry_file:
+                entry_file.write(data)
+            os.rename(temporary_path, path)
+        except (IOError, OSError) as e:
+            # Windows won't rename over an existing file, in which case whoever
+            # got there first stored the same program.
+            if not os.path.exists(path):
+                logger.warning('Unable to store cache entry {0}: {1}'.format(path, e))
+            self._remove(temporary_path)
+            return
+
+        if self._size is None:
+            self._size = sum(stat.st_size for _, stat in self._entries())
+        else:
+            self._size += len(data)
+
+        if self._size > self.max_size:
+            self._evict()
+
+    def parse(self, source_text, parser = None):
+        '''Get the Program for the given source text, parsing it on a miss.'''
+        parser = parser or LingoParser()
+        assert parser.start == 'program', 'Only whole programs are cached, not {0}.'.format(parser.start)
+        assert parser.track_positions, 'Only programs with complete positions are cached.'
+
+        program = self.get(source_text)
+        if program is None:
+            program = parser.parse(source_text)
+            self.put(source_text, program)
+
+        return program
+
+    def clear(self):
+        '''Remove every entry from the cache.'''
+        for path, _ in self._entries():
+            self._remove(path)
+
+        self._size = 0
+
+    def _entries(self):
+        '''Get the (path, stat) of every entry, least recently used first.'''
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(ENTRY_SUFFIX):
+                continue
+
+            path = os.path.join(self.directory, name)
+            try:
+                entries.append((path, os.stat(path)))
+            except OSError:
+                # Removed by another process
+                pass
+
+        entries.sort(key = lambda entry: entry[1].st_mtime)
+        return entries
+
+    def _evict(self):
+        '''Remove the least recently used entries until the cache fits.
+
+        Entries are removed until the cache is down to three quarters of its
+        cap, so the directory isn't scanned again on the next few stores.
+        '''
+        entries = self._entries()
+        size = sum(stat.st_size for _, stat in entries)
+        target_size = self.max_size * 3 // 4
+
+        for path, stat in entries:
+            if size <= target_size:
+                break
+
+            self._remove(path)
+            size -= stat.st_size
+
+        self._size = size
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -4,24 +4,117 @@ Provide the components of the PySleuth language "Lingo".
 
 These components are produced in the parser module and consumed by
 the various analyses implemented against PySleuth. 
+
+Programs may have millions of components, so the components keep their
+attributes in __slots__ instead of a per-instance __dict__, and keep their
+line span and lex span packed into a single int each (the start in the high
+bits, the end in the low SPAN_BITS bits). The line_span and lex_span
+properties unpack them.
 '''
+
+# The number of bits of the end of a packed span
+SPAN_BITS = 32
+SPAN_MASK = (1 << SPAN_BITS) - 1
+
+def pack_span(span):
+    '''Pack a (start, end) span into a single int.'''
+    start, end = span
+    assert 0 <= start and 0 <= end <= SPAN_MASK, span
+    return (start << SPAN_BITS) | end
+
+def unpack_span(packed_span):
+    '''Unpack a span packed by pack_span.'''
+    return (packed_span >> SPAN_BITS, packed_span & SPAN_MASK)
+
+_attribute_names = {}
+
+def get_attribute_names(component_class):
+    '''Get the names of the slots of a component class (and its bases).'''
+    names = _attribute_names.get(component_class)
+    if names is None:
+        names = []
+        for base in reversed(component_class.__mro__):
+            for name in base.__dict__.get('__slots__', ()):
+                if name not in names and name not in ('__dict__', '__weakref__'):
+                    names.append(name)
+
+        names = _attribute_names[component_class] = tuple(names)
+
+    return names
+
+def get_attributes(component):
+    '''Get a dict of the attributes of a component, as vars would.
+
+    Spans are given in their packed form, under the names of their slots.
+    '''
+    attributes = {}
+    for name in get_attribute_names(component.__class__):
+        try:
+            attributes[name] = getattr(component, name)
+        except AttributeError:
+            # Not set
+            pass
+
+    # Subclasses defined elsewhere may not have slots
+    attributes.update(getattr(component, '__dict__', ()))
+    return attributes
+
+# Attributes that lead back up the tree (or back along a sequence), or that
+# never hold components
+NON_CHILD_NAMES = frozenset(['_previous_command', '_parent_command', '_last_command', 'parent', 'type',
+                             '_line_span', '_lex_span', 'id', 'symbols'])
+
+_child_names = {}
+
+def get_child_names(component):
+    '''Get the names of the attributes of a component that lead down the tree (or forward along a sequence).
+
+    The attributes hold a component, a list of components, or None.
+    '''
+    component_class = component.__class__
+    names = _child_names.get(component_class)
+    if names is None:
+        names = tuple(sorted(name for name, value in get_attributes(component).iteritems()
+                             if name not in NON_CHILD_NAMES and
+                                (value is None or isinstance(value, (LingoComponent, list)))))
+        _child_names[component_class] = names
+
+    return names
+
 class Visitable(object):
+    __slots__ = ()
     def accept(self, visitor):
         print "AST Nodes must implement accept"
         assert(False)
 class LingoComponent(Visitable):
+    __slots__ = ('_line_span', '_lex_span', 'type')
     def __init__(self, line_span, lex_span):
         # Assert that we get a valid line span and lex_span, since subclasses will 
         # default line_span to None to maintain a nice keyword-assignment interface.
         assert line_span is not None
         assert lex_span is not None
-        self.line_span = line_span
-        self.lex_span = lex_span
+        # Pack the spans inline (see pack_span), since every component does it
+        start, end = line_span
+        self._line_span = (start << SPAN_BITS) | end
+        start, end = lex_span
+        self._lex_span = (start << SPAN_BITS) | end
         self.type = None
         super(LingoComponent, self).__init__()
     @property
+    def line_span(self):
+        return (self._line_span >> SPAN_BITS, self._line_span & SPAN_MASK)
+    @line_span.setter
+    def line_span(self, line_span):
+        self._line_span = pack_span(line_span)
+    @property
+    def lex_span(self):
+        return (self._lex_span >> SPAN_BITS, self._lex_span & SPAN_MASK)
+    @lex_span.setter
+    def lex_span(self, lex_span):
+        self._lex_span = pack_span(lex_span)
+    @property
     def line_number(self):
-        return self.line_span[0]
+        return self._line_span >> SPAN_BITS
     def accept(self, visitor):
         visitor.visit_lingo_component(self)
 #
@@ -29,6 +122,7 @@ class LingoComponent(Visitable):
 #
 
 class Program(LingoComponent):
+    __slots__ = ('functions', 'command', 'symbols')
     def __init__(self, function_declarations, command, line_span = None, lex_span = None):
         assert isinstance(function_declarations, list), function_declarations
         assert all([isinstance(i, FunctionDeclaration) for i in function_declarations]), function_declarations
@@ -37,6 +131,9 @@ class Program(LingoComponent):
         self.functions = function_declarations
         self.command = command
 
+        # The SymbolTable of the program, made by the parser
+        self.symbols = None
+
         super(Program, self).__init__(line_span = line_span, lex_span = lex_span)
     def accept(self, visitor):
         visitor.visit_program(self)
@@ -45,10 +142,12 @@ class Program(LingoComponent):
 #
 
 class Command(LingoComponent):
+    __slots__ = ('_previous_command', '_next_command', '_parent_command', '_last_command')
     def __init__(self, line_span = None, lex_span = None):
         self._previous_command = None
         self._next_command = None
         self._parent_command = None
+        self._last_command = None
 
         super(Command, self).__init__(line_span = line_span, lex_span = lex_span)
 
@@ -64,19 +163,36 @@ class Command(LingoComponent):
         Since we can't make any guarantees about the parse tree that will be 
         generated, we have to treat the next_command as coming after this particular
         sequence of commands. So, if this command already has a next command, 
-        call set_next_command on our next command.
+        the next command is attached to the last command of the sequence.
         '''
         assert next_command is not None
 
-        if self._next_command is not None:
-            self._next_command.set_next_command(next_command)
-            return
-
-        assert self._next_command is None, '"{0}" is already followed by "{1}"; cannot change to "{2}"'.format(self, self._next_command, next_command)
-        self._next_command = next_command
+        last_command = self.get_last_command()
+        assert last_command._next_command is None, '"{0}" is already followed by "{1}"; cannot change to "{2}"'.format(last_command, last_command._next_command, next_command)
+        last_command._next_command = next_command
 
         # Apply the reflection as well
-        next_command.set_previous_command(self)
+        next_command.set_previous_command(last_command)
+
+        self._last_command = next_command.get_last_command()
+
+    def get_last_command(self):
+        '''Get the last command of the sequence continuing from this command.
+        
+        The last command found is remembered, so repeatedly appending to the
+        same sequence (as the parser does) only walks the commands appended
+        since the previous call instead of the whole sequence. A command
+        removed from the sequence since (see the incremental module) has no
+        previous command, so the whole sequence is walked again.
+        '''
+        last_command = self._last_command
+        if last_command is None or (last_command._previous_command is None and last_command is not self):
+            last_command = self
+        while last_command._next_command is not None:
+            last_command = last_command._next_command
+
+        self._last_command = last_command
+        return last_command
 
     def get_previous_command(self):
         return self._previous_command
@@ -95,11 +211,12 @@ class Command(LingoComponent):
         If no parent command is found, this is a top level command, 
         and None is returned.
         '''
-        if self._parent_command:
-            return self._parent_command
+        command = self
+        while command is not None:
+            if command._parent_command:
+                return command._parent_command
 
-        if self.get_previous_command():
-            return self.get_previous_command().parent_command
+            command = command.get_previous_command()
 
         return None
 
@@ -127,6 +244,7 @@ class Command(LingoComponent):
 
 
 class AssignmentCommand(Command):
+    __slots__ = ('assigned_variable', 'expression')
     def __init__(self,
                  assigned_variable,
                  expression,
@@ -139,35 +257,24 @@ class AssignmentCommand(Command):
 
         super(AssignmentCommand, self).__init__(line_span = line_span, lex_span = lex_span)
 
-    def get_next_command(self):
-        '''Get the command following this command.
-        
-        This is something of a kludge to separate function calls into 
-        CALL and RET nodes (which may make some analyses simpler).
-        
-        If this command's expression is a CALL, we clone this command
-        with the matching RET and adjust the next command pointers
-        appropriately and return the RET as the next command.
-        '''
-        if (isinstance(self.expression, FunctionCall) and
-            not isinstance(self._next_command, FunctionReturn)):
-
-            function_return_command = AssignmentCommand(self.assigned_variable,
-                                                        self.expression.get_return_expression(),
-                                                        line_span = self.line_span,
-                                                        lex_span = self.lex_span)
-
+        # Function calls are separated into CALL and RET commands (which may
+        # make some analyses simpler). The RET command assigns the same
+        # variable, and follows this command in its sequence.
+        if isinstance(expression, FunctionCall):
+            function_return_command = AssignmentCommand(assigned_variable,
+                                                        expression.get_return_expression(),
+                                                        line_span = line_span,
+                                                        lex_span = lex_span)
 
-            function_return_command._next_command = self._next_command
             self._next_command = function_return_command
-
-        return super(AssignmentCommand, self).get_next_command()
+            function_return_command._previous_command = self
 
     def __repr__(self):
         return '{0} := {1}'.format(self.assigned_variable, self.expression)
     def accept(self, visitor):
         visitor.visit_assignment_command(self)
 class ConditionalCommand(Command):
+    __slots__ = ('expression',)
     def __init__(self, expression, line_span = None, lex_span = None):
         assert isinstance(expression, Expression), expression
         self.expression = expression
@@ -179,6 +286,7 @@ class ConditionalCommand(Command):
     def accept(self, visitor):
         visitor.visit_conditional_command(self)
 class IfCommand(ConditionalCommand):
+    __slots__ = ('true_block', 'false_block')
     def __init__(self,
                  expression,
                  true_block,
@@ -203,6 +311,7 @@ class IfCommand(ConditionalCommand):
         visitor.visit_if_command(self)
 
 class WhileCommand(ConditionalCommand):
+    __slots__ = ('loop_block',)
     def __init__(self,
                  expression,
                  loop_block,
@@ -222,11 +331,13 @@ class WhileCommand(ConditionalCommand):
         visitor.visit_while_command(self)
 
 class SkipCommand(Command):
+    __slots__ = ()
     def __repr__(self):
         return 'skip'
     def accept(self, visitor):
         visitor.visit_skip_command(self)
 class FunctionDeclaration(Command):
+    __slots__ = ('name', 'definition')
     def __init__(self, name, definition, line_span = None, lex_span = None):
         assert isinstance(name, str), name
         assert isinstance(definition, FunctionDefinition), definition
@@ -246,6 +357,7 @@ class FunctionDeclaration(Command):
         visitor.visit_function_declaration(self)
 
 class InputCommand(Command):
+    __slots__ = ('variable',)
     def __init__(self, variable, line_span = None, lex_span = None):
         assert isinstance(variable, Variable), variable
         self.variable = variable
@@ -258,6 +370,7 @@ class InputCommand(Command):
         visitor.visit_input_command(self)
 
 class ReturnCommand(Command):
+    __slots__ = ('variable',)
     def __init__(self, variable, line_span = None, lex_span = None):
         assert isinstance(variable, Variable), variable
         self.variable = variable
@@ -273,9 +386,10 @@ class ReturnCommand(Command):
 #
 
 class Expression(LingoComponent):
-    pass
+    __slots__ = ()
 
 class New(Expression):
+    __slots__ = ('allocate_type',)
     def __init__(self,
                  allocate_type,
                  line_span = None, lex_span = None):
@@ -287,6 +401,7 @@ class New(Expression):
     def accept(self, visitor):
         visitor.visit_new(self)
 class BinaryExpression(Expression):
+    __slots__ = ('left_term', 'operator', 'right_term')
     def __init__(self,
                  left_term,
                  operator,
@@ -306,6 +421,7 @@ class BinaryExpression(Expression):
     def accept(self, visitor):
         visitor.visit_binary_expression(self)
 class FunctionCall(Expression):
+    __slots__ = ('function_variable', 'parameter_variables')
     def __init__(self, function_variable, parameter_variables, line_span = None, lex_span = None):
         assert isinstance(function_variable, Variable), function_variable
         for parameter_variable in parameter_variables:
@@ -327,6 +443,7 @@ class FunctionCall(Expression):
     def accept(self, visitor):
         visitor.visit_function_call(self)
 class FunctionReturn(Expression):
+    __slots__ = ('function_variable', 'parameter_variables')
     def __init__(self, function_variable, parameter_variables, line_span = None, lex_span = None):
         assert isinstance(function_variable, Variable), function_variable
         for parameter_variable in parameter_variables:
@@ -342,6 +459,7 @@ class FunctionReturn(Expression):
     def accept(self, visitor):
         visitor.visit_function_return(self)
 class FunctionDefinition(Expression):
+    __slots__ = ('parameters', 'body')
     def __init__(self, parameters, body, line_span = None, lex_span = None):
         for parameter in parameters:
             assert isinstance(parameter, Variable), parameter
@@ -361,12 +479,20 @@ class FunctionDefinition(Expression):
 #
 
 class Atom(Expression):
-    pass
-
+    __slots__ = ()
+
+# The parser resolves every Variable of a program to the id of its symbol (see
+# the symbols module). Resolved Variables are equal if they have the same id,
+# and hash by it alone, so renaming them (as typecheck does) keeps them in the
+# sets and dicts they're in. Variables made without an id are equal to any
+# Variable with the same name, and hash by the name, so keep them out of the
+# sets and dicts holding resolved Variables.
 class Variable(Atom):
+    __slots__ = ('name', 'id', 'rank', 'parent')
     def __init__(self, name, line_span = None, lex_span = None):
         assert isinstance(name, str), name
         self.name = name
+        self.id = None
         self.rank = 0
         self.parent = self
         super(Variable, self).__init__(line_span = line_span, lex_span = lex_span)
@@ -375,21 +501,32 @@ class Variable(Atom):
         return '{0}'.format(self.name)
     def __eq__(self, other):
         if isinstance(other, Variable):
+            if self.id is not None and other.id is not None:
+                return self.id == other.id
             return self.name == other.name
         return False
+    def __ne__(self, other):
+        return not self == other
+    def __hash__(self):
+        if self.id is not None:
+            return self.id
+        return hash(self.name)
     def accept(self, visitor):
         visitor.visit_variable(self)
 class ReferencedVariable(Variable):
+    __slots__ = ()
     def __repr__(self):
         return 'ref {0}'.format(super(ReferencedVariable, self).__repr__())
     def accept(self, visitor):
         visitor.visit_referenced_variable(self)
 class DereferencedVariable(Variable):
+    __slots__ = ()
     def __repr__(self):
         return '!{0}'.format(super(DereferencedVariable, self).__repr__())
     def accept(self, visitor):
         visitor.visit_dereferenced_variable(self)
 class Number(Atom):
+    __slots__ = ('value', 'rank', 'parent')
     def __init__(self, value, line_span = None, lex_span = None):
         assert isinstance(value, int), value
         self.value = value
@@ -403,6 +540,7 @@ class Number(Atom):
     def accept(self, visitor):
         visitor.visit_number(self)
 class Boolean(Atom):
+    __slots__ = ('value', 'rank', 'parent')
     def __init__(self, value, line_span = None, lex_span = None):
         assert isinstance(value, bool), value
         self.value = value
@@ -418,6 +556,7 @@ class Boolean(Atom):
 #
 
 class Operator(LingoComponent):
+    __slots__ = ('token',)
     def __init__(self, token, line_span = None, lex_span = None):
         assert isinstance(token, str), token
         self.token = token
@@ -427,18 +566,18 @@ class Operator(LingoComponent):
         return '{0}'.format(self.token)
 
 
-class ArithmeticOperator(Operator): pass
-class OperatorPlus(ArithmeticOperator): pass
-class OperatorMinus(ArithmeticOperator): pass
-class OperatorTimes(ArithmeticOperator): pass
-class OperatorDivide(ArithmeticOperator): pass
+class ArithmeticOperator(Operator): __slots__ = ()
+class OperatorPlus(ArithmeticOperator): __slots__ = ()
+class OperatorMinus(ArithmeticOperator): __slots__ = ()
+class OperatorTimes(ArithmeticOperator): __slots__ = ()
+class OperatorDivide(ArithmeticOperator): __slots__ = ()
 
-class ComparisonOperator(Operator): pass
-class OperatorLessThan(ComparisonOperator): pass
-class OperatorEqualTo(ComparisonOperator): pass
-class OperatorNotEqualTo(ComparisonOperator): pass
-class OperatorLessThanOrEqualTo(ComparisonOperator): pass
+class ComparisonOperator(Operator): __slots__ = ()
+class OperatorLessThan(ComparisonOperator): __slots__ = ()
+class OperatorEqualTo(ComparisonOperator): __slots__ = ()
+class OperatorNotEqualTo(ComparisonOperator): __slots__ = ()
+class OperatorLessThanOrEqualTo(ComparisonOperator): __slots__ = ()
 
-class BooleanOperator(Operator): pass
-class OperatorAnd(BooleanOperator): pass
-class OperatorOr(BooleanOperator): pass
+class BooleanOperator(Operator): __slots__ = ()
+class OperatorAnd(BooleanOperator): __slots__ = ()
+class OperatorOr(BooleanOperator): __slots__ = ()
@@ -0,0 +1,574 @@
+'''
+Provide a hand-written predictive parser for the PySleuth language "Lingo".
+
+The DescentParser is an alternative to the PLY (LALR) parser that LingoParser
+builds from its p_* productions. It reads the same tokens and builds the same
+LingoComponents, with the same line_span and lex_span values, but it needs no
+parse tables and decides every step from the next token alone.
+
+Nested constructs are handled with explicit stacks instead of recursion:
+command blocks (the bodies of if and while commands) are frames on a block
+stack, and parenthesized expressions are frames on an expression stack. This
+keeps the parser's memory on the heap, so it handles arbitrarily long and
+deeply nested programs without raising the recursion limit.
+
+Line spans and lex spans follow the PLY position tracking exactly: every
+parsed value carries a position record of (line number, lex position, end
+line number, end lex position), where the start is taken from the first
+token of the value and the end from the *start* of its last token. The
+components are given the same spans that LingoParser.lex_span computes from
+these records.
+'''
+
+from sleuth.lingo.components import * #@UnusedWildImport
+from sleuth.lingo.symbols import resolve_symbols
+from sleuth.lingo.types import *
+
+
+OPERATORS = {
+    'OP_PLUS' : OperatorPlus,
+    'OP_MINUS' : OperatorMinus,
+    'OP_TIMES' : OperatorTimes,
+    'OP_DIVIDE' : OperatorDivide,
+    'OP_CMP_LT' : OperatorLessThan,
+    'OP_CMP_EQ' : OperatorEqualTo,
+    'OP_CMP_NE' : OperatorNotEqualTo,
+    'OP_CMP_LTE' : OperatorLessThanOrEqualTo,
+    'OP_BOOL_AND' : OperatorAnd,
+    'OP_BOOL_OR' : OperatorOr,
+}
+
+PRIMITIVE_TYPES = {
+    'KEYWORD_INT' : 'INTEGER',
+    'KEYWORD_BOOLEAN' : 'BOOLEAN',
+}
+
+# How a sequence of commands ends
+END_OF_INPUT = 'end of input'
+END_OF_BLOCK = 'end of block'
+END_OF_FUNCTION = 'end of function'
+
+# What a block of commands belongs to
+IF_TRUE_BLOCK = 'if true block'
+IF_FALSE_BLOCK = 'if false block'
+WHILE_BLOCK = 'while block'
+
+
+class _Sequence(object):
+    '''A sequence of commands that is being parsed.
+
+    The owner is None for the outermost sequence, and a tuple describing the
+    command that the block belongs to otherwise.
+    '''
+
+    def __init__(self, end, owner = None):
+        self.end = end
+        self.owner = owner
+        self.first_command = None
+        self.position = None
+
+    def append(self, command, position):
+        if self.first_command is None:
+            self.first_command = command
+            self.position = position
+        else:
+            self.first_command.set_next_command(command)
+            self.position = self.position[:2] + position[2:]
+
+
+class DescentParser(object):
+    '''Parse Lingo source text without parse tables or recursion.
+
+    The lingo_parser provides the tokenizer, the start symbol and the syntax
+    error reporting (LingoParser.p_error), so errors are reported exactly as
+    by the PLY parser.
+
+    If positions is a dict, the position record of every command and function
+    declaration is stored in it, keyed by the id of the component.
+    '''
+
+    def __init__(self, lingo_parser, lexer, positions = None):
+        self.lingo_parser = lingo_parser
+        self.lexer = lexer
+        self.positions = positions
+        self.token = None
+
+        self._start_rules = {
+            'program' : self.parse_program,
+            'function_declaration' : self.parse_function_declaration,
+            'function_definition' : self.parse_function_definition,
+            'command' : self.parse_command_sequence,
+            'assignment_rhs' : self.parse_assignment_rhs,
+            'expression' : self.parse_expression,
+            'variable' : self.parse_variable,
+            'referenced_variable' : self.parse_referenced_variable,
+            'dereferenced_variable' : self.parse_dereferenced_variable,
+            'bool' : self.parse_bool,
+            'number' : self.parse_number,
+            'operator' : self.parse_operator,
+        }
+
+    def parse(self, source_text):
+        start_rule = self._start_rules.get(self.lingo_parser.start)
+        if start_rule is None:
+            raise ValueError('Unsupported start symbol: {0}'.format(self.lingo_parser.start))
+
+        self.lexer.input(source_text)
+        self.advance()
+
+        # An empty production takes its position from the state of the lexer
+        # after reading the next token.
+        self.empty_position = (self.lexer.lineno, self.lexer.lexpos) * 2
+
+        value, _ = start_rule()
+        if self.token is not None:
+            self.error()
+
+        return value
+
+    #
+    # Tokens
+    #
+
+    def advance(self):
+        '''Consume the current token and read the next one.'''
+        token = self.token
+        self.token = self.lexer.token()
+        return token
+
+    def expect(self, token_type):
+        '''Consume the current token, which must be of the given type.'''
+        token = self.token
+        if token is None or token.type != token_type:
+            self.error()
+
+        self.token = self.lexer.token()
+        return token
+
+    def append(self, sequence, command, position):
+        '''Append a command to a sequence, recording its position if requested.'''
+        sequence.append(command, position)
+
+        if self.positions is not None:
+            self.positions[id(command)] = position
+
+    def error(self):
+        '''Report a syntax error at the current token.'''
+        token = self.token
+        if token is not None and not hasattr(token, 'lexer'):
+            token.lexer = self.lexer
+
+        self.lingo_parser.p_error(token)
+
+        # p_error always raises, but make sure we never continue parsing.
+        raise AssertionError('p_error did not raise for {0}'.format(token))
+
+    #
+    # Program and functions
+    #
+
+    def parse_program(self):
+        functions = []
+        position = self.empty_position
+
+        while self.token is not None and self.token.type == 'KEYWORD_DEF':
+            function, function_position = self.parse_function_declaration()
+            if not functions:
+                position = function_position
+            functions.append(function)
+
+        command, command_position = self.parse_command_sequence()
+
+        program = Program(functions, command,
+                          line_span = (position[0], command_position[2]),
+                          lex_span = (position[1], command.lex_span[1]))
+        resolve_symbols(program)
+        return program, position[:2] + command_position[2:]
+
+    def parse_function_declaration(self):
+        def_token = self.expect('KEYWORD_DEF')
+        name = self.expect('IDENTIFIER').value
+        self.expect('OP_CMP_EQ')
+        definition, definition_position = self.parse_function_definition()
+
+        declaration = FunctionDeclaration(name, definition,
+                                          line_span = (def_token.lineno, definition_position[2]),
+                                          lex_span = (def_token.lexpos, definition.lex_span[1]))
+        position = (def_token.lineno, def_token.lexpos) + definition_position[2:]
+
+        if self.positions is not None:
+            self.positions[id(declaration)] = position
+
+        return declaration, position
+
+    def parse_function_definition(self):
+        fun_token = self.expect('KEYWORD_FUN')
+        self.expect('LPAREN')
+        parameters = self.parse_variable_list()
+        self.expect('RPAREN')
+        self.expect('LBRACE')
+        body = self.parse_commands(_Sequence(END_OF_FUNCTION))
+        rbrace_token = self.expect('RBRACE')
+
+        definition = FunctionDefinition(parameters, body,
+                                        line_span = (fun_token.lineno, rbrace_token.lineno),
+                                        lex_span = (fun_token.lexpos, fun_token.lexpos + len(rbrace_token.value)))
+        return definition, (fun_token.lineno, fun_token.lexpos, rbrace_token.lineno, rbrace_token.lexpos)
+
+    def parse_variable_list(self):
+        variables = []
+
+        # The list may start with a comma, since the grammar allows the
+        # first element to be the empty list: "f(, a)" is "f(a)".
+        if self.token is not None and self.token.type == 'IDENTIFIER':
+            variables.append(self.parse_variable()[0])
+
+        while self.token is not None and self.token.type == 'COMMA':
+            self.advance()
+            variables.append(self.parse_variable()[0])
+
+        return variables
+
+    #
+    # Commands
+    #
+
+    def parse_command_sequence(self):
+        sequence = _Sequence(END_OF_INPUT)
+        self.parse_commands(sequence)
+        return sequence.first_command, sequence.position
+
+    def parse_commands(self, sequence):
+        '''Parse the commands of the given sequence, and of all blocks nested in it.
+
+        Returns the first command of the sequence. Blocks are pushed on a stack
+        when their opening brace is read, and turned into their if or while
+        command when their closing brace is read.
+        '''
+        blocks = [sequence]
+
+        while True:
+            token = self.token
+            if token is None:
+                self.error()
+            token_type = token.type
+
+            if token_type == 'KEYWORD_IF' or token_type == 'KEYWORD_WHILE':
+                self.advance()
+                self.expect('LPAREN')
+                expression, _ = self.parse_expression()
+                self.expect('RPAREN')
+
+                if token_type == 'KEYWORD_IF':
+                    self.expect('KEYWORD_THEN')
+                    owner = (IF_TRUE_BLOCK, token, expression)
+                else:
+                    self.expect('KEYWORD_DO')
+                    owner = (WHILE_BLOCK, token, expression)
+
+                self.expect('LBRACE')
+                sequence = _Sequence(END_OF_BLOCK, owner)
+                blocks.append(sequence)
+                continue
+
+            if (token_type == 'KEYWORD_RETURN' and
+                sequence.end == END_OF_FUNCTION and sequence.first_command is None):
+                command, position = self.parse_return()
+                self.append(sequence, command, position)
+                return sequence.first_command
+
+            command, position = self.parse_simple_command()
+
+            # Append the command to its sequence, and close all the blocks
+            # that end after it.
+            while True:
+                self.append(sequence, command, position)
+
+                token = self.token
+                if token is not None and token.type == 'SEMI':
+                    self.advance()
+
+                    if (sequence.end == END_OF_FUNCTION and
+                        self.token is not None and self.token.type == 'KEYWORD_RETURN'):
+                        command, position = self.parse_return()
+                        self.append(sequence, command, position)
+                        return sequence.first_command
+
+                    break
+
+                if sequence.end == END_OF_INPUT:
+                    return sequence.first_command
+
+                if sequence.end == END_OF_FUNCTION:
+                    self.error()
+
+                rbrace_token = self.expect('RBRACE')
+                blocks.pop()
+                owner = sequence.owner
+                kind, keyword_token, expression = owner[:3]
+
+                if kind == IF_TRUE_BLOCK:
+                    self.expect('KEYWORD_ELSE')
+                    self.expect('LBRACE')
+                    sequence = _Sequence(END_OF_BLOCK, (IF_FALSE_BLOCK, keyword_token, expression, sequence.first_command))
+                    blocks.append(sequence)
+                    break
+
+                line_span = (keyword_token.lineno, rbrace_token.lineno)
+                if kind == IF_FALSE_BLOCK:
+                    command = IfCommand(expression, owner[3], sequence.first_command,
+                                        line_span = line_span,
+                                        lex_span = expression.lex_span)
+                else:
+                    command = WhileCommand(expression, sequence.first_command,
+                                           line_span = line_span,
+                                           lex_span = expression.lex_span)
+
+                position = (keyword_token.lineno, keyword_token.lexpos, rbrace_token.lineno, rbrace_token.lexpos)
+                sequence = blocks[-1]
+
+    def parse_simple_command(self):
+        '''Parse a command that doesn't contain a block.'''
+        token = self.token
+        token_type = token.type
+
+        if token_type == 'IDENTIFIER' or token_type == 'OP_DEREF':
+            return self.parse_assignment()
+
+        if token_type == 'KEYWORD_SKIP':
+            self.advance()
+            command = SkipCommand(line_span = (token.lineno, token.lineno),
+                                  lex_span = (token.lexpos, token.lexpos + len(token.value)))
+            return command, (token.lineno, token.lexpos) * 2
+
+        if token_type == 'KEYWORD_INPUT':
+            self.advance()
+            variable, variable_position = self.parse_variable()
+            command = InputCommand(variable,
+                                   line_span = (token.lineno, variable_position[2]),
+                                   lex_span = (token.lexpos, variable.lex_span[1]))
+            return command, (token.lineno, token.lexpos) + variable_position[2:]
+
+        self.error()
+
+    def parse_return(self):
+        token = self.expect('KEYWORD_RETURN')
+        variable, variable_position = self.parse_variable()
+        command = ReturnCommand(variable,
+                                line_span = (token.lineno, variable_position[2]),
+                                lex_span = (token.lexpos, variable.lex_span[1]))
+        return command, (token.lineno, token.lexpos) + variable_position[2:]
+
+    def parse_assignment(self):
+        if self.token.type == 'OP_DEREF':
+            variable, position = self.parse_dereferenced_variable()
+        else:
+            variable, position = self.parse_variable()
+
+        self.expect('OP_ASSIGNMENT')
+        expression, expression_position = self.parse_assignment_rhs()
+
+        command = AssignmentCommand(variable, expression,
+                                    line_span = (position[0], expression_position[2]),
+                                    lex_span = (position[1], expression.lex_span[1]))
+        return command, position[:2] + expression_position[2:]
+
+    def parse_assignment_rhs(self):
+        token = self.token
+        token_type = token.type if token is not None else None
+
+        if token_type == 'KEYWORD_NEW':
+            self.advance()
+            allocate_type, type_position = self.parse_type()
+            expression = New(allocate_type,
+                             line_span = (token.lineno, type_position[2]),
+                             lex_span = (token.lexpos, token.lexpos + len(str(allocate_type))))
+            return expression, (token.lineno, token.lexpos) + type_position[2:]
+
+        if token_type == 'KEYWORD_REF':
+            return self.parse_referenced_variable()
+
+        if token_type == 'IDENTIFIER' or token_type == 'OP_DEREF':
+            if token_type == 'IDENTIFIER':
+                variable, position = self.parse_variable()
+            else:
+                variable, position = self.parse_dereferenced_variable()
+
+            if self.token is not None and self.token.type == 'LPAREN':
+                return self.parse_function_application(variable, position)
+
+            return self.parse_expression((variable, position))
+
+        return self.parse_expression()
+
+    def parse_function_application(self, function_variable, position):
+        lparen_token = self.expect('LPAREN')
+        parameters = self.parse_variable_list()
+        rparen_token = self.expect('RPAREN')
+
+        # The lex span ends one character after the start, since the last
+        # symbol of the production is the closing parenthesis.
+        expression = FunctionCall(function_variable, parameters,
+                                  line_span = (position[0], rparen_token.lineno),
+                                  lex_span = (position[1], position[1] + len(rparen_token.value)))
+        return expression, position[:2] + (rparen_token.lineno, rparen_token.lexpos)
+
+    def parse_type(self):
+        ref_tokens = []
+        while self.token is not None and self.token.type == 'KEYWORD_REF':
+            ref_tokens.append(self.advance())
+
+        token = self.token
+        if token is None or token.type not in PRIMITIVE_TYPES:
+            self.error()
+        self.advance()
+
+        allocate_type = Primitive(PRIMITIVE_TYPES[token.type])
+        for ref_token in reversed(ref_tokens):
+            allocate_type = Reference(allocate_type, ref_token.lineno)
+
+        start_token = ref_tokens[0] if ref_tokens else token
+        return allocate_type, (start_token.lineno, start_token.lexpos, token.lineno, token.lexpos)
+
+    #
+    # Expressions
+    #
+
+    def parse_expression(self, first_term = None):
+        '''Parse an expression, optionally continuing after its (already parsed) first term.
+
+        Binary expressions associate to the right, as they do in the PLY
+        parser: "a + b * c" is "a + (b * c)". The terms and operators of an
+        expression are collected in a list and combined once the expression
+        ends. Parenthesized expressions push the enclosing list on a stack.
+        '''
+        enclosing = []
+        terms = []
+        term = first_term
+
+        while True:
+            if term is None:
+                token = self.token
+                if token is not None and token.type == 'LPAREN':
+                    self.advance()
+                    enclosing.append((token, terms))
+                    terms = []
+                    continue
+
+                term = self.parse_atom()
+
+            terms.append(term)
+            term = None
+
+            token = self.token
+            if token is not None and token.type in OPERATORS:
+                terms.append(self.parse_operator())
+                continue
+
+            if not enclosing:
+                return self.combine_terms(terms, 0)
+
+            # A parenthesized expression must contain an operator
+            if len(terms) < 3:
+                self.error()
+
+            rparen_token = self.expect('RPAREN')
+            lparen_token, enclosing_terms = enclosing.pop()
+
+            right_term, _ = self.combine_terms(terms, 2)
+            expression = BinaryExpression(terms[0][0], terms[1][0], right_term,
+                                          line_span = (lparen_token.lineno, rparen_token.lineno),
+                                          lex_span = (lparen_token.lexpos, lparen_token.lexpos + len(rparen_token.value)))
+
+            term = (expression, (lparen_token.lineno, lparen_token.lexpos, rparen_token.lineno, rparen_token.lexpos))
+            terms = enclosing_terms
+
+    def combine_terms(self, terms, start):
+        '''Combine terms[start:] (alternating terms and operators) into one right-associative expression.'''
+        expression, position = terms[-1]
+
+        for index in xrange(len(terms) - 3, start - 1, -2):
+            left_term, left_position = terms[index]
+            operator = terms[index + 1][0]
+
+            expression = BinaryExpression(left_term, operator, expression,
+                                          line_span = (left_position[0], position[2]),
+                                          lex_span = (left_position[1], expression.lex_span[1]))
+            position = left_position[:2] + position[2:]
+
+        return expression, position
+
+    def parse_atom(self):
+        token = self.token
+        token_type = token.type if token is not None else None
+
+        if token_type == 'IDENTIFIER':
+            return self.parse_variable()
+        if token_type == 'OP_DEREF':
+            return self.parse_dereferenced_variable()
+        if token_type == 'NUMBER':
+            return self.parse_number()
+        if token_type == 'KEYWORD_TRUE' or token_type == 'KEYWORD_FALSE':
+            return self.parse_bool()
+
+        self.error()
+
+    #
+    # Atoms
+    #
+
+    def parse_variable(self):
+        token = self.expect('IDENTIFIER')
+        variable = Variable(token.value,
+                            line_span = (token.lineno, token.lineno),
+                            lex_span = (token.lexpos, token.lexpos + len(token.value)))
+        return variable, (token.lineno, token.lexpos) * 2
+
+    def parse_referenced_variable(self):
+        ref_token = self.expect('KEYWORD_REF')
+        token = self.expect('IDENTIFIER')
+        variable = ReferencedVariable(token.value,
+                                      line_span = (ref_token.lineno, token.lineno),
+                                      lex_span = (ref_token.lexpos, ref_token.lexpos + len(token.value)))
+        return variable, (ref_token.lineno, ref_token.lexpos, token.lineno, token.lexpos)
+
+    def parse_dereferenced_variable(self):
+        deref_token = self.expect('OP_DEREF')
+        token = self.expect('IDENTIFIER')
+        variable = DereferencedVariable(token.value,
+                                        line_span = (deref_token.lineno, token.lineno),
+                                        lex_span = (deref_token.lexpos, deref_token.lexpos + len(token.value)))
+        return variable, (deref_token.lineno, deref_token.lexpos, token.lineno, token.lexpos)
+
+    def parse_bool(self):
+        token = self.token
+        if token is None or (token.type != 'KEYWORD_TRUE' and token.type != 'KEYWORD_FALSE'):
+            self.error()
+        self.advance()
+
+        boolean = Boolean(token.value == 'true',
+                          line_span = (token.lineno, token.lineno),
+                          lex_span = (token.lexpos, token.lexpos + len(token.value)))
+        return boolean, (token.lineno, token.lexpos) * 2
+
+    def parse_number(self):
+        token = self.expect('NUMBER')
+
+        # The lex span is based on the value, not on the source text (which
+        # may have leading zeros).
+        number = Number(token.value,
+                        line_span = (token.lineno, token.lineno),
+                        lex_span = (token.lexpos, token.lexpos + len(str(token.value))))
+        return number, (token.lineno, token.lexpos) * 2
+
+    def parse_operator(self):
+        token = self.token
+        operator_class = OPERATORS.get(token.type) if token is not None else None
+        if operator_class is None:
+            self.error()
+        self.advance()
+
+        operator = operator_class(token.value,
+                                  line_span = (token.lineno, token.lineno),
+                                  lex_span = (token.lexpos, token.lexpos + len(token.value)))
+        return operator, (token.lineno, token.lexpos) * 2
@@ -0,0 +1,506 @@
+'''
+Provide a flat encoding of Lingo programs, for programs too large to keep
+as a graph of components.
+
+A FlatProgram keeps every component of a program as one row of a set of
+parallel columns: the kind of the component, the rows of its parent, its
+first child and its next sibling (or -1), its line span and lex span, and
+the id of its symbol. The columns are arrays of four-byte ints, except the
+kinds, which are bytes. Rows are numbered in pre-order, so the program is
+row 0 and every component comes before the components in it.
+
+The children of a row are its components in source order. Sequences of
+commands are kept under BLOCK rows (one per block: the top level of the
+program, the body of a function, and the blocks of if and while commands),
+whose children are the commands of the block. The [RET] halves of function
+calls aren't kept, since they are made again with their [CALL] halves.
+
+For Variables the symbol column holds the id of the symbol (the FlatProgram
+shares the SymbolTable of the program), and for function declarations the id
+of the function name. Literals, operators and the types allocated by new
+keep the index of their value (or token, or type) in the constants list
+there instead.
+
+Components are only made when they are asked for: get_component makes the
+component of a row (and everything in it) the first time it is asked for,
+and LazyProgram puts a Program-like face on a FlatProgram that makes its
+functions and commands as they are touched. build makes a component without
+keeping it, for passes (like type checking) that only need one part of the
+program at a time. The CFG of a FlatProgram is scanned from its rows (see
+cfg.FlatCommandNode), and only makes the commands of the nodes looked at.
+'''
+
+from sleuth.common.memory import garbage_collection_paused
+from sleuth.lingo.components import * #@UnusedWildImport
+from sleuth.lingo.symbols import SymbolTable, resolve_symbols
+from sleuth.lingo.types import Type, Primitive, Reference, Function
+from array import array
+from itertools import izip
+import marshal
+
+
+# The version of the encoding written by dumps
+FORMAT_VERSION = 1
+
+# The kind of the rows holding the commands of a block
+BLOCK = 0
+
+# The classes of component, by kind
+KIND_CLASSES = (None, Program, FunctionDeclaration, FunctionDefinition,
+                AssignmentCommand, IfCommand, WhileCommand, SkipCommand, InputCommand, ReturnCommand,
+                New, BinaryExpression, FunctionCall,
+                Variable, ReferencedVariable, DereferencedVariable, Number, Boolean,
+                OperatorPlus, OperatorMinus, OperatorTimes, OperatorDivide,
+                OperatorLessThan, OperatorEqualTo, OperatorNotEqualTo, OperatorLessThanOrEqualTo,
+                OperatorAnd, OperatorOr)
+
+KINDS = dict((component_class, kind) for kind, component_class in enumerate(KIND_CLASSES))
+
+CALL_KIND = KINDS[FunctionCall]
+ASSIGNMENT_KIND = KINDS[AssignmentCommand]
+FUNCTION_DECLARATION_KIND = KINDS[FunctionDeclaration]
+CONDITIONAL_KINDS = frozenset([KINDS[IfCommand], KINDS[WhileCommand]])
+
+VARIABLE_KINDS = frozenset(KINDS[component_class] for component_class in (Variable, ReferencedVariable, DereferencedVariable))
+
+# The names of the columns, in the order dumps writes them
+COLUMN_NAMES = ('kinds', 'parents', 'first_children', 'next_siblings',
+                'line_starts', 'line_ends', 'lex_starts', 'lex_ends', 'symbol_ids')
+
+
+class FlatProgram(object):
+    '''A program kept as parallel columns of ints, one row per component.'''
+
+    def __init__(self, symbols):
+        self.kinds = array('b')
+        self.parents = array('i')
+        self.first_children = array('i')
+        self.next_siblings = array('i')
+        self.line_starts = array('i')
+        self.line_ends = array('i')
+        self.lex_starts = array('i')
+        self.lex_ends = array('i')
+        self.symbol_ids = array('i')
+
+        # Literal values, operator tokens and allocated types, by index
+        self.constants = []
+        self._constant_indices = {}
+
+        self.symbols = symbols
+
+        # The components made by get_component, by row
+        self._components = {}
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __repr__(self):
+        return '<FlatProgram of {0} rows>'.format(len(self.kinds))
+
+    def get_size(self):
+        '''Get the number of bytes taken by the columns.'''
+        return sum(column.itemsize * len(column) for column in self.get_columns())
+
+    def get_columns(self):
+        return [getattr(self, name) for name in COLUMN_NAMES]
+
+    def add_constant(self, value):
+        '''Get the index of a constant, adding it if it's new.'''
+        if isinstance(value, Type):
+            # Types are changed by type checking, so every New has its own
+            self.constants.append(value)
+            return len(self.constants) - 1
+
+        key = (value.__class__, value)
+        index = self._constant_indices.get(key)
+        if index is None:
+            index = self._constant_indices[key] = len(self.constants)
+            self.constants.append(value)
+
+        return index
+
+    def get_class(self, row):
+        '''Get the class of the component of a row (None for a block).'''
+        return KIND_CLASSES[self.kinds[row]]
+
+    def get_children(self, row):
+        '''Get the rows of the children of a row, in source order.'''
+        children = []
+        child = self.first_children[row]
+        next_siblings = self.next_siblings
+        while child != -1:
+            children.append(child)
+            child = next_siblings[child]
+        return children
+
+    def get_line_span(self, row):
+        return (self.line_starts[row], self.line_ends[row])
+
+    def get_lex_span(self, row):
+        return (self.lex_starts[row], self.lex_ends[row])
+
+    def get_name(self, row):
+        '''Get the name of the variable or function declared by a row.'''
+        return self.symbols.names[self.symbol_ids[row]]
+
+    def get_value(self, row):
+        '''Get the value of a literal, the token of an operator, or the type allocated by a new.'''
+        return self.constants[self.symbol_ids[row]]
+
+    def get_function_rows(self):
+        '''Get the rows of the function declarations.'''
+        return [row for row in self.get_children(0) if self.kinds[row] != BLOCK]
+
+    def get_command_rows(self):
+        '''Get the rows of the top level commands.'''
+        return self.get_children(self.get_block_row())
+
+    def get_block_row(self):
+        '''Get the row of the block of top level commands.'''
+        return self.get_children(0)[-1]
+
+    def get_next_command_row(self, row):
+        '''Get the row of the command after a command in its block (or -1).'''
+        if self.kinds[self.parents[row]] != BLOCK:
+            return -1
+        return self.next_siblings[row]
+
+    def get_block_starts(self, row):
+        '''Get the rows of the first commands of the blocks of a command (as for Command.get_block_commands).'''
+        kind = self.kinds[row]
+        if kind in CONDITIONAL_KINDS:
+            # The expression comes before the blocks
+            first_children = self.first_children
+            next_siblings = self.next_siblings
+            blocks = []
+            child = next_siblings[first_children[row]]
+            while child != -1:
+                blocks.append(first_children[child])
+                child = next_siblings[child]
+            return blocks
+        if kind == FUNCTION_DECLARATION_KIND:
+            # The body is the last child of the definition
+            block_row = self.get_children(self.first_children[row])[-1]
+            return [self.first_children[block_row]]
+        return []
+
+    def get_component(self, row):
+        '''Get the component of a row, making it (and everything in it) the first time.
+
+        The component of a block is its first command, followed by the rest.
+        A command made on its own isn't followed by the commands after it
+        until its block is made.
+        '''
+        component = self._components.get(row)
+        if component is None:
+            component = self.build(row, self._components)
+        return component
+
+    def get_program(self):
+        '''Get the whole Program.'''
+        return self.get_component(0)
+
+    def build(self, row, components = None):
+        '''Make the component of a row, and everything in it.
+
+        Components already made are taken from components (a dict by row), and
+        the new ones are added to it. If components is None, nothing is kept.
+        '''
+        if components is None:
+            components = {}
+
+        with garbage_collection_paused():
+            return self._build(row, components)
+
+    def _build(self, row, components):
+        kinds = self.kinds
+        first_children = self.first_children
+        next_siblings = self.next_siblings
+        line_starts = self.line_starts
+        line_ends = self.line_ends
+        lex_starts = self.lex_starts
+        lex_ends = self.lex_ends
+        symbol_ids = self.symbol_ids
+        names = self.symbols.names
+        constants = self.constants
+
+        # Rows are made after the rows in them, so in reverse pre-order
+        root = row
+        rows = []
+        stack = [root]
+        while stack:
+            row = stack.pop()
+            if row in components:
+                continue
+            rows.append(row)
+            child = first_children[row]
+            while child != -1:
+                stack.append(child)
+                child = next_siblings[child]
+
+        for row in reversed(rows):
+            kind = kinds[row]
+            children = []
+            child = first_children[row]
+            while child != -1:
+                children.append(components[child])
+                child = next_siblings[child]
+
+            if kind == BLOCK:
+                component = children[0]
+                for command in children[1:]:
+                    component.set_next_command(command)
+                components[row] = component
+                continue
+
+            component_class = KIND_CLASSES[kind]
+            line_span = (line_starts[row], line_ends[row])
+            lex_span = (lex_starts[row], lex_ends[row])
+
+            if kind in VARIABLE_KINDS:
+                symbol_id = symbol_ids[row]
+                component = component_class(names[symbol_id], line_span = line_span, lex_span = lex_span)
+                component.id = symbol_id
+            elif component_class is Program:
+                component = Program(children[:-1], children[-1], line_span = line_span, lex_span = lex_span)
+                component.symbols = self.symbols
+            elif component_class is FunctionDeclaration:
+                component = FunctionDeclaration(names[symbol_ids[row]], children[0], line_span = line_span, lex_span = lex_span)
+            elif component_class is FunctionDefinition:
+                component = FunctionDefinition(children[:-1], children[-1], line_span = line_span, lex_span = lex_span)
+            elif component_class is FunctionCall:
+                component = FunctionCall(children[0], children[1:], line_span = line_span, lex_span = lex_span)
+            elif component_class is New:
+                # Every New gets its own copy of the type, as it would from the parser
+                component = New(decode_constant(encode_constant(constants[symbol_ids[row]])), line_span = line_span, lex_span = lex_span)
+            elif issubclass(component_class, (Atom, Operator)):
+                component = component_class(constants[symbol_ids[row]], line_span = line_span, lex_span = lex_span)
+            else:
+                component = component_class(*children, line_span = line_span, lex_span = lex_span)
+
+            components[row] = component
+
+        return components[root]
+
+    def dumps(self):
+        '''Encode the program as a string, to be read back by loads.'''
+        symbols = self.symbols
+        return marshal.dumps((FORMAT_VERSION,
+                              [column.tostring() for column in self.get_columns()],
+                              [encode_constant(value) for value in self.constants],
+                              symbols.names, symbols.scopes, sorted(symbols.function_names)))
+
+    @classmethod
+    def loads(cls, data):
+        '''Decode a program encoded by dumps.'''
+        version, columns, constants, names, scopes, function_names = marshal.loads(data)
+        if version != FORMAT_VERSION:
+            raise ValueError('Flat program version {0} is not {1}'.format(version, FORMAT_VERSION))
+
+        symbols = SymbolTable.rebuild(names, scopes, function_names)
+
+        flat = cls(symbols)
+        for name, data in izip(COLUMN_NAMES, columns):
+            getattr(flat, name).fromstring(data)
+
+        flat.constants = [decode_constant(value) for value in constants]
+        for index, value in enumerate(flat.constants):
+            if not isinstance(value, Type):
+                flat._constant_indices[(value.__class__, value)] = index
+
+        return flat
+
+
+def flatten(program):
+    '''Make the FlatProgram of a Program.'''
+    if program.symbols is None:
+        resolve_symbols(program)
+
+    with garbage_collection_paused():
+        return _flatten(program, program.symbols)
+
+def _flatten(program, symbols):
+    flat = FlatProgram(symbols)
+    kinds = flat.kinds
+    parents = flat.parents
+    first_children = flat.first_children
+    next_siblings = flat.next_siblings
+    line_starts = flat.line_starts
+    line_ends = flat.line_ends
+    lex_starts = flat.lex_starts
+    lex_ends = flat.lex_ends
+    symbol_ids = flat.symbol_ids
+    add_constant = flat.add_constant
+
+    # The last child added to every row so far
+    last_children = []
+
+    # (component, row of the parent); blocks are pushed as a list of commands
+    stack = [(program, -1)]
+    while stack:
+        component, parent = stack.pop()
+        row = len(kinds)
+
+        if component.__class__ is list:
+            kind = BLOCK
+            line_span = component[0]._line_span & ~SPAN_MASK | component[-1]._line_span & SPAN_MASK
+            lex_span = component[0]._lex_span & ~SPAN_MASK | component[-1]._lex_span & SPAN_MASK
+        else:
+            kind = KINDS.get(component.__class__)
+            if kind is None:
+                raise TypeError("Can't flatten {0!r} ({1})".format(component, component.__class__.__name__))
+            line_span = component._line_span
+            lex_span = component._lex_span
+
+        kinds.append(kind)
+        parents.append(parent)
+        first_children.append(-1)
+        next_siblings.append(-1)
+        line_starts.append(line_span >> SPAN_BITS)
+        line_ends.append(line_span & SPAN_MASK)
+        lex_starts.append(lex_span >> SPAN_BITS)
+        lex_ends.append(lex_span & SPAN_MASK)
+        last_children.append(-1)
+
+        if parent != -1:
+            if last_children[parent] == -1:
+                first_children[parent] = row
+            else:
+                next_siblings[last_children[parent]] = row
+            last_children[parent] = row
+
+        if kind == BLOCK:
+            symbol_ids.append(-1)
+            children = component
+        elif kind in VARIABLE_KINDS:
+            assert component.id is not None, component
+            symbol_ids.append(component.id)
+            continue
+        elif component.__class__ is FunctionDeclaration:
+            symbol_ids.append(symbols.lookup(component.name))
+            children = [component.definition]
+        elif isinstance(component, (Number, Boolean, Operator)):
+            symbol_ids.append(add_constant(component.value if isinstance(component, Atom) else component.token))
+            continue
+        elif component.__class__ is New:
+            symbol_ids.append(add_constant(component.allocate_type))
+            continue
+        else:
+            symbol_ids.append(-1)
+            children = _get_children(component)
+
+        for child in reversed(children):
+            stack.append((child, row))
+
+    return flat
+
+
+def _get_commands(command):
+    '''Get the commands of the sequence starting with a command, without [RET] halves.'''
+    commands = []
+    while command is not None:
+        if not (command.__class__ is AssignmentCommand and command.expression.__class__ is FunctionReturn):
+            commands.append(command)
+        command = command._next_command
+    return commands
+
+def _get_children(component):
+    '''Get the children of a component as flattened (with blocks as lists of commands).'''
+    component_class = component.__class__
+    if component_class is Program:
+        return component.functions + [_get_commands(component.command)]
+    if component_class is FunctionDefinition:
+        return component.parameters + [_get_commands(component.body)]
+    if component_class is AssignmentCommand:
+        return [component.assigned_variable, component.expression]
+    if component_class is IfCommand:
+        return [component.expression, _get_commands(component.true_block), _get_commands(component.false_block)]
+    if component_class is WhileCommand:
+        return [component.expression, _get_commands(component.loop_block)]
+    if component_class is InputCommand or component_class is ReturnCommand:
+        return [component.variable]
+    if component_class is BinaryExpression:
+        return [component.left_term, component.operator, component.right_term]
+    if component_class is FunctionCall:
+        return [component.function_variable] + component.parameter_variables
+    return []
+
+
+def encode_constant(value):
+    '''Encode a constant as a value marshal can write.'''
+    if isinstance(value, Primitive):
+        return ('primitive', value.value, value.line_number)
+    if isinstance(value, Reference):
+        return ('reference', encode_constant(value.value), value.line_number)
+    if isinstance(value, Function):
+        return ('function', [encode_constant(t) for t in value.signature], value.line_number)
+    return value
+
+def decode_constant(value):
+    '''Decode a constant encoded by encode_constant.'''
+    if value.__class__ is not tuple:
+        return value
+    kind, value, line_number = value
+    if kind == 'primitive':
+        return Primitive(value, line_number)
+    if kind == 'reference':
+        return Reference(decode_constant(value), line_number)
+    return Function([decode_constant(t) for t in value], line_number)
+
+
+class LazyComponents(object):
+    '''A list of the components of rows of a FlatProgram, made as they are touched.'''
+
+    def __init__(self, flat, rows):
+        self.flat = flat
+        self.rows = rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.flat.get_component(row) for row in self.rows[index]]
+        return self.flat.get_component(self.rows[index])
+
+    def __iter__(self):
+        for row in self.rows:
+            yield self.flat.get_component(row)
+
+
+class LazyProgram(object):
+    '''Look like the Program of a FlatProgram, making its components as they are touched.
+
+    Touching one function declaration makes only that declaration, and
+    touching the command makes the top level commands (and not the
+    functions).
+    '''
+
+    def __init__(self, flat):
+        self.flat = flat
+        self.functions = LazyComponents(flat, flat.get_function_rows())
+        self.symbols = flat.symbols
+        self.type = None
+
+    @property
+    def command(self):
+        return self.flat.get_component(self.flat.get_block_row())
+
+    @property
+    def line_span(self):
+        return self.flat.get_line_span(0)
+
+    @property
+    def lex_span(self):
+        return self.flat.get_lex_span(0)
+
+    @property
+    def line_number(self):
+        return self.flat.line_starts[0]
+
+    def get_program(self):
+        '''Get the real Program, making all of it.'''
+        return self.flat.get_program()
+
+    def accept(self, visitor):
+        visitor.visit_program(self)
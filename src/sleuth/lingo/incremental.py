@@ -0,0 +1,650 @@
+'''
+Provide incremental reparsing of Lingo programs as their source is edited.
+
+An IncrementalParser keeps a Program in step with the text it was parsed
+from. Every edit (replacing a range of the text with new text) reparses only
+the innermost command or function declaration that contains the edited
+range, and splices the new components into the existing Program in place of
+the old ones. The rest of the Program is kept as it is: components before
+the edit are untouched, and components after it only have their line spans
+and lex spans shifted.
+
+The top level commands and function declarations are indexed by where they
+start, so the edited one is found by a binary search. Components after the
+edit but within the same top level command are shifted right away. The top
+level commands after it are shifted lazily: the shift is logged, and the log
+is applied when the program is next read (or when it gets long). Until then,
+the start of every top level command in the index, and the position records
+of everything in it, are as they were when the command was last shifted, and
+are translated through the shifts logged since. Every top level command is
+either entirely before or entirely after the edit that logged a shift, so a
+shift moves all of it alike.
+
+If the edited text doesn't parse on its own (say, the edit adds a semicolon
+and another command), the enclosing if, while and function declaration are
+tried in turn, and the whole program is reparsed as a last resort.
+
+The parsing is done by the descent backend, which records where every
+command ends. A command's extent runs from the start of its first token to
+the end of its last token, so edits that touch either end of a command
+(like typing at the end of a line) are still within the command.
+'''
+
+from sleuth.common.exception import LingoException
+from sleuth.lingo.components import * #@UnusedWildImport
+from sleuth.lingo.descent import DescentParser
+from sleuth.lingo.parser import LingoParser, TOKENIZER_PLY, BACKEND_DESCENT
+from sleuth.lingo.symbols import VARIABLE_CLASSES, resolve_symbols
+from sleuth.lingo.tokenizer import master_regex
+from sleuth.lingo.types import Reference
+from bisect import bisect_right
+from itertools import chain, islice
+
+
+# The number of shifts logged before they are applied to the whole program
+MAX_PENDING_SHIFTS = 64
+
+
+def iterate_sequence(command):
+    '''Iterate over the commands of the sequence starting with the given command.'''
+    while command is not None:
+        yield command
+        command = command._next_command
+
+
+def is_return_assignment(command):
+    '''Check if the command is the [RET] half of a function call assignment.
+
+    These are created along with the [CALL] half (which they follow), and
+    share its variables. They aren't parsed, so they have no position.
+    '''
+    return isinstance(command, AssignmentCommand) and isinstance(command.expression, FunctionReturn)
+
+
+def iterate_top_level(program):
+    '''Iterate over the function declarations and the top level commands of a program, but for [RET] halves.'''
+    for declaration in program.functions:
+        yield declaration
+
+    for command in iterate_sequence(program.command):
+        if not is_return_assignment(command):
+            yield command
+
+
+def iterate_variables(component):
+    '''Iterate over the Variables in the component (and the commands after it).'''
+    stack = [component]
+    while stack:
+        node = stack.pop()
+        if node.__class__ in VARIABLE_CLASSES:
+            yield node
+            continue
+
+        for name in get_child_names(node):
+            value = getattr(node, name)
+            if value.__class__ is list:
+                stack.extend(value)
+            elif value is not None:
+                stack.append(value)
+
+
+class IncrementalParser(object):
+    '''Keep a Program up to date with the edits to its source text.'''
+
+    def __init__(self, source_text, tokenizer = TOKENIZER_PLY):
+        '''Parse the given source text.
+
+        Raises LingoException if the source text is not a valid program.
+        '''
+        self._parsers = {}
+        for start in ('program', 'command', 'function_declaration'):
+            parser = LingoParser(tokenizer = tokenizer, backend = BACKEND_DESCENT)
+            parser.start = start
+            self._parsers[start] = parser
+
+        self.source_text = ''
+        self._program = None
+
+        # The position record of every command and function declaration in
+        # the program, keyed by the id of the component (see DescentParser).
+        self._positions = {}
+
+        # The top level components in order, where each starts, and the
+        # number of logged shifts that were applied to it
+        self._top_level = []
+        self._top_level_starts = []
+        self._top_level_epochs = []
+
+        # The shifts (boundary, delta, line_delta) of the top level components
+        # after the edits that logged them, oldest first
+        self._shifts = []
+
+        # Set when the spans of the program have to be computed again
+        self._program_spans_stale = False
+
+        # The number of Variables of every symbol, to drop the symbols that
+        # edits leave unused
+        self._uses = []
+
+        # Set when the source text has been edited into a program that
+        # doesn't parse, so the next edit has to parse the whole program.
+        self._stale = False
+
+        self._parse_program(source_text.replace('\r\n', '\n'))
+
+    @property
+    def program(self):
+        '''The Program, with the spans of all of its components up to date.'''
+        self._apply_shifts()
+        return self._program
+
+    def edit(self, offset, deleted_length, inserted_text):
+        '''Replace deleted_length characters at offset with inserted_text.
+
+        Offsets are into source_text, whose newlines are normalized to '\\n'.
+        The program is updated in place, and components that are not part of
+        the edited command (or function declaration) are kept. The spans of
+        the top level commands after the edit are shifted when the program is
+        next read.
+
+        Raises LingoException if the edited source text is not a valid
+        program. The source text is edited all the same, and the program is
+        left as it was until an edit makes the source text valid again.
+        '''
+        old_text = self.source_text
+        assert 0 <= offset and offset + deleted_length <= len(old_text), (offset, deleted_length)
+
+        inserted_text = inserted_text.replace('\r\n', '\n')
+        new_text = old_text[:offset] + inserted_text + old_text[offset + deleted_length:]
+
+        if not self._stale:
+            index, enclosing = self._get_enclosing_components(offset, offset + deleted_length)
+            if enclosing and isinstance(enclosing[0], FunctionDeclaration):
+                function_name = enclosing[0].name
+            else:
+                function_name = None
+
+            for component in reversed(enclosing):
+                if isinstance(component, ReturnCommand):
+                    # Return commands can only be parsed as part of a function
+                    continue
+
+                if self._reparse_component(component, index, new_text, len(inserted_text) - deleted_length, function_name):
+                    return
+
+        try:
+            self._parse_program(new_text)
+        except LingoException:
+            # The program is left as it was, for the text before the edit
+            self._apply_shifts()
+            self.source_text = new_text
+            self._stale = True
+            raise
+
+    #
+    # Finding the edited components
+    #
+
+    def _get_token_end(self, text, lexpos):
+        '''Get the end of the token starting at lexpos.'''
+        return master_regex.match(text, lexpos).end()
+
+    def _find_top_level(self, offset):
+        '''Get the index of the last top level component starting at or before offset (-1 if there is none).'''
+        starts = self._top_level_starts
+        if not self._shifts:
+            return bisect_right(starts, offset) - 1
+
+        epochs = self._top_level_epochs
+        low, high = 0, len(starts)
+        while low < high:
+            middle = (low + high) // 2
+            if self._translate(starts[middle], epochs[middle])[0] <= offset:
+                low = middle + 1
+            else:
+                high = middle
+        return low - 1
+
+    def _get_enclosing_components(self, start, end):
+        '''Get the commands and function declarations containing [start, end], outermost first.
+
+        Returns the index of the outermost one among the top level components
+        too. It is shifted up to date, along with everything in it.
+        '''
+        index = self._find_top_level(start)
+        if index < 0:
+            return index, []
+        self._apply_top_level_shifts(index)
+
+        text = self.source_text
+        positions = self._positions
+        enclosing = []
+        candidates = [self._top_level[index]]
+
+        while True:
+            found = None
+            for component in candidates:
+                position = positions.get(id(component))
+                if position is None:
+                    # [RET] halves of function calls aren't parsed
+                    continue
+                if position[1] > start:
+                    break
+
+                if end <= self._get_token_end(text, position[3]):
+                    found = component
+                    break
+
+            if found is None:
+                return index, enclosing
+
+            enclosing.append(found)
+            candidates = chain(*[iterate_sequence(block) for block in found.get_block_commands()])
+
+    #
+    # Reparsing
+    #
+
+    def _reparse_component(self, component, index, new_text, delta, function_name):
+        '''Reparse the text of the given component and splice in the result.
+
+        The component is in the top level component with the given index, and
+        in the function with the given name (or None). Returns False
+        (changing nothing) if the text doesn't parse.
+        '''
+        positions = self._positions
+        line, start, _, last_token_start = positions[id(component)]
+        end = self._get_token_end(self.source_text, last_token_start)
+
+        if isinstance(component, FunctionDeclaration):
+            start_symbol = 'function_declaration'
+        else:
+            start_symbol = 'command'
+
+        fragment_text = new_text[start:end + delta]
+
+        # A single line comment runs on to the end of the line, past the end
+        # of the fragment, so it can't be parsed without the text after it.
+        if '//' in fragment_text[fragment_text.rfind('\n') + 1:]:
+            return False
+
+        fragment_positions = {}
+        try:
+            fragment = self._parse(start_symbol, fragment_text, fragment_positions)
+        except LingoException:
+            return False
+
+        old_text = self.source_text
+        line_delta = new_text.count('\n', start, end + delta) - old_text.count('\n', start, end)
+
+        # Move everything after the component in its top level component, and
+        # stretch everything around it, before the component is replaced.
+        top_level = self._top_level[index]
+        if component is not top_level and (delta or line_delta):
+            self._shift(top_level, end, delta, line_delta, positions, self._get_following(top_level))
+
+        self._forget(component)
+
+        # The fragment was parsed on its own, from line 1 and offset 0
+        self._shift(fragment, 0, start, line - 1, fragment_positions)
+        positions.update(fragment_positions)
+
+        # The top level components after this one are shifted lazily. This
+        # one (or the ones replacing it) are up to date.
+        if delta or line_delta:
+            self._shifts.append((end, delta, line_delta))
+        epoch = len(self._shifts)
+        self._top_level_epochs[index] = epoch
+
+        program = self._program
+        symbols = program.symbols
+        if isinstance(fragment, FunctionDeclaration):
+            # Function declarations come first among the top level components
+            program.functions[index] = fragment
+            self._top_level[index] = fragment
+
+            if fragment.name == component.name:
+                symbols.resolve(fragment)
+                self._count_uses(fragment)
+                self._release(component)
+            else:
+                # Renaming a function changes the scope of its name everywhere
+                resolve_symbols(program)
+                self._count_all_uses()
+        else:
+            # Resolve the fragment before it leads on to the rest of the sequence
+            symbols.resolve(fragment, function_name)
+            self._count_uses(fragment)
+            fragment_commands = [command for command in iterate_sequence(fragment) if not is_return_assignment(command)]
+
+            for removed_command in self._splice(component, fragment):
+                self._release(removed_command)
+
+            if component is top_level:
+                self._top_level[index:index + 1] = fragment_commands
+                self._top_level_starts[index:index + 1] = [positions[id(command)][1] for command in fragment_commands]
+                self._top_level_epochs[index:index + 1] = [epoch] * len(fragment_commands)
+
+        self.source_text = new_text
+        self._program_spans_stale = True
+        if epoch > MAX_PENDING_SHIFTS:
+            self._apply_shifts()
+        return True
+
+    def _parse(self, start_symbol, source_text, positions = None):
+        lingo_parser = self._parsers[start_symbol]
+        lexer = lingo_parser.lexer.clone()
+        lexer.lineno = 1
+
+        return DescentParser(lingo_parser, lexer, positions).parse(source_text)
+
+    def _parse_program(self, source_text):
+        '''Parse the whole source text, keeping the identity of the Program.'''
+        positions = {}
+        program = self._parse('program', source_text, positions)
+
+        if self._program is None:
+            self._program = program
+        else:
+            self._program.functions = program.functions
+            self._program.command = program.command
+            self._program.symbols = program.symbols
+            self._program.line_span = program.line_span
+            self._program.lex_span = program.lex_span
+
+        self.source_text = source_text
+        self._positions = positions
+        self._stale = False
+
+        self._top_level = list(iterate_top_level(self._program))
+        self._top_level_starts = [positions[id(component)][1] for component in self._top_level]
+        self._top_level_epochs = [0] * len(self._top_level)
+        del self._shifts[:]
+        self._program_spans_stale = False
+
+        self._count_all_uses()
+
+    #
+    # Shifting lazily
+    #
+
+    def _translate(self, offset, epoch):
+        '''Translate an offset through the shifts logged from the given epoch on.
+
+        Returns the offset in the source text, and the number of lines it moved.
+        '''
+        line_delta = 0
+        for boundary, shift_delta, shift_line_delta in islice(self._shifts, epoch, None):
+            if offset >= boundary:
+                offset += shift_delta
+                line_delta += shift_line_delta
+
+        return offset, line_delta
+
+    def _get_following(self, command):
+        '''Get the command following a top level command, and the [RET] half going with it.'''
+        next_command = command._next_command
+        if next_command is not None and is_return_assignment(next_command):
+            next_command = next_command._next_command
+        return next_command
+
+    def _apply_top_level_shifts(self, index):
+        '''Apply the shifts logged since the top level component with the given index was shifted.'''
+        epoch = self._top_level_epochs[index]
+        if epoch == len(self._shifts):
+            return
+
+        start = self._top_level_starts[index]
+        new_start, line_delta = self._translate(start, epoch)
+        if new_start != start or line_delta:
+            component = self._top_level[index]
+            self._shift(component, 0, new_start - start, line_delta, self._positions, self._get_following(component))
+
+        self._top_level_starts[index] = new_start
+        self._top_level_epochs[index] = len(self._shifts)
+
+    def _apply_shifts(self):
+        '''Apply the logged shifts to every top level component, and compute the spans of the program.'''
+        if self._shifts:
+            top_level = self._top_level
+            starts = self._top_level_starts
+            epochs = self._top_level_epochs
+            function_count = len(self._program.functions)
+
+            # The top level commands that move alike are shifted in one go,
+            # along the sequence
+            run_index = run_delta = run_line_delta = None
+            for index in xrange(len(top_level)):
+                start = starts[index]
+                new_start, line_delta = self._translate(start, epochs[index])
+                delta = new_start - start
+                starts[index] = new_start
+
+                if index < function_count:
+                    if delta or line_delta:
+                        self._shift(top_level[index], 0, delta, line_delta, self._positions)
+                elif delta != run_delta or line_delta != run_line_delta:
+                    self._shift_run(run_index, index, run_delta, run_line_delta)
+                    run_index, run_delta, run_line_delta = index, delta, line_delta
+
+            self._shift_run(run_index, len(top_level), run_delta, run_line_delta)
+
+            del self._shifts[:]
+            self._top_level_epochs = [0] * len(top_level)
+
+        if self._program_spans_stale:
+            self._update_program_spans()
+            self._program_spans_stale = False
+
+    def _shift_run(self, first, stop, delta, line_delta):
+        '''Shift the top level commands with indices from first up to stop alike.'''
+        if first is None or not (delta or line_delta):
+            return
+
+        top_level = self._top_level
+        stop_command = top_level[stop] if stop < len(top_level) else None
+        self._shift(top_level[first], 0, delta, line_delta, self._positions, stop_command)
+
+    #
+    # Updating the program
+    #
+
+    def _shift(self, root, boundary, delta, line_delta, positions, stop = None):
+        '''Shift the spans of the components after boundary.
+
+        Components starting at or after boundary move by delta characters and
+        line_delta lines. The commands and function declarations containing
+        boundary only move their ends. Everything before boundary is skipped
+        without visiting the components inside it, except for the links along
+        command sequences. The sequence of root is followed up to the stop
+        command.
+        '''
+        stack = [root]
+        pop = stack.pop
+        push = stack.append
+
+        # Adding these to a packed span moves both its start and its end
+        packed_delta = (delta << SPAN_BITS) + delta
+        packed_line_delta = (line_delta << SPAN_BITS) + line_delta
+
+        while stack:
+            node = pop()
+            if node is stop:
+                continue
+
+            if node._lex_span >> SPAN_BITS >= boundary:
+                # After the boundary, which is by far the most common case
+                node._lex_span += packed_delta
+                node._line_span += packed_line_delta
+
+                position = positions.get(id(node))
+                if position is not None:
+                    positions[id(node)] = (position[0] + line_delta, position[1] + delta,
+                                           position[2] + line_delta, position[3] + delta)
+
+                node_class = node.__class__
+                if node_class is AssignmentCommand and node.expression.__class__ is FunctionReturn:
+                    # The variables of a [RET] half are shared with the
+                    # [CALL] half, which shifts them.
+                    expression = node.expression
+                    expression._lex_span += packed_delta
+                    expression._line_span += packed_line_delta
+                    if node._next_command is not None:
+                        push(node._next_command)
+                    continue
+
+                if node_class is New and line_delta:
+                    self._shift_type(node.allocate_type, line_delta)
+
+                for name in get_child_names(node):
+                    value = getattr(node, name)
+                    if value.__class__ is list:
+                        stack.extend(value)
+                    elif value is not None:
+                        push(value)
+                continue
+
+            position = positions.get(id(node))
+
+            if position is not None and position[3] >= boundary:
+                # Contains the boundary
+                positions[id(node)] = position[:2] + (position[2] + line_delta, position[3] + delta)
+                node.line_span = (node.line_span[0], node.line_span[1] + line_delta)
+
+                if isinstance(node, FunctionDeclaration):
+                    definition = node.definition
+                    definition.line_span = (definition.line_span[0], definition.line_span[1] + line_delta)
+                    push(definition.body)
+                else:
+                    stack.extend(node.get_block_commands())
+                    if node._next_command is not None:
+                        push(node._next_command)
+
+            elif isinstance(node, Command) and node._next_command is not None:
+                # Entirely before the boundary
+                push(node._next_command)
+
+    def _shift_type(self, allocate_type, line_delta):
+        '''Shift the line numbers of the references in an allocated type.'''
+        while isinstance(allocate_type, Reference):
+            allocate_type.line_number += line_delta
+            allocate_type = allocate_type.value
+
+    def _forget(self, component):
+        '''Forget the positions of the given component and everything in it.'''
+        positions = self._positions
+        stack = [component]
+        while stack:
+            node = stack.pop()
+            positions.pop(id(node), None)
+
+            for block in node.get_block_commands():
+                stack.extend(iterate_sequence(block))
+
+    def _splice(self, command, first_command):
+        '''Replace the command with the sequence starting with first_command.
+
+        The command (and the [RET] half going with it) is detached from the
+        program, so the commands before it no longer take it for the last
+        command of their sequence. Returns the removed commands.
+        '''
+        last_command = first_command.get_last_command()
+
+        # The [RET] half of a function call assignment goes with it
+        removed_commands = [command]
+        next_command = command._next_command
+        if next_command is not None and is_return_assignment(next_command):
+            removed_commands.append(next_command)
+            next_command = next_command._next_command
+
+        previous_command = command._previous_command
+        if previous_command is not None:
+            previous_command._next_command = first_command
+            first_command._previous_command = previous_command
+        else:
+            parent_command = command._parent_command
+            first_command._parent_command = parent_command
+            self._replace_block(parent_command, command, first_command)
+
+        if next_command is not None:
+            last_command._next_command = next_command
+            next_command._previous_command = last_command
+
+        for removed_command in removed_commands:
+            removed_command._previous_command = None
+            removed_command._next_command = None
+            removed_command._parent_command = None
+
+        return removed_commands
+
+    def _replace_block(self, parent_command, command, first_command):
+        '''Replace the first command of a block (or of a sequence without a parent).'''
+        if parent_command is None:
+            if self._program.command is command:
+                self._program.command = first_command
+                return
+
+            for declaration in self._program.functions:
+                if declaration.definition.body is command:
+                    declaration.definition.body = first_command
+                    return
+
+        elif isinstance(parent_command, IfCommand):
+            if parent_command.true_block is command:
+                parent_command.true_block = first_command
+            else:
+                parent_command.false_block = first_command
+            return
+
+        elif isinstance(parent_command, WhileCommand):
+            parent_command.loop_block = first_command
+            return
+
+        raise AssertionError('Cannot find the block starting with "{0}"'.format(command))
+
+    def _update_program_spans(self):
+        '''Compute the spans of the program, as the parser does.'''
+        program = self._program
+
+        if program.functions:
+            line, lexpos = self._positions[id(program.functions[0])][:2]
+        else:
+            # Without functions, the program starts where the lexer stopped
+            # after reading the first token.
+            line, lexpos = self._positions[id(program.command)][:2]
+            lexpos = self._get_token_end(self.source_text, lexpos)
+
+        program.line_span = (line, program.command.get_last_command().line_span[1])
+        program.lex_span = (lexpos, program.command.lex_span[1])
+
+    #
+    # Keeping the symbols
+    #
+
+    def _count_all_uses(self):
+        '''Count the Variables of every symbol in the program.'''
+        program = self._program
+        self._uses = [0] * len(program.symbols)
+        for declaration in program.functions:
+            self._count_uses(declaration)
+        self._count_uses(program.command)
+
+    def _count_uses(self, component):
+        '''Count the Variables of every symbol in the component (and the commands after it).'''
+        uses = self._uses
+        symbol_count = len(self._program.symbols)
+        if len(uses) < symbol_count:
+            uses.extend([0] * (symbol_count - len(uses)))
+
+        for variable in iterate_variables(component):
+            uses[variable.id] += 1
+
+    def _release(self, component):
+        '''Stop counting the Variables of a removed component, and drop the symbols no Variable uses any more.'''
+        symbols = self._program.symbols
+        uses = self._uses
+        for variable in iterate_variables(component):
+            symbol_id = variable.id
+            uses[symbol_id] -= 1
+            if not uses[symbol_id] and symbols.names[symbol_id] not in symbols.function_names:
+                symbols.drop(symbol_id)
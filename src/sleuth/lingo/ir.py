@@ -0,0 +1,386 @@
+'''
+Provide a linear three-address form of Lingo programs.
+
+lower turns a Program (and its CFG, a ProgramBlock) into an IRProgram: an
+array of instructions, each an opcode, a destination and two operands, kept
+in parallel columns of ints. Analyses can then run over integers, rather
+than matching on the classes of the components at every CFG node, and the
+whole IR can be written out (dumps) and read back (loads) cheaply.
+
+Operands are ints too:
+- 0 and up are variables: the ids of the symbols of the program first (see
+  the symbols module), then the temporaries holding the values of nested
+  expressions, which are numbered after them.
+- Negative operands are constants: -1 - operand is the index of the value
+  in the constants list.
+- NO_OPERAND is no operand at all.
+
+The instructions of every CFG node are kept together, nodes in reverse
+post order. Every instruction knows its node (by index into nodes) and the
+line and lex span of the component it came from: the command for the
+instruction finishing a command, the nested expression for those computing
+temporaries.
+
+Calls take their arguments from the arguments array: operand b of a CALL
+(or RESULT, or FUNCTION) is the offset of the number of arguments, which
+the arguments follow. A function call assignment is a CALL in its [CALL]
+node and a RESULT (assigning the value returned) in its [RET] node.
+'''
+
+from sleuth.lingo.components import * #@UnusedWildImport
+from sleuth.lingo.flat import encode_constant, decode_constant
+from sleuth.lingo.symbols import SymbolTable
+from sleuth.tracks.cfg import ProgramBlock
+from array import array
+from itertools import izip
+import marshal
+
+
+# The version of the encoding written by dumps
+FORMAT_VERSION = 2
+
+NO_OPERAND = -0x80000000
+
+# Opcodes
+NOP = 0         # skip
+COPY = 1        # dest := a
+ADD = 2         # dest := a + b
+SUBTRACT = 3    # dest := a - b
+MULTIPLY = 4    # dest := a * b
+DIVIDE = 5      # dest := a / b
+LESS = 6        # dest := a < b
+EQUAL = 7       # dest := a = b
+NOT_EQUAL = 8   # dest := a != b
+LESS_EQUAL = 9  # dest := a <= b
+AND = 10        # dest := a && b
+OR = 11         # dest := a || b
+REF = 12        # dest := ref a
+LOAD = 13       # dest := !a
+STORE = 14      # !dest := a
+NEW = 15        # dest := new a (a is the constant of the type)
+CALL = 16       # a(arguments at b) [CALL]
+RESULT = 17     # dest := a(arguments at b) [RET]
+INPUT = 18      # input dest
+RETURN = 19     # return a
+IF = 20         # if (a)
+WHILE = 21      # while (a)
+FUNCTION = 22   # def dest = fun(arguments at b)
+
+OPCODE_NAMES = ('nop', 'copy', 'add', 'subtract', 'multiply', 'divide', 'less', 'equal', 'not_equal', 'less_equal',
+                'and', 'or', 'ref', 'load', 'store', 'new', 'call', 'result', 'input', 'return', 'if', 'while',
+                'function')
+
+BINARY_OPCODES = {
+    OperatorPlus : ADD,
+    OperatorMinus : SUBTRACT,
+    OperatorTimes : MULTIPLY,
+    OperatorDivide : DIVIDE,
+    OperatorLessThan : LESS,
+    OperatorEqualTo : EQUAL,
+    OperatorNotEqualTo : NOT_EQUAL,
+    OperatorLessThanOrEqualTo : LESS_EQUAL,
+    OperatorAnd : AND,
+    OperatorOr : OR,
+}
+
+# The names of the columns, in the order dumps writes them
+COLUMN_NAMES = ('opcodes', 'destinations', 'operands_a', 'operands_b', 'instruction_nodes',
+                'line_starts', 'line_ends', 'lex_starts', 'lex_ends')
+
+
+def is_constant(operand):
+    return operand < 0 and operand != NO_OPERAND
+
+
+class IRProgram(object):
+    '''The instructions of a program, in parallel columns.'''
+
+    def __init__(self, symbols):
+        self.opcodes = array('b')
+        self.destinations = array('i')
+        self.operands_a = array('i')
+        self.operands_b = array('i')
+
+        # The index of the CFG node of every instruction, and the starts and
+        # ends of the spans of the component it came from
+        self.instruction_nodes = array('i')
+        self.line_starts = array('i')
+        self.line_ends = array('i')
+        self.lex_starts = array('i')
+        self.lex_ends = array('i')
+
+        # The arguments of calls (and parameters of functions), each list
+        # preceded by its length
+        self.arguments = array('i')
+
+        self.constants = []
+        self._constant_indices = {}
+
+        self.symbols = symbols
+        self.temporary_count = 0
+
+        # The CFG nodes (none after loads), and the offset of the first
+        # instruction of every node
+        self.nodes = []
+        self.node_starts = array('i')
+        self._node_indices = {}
+
+    def __len__(self):
+        return len(self.opcodes)
+
+    def __repr__(self):
+        return '<IRProgram of {0} instructions>'.format(len(self.opcodes))
+
+    def get_columns(self):
+        return [getattr(self, name) for name in COLUMN_NAMES]
+
+    def new_temporary(self):
+        self.temporary_count += 1
+        return len(self.symbols) + self.temporary_count - 1
+
+    def get_constant_operand(self, value):
+        '''Get the operand of a constant, adding it if it's new.'''
+        if isinstance(value, Type):
+            self.constants.append(value)
+            return -len(self.constants)
+
+        key = (value.__class__, value)
+        index = self._constant_indices.get(key)
+        if index is None:
+            index = self._constant_indices[key] = len(self.constants)
+            self.constants.append(value)
+        return -1 - index
+
+    def get_constant(self, operand):
+        '''Get the value of a constant operand.'''
+        return self.constants[-1 - operand]
+
+    def is_temporary(self, operand):
+        return operand >= len(self.symbols)
+
+    def add_arguments(self, operands):
+        '''Add a list of arguments, and get its offset.'''
+        offset = len(self.arguments)
+        self.arguments.append(len(operands))
+        self.arguments.extend(operands)
+        return offset
+
+    def get_arguments(self, offset):
+        return self.arguments[offset + 1:offset + 1 + self.arguments[offset]].tolist()
+
+    def add(self, opcode, destination, a, b, component):
+        '''Add an instruction to the last node.'''
+        self.opcodes.append(opcode)
+        self.destinations.append(destination)
+        self.operands_a.append(a)
+        self.operands_b.append(b)
+        self.instruction_nodes.append(len(self.node_starts) - 1)
+        self.add_spans(component)
+
+    def add_spans(self, component, index = None):
+        '''Set the spans of an instruction (by default, a new one at the end) to those of a component.'''
+        line_span = component._line_span
+        lex_span = component._lex_span
+        if index is None:
+            self.line_starts.append(line_span >> SPAN_BITS)
+            self.line_ends.append(line_span & SPAN_MASK)
+            self.lex_starts.append(lex_span >> SPAN_BITS)
+            self.lex_ends.append(lex_span & SPAN_MASK)
+        else:
+            self.line_starts[index] = line_span >> SPAN_BITS
+            self.line_ends[index] = line_span & SPAN_MASK
+            self.lex_starts[index] = lex_span >> SPAN_BITS
+            self.lex_ends[index] = lex_span & SPAN_MASK
+
+    def get_instructions(self, node):
+        '''Get the range of the indices of the instructions of a CFG node.'''
+        index = self._node_indices[node]
+        end = self.node_starts[index + 1] if index + 1 < len(self.node_starts) else len(self.opcodes)
+        return xrange(self.node_starts[index], end)
+
+    def get_node(self, instruction):
+        '''Get the CFG node of an instruction.'''
+        return self.nodes[self.instruction_nodes[instruction]]
+
+    def get_line_span(self, instruction):
+        return (self.line_starts[instruction], self.line_ends[instruction])
+
+    def get_lex_span(self, instruction):
+        return (self.lex_starts[instruction], self.lex_ends[instruction])
+
+    def format_operand(self, operand):
+        if operand == NO_OPERAND:
+            return '_'
+        if operand < 0:
+            return repr(self.get_constant(operand))
+        if operand >= len(self.symbols):
+            return '%{0}'.format(operand - len(self.symbols))
+        return self.symbols.names[operand]
+
+    def format_instruction(self, instruction):
+        '''Describe an instruction, like "x := add a, 1" or "!p := store x".'''
+        opcode = self.opcodes[instruction]
+        operands = [self.operands_a[instruction], self.operands_b[instruction]]
+        if opcode in (CALL, RESULT, FUNCTION):
+            operands[1:] = self.get_arguments(operands[1])
+
+        text = ' '.join([OPCODE_NAMES[opcode], ', '.join(self.format_operand(operand) for operand in operands
+                                                          if operand != NO_OPERAND)]).rstrip()
+        destination = self.destinations[instruction]
+        if destination != NO_OPERAND:
+            text = '{0}{1} := {2}'.format('!' if opcode == STORE else '', self.format_operand(destination), text)
+        return text
+
+    def dumps(self):
+        '''Encode the instructions as a string, to be read back by loads.
+
+        The CFG nodes aren't written; instructions still know the index of
+        their node.
+        '''
+        symbols = self.symbols
+        return marshal.dumps((FORMAT_VERSION,
+                              [column.tostring() for column in self.get_columns()],
+                              self.arguments.tostring(), self.node_starts.tostring(),
+                              [encode_constant(value) for value in self.constants], self.temporary_count,
+                              symbols.names, symbols.scopes, sorted(symbols.function_names)))
+
+    @classmethod
+    def loads(cls, data):
+        '''Decode instructions encoded by dumps.'''
+        (version, columns, arguments, node_starts, constants, temporary_count,
+         names, scopes, function_names) = marshal.loads(data)
+        if version != FORMAT_VERSION:
+            raise ValueError('IR version {0} is not {1}'.format(version, FORMAT_VERSION))
+
+        symbols = SymbolTable.rebuild(names, scopes, function_names)
+
+        program = cls(symbols)
+        for name, data in izip(COLUMN_NAMES, columns):
+            getattr(program, name).fromstring(data)
+        program.arguments.fromstring(arguments)
+        program.node_starts.fromstring(node_starts)
+        program.constants = [decode_constant(value) for value in constants]
+        program.temporary_count = temporary_count
+        return program
+
+
+class _Lowering(object):
+    '''Lower the commands of CFG nodes into an IRProgram.'''
+
+    def __init__(self, program):
+        self.program = program
+
+    def get_operand(self, expression, destination = None):
+        '''Add the instructions computing an expression, and get the operand holding its value.
+
+        Expressions that aren't variables or constants are computed into
+        destination, if given, or else into a new temporary.
+        '''
+        program = self.program
+        expression_class = expression.__class__
+        if expression_class is Variable:
+            return expression.id
+        if expression_class is Number or expression_class is Boolean:
+            return program.get_constant_operand(expression.value)
+
+        # The binary expressions, in post order, without recursing
+        stack = [(expression, False)]
+        results = []
+        while stack:
+            component, operands_done = stack.pop()
+            component_class = component.__class__
+
+            if component_class is BinaryExpression:
+                if not operands_done:
+                    stack.append((component, True))
+                    stack.append((component.right_term, False))
+                    stack.append((component.left_term, False))
+                    continue
+                right = results.pop()
+                left = results.pop()
+                target = destination if component is expression and destination is not None else program.new_temporary()
+                program.add(BINARY_OPCODES[component.operator.__class__], target, left, right, component)
+                results.append(target)
+            elif component_class is Variable:
+                results.append(component.id)
+            elif component_class is Number or component_class is Boolean:
+                results.append(program.get_constant_operand(component.value))
+            else:
+                target = destination if component is expression and destination is not None else program.new_temporary()
+                if component_class is ReferencedVariable:
+                    program.add(REF, target, component.id, NO_OPERAND, component)
+                elif component_class is DereferencedVariable:
+                    program.add(LOAD, target, component.id, NO_OPERAND, component)
+                elif component_class is New:
+                    program.add(NEW, target, program.get_constant_operand(component.allocate_type), NO_OPERAND, component)
+                else:
+                    raise TypeError("Can't lower {0!r} ({1})".format(component, component_class.__name__))
+                results.append(target)
+
+        return results.pop()
+
+    def lower_command(self, command):
+        program = self.program
+        command_class = command.__class__
+
+        if command_class is AssignmentCommand:
+            variable = command.assigned_variable
+            expression = command.expression
+            expression_class = expression.__class__
+
+            if expression_class is FunctionCall or expression_class is FunctionReturn:
+                function = self.get_operand(expression.function_variable)
+                arguments = program.add_arguments([self.get_operand(parameter) for parameter in expression.parameter_variables])
+                if expression_class is FunctionCall:
+                    program.add(CALL, NO_OPERAND, function, arguments, command)
+                    return
+                opcode = RESULT
+            else:
+                opcode = None
+
+            if variable.__class__ is DereferencedVariable:
+                if opcode is None:
+                    value = self.get_operand(expression)
+                else:
+                    value = program.new_temporary()
+                    program.add(opcode, value, function, arguments, expression)
+                program.add(STORE, variable.id, value, NO_OPERAND, command)
+            elif opcode is not None:
+                program.add(opcode, variable.id, function, arguments, command)
+            elif expression_class is Variable or expression_class is Number or expression_class is Boolean:
+                program.add(COPY, variable.id, self.get_operand(expression), NO_OPERAND, command)
+            else:
+                self.get_operand(expression, variable.id)
+                # The instruction finishing the command has the span of the command
+                program.add_spans(command, len(program) - 1)
+
+        elif command_class is IfCommand or command_class is WhileCommand:
+            condition = self.get_operand(command.expression)
+            program.add(IF if command_class is IfCommand else WHILE, NO_OPERAND, condition, NO_OPERAND, command)
+        elif command_class is InputCommand:
+            program.add(INPUT, command.variable.id, NO_OPERAND, NO_OPERAND, command)
+        elif command_class is ReturnCommand:
+            program.add(RETURN, NO_OPERAND, self.get_operand(command.variable), NO_OPERAND, command)
+        elif command_class is SkipCommand:
+            program.add(NOP, NO_OPERAND, NO_OPERAND, NO_OPERAND, command)
+        elif command_class is FunctionDeclaration:
+            parameters = program.add_arguments([parameter.id for parameter in command.definition.parameters])
+            program.add(FUNCTION, program.symbols.lookup(command.name), NO_OPERAND, parameters, command)
+        else:
+            raise TypeError("Can't lower {0!r} ({1})".format(command, command_class.__name__))
+
+
+def lower(program, program_block = None):
+    '''Lower a Program (with its ProgramBlock, which is made if not given) into an IRProgram.'''
+    if program_block is None:
+        program_block = ProgramBlock(program)
+
+    ir = IRProgram(program.symbols)
+    lowering = _Lowering(ir)
+    for node in program_block.nodes:
+        ir._node_indices[node] = len(ir.nodes)
+        ir.nodes.append(node)
+        ir.node_starts.append(len(ir.opcodes))
+        lowering.lower_command(node.command)
+
+    return ir
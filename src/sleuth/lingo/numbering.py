@@ -0,0 +1,217 @@
+'''
+Provide value numbers for the expressions of Lingo programs.
+
+Generated programs repeat the same expressions (like "a + 1") over and over,
+each as its own tree of components. An ExpressionTable hash-conses them: it
+gives every structurally distinct expression a number, so equal expressions
+anywhere in the program get the same number, and keeps one canonical
+component per number. Analyses (available expressions, constant propagation)
+can key their state by the numbers rather than by the components, and keep
+one entry per distinct expression.
+
+Two expressions are the same if they are the same variable (the same symbol;
+see the symbols module), the same literal, or the same operator applied to
+the same operands. The operands of commutative operators are ordered, so
+"1 + a" is the same as "a + 1". Allocations and function calls have effects,
+so every one of them gets a number of its own.
+
+The variables read by every expression are kept too, for analyses to know
+which assignments kill it. Nothing here knows what a pointer points to, so
+an expression reading through one (!p) also reads MEMORY: it's killed by
+any assignment through a pointer, and by any assignment to a variable whose
+address is taken (ref x), as well as by assignments to p.
+
+Numbering is opt-in, and doesn't change the program: the components of
+equal expressions stay separate (they have their own positions, and type
+checking renames and annotates variables in place), and are mapped to the
+canonical ones by the table.
+'''
+
+from sleuth.lingo.components import * #@UnusedWildImport
+from sleuth.lingo.symbols import VARIABLE_CLASSES
+from sleuth.lingo.traversal import walk
+
+
+# Operators whose operands can be swapped
+COMMUTATIVE_OPERATORS = frozenset([OperatorPlus, OperatorTimes, OperatorEqualTo, OperatorNotEqualTo,
+                                   OperatorAnd, OperatorOr])
+
+_NO_VARIABLES = frozenset()
+
+# Read by the expressions reading through pointers, in place of whatever
+# they may point to (never a symbol id, nor a name)
+MEMORY = -1
+
+_MEMORY_ONLY = frozenset([MEMORY])
+
+
+class ExpressionTable(object):
+    '''The value numbers of the expressions of a program.'''
+
+    def __init__(self):
+        # The structure of every expression, by number: a tuple of the class of
+        # the expression (or operator) and its symbol, value or operands
+        self.keys = []
+
+        # The first component numbered with every number
+        self.expressions = []
+
+        # The symbols (or names, if unresolved) of the variables read by the
+        # expression of every number
+        self.variables = []
+
+        # The number of every key
+        self._numbers = {}
+
+        # The number of every component numbered so far, but for variables
+        self._component_numbers = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __repr__(self):
+        return '<ExpressionTable of {0} expressions>'.format(len(self.keys))
+
+    def number(self, expression):
+        '''Get the number of an expression (numbering it, and the expressions in it, if they're new).'''
+        number = self.lookup(expression)
+        if number is not None:
+            return number
+
+        numbers = self._numbers
+        component_numbers = self._component_numbers
+        keys = self.keys
+        variables = self.variables
+        lookup = self.lookup
+
+        # Operands are numbered before their expressions, without recursing
+        stack = [expression]
+        while stack:
+            node = stack[-1]
+            node_class = node.__class__
+
+            if node_class in VARIABLE_CLASSES:
+                symbol = node.name if node.id is None else node.id
+                key = (node_class, symbol)
+                if node_class is DereferencedVariable:
+                    node_variables = frozenset([symbol, MEMORY])
+                else:
+                    node_variables = frozenset([symbol])
+            elif node in component_numbers:
+                stack.pop()
+                continue
+            elif node_class is BinaryExpression:
+                left = lookup(node.left_term)
+                right = lookup(node.right_term)
+                if left is None or right is None:
+                    if right is None:
+                        stack.append(node.right_term)
+                    if left is None:
+                        stack.append(node.left_term)
+                    continue
+
+                operator_class = node.operator.__class__
+                if operator_class in COMMUTATIVE_OPERATORS and right < left:
+                    left, right = right, left
+                key = (operator_class, left, right)
+                node_variables = variables[left] | variables[right]
+            elif node_class is Number or node_class is Boolean:
+                key = (node_class, node.value)
+                node_variables = _NO_VARIABLES
+            else:
+                # Never the same as anything else
+                key = (node_class, len(keys))
+                operands = _get_operands(node)
+                node_variables = frozenset(variable.name if variable.id is None else variable.id
+                                           for variable in operands)
+                if any(operand.__class__ is DereferencedVariable for operand in operands):
+                    node_variables |= _MEMORY_ONLY
+
+            stack.pop()
+            number = numbers.get(key)
+            if number is None:
+                number = numbers[key] = len(keys)
+                keys.append(key)
+                self.expressions.append(node)
+                variables.append(node_variables)
+            if node_class not in VARIABLE_CLASSES:
+                component_numbers[node] = number
+
+        return lookup(expression)
+
+    def lookup(self, expression):
+        '''Get the number of an expression that was numbered, or None.'''
+        expression_class = expression.__class__
+        if expression_class in VARIABLE_CLASSES:
+            # Variables are equal to (and hash like) the other variables of their
+            # symbol, even references to them, so they're looked up by their key
+            symbol = expression.name if expression.id is None else expression.id
+            return self._numbers.get((expression_class, symbol))
+        return self._component_numbers.get(expression)
+
+    def get_expression(self, number):
+        '''Get the canonical component of a number.'''
+        return self.expressions[number]
+
+    def get_canonical(self, expression):
+        '''Get the canonical component equal to an expression, numbering it if it's new.'''
+        return self.expressions[self.number(expression)]
+
+    def get_variables(self, number):
+        '''Get the symbol ids of the variables read by the expression of a number.
+
+        Assigning any of them kills the expression. If the expression reads
+        through a pointer, MEMORY is one of them: then it's also killed by
+        assignments through pointers, and to variables whose address is taken.
+        '''
+        return self.variables[number]
+
+    def is_constant(self, number):
+        '''Is the expression of a number made of literals only?'''
+        key_class = self.keys[number][0]
+        return not self.variables[number] and (key_class is Number or key_class is Boolean or
+                                               issubclass(key_class, Operator))
+
+
+def _get_operands(expression):
+    '''Get the variables used by a function call (or return).'''
+    if isinstance(expression, (FunctionCall, FunctionReturn)):
+        return [expression.function_variable] + expression.parameter_variables
+    return []
+
+
+class _Numberer(object):
+    '''Number the expressions (and variables) of commands.'''
+
+    def __init__(self, table):
+        self.number = table.number
+
+    def visit_function_definition(self, function_definition):
+        for parameter in function_definition.parameters:
+            self.number(parameter)
+
+    def visit_assignment_command(self, assignment_command):
+        self.number(assignment_command.assigned_variable)
+        self.number(assignment_command.expression)
+
+    def visit_conditional_command(self, conditional_command):
+        self.number(conditional_command.expression)
+
+    def visit_input_command(self, input_command):
+        self.number(input_command.variable)
+
+    def visit_return_command(self, return_command):
+        self.number(return_command.variable)
+
+
+def number_program(program, table = None):
+    '''Number every expression of a program, in a new ExpressionTable (or the given one).'''
+    if table is None:
+        table = ExpressionTable()
+
+    numberer = _Numberer(table)
+    for declaration in program.functions:
+        walk(declaration, numberer, commands_only = True)
+    walk(program.command, numberer, commands_only = True)
+
+    return table
@@ -12,39 +12,212 @@ object graphs constructed of LingoComponents.
   I don't care. (I like the name and I'm sticking with it!) )
 '''
 
-from ply.lex import lex, TOKEN #@UnresolvedImport
+from ply.lex import lex, LexToken, TOKEN #@UnresolvedImport
 from ply.yacc import yacc, debug_file #@UnresolvedImport
-from sleuth.common.exception import NestedException
+from sleuth.common.exception import LingoException, LingoLexingException, \
+    LingoParsingException
 from sleuth.lingo.components import * #@UnusedWildImport
+from sleuth.lingo.descent import DescentParser
+from sleuth.lingo.symbols import resolve_symbols
+from sleuth.lingo.tokenizer import LingoTokenizer
 from sleuth.lingo.types import *
+import copy
 import logging
 import os.path
+import threading
 
 
 logger = logging.getLogger(__name__)
 
-class LingoParser(object):
+LINGO_DIRECTORY = os.path.dirname(__file__)
+
+# The precompiled parse tables are imported by their fully qualified name, so
+# they are found no matter what the current working directory is.
+PARSE_TABLES_MODULE = 'sleuth.lingo.yacc_parse_tables'
+
+
+class _ParserCache(object):
+    '''Process-wide cache of the PLY lexers and parsers built for Lingo.
+    
+    Building a PLY lexer reflects over the token rules and compiles the master
+    regular expression, and building a PLY parser loads (or, worse, generates)
+    the LALR tables. Both only depend on the grammar, so they are built once
+    per LingoParser class (and start symbol) and shared by every instance.
+    
+    Lexers carry the state of the input being tokenized, so callers only ever 
+    receive clones of the cached lexers. PLY parsers keep the state of the
+    parse (and their productions and error function are bound to the
+    LingoParser that built them), so callers only ever receive copies of the
+    cached parsers, sharing the parse tables but bound to the caller.
+    '''
 
     def __init__(self):
-        self.lexer = lex(module = self, errorlog = logger)
+        self._lock = threading.Lock()
+        self._lexers = {}
+        self._parsers = {}
+
+    def get_lexer(self, lingo_parser):
+        '''Get a lexer bound to the given LingoParser instance.'''
+        key = lingo_parser.__class__
+
+        lexer = self._lexers.get(key)
+        if lexer is None:
+            with self._lock:
+                lexer = self._lexers.get(key)
+                if lexer is None:
+                    lexer = lex(module = lingo_parser, errorlog = logger)
+                    self._lexers[key] = lexer
+
+        return lexer.clone(lingo_parser)
+
+    def get_parser(self, lingo_parser, write_tables = False):
+        '''Get a parser for the class and start symbol of the given LingoParser, bound to it.
+        
+        The productions of the parser call the p_* methods of the given
+        LingoParser (as they are when this is called, so customizations made
+        to the instance before its first parse are kept).
+        
+        Unless write_tables is set, the parse tables are only ever read from
+        the precompiled table module. If the tables do not match the grammar 
+        (or the start symbol), they are regenerated in memory and nothing is 
+        written into the package directory.
+        '''
+        key = (lingo_parser.__class__, lingo_parser.start)
+
+        parser = self._parsers.get(key)
+        if parser is None:
+            with self._lock:
+                parser = self._parsers.get(key)
+                if parser is None:
+                    parser = self._build_parser(lingo_parser, write_tables)
+                    self._parsers[key] = parser
+
+        return self._bind_parser(parser, lingo_parser)
+
+    def clear(self):
+        '''Forget all cached lexers and parsers.'''
+        with self._lock:
+            self._lexers.clear()
+            self._parsers.clear()
+
+    def _bind_parser(self, parser, lingo_parser):
+        '''Copy a cached parser, sharing its tables, with its productions bound to the given LingoParser.'''
+        bound_parser = copy.copy(parser)
+        bound_parser.productions = []
+        for production in parser.productions:
+            production = copy.copy(production)
+            if production.func:
+                production.callable = getattr(lingo_parser, production.func)
+            bound_parser.productions.append(production)
+        bound_parser.errorfunc = lingo_parser.p_error
+        return bound_parser
+
+    def _build_parser(self, lingo_parser, write_tables):
+        if write_tables:
+            return yacc(module = lingo_parser,
+                        start = lingo_parser.start,
+                        tabmodule = 'yacc_parse_tables',
+                        errorlog = logger,
+                        outputdir = LINGO_DIRECTORY,
+                        debug = True,
+                        debugfile = debug_file)
+
+        return yacc(module = lingo_parser,
+                    start = lingo_parser.start,
+                    tabmodule = PARSE_TABLES_MODULE,
+                    errorlog = logger,
+                    debug = False,
+                    write_tables = False)
+
+parser_cache = _ParserCache()
+
+
+# Names of the available tokenizers
+TOKENIZER_PLY = 'ply'
+TOKENIZER_REGEX = 'regex'
+
+# Names of the available parser backends
+BACKEND_YACC = 'yacc'
+BACKEND_DESCENT = 'descent'
+
+
+class LingoParser(object):
+
+    def __init__(self, tokenizer = TOKENIZER_PLY, backend = BACKEND_YACC, track_positions = True):
+        '''Create a parser.
+        
+        The tokenizer selects how source text is split into tokens: either with 
+        the PLY lexer built from the t_* rules below (TOKENIZER_PLY), or with 
+        the hand-written LingoTokenizer (TOKENIZER_REGEX). Both produce the same
+        tokens.
+        
+        The backend selects how the tokens are parsed: either with the PLY 
+        (LALR) parser built from the p_* productions below (BACKEND_YACC), or
+        with the hand-written DescentParser (BACKEND_DESCENT), which needs no
+        parse tables and is considerably faster. Both produce the same
+        LingoComponents.
+        
+        Unless track_positions is set, the PLY backend only records where 
+        components start: their line spans and lex spans start and end at the
+        first token of the component. This saves the cost of tracking the 
+        ends of every production, for runs that never show source positions.
+        (The descent backend gets complete spans at no extra cost, so it 
+        always records them.)
+        '''
+        if tokenizer == TOKENIZER_PLY:
+            self.lexer = parser_cache.get_lexer(self)
+        elif tokenizer == TOKENIZER_REGEX:
+            self.lexer = LingoTokenizer(self.keywords)
+        else:
+            raise ValueError('Unknown tokenizer: {0}'.format(tokenizer))
+
+        self.tokenizer = tokenizer
+
+        if backend not in (BACKEND_YACC, BACKEND_DESCENT):
+            raise ValueError('Unknown parser backend: {0}'.format(backend))
+
+        self.backend = backend
+        self.track_positions = track_positions
 
         # Delay creating the parser to allow for runtime customizations
         self.parser = None
 
+        # A PLY parser keeps the state of the parse, so it parses one source
+        # text at a time
+        self._parse_lock = threading.Lock()
+        self._parser_start = None
+
+    @classmethod
+    def generate_tables(cls):
+        '''Regenerate the precompiled parse tables (and debug file) in the package.
+        
+        This only needs to be done after changing the grammar. Regular parsing
+        never writes into the package directory.
+        '''
+        lingo_parser = cls()
+        lingo_parser.parser = parser_cache._build_parser(lingo_parser, write_tables = True)
+        return lingo_parser.parser
+
     def parse(self, source_text):
         # Fix up newlines!
         source_text = source_text.replace('\r\n', '\n')
 
-        lingo_directory = os.path.dirname(__file__)
-        debug_filename = os.path.join(lingo_directory, debug_file)
+        # Tokenize with a private copy of the lexer so that concurrent calls
+        # don't trample each other's input.
+        lexer = self.lexer.clone()
+        lexer.lineno = 1
+
+        if self.backend == BACKEND_DESCENT:
+            return DescentParser(self, lexer).parse(source_text)
+
+        with self._parse_lock:
+            if self.parser is None or self._parser_start != self.start:
+                self.parser = parser_cache.get_parser(self)
+                self._parser_start = self.start
 
-        self.parser = yacc(module = self,
-                           tabmodule = 'yacc_parse_tables',
-                           errorlog = logger,
-                           outputdir = lingo_directory,
-                           debugfile = debug_filename)
-        return self.parser.parse(source_text,
-                                 tracking = True)
+            return self.parser.parse(source_text,
+                                     lexer = lexer,
+                                     tracking = self.track_positions)
 
 
     #
@@ -216,10 +389,38 @@ class LingoParser(object):
                                                          marker_line = marker_line,
                                                          lex_token = t))
 
+    def start_position(self, p):
+        '''Get the line number and lex position of the first token of a production.'''
+        for symbol in p.slice[1:]:
+            if isinstance(symbol, LexToken):
+                return symbol.lineno, symbol.lexpos
+
+            value = symbol.value
+            if isinstance(value, list):
+                # Skip empty lists (of function declarations)
+                if not value:
+                    continue
+                value = value[0]
+
+            return value.line_span[0], value.lex_span[0]
+
+        return 1, 0
+
+    def line_span(self, p):
+        if not self.track_positions:
+            line = self.start_position(p)[0]
+            return (line, line)
+
+        return p.linespan(0)
+
     def lex_span(self, p, target = 0):
         if hasattr(p[target], 'lex_span'):
             return p[target].lex_span
 
+        if not self.track_positions:
+            start = self.start_position(p)[1]
+            return (start, start)
+
         start = p.lexspan(0)[0]
 
         last_index = len(p) - 1
@@ -241,7 +442,8 @@ class LingoParser(object):
 
     def p_program(self, p):
         '''program : function_declaration_list command'''
-        p[0] = Program(p[1], p[2], line_span = p.linespan(0), lex_span = self.lex_span(p))
+        p[0] = Program(p[1], p[2], line_span = self.line_span(p), lex_span = self.lex_span(p))
+        resolve_symbols(p[0])
 
     #
     # Function Rules
@@ -249,7 +451,8 @@ class LingoParser(object):
 
     def p_function_declaration_list_list(self, p):
         '''function_declaration_list : function_declaration_list function_declaration'''
-        p[0] = p[1] + [p[2]]
+        p[1].append(p[2])
+        p[0] = p[1]
 
     def p_function_declaration_list_single(self, p):
         '''function_declaration_list : function_declaration'''
@@ -263,11 +466,11 @@ class LingoParser(object):
         '''function_declaration : KEYWORD_DEF IDENTIFIER OP_CMP_EQ function_definition'''
         # Note: Due to how Ply treats tokens, we have to use the same token for both
         #    the equality comparision and binding operators.
-        p[0] = FunctionDeclaration(p[2], p[4], line_span = p.linespan(0), lex_span = self.lex_span(p))
+        p[0] = FunctionDeclaration(p[2], p[4], line_span = self.line_span(p), lex_span = self.lex_span(p))
 
     def p_function_definition(self, p):
         '''function_definition : KEYWORD_FUN LPAREN variable_list RPAREN LBRACE function_body RBRACE'''
-        p[0] = FunctionDefinition(p[3], p[6], line_span = p.linespan(0), lex_span = self.lex_span(p))
+        p[0] = FunctionDefinition(p[3], p[6], line_span = self.line_span(p), lex_span = self.lex_span(p))
 
     def p_function_body(self, p):
         '''function_body : command SEMI command_return
@@ -288,7 +491,7 @@ class LingoParser(object):
         '''function_application : variable LPAREN variable_list RPAREN
                                 | dereferenced_variable LPAREN variable_list RPAREN
         '''
-        p[0] = FunctionCall(p[1], p[3], line_span = p.linespan(0), lex_span = self.lex_span(p))
+        p[0] = FunctionCall(p[1], p[3], line_span = self.line_span(p), lex_span = self.lex_span(p))
 
     #
     # Command Rules
@@ -306,30 +509,30 @@ class LingoParser(object):
         '''command : variable OP_ASSIGNMENT assignment_rhs 
                    | dereferenced_variable OP_ASSIGNMENT assignment_rhs
         '''
-        p[0] = AssignmentCommand(p[1], p[3], line_span = p.linespan(0), lex_span = self.lex_span(p))
+        p[0] = AssignmentCommand(p[1], p[3], line_span = self.line_span(p), lex_span = self.lex_span(p))
 
     def p_command_if(self, p):
         '''command : KEYWORD_IF LPAREN expression RPAREN KEYWORD_THEN LBRACE command RBRACE KEYWORD_ELSE LBRACE command RBRACE'''
-        p[0] = IfCommand(p[3], p[7], p[11], line_span = p.linespan(0), lex_span = self.lex_span(p, target = 3))
+        p[0] = IfCommand(p[3], p[7], p[11], line_span = self.line_span(p), lex_span = self.lex_span(p, target = 3))
 
     def p_command_while(self, p):
         '''command : KEYWORD_WHILE LPAREN expression RPAREN KEYWORD_DO LBRACE command RBRACE'''
-        p[0] = WhileCommand(p[3], p[7], line_span = p.linespan(0), lex_span = self.lex_span(p, target = 3))
+        p[0] = WhileCommand(p[3], p[7], line_span = self.line_span(p), lex_span = self.lex_span(p, target = 3))
 
     def p_command_skip(self, p):
         '''command : KEYWORD_SKIP'''
-        p[0] = SkipCommand(line_span = p.linespan(0), lex_span = self.lex_span(p))
+        p[0] = SkipCommand(line_span = self.line_span(p), lex_span = self.lex_span(p))
 
     def p_command_input(self, p):
         ''' command : KEYWORD_INPUT variable'''
-        p[0] = InputCommand(p[2], line_span = p.linespan(0), lex_span = self.lex_span(p))
+        p[0] = InputCommand(p[2], line_span = self.line_span(p), lex_span = self.lex_span(p))
 
     def p_command_return(self, p):
         '''command_return : KEYWORD_RETURN variable'''
         # According to the abstract syntax grammar, the return statement isn't really
         # a "command", but they're functionally the same, other than the syntax
         # requires them to appear only and always at the end of functions. 
-        p[0] = ReturnCommand(p[2], p.linespan(0), lex_span = self.lex_span(p))
+        p[0] = ReturnCommand(p[2], line_span = self.line_span(p), lex_span = self.lex_span(p))
 
 
     #
@@ -337,7 +540,7 @@ class LingoParser(object):
     #
     def p_assignment_rhs_new(self, p):
         '''assignment_rhs : KEYWORD_NEW type'''
-        p[0] = New(p[2], line_span=p.linespan(0), lex_span = self.lex_span(p))
+        p[0] = New(p[2], line_span = self.line_span(p), lex_span = self.lex_span(p))
     def p_assignment_rhs_expression(self, p):
         '''assignment_rhs : expression'''
         assert isinstance(p[1], Expression), p[1]
@@ -365,7 +568,7 @@ class LingoParser(object):
         p[0] = p[1]
     def p_ref_type(self, p):
         ''' ref_type : KEYWORD_REF type '''
-        p[0] = Reference(p[2], p.linespan(0)[0])
+        p[0] = Reference(p[2], p.lineno(1))
     def p_int_type(self, p):
         ''' int_type : KEYWORD_INT '''
         p[0] = Primitive("INTEGER")
@@ -397,7 +600,7 @@ class LingoParser(object):
         if len(p) == 6:
             shift = 1
 
-        p[0] = BinaryExpression(p[1 + shift], p[2 + shift], p[3 + shift], line_span = p.linespan(0), lex_span = self.lex_span(p))
+        p[0] = BinaryExpression(p[1 + shift], p[2 + shift], p[3 + shift], line_span = self.line_span(p), lex_span = self.lex_span(p))
 
 
     #
@@ -405,7 +608,8 @@ class LingoParser(object):
     #
     def p_variable_list_list(self, p):
         ''' variable_list : variable_list COMMA variable'''
-        p[0] =  p[1] + [p[3]]
+        p[1].append(p[3])
+        p[0] = p[1]
     def p_variable_list_single(self, p):
         '''variable_list : variable '''
         p[0] = [p[1]]
@@ -414,25 +618,25 @@ class LingoParser(object):
         p[0] = []
     def p_variable(self, p):
         '''variable : IDENTIFIER'''
-        p[0] = Variable(p[1], line_span = p.linespan(0), lex_span = self.lex_span(p))
+        p[0] = Variable(p[1], line_span = self.line_span(p), lex_span = self.lex_span(p))
 
     def p_referenced_variable(self, p):
         '''referenced_variable : KEYWORD_REF IDENTIFIER'''
-        p[0] = ReferencedVariable(p[2], line_span = p.linespan(0), lex_span = self.lex_span(p))
+        p[0] = ReferencedVariable(p[2], line_span = self.line_span(p), lex_span = self.lex_span(p))
 
     def p_dereferenced_variable(self, p):
         '''dereferenced_variable : OP_DEREF IDENTIFIER'''
-        p[0] = DereferencedVariable(p[2], line_span = p.linespan(0), lex_span = self.lex_span(p))
+        p[0] = DereferencedVariable(p[2], line_span = self.line_span(p), lex_span = self.lex_span(p))
 
     def p_bool(self, p):
         '''bool : KEYWORD_TRUE
                 | KEYWORD_FALSE
         '''
-        p[0] = Boolean(p[1] == 'true', line_span = p.linespan(0), lex_span = self.lex_span(p))
+        p[0] = Boolean(p[1] == 'true', line_span = self.line_span(p), lex_span = self.lex_span(p))
 
     def p_number(self, p):
         '''number : NUMBER'''
-        p[0] = Number(p[1], line_span = p.linespan(0), lex_span = self.lex_span(p))
+        p[0] = Number(p[1], line_span = self.line_span(p), lex_span = self.lex_span(p))
 
     def p_operator(self, p):
         '''operator : OP_PLUS
@@ -462,17 +666,5 @@ class LingoParser(object):
         }
 
         operator_class = operator_map[p[1]]
-        p[0] = operator_class(p[1], line_span = p.linespan(0), lex_span = self.lex_span(p))
-
-#
-# Exceptions
-#
-
-class LingoException(NestedException):
-    pass
-
-class LingoLexingException(LingoException):
-    pass
+        p[0] = operator_class(p[1], line_span = self.line_span(p), lex_span = self.lex_span(p))
 
-class LingoParsingException(LingoException):
-    pass
@@ -0,0 +1,183 @@
+'''
+Provide the symbol table of a Lingo program.
+
+Every distinct variable of a program (a name, in the scope declaring it) is
+given a dense integer id, starting at 0, and every Variable in the program
+is resolved to the id of its symbol. Analyses can then key their state by
+the id, or keep it in a flat list indexed by the id, rather than in dicts
+keyed by name.
+
+Lingo scopes variables by function: within a function declaration (its
+parameters and its body) every variable is local to the function, except
+for the names of the declared functions, which are global like every
+variable outside the functions. These are the rules typecheck.Rename
+follows when it prefixes local names with their function.
+
+The names of the variables are interned, so the Variables of a symbol share
+a single string.
+
+A symbol that no Variable uses any more (after an edit, see the incremental
+module) can be dropped. Its id is given out again to the next new symbol, so
+the ids stay dense; until then, its name and scope are None.
+'''
+
+from sleuth.lingo.components import * #@UnusedWildImport
+from itertools import izip
+
+
+VARIABLE_CLASSES = frozenset([Variable, ReferencedVariable, DereferencedVariable])
+
+
+class SymbolTable(object):
+    '''The symbols of a program, by their ids.'''
+
+    def __init__(self, function_names = ()):
+        # The name and the scope of every symbol, by id. The scope is the
+        # name of the function declaring the symbol, or None for globals.
+        self.names = []
+        self.scopes = []
+
+        self.function_names = frozenset(intern(name) for name in function_names)
+
+        # The id of every symbol, by (scope, name)
+        self._ids = {}
+
+        # The ids of dropped symbols
+        self._free_ids = []
+
+        for name in sorted(self.function_names):
+            self.add(name, None)
+
+    @classmethod
+    def rebuild(cls, names, scopes, function_names):
+        '''Make the table with the given names and scopes by id (as written out from a table).'''
+        table = cls(function_names)
+
+        free_ids = []
+        for name, scope in izip(names, scopes):
+            if name is None:
+                free_ids.append(len(table.names))
+                table.names.append(None)
+                table.scopes.append(None)
+            else:
+                table.add(name, scope)
+
+        table._free_ids = free_ids
+        return table
+
+    def __len__(self):
+        return len(self.names)
+
+    def __repr__(self):
+        return '<SymbolTable of {0} symbols>'.format(len(self.names))
+
+    def add(self, name, scope):
+        '''Get the id of the symbol with the given name in the given scope, adding it if it's new.'''
+        key = (scope, name)
+        symbol_id = self._ids.get(key)
+        if symbol_id is None:
+            symbol_id = self._new_symbol(key)
+
+        return symbol_id
+
+    def _new_symbol(self, key):
+        if self._free_ids:
+            symbol_id = self._free_ids.pop()
+            self.scopes[symbol_id], self.names[symbol_id] = key[0], intern(key[1])
+        else:
+            symbol_id = len(self.names)
+            self.scopes.append(key[0])
+            self.names.append(intern(key[1]))
+
+        self._ids[key] = symbol_id
+        return symbol_id
+
+    def drop(self, symbol_id):
+        '''Drop a symbol that no Variable uses any more.
+
+        The names of the declared functions are global symbols as long as the
+        functions are declared, so they are never dropped.
+        '''
+        name = self.names[symbol_id]
+        assert name not in self.function_names, name
+
+        del self._ids[(self.scopes[symbol_id], name)]
+        self.names[symbol_id] = None
+        self.scopes[symbol_id] = None
+        self._free_ids.append(symbol_id)
+
+    def get_scope(self, name, function_name):
+        '''Get the scope of a variable with the given name, used in the given function (or None).'''
+        if function_name is None or name in self.function_names:
+            return None
+        return function_name
+
+    def lookup(self, name, function_name = None):
+        '''Get the id of a variable with the given name, used in the given function (or at the top level).
+
+        Returns None if the program has no such variable (or it was dropped).
+        '''
+        return self._ids.get((self.get_scope(name, function_name), name))
+
+    def get_name(self, symbol_id):
+        return self.names[symbol_id]
+
+    def new_array(self, value = None):
+        '''Make a list with the given value for every symbol, to be indexed by symbol ids.'''
+        return [value] * len(self.names)
+
+    def resolve(self, component, function_name = None):
+        '''Resolve the Variables in the component (and the commands after it).
+
+        The component is used in the function with the given name, or at the
+        top level if function_name is None. A function declaration is
+        resolved in its own scope.
+        '''
+        if component.__class__ is FunctionDeclaration:
+            function_name = component.name = intern(component.name)
+            self.add(function_name, None)
+
+        ids = self._ids
+        names = self.names
+        function_names = self.function_names
+        variable_classes = VARIABLE_CLASSES
+
+        stack = [component]
+        pop = stack.pop
+        push = stack.append
+
+        while stack:
+            node = pop()
+            node_class = node.__class__
+
+            if node_class in variable_classes:
+                name = node.name
+                if name in function_names:
+                    key = (None, name)
+                else:
+                    key = (function_name, name)
+
+                symbol_id = ids.get(key)
+                if symbol_id is None:
+                    symbol_id = self._new_symbol(key)
+
+                node.name = names[symbol_id]
+                node.id = symbol_id
+                continue
+
+            for name in get_child_names(node):
+                value = getattr(node, name)
+                if value.__class__ is list:
+                    stack.extend(value)
+                elif value is not None:
+                    push(value)
+
+def resolve_symbols(program):
+    '''Make the symbol table of the program, and resolve every Variable in it.'''
+    table = SymbolTable([declaration.name for declaration in program.functions])
+    for declaration in program.functions:
+        table.resolve(declaration)
+    table.resolve(program.command)
+
+    program.symbols = table
+    return table
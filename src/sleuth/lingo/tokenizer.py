@@ -0,0 +1,189 @@
+'''
+Provide a hand-written tokenizer for the PySleuth language "Lingo".
+
+The LingoTokenizer is an alternative to the PLY lexer that LingoParser builds
+from its t_* rules. All tokens are recognized by a single compiled regular
+expression with one named group per token, and comments are skipped by
+searching for their terminator instead of matching them with a regular
+expression, which keeps long comments linear.
+
+The tokenizer implements the part of the PLY lexer interface that the PLY
+parser uses (input, token, lineno, lexpos and lexdata), and produces the same
+token stream, with the same line numbers and lex positions, as the PLY lexer.
+'''
+
+from ply.lex import LexToken #@UnresolvedImport
+from sleuth.common.exception import LingoLexingException
+import re
+
+
+# Operators and punctuation, ordered so that longer tokens are tried before
+# their prefixes (e.g. "<=" before "<").
+LITERAL_TOKENS = [
+    ('OP_BOOL_OR', '||'),
+    ('OP_BOOL_AND', '&&'),
+    ('OP_CMP_NE', '!='),
+    ('OP_CMP_LTE', '<='),
+    ('OP_ASSIGNMENT', ':='),
+
+    ('OP_PLUS', '+'),
+    ('OP_MINUS', '-'),
+    ('OP_TIMES', '*'),
+    ('OP_DIVIDE', '/'),
+    ('OP_CMP_LT', '<'),
+    ('OP_CMP_EQ', '='),
+    ('OP_DEREF', '!'),
+
+    ('LPAREN', '('),
+    ('RPAREN', ')'),
+    ('LBRACE', '{'),
+    ('RBRACE', '}'),
+    ('SEMI', ';'),
+    ('COMMA', ','),
+]
+
+# Comments are matched by their opening characters only. They have to come
+# before the OP_DIVIDE token, which shares their first character.
+TOKEN_PATTERN = '|'.join([r'(?P<IDENTIFIER>[_A-Za-z][_A-Za-z0-9]*)',
+                          r'(?P<NUMBER>\d+)',
+                          r'(?P<newline>\n+)',
+                          r'(?P<comment>/[/*])'] +
+                         ['(?P<{0}>{1})'.format(token_type, re.escape(text))
+                          for token_type, text in LITERAL_TOKENS])
+
+# Spaces and tabs are skipped as part of matching the token that follows them.
+IGNORED_CHARACTERS = ' \t'
+MASTER_PATTERN = '[{0}]*(?:{1})'.format(IGNORED_CHARACTERS, TOKEN_PATTERN)
+
+master_regex = re.compile(MASTER_PATTERN)
+
+# The token types by group number, so tokens can be told apart by 
+# Match.lastindex without looking up group names.
+GROUP_TYPES = dict((group_number, group_name) 
+                   for group_name, group_number in master_regex.groupindex.items())
+
+IDENTIFIER_GROUP = master_regex.groupindex['IDENTIFIER']
+NUMBER_GROUP = master_regex.groupindex['NUMBER']
+NEWLINE_GROUP = master_regex.groupindex['newline']
+COMMENT_GROUP = master_regex.groupindex['comment']
+DIVIDE_GROUP = master_regex.groupindex['OP_DIVIDE']
+
+# Terminators of the single and multi line comments
+COMMENT_TERMINATORS = {
+    '//' : '\n',
+    '/*' : '*/',
+}
+
+
+class LingoTokenizer(object):
+    '''Tokenize Lingo source text with a single master regular expression.'''
+
+    def __init__(self, keywords):
+        self.keywords = keywords
+        self.input('')
+
+    def clone(self):
+        '''Get a new tokenizer for the same keywords.'''
+        return LingoTokenizer(self.keywords)
+
+    def input(self, lexdata):
+        self.lexdata = lexdata
+        self.lexpos = 0
+        self.lineno = 1
+
+        # The position from which each comment terminator is known to be
+        # missing, so unterminated comments don't rescan the rest of the input.
+        self._missing_terminators = {}
+
+    def token(self):
+        lexdata = self.lexdata
+        lexpos = self.lexpos
+        lexlen = len(lexdata)
+        match = master_regex.match
+
+        while lexpos < lexlen:
+            m = match(lexdata, lexpos)
+            if m is None:
+                return self._no_match(lexpos)
+
+            group = m.lastindex
+            lexpos, end = m.span(group)
+
+            if group == NEWLINE_GROUP:
+                self.lineno += end - lexpos
+                lexpos = end
+                continue
+
+            if group == COMMENT_GROUP:
+                end = self._find_comment_end(lexpos, lexdata[lexpos:end])
+                if end >= 0:
+                    self.lineno += lexdata.count('\n', lexpos, end)
+                    lexpos = end
+                    continue
+
+                # An unterminated comment is just a division operator
+                group = DIVIDE_GROUP
+                end = lexpos + 1
+
+            token = LexToken()
+            value = lexdata[lexpos:end]
+
+            if group == IDENTIFIER_GROUP:
+                token.type = self.keywords.get(value, 'IDENTIFIER')
+            elif group == NUMBER_GROUP:
+                token.type = 'NUMBER'
+                value = int(value)
+            else:
+                token.type = GROUP_TYPES[group]
+
+            token.value = value
+            token.lineno = self.lineno
+            token.lexpos = lexpos
+
+            self.lexpos = end
+            return token
+
+        self.lexpos = lexpos
+        return None
+
+    def _no_match(self, lexpos):
+        '''Handle input at lexpos that doesn't start with a token.
+        
+        This is either trailing whitespace, or an unrecognized character.
+        '''
+        lexdata = self.lexdata
+        while lexpos < len(lexdata) and lexdata[lexpos] in IGNORED_CHARACTERS:
+            lexpos += 1
+
+        self.lexpos = lexpos
+        if lexpos == len(lexdata):
+            return None
+
+        message = "Unrecognized character for tokenizer on line {0}: '{1}'".format(self.lineno,
+                                                                                   lexdata[lexpos])
+        raise LingoLexingException(message)
+
+    def _find_comment_end(self, lexpos, opening):
+        '''Get the position after the comment starting at lexpos, or -1 if it is not terminated.'''
+        terminator = COMMENT_TERMINATORS[opening]
+        search_start = lexpos + 2
+
+        missing_from = self._missing_terminators.get(terminator)
+        if missing_from is not None and search_start >= missing_from:
+            return -1
+
+        index = self.lexdata.find(terminator, search_start)
+        if index < 0:
+            self._missing_terminators[terminator] = search_start
+            return -1
+
+        return index + len(terminator)
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        token = self.token()
+        if token is None:
+            raise StopIteration
+        return token
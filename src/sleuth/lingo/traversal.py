@@ -0,0 +1,224 @@
+'''
+Provide walks over Lingo component trees that don't recurse.
+
+walk visits a component, everything in it, and the commands after it (like
+visit_command_block), keeping the components still to visit on an explicit
+stack, so arbitrarily long sequences and deeply nested blocks can be walked
+without raising the recursion limit.
+
+The visitor's methods are named as for accept: a component is visited by
+visit_<name of its class in lower case, separated by underscores>, so an
+IfCommand is visited by visit_if_command. If the visitor has no method for
+the class itself, the method for the nearest base class is used (so
+visit_command visits every kind of command), and components without any
+method are walked through without a call. A component is visited before the
+components in it; a leave_<name> method, if there is one, is called after
+them. Returning PRUNE from a visit method skips the components in it.
+
+A visitor whose visit methods go on to the components in them themselves
+(through accept, as TypeCheck's do) can't be walked with them. It can give
+walk other methods to use instead, named with another prefix (say,
+enter_if_command), and be walked with that prefix.
+
+The methods for every class of component are looked up once per class of
+visitor and kept in a table (a WalkPlan), so walking a component costs a
+dict lookup rather than a call to accept and an attribute lookup on the
+visitor. Components the visitor has no use for (operators and literals,
+usually) aren't even put on the stack.
+
+The components in a component are walked in the order they appear in the
+source text. The [RET] half of a function call assignment shares its
+variables with the [CALL] half, so only its FunctionReturn is walked.
+'''
+
+from sleuth.lingo.components import * #@UnusedWildImport
+from operator import attrgetter
+import re
+
+
+# Returned by a visit method to skip the components in the visited component
+PRUNE = object()
+
+# The attributes holding the components in a component, in source order, by
+# component class. The commands in a sequence follow each other rather than
+# being in the first command.
+CHILDREN = {
+    Program : ('functions', 'command'),
+    FunctionDeclaration : ('definition',),
+    FunctionDefinition : ('parameters', 'body'),
+    AssignmentCommand : ('assigned_variable', 'expression'),
+    IfCommand : ('expression', 'true_block', 'false_block'),
+    WhileCommand : ('expression', 'loop_block'),
+    InputCommand : ('variable',),
+    ReturnCommand : ('variable',),
+    BinaryExpression : ('left_term', 'operator', 'right_term'),
+    FunctionCall : ('function_variable', 'parameter_variables'),
+    FunctionReturn : (),
+}
+
+# The same, for walks over the commands only
+COMMAND_CHILDREN = {
+    Program : ('functions', 'command'),
+    FunctionDeclaration : ('definition',),
+    FunctionDefinition : ('body',),
+    IfCommand : ('true_block', 'false_block'),
+    WhileCommand : ('loop_block',),
+}
+
+
+def get_children(component_class, children = CHILDREN):
+    '''Get the attributes holding the components in a component class, in source order.'''
+    names = children.get(component_class)
+    if names is None:
+        # Classes defined elsewhere walk like their bases
+        names = ()
+        for base in component_class.__mro__[1:]:
+            if base in children:
+                names = children[base]
+                break
+        children[component_class] = names
+
+    return names
+
+
+def make_getter(names):
+    '''Make a function getting a tuple of the named attributes of a component (or None if there are none).'''
+    if not names:
+        return None
+    if len(names) == 1:
+        get = attrgetter(names[0])
+        return lambda component: (get(component),)
+    return attrgetter(*names)
+
+
+def get_method_name(prefix, component_class):
+    '''Get the name of the method of a visitor for a component class, as for accept.'''
+    return prefix + re.sub('(?<=[a-z0-9])([A-Z])', r'_\1', component_class.__name__).lower()
+
+
+class WalkPlan(dict):
+    '''How to walk every class of component with a class of visitor.
+
+    By component class: whether the component is a command, the visit and
+    leave methods of the visitor (or None), a function getting the
+    components in it (in source order, or None if there are none), and
+    whether it is a leaf that only needs visiting. None for components that
+    have neither methods nor components in them, which aren't walked at all.
+    '''
+
+    def __init__(self, visitor_class, children, prefix = 'visit_'):
+        super(WalkPlan, self).__init__()
+        self.visitor_class = visitor_class
+        self.children = children
+        self.prefix = prefix
+
+    def get_method(self, prefix, component_class):
+        for base in component_class.__mro__:
+            method = getattr(self.visitor_class, get_method_name(prefix, base), None)
+            if method is not None:
+                # The function itself is quicker to call than the unbound method
+                return getattr(method, 'im_func', method)
+        return None
+
+    def __missing__(self, component_class):
+        is_command = issubclass(component_class, Command)
+        visit = self.get_method(self.prefix, component_class)
+        leave = self.get_method('leave_', component_class)
+        names = get_children(component_class, self.children)
+
+        if is_command or leave or names:
+            plan = (is_command, visit, leave, make_getter(names), False)
+        elif visit:
+            plan = (False, visit, None, None, True)
+        else:
+            plan = None
+
+        self[component_class] = plan
+        return plan
+
+
+_walk_plans = {}
+
+def get_walk_plan(visitor_class, commands_only = False, prefix = 'visit_'):
+    '''Get the WalkPlan of a visitor class.'''
+    key = (visitor_class, bool(commands_only), prefix)
+    plan = _walk_plans.get(key)
+    if plan is None:
+        plan = _walk_plans[key] = WalkPlan(visitor_class, COMMAND_CHILDREN if commands_only else CHILDREN, prefix)
+    return plan
+
+
+# Marks the place on the stack where a component is left
+_LEAVE = object()
+
+# Gets what is walked in the [RET] half of a function call assignment
+_get_return_children = make_getter(('expression',))
+
+def walk(root, visitor, commands_only = False, prefix = 'visit_'):
+    '''Walk the components under root, and the commands after it, with the visitor.
+
+    If commands_only is true, only the program, function declarations (and
+    definitions) and commands are walked, and not their expressions. The
+    components are visited by the visitor's methods named with prefix.
+    '''
+    plans = get_walk_plan(visitor.__class__, commands_only, prefix)
+
+    stack = [root]
+    pop = stack.pop
+    push = stack.append
+    insert = stack.insert
+
+    while stack:
+        node = pop()
+
+        if node is _LEAVE:
+            node = pop()
+            plans[node.__class__][2](visitor, node)
+            continue
+
+        plan = plans[node.__class__]
+        if plan is None:
+            continue
+        is_command, visit, leave, children, _ = plan
+
+        if is_command:
+            if node._next_command is not None:
+                push(node._next_command)
+            if node.__class__ is AssignmentCommand and children and node.expression.__class__ is FunctionReturn:
+                children = _get_return_children
+
+        if visit is not None and visit(visitor, node) is PRUNE:
+            continue
+
+        if leave is not None:
+            push(node)
+            push(_LEAVE)
+
+        if children is None:
+            continue
+
+        # The components in this one are pushed in reverse, so they are popped
+        # in order. Leaves are visited right away instead, unless there is a
+        # component before them still to walk.
+        top = len(stack)
+        deferred = False
+        for value in children(node):
+            if value.__class__ is list:
+                for item in value:
+                    plan = plans[item.__class__]
+                    if plan is None:
+                        continue
+                    if plan[4] and not deferred:
+                        plan[1](visitor, item)
+                    else:
+                        insert(top, item)
+                        deferred = True
+            elif value is not None:
+                plan = plans[value.__class__]
+                if plan is None:
+                    continue
+                if plan[4] and not deferred:
+                    plan[1](visitor, value)
+                else:
+                    insert(top, value)
+                    deferred = True
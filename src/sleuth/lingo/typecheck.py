@@ -1,8 +1,8 @@
 from sleuth.common.exception import TypeException
 from sleuth.lingo.components import *
+from sleuth.lingo.traversal import walk
 from sleuth.lingo.types import *
 import sys
-import copy
 
 ''' 
     First renames all variables within functions to prepend with function name, that way
@@ -27,6 +27,7 @@ class TypeCheck:
         self.variables = {}
         self.functions = []
         self.return_variable = None
+        self.signature = None
         self.annotate_types = annotate_types
     '''
         Print every variable that was visited and types were not inferred.
@@ -158,17 +159,38 @@ class TypeCheck:
     Visit a Program node in the AST
     
     Visit each function declaration, then each command in the linked list of commands.
+    Only the commands are walked (with the enter_ methods, so nesting doesn't
+    recurse); their expressions are checked by evaluate_known.
     '''
     def visit_program(self, program):
         self.program = program
         self.rename = Rename(self.variables)
         self.rename.visit_program(program)
         for functionDeclaration in program.functions:
-            functionDeclaration.accept(self)
-        self.visit_command_block(program.command)
+            walk(functionDeclaration, self, commands_only = True, prefix = 'enter_')
+        walk(program.command, self, commands_only = True, prefix = 'enter_')
         self.check_unknown()
         self.rename.visit_program(program)
-        
+
+    '''
+    Check a FlatProgram, making the components of one function declaration
+    or top level command at a time (and dropping them once checked), so the
+    whole program is never made.
+
+    The inferred types stay in self.variables, by renamed name; there are no
+    components to annotate them on, so annotate_types is ignored.
+    '''
+    def visit_flat_program(self, flat):
+        self.program = None
+        self.annotate_types = False
+        self.rename = Rename(self.variables)
+        self.rename.functions = set(flat.get_name(row) for row in flat.get_function_rows())
+        for row in flat.get_function_rows() + flat.get_command_rows():
+            component = flat.build(row)
+            walk(component, self.rename, prefix = 'enter_')
+            walk(component, self, commands_only = True, prefix = 'enter_')
+        self.check_unknown()
+
     def visit_assignment_command(self, assignment_command):
         #FunctionReturn gives nothing extra from FunctionCall, skip it
         if isinstance(assignment_command.expression, FunctionReturn):
@@ -225,16 +247,26 @@ class TypeCheck:
             self.unify(lhs_variable, Reference(expression.allocate_type, lhs_variable.line_number))
 
     
+    enter_assignment_command = visit_assignment_command
+    
     ''' Check expression evaluates to a boolean, and visit both blocks'''
     def visit_if_command(self, if_command):
-        self.evaluate_known(if_command.expression, Primitive("BOOLEAN", if_command.expression.line_number))
+        self.enter_if_command(if_command)
         self.visit_command_block(if_command.true_block)
         self.visit_command_block(if_command.false_block)
+
+    ''' Check expression evaluates to a boolean (walk goes on to both blocks)'''
+    def enter_if_command(self, if_command):
+        self.evaluate_known(if_command.expression, Primitive("BOOLEAN", if_command.expression.line_number))
         
     '''Check expression evaluates to a boolean, and visit block '''
     def visit_while_command(self, while_command):
-        self.evaluate_known( while_command.expression, Primitive("BOOLEAN", while_command.expression.line_number) )
+        self.enter_while_command(while_command)
         self.visit_command_block(while_command.loop_block)
+
+    '''Check expression evaluates to a boolean (walk goes on to the block)'''
+    def enter_while_command(self, while_command):
+        self.evaluate_known( while_command.expression, Primitive("BOOLEAN", while_command.expression.line_number) )
     
     def visit_skip_command(self, skip_command):
         pass
@@ -245,24 +277,35 @@ class TypeCheck:
             self.variables[input_command.variable.name] = input_command.variable
         else:
             self.evaluate_known( input_command.variable, Primitive("INTEGER", input_command.variable.line_number) )
+    enter_input_command = visit_input_command
     '''
         Standard unification rules. self.return_variable contains the return variable from visiting 
         the actual function declaration, which can then be unified with the temporary representing
         the return type of the function.
     '''
     def visit_function_declaration(self, function_declaration):
+        self.enter_function_declaration(function_declaration)
+        function_declaration.definition.accept(self)
+        self.leave_function_declaration(function_declaration)
+
+    '''The same, in two halves: walk goes on to the body in between.'''
+    def enter_function_declaration(self, function_declaration):
         signature = [self.get_temp(function_declaration.line_span, function_declaration.lex_span) for parameter in range(len(function_declaration.definition.parameters)+1)]
         self.unify(Variable(function_declaration.name,function_declaration.line_span, function_declaration.lex_span), \
                                 Function(signature, function_declaration.line_number) )
         for parameter in range(len(function_declaration.definition.parameters)):
             self.unify(signature[parameter], \
                                  function_declaration.definition.parameters[parameter] )
-        function_declaration.definition.accept(self)
+        self.signature = signature
+
+    def leave_function_declaration(self, function_declaration):
+        signature = self.signature
         self.unify(signature[len(signature)-1], self.return_variable)
         
     '''store return value for unification later.'''
     def visit_return_command(self, return_command):
         self.return_variable = return_command.variable
+    enter_return_command = visit_return_command
         
     def visit_function_definition(self, function_definition):
         self.visit_command_block(function_definition.body)
@@ -278,55 +321,56 @@ class TypeCheck:
     ''' Due to the simplicity of Lingo the operator determines the types of 
         the operands, thus we take advantage of this. 
         
-        Recursively check input types for the operators, then in the base
+        Check input types for the operators (keeping the operands still to check
+        on a stack, so long expressions don't recurse), then in the base
         cases unify variables with their appropriate types.
         
         @expression : expression whose type to check/infer
         @t : type to check, None if the base call 
     '''
     def evaluate_known(self, expression, t):
-        #Recursively check operands of binary expression
-        if isinstance(expression, BinaryExpression):
-            if isinstance(expression.operator, ArithmeticOperator):
-                if t != Primitive("INTEGER") and t != None:
-		    self.error("%s was found when integer was expected in the expression %s" % (t, expression), expression)
-		else:
-                    self.evaluate_known(expression.left_term, Primitive("INTEGER", expression.left_term.line_number))
-                    self.evaluate_known(expression.right_term, Primitive("INTEGER", expression.right_term.line_number))
-                    return Primitive("INTEGER", expression.line_number)
-            if isinstance(expression.operator, ComparisonOperator):
-                if t != Primitive("BOOLEAN") and t != None:
-		    self.error("%s was found when boolean was expected in the expression %s" % (t, expression), expression)
-		else:
-                    self.evaluate_known(expression.left_term, Primitive("INTEGER", expression.left_term.line_number))
-                    self.evaluate_known(expression.right_term, Primitive("INTEGER", expression.right_term.line_number))
-                    return Primitive("BOOLEAN", expression.line_number)
-            elif isinstance(expression.operator, BooleanOperator):
-                if t != Primitive("BOOLEAN") and t != None:
-		    self.error("%s was found when boolean was expected in the expression %s" % (t, expression), expression)
-		else:
-                    self.evaluate_known(expression.left_term, Primitive("BOOLEAN", expression.left_term.line_number))
-                    self.evaluate_known(expression.right_term, Primitive("BOOLEAN", expression.right_term.line_number))
-                    return Primitive("BOOLEAN", expression.line_number)
-        #t has type of the variable, add that to our type mapping, print an self.error message if type does not match
-        elif isinstance(expression, DereferencedVariable):
-            self.unify(expression, Reference(t, expression.line_number))
-        elif isinstance(expression, ReferencedVariable):
-            self.error("The referenced variable %s was found in a binary expression" % expression, expression)
-        elif isinstance(expression, Variable):
-            self.unify(expression, t)
-        elif isinstance(expression, Number) :
-            if t != Primitive("INTEGER"):
-                self.error("Number literal %s was found when %s was expected" % (expression,t), expression)
+        root = expression
+        root_type = None
+        stack = [(expression, t)]
+        while stack:
+            expression, t = stack.pop()
+            #Check operands of binary expression, left before right
+            if isinstance(expression, BinaryExpression):
+                if isinstance(expression.operator, ArithmeticOperator):
+                    operand_type, expression_type, expected = "INTEGER", "INTEGER", "integer"
+                elif isinstance(expression.operator, ComparisonOperator):
+                    operand_type, expression_type, expected = "INTEGER", "BOOLEAN", "boolean"
+                elif isinstance(expression.operator, BooleanOperator):
+                    operand_type, expression_type, expected = "BOOLEAN", "BOOLEAN", "boolean"
+                else:
+                    continue
+                if t != Primitive(expression_type) and t != None:
+                    self.error("%s was found when %s was expected in the expression %s" % (t, expected, expression), expression)
+                    continue
+                stack.append((expression.right_term, Primitive(operand_type, expression.right_term.line_number)))
+                stack.append((expression.left_term, Primitive(operand_type, expression.left_term.line_number)))
+                if expression is root:
+                    root_type = Primitive(expression_type, expression.line_number)
+            #t has type of the variable, add that to our type mapping, print an self.error message if type does not match
+            elif isinstance(expression, DereferencedVariable):
+                self.unify(expression, Reference(t, expression.line_number))
+            elif isinstance(expression, ReferencedVariable):
+                self.error("The referenced variable %s was found in a binary expression" % expression, expression)
+            elif isinstance(expression, Variable):
+                self.unify(expression, t)
+            elif isinstance(expression, Number) :
+                if t != Primitive("INTEGER"):
+                    self.error("Number literal %s was found when %s was expected" % (expression,t), expression)
+                elif expression is root:
+                    root_type = t
+            elif isinstance(expression, Boolean):
+                if t!= Primitive("BOOLEAN"):
+                    self.error("Boolean literal %s found when %s was expected." %  (expression,t), expression)
+                elif expression is root:
+                    root_type = t
             else:
-                return t
-        elif isinstance(expression, Boolean):
-            if t!= Primitive("BOOLEAN"):
-                self.error("Boolean literal %s found when %s was expected." %  (expression,t), expression)
-            else:
-                return t
-        else:
-            self.error("Unknown case %s, or type checker bug encountered" %  expression, expression)
+                self.error("Unknown case %s, or type checker bug encountered" %  expression, expression)
+        return root_type
         
     def error(self, message, expr1, expr2=None):
         if expr2 != None:
@@ -349,9 +393,11 @@ class TypeCheck:
 class Rename:
     def __init__(self, variables):
         self.function_scope = ""
-        self.functions=[]
+        self.functions=set()
         self.variables = variables
         self.rename = True
+    '''Get a new copy of the type inferred for x (so the annotations share
+       nothing with the types being unified), or None if it isn't known.'''
     def get_type(self, x):
         xBase = x #Maintain if we find root and don't know type
         if isinstance(x, Variable):
@@ -360,7 +406,7 @@ class Rename:
             else:
                 return None
         if isinstance(x, Primitive):
-            return x
+            return Primitive(x.value, x.line_number)
         elif isinstance(x, Reference):
             return Reference(self.get_type(x.value), 0)
         elif isinstance(x, Function):
@@ -372,11 +418,15 @@ class Rename:
         else:
             x.parent = self.find(x.parent)
             return x.parent
+    '''The program is walked with the enter_ methods, so nesting doesn't recurse.
+       Renaming leaves the commands outside functions as they are (they have no
+       scope), so they are only walked when renaming back.'''
     def visit_program(self, program):
-        self.functions = [functionDeclaration.name for functionDeclaration in program.functions]
+        self.functions = set(functionDeclaration.name for functionDeclaration in program.functions)
         for functionDeclaration in program.functions:
-            functionDeclaration.accept(self)
-        self.visit_command_block(program.command)
+            walk(functionDeclaration, self, prefix = 'enter_')
+        if not self.rename or self.function_scope:
+            walk(program.command, self, prefix = 'enter_')
         self.rename = False
         
     def visit_assignment_command(self, assignment_command):
@@ -401,13 +451,18 @@ class Rename:
         pass
     
     def visit_function_declaration(self, function_declaration):
-        oldScope = self.function_scope
-        
-        self.function_scope = self.function_scope + function_declaration.name + "_"
+        self.enter_function_declaration(function_declaration)
         for parameter in range(len(function_declaration.definition.parameters)):
             function_declaration.definition.parameters[parameter].accept(self)
         function_declaration.definition.accept(self)
-        self.function_scope = oldScope
+        self.leave_function_declaration(function_declaration)
+
+    '''Variables in a function (its parameters and body) are renamed with its scope.
+       Walks don't go into the variables shared by the [RET] half of a function call again.'''
+    def enter_function_declaration(self, function_declaration):
+        self.function_scope = self.function_scope + function_declaration.name + "_"
+    def leave_function_declaration(self, function_declaration):
+        self.function_scope = self.function_scope[:-len(function_declaration.name) - 1]
         
     def visit_return_command(self, return_command):
         return_command.variable.accept(self)
@@ -437,7 +492,7 @@ class Rename:
     
     def visit_variable(self, variable):
         if not self.rename:
-            variable.type = copy.deepcopy(self.get_type(variable))
+            variable.type = self.get_type(variable)
         if variable.name not in self.functions:
             if self.rename:
                 self.append_scope(variable)
@@ -449,7 +504,7 @@ class Rename:
         if not self.rename:
             var = Variable(referenced_variable.name, referenced_variable.line_span, \
                                           referenced_variable.lex_span)
-            referenced_variable.type = copy.deepcopy(self.get_type(var))
+            referenced_variable.type = self.get_type(var)
         if referenced_variable.name not in self.functions:
             if self.rename:
                 self.append_scope(referenced_variable)
@@ -462,8 +517,11 @@ class Rename:
         else:
             var =Variable(dereferenced_variable.name, dereferenced_variable.line_span, \
                                           dereferenced_variable.lex_span)
-            dereferenced_variable.type = copy.deepcopy(self.get_type(var))
+            dereferenced_variable.type = self.get_type(var)
             self.remove_scope(dereferenced_variable)
+    enter_variable = visit_variable
+    enter_referenced_variable = visit_referenced_variable
+    enter_dereferenced_variable = visit_dereferenced_variable
     def visit_number(self, number):
         pass
     def visit_boolean(self, boolean):
@@ -1,83 +1,84 @@
 
-# /home/kyleklein/workspace/pysleuth/src/sleuth/lingo/yacc_parse_tables.py
+# yacc_parse_tables.py
 # This file is automatically generated. Do not edit.
-_tabversion = '3.2'
+# pylint: disable=W,C,R
+_tabversion = '3.10'
 
 _lr_method = 'LALR'
 
-_lr_signature = ':\xd9\x0b\x1c\xa8Q-\xc8\x0f\x92"\xeeH\x1c\xaaB'
+_lr_signature = 'programleftSEMIleftOP_PLUSOP_MINUSleftOP_TIMESOP_DIVIDECOMMA IDENTIFIER KEYWORD_BOOLEAN KEYWORD_DEF KEYWORD_DO KEYWORD_ELSE KEYWORD_FALSE KEYWORD_FUN KEYWORD_IF KEYWORD_INPUT KEYWORD_INT KEYWORD_NEW KEYWORD_REF KEYWORD_RETURN KEYWORD_SKIP KEYWORD_THEN KEYWORD_TRUE KEYWORD_WHILE LBRACE LPAREN NUMBER OP_ASSIGNMENT OP_BOOL_AND OP_BOOL_OR OP_CMP_EQ OP_CMP_LT OP_CMP_LTE OP_CMP_NE OP_DEREF OP_DIVIDE OP_MINUS OP_PLUS OP_TIMES RBRACE RPAREN SEMIempty : program : function_declaration_list commandfunction_declaration_list : function_declaration_list function_declarationfunction_declaration_list : function_declarationfunction_declaration_list : emptyfunction_declaration : KEYWORD_DEF IDENTIFIER OP_CMP_EQ function_definitionfunction_definition : KEYWORD_FUN LPAREN variable_list RPAREN LBRACE function_body RBRACEfunction_body : command SEMI command_return\n                         | command_return\n        function_application : variable LPAREN variable_list RPAREN\n                                | dereferenced_variable LPAREN variable_list RPAREN\n        command : command SEMI commandcommand : variable OP_ASSIGNMENT assignment_rhs \n                   | dereferenced_variable OP_ASSIGNMENT assignment_rhs\n        command : KEYWORD_IF LPAREN expression RPAREN KEYWORD_THEN LBRACE command RBRACE KEYWORD_ELSE LBRACE command RBRACEcommand : KEYWORD_WHILE LPAREN expression RPAREN KEYWORD_DO LBRACE command RBRACEcommand : KEYWORD_SKIP command : KEYWORD_INPUT variablecommand_return : KEYWORD_RETURN variableassignment_rhs : KEYWORD_NEW typeassignment_rhs : expressionassignment_rhs : referenced_variableassignment_rhs : function_applicationtype : ref_type\n                | int_type\n                | bool_type\n          ref_type : KEYWORD_REF type  int_type : KEYWORD_INT  bool_type : KEYWORD_BOOLEAN expression : variable\n                      | dereferenced_variable\n                      | bool \n                      | number\n        expression : expression operator expression\n                      | LPAREN expression operator expression RPAREN\n         variable_list : variable_list COMMA variablevariable_list : variable variable_list : emptyvariable : IDENTIFIERreferenced_variable : KEYWORD_REF IDENTIFIERdereferenced_variable : OP_DEREF IDENTIFIERbool : KEYWORD_TRUE\n                | KEYWORD_FALSE\n        number : NUMBERoperator : OP_PLUS\n                    | OP_MINUS\n                    | OP_TIMES\n                    | OP_DIVIDE\n\n                    | OP_CMP_LT\n                    | OP_CMP_EQ\n                    | OP_CMP_NE\n                    | OP_CMP_LTE\n\n                    | OP_BOOL_AND\n                    | OP_BOOL_OR\n        '
     
 _lr_action_items = {'LPAREN':([9,10,12,18,19,20,21,22,29,35,36,46,51,52,53,54,55,56,57,58,59,60,61,75,],[-39,19,21,35,35,35,35,-41,48,35,50,71,-48,-46,-51,-47,-50,-49,-52,-45,-54,35,-53,35,]),'OP_MINUS':([9,22,25,28,29,31,32,33,36,37,39,40,41,43,49,77,84,90,],[-39,-41,-42,-33,-31,-43,-44,-32,-30,52,-31,-30,52,52,52,52,52,-35,]),'OP_CMP_EQ':([9,16,22,25,28,29,31,32,33,36,37,39,40,41,43,49,77,84,90,],[-39,24,-41,-42,-33,-31,-43,-44,-32,-30,55,-31,-30,55,55,55,55,55,-35,]),'NUMBER':([18,19,20,21,35,51,52,53,54,55,56,57,58,59,60,61,75,],[32,32,32,32,32,-48,-46,-51,-47,-50,-49,-52,-45,-54,32,-53,32,]),'OP_CMP_LTE':([9,22,25,28,29,31,32,33,36,37,39,40,41,43,49,77,84,90,],[-39,-41,-42,-33,-31,-43,-44,-32,-30,57,-31,-30,57,57,57,57,57,-35,]),'OP_PLUS':([9,22,25,28,29,31,32,33,36,37,39,40,41,43,49,77,84,90,],[-39,-41,-42,-33,-31,-43,-44,-32,-30,58,-31,-30,58,58,58,58,58,-35,]),'KEYWORD_INT':([38,62,],[63,63,]),'KEYWORD_INPUT':([0,1,2,5,14,23,45,86,87,93,101,103,104,],[-1,-4,6,-5,-3,6,-6,6,6,6,-7,6,6,]),'KEYWORD_RETURN':([93,103,],[98,98,]),'OP_DIVIDE':([9,22,25,28,29,31,32,33,36,37,39,40,41,43,49,77,84,90,],[-39,-41,-42,-33,-31,-43,-44,-32,-30,51,-31,-30,51,51,51,51,51,-35,]),'RPAREN':([9,22,25,28,31,32,33,39,40,41,43,48,50,71,72,73,74,76,77,81,84,89,90,],[-39,-41,-42,-33,-43,-44,-32,-31,-30,69,70,-1,-1,-1,-38,-37,82,85,-34,88,90,-36,-35,]),'KEYWORD_SKIP':([0,1,2,5,14,23,45,86,87,93,101,103,104,],[-1,-4,7,-5,-3,7,-6,7,7,7,-7,7,7,]),'SEMI':([7,9,15,17,22,25,26,28,29,30,31,32,33,34,36,37,39,40,42,44,47,63,64,65,66,67,68,77,78,82,85,90,91,92,94,99,106,107,],[-17,-39,23,-18,-41,-42,-23,-33,-31,-22,-43,-44,-32,-14,-30,-21,-31,-30,-13,-12,-40,-28,-25,-24,-20,-26,-29,-34,-27,-11,-10,-35,23,23,-16,103,23,-15,]),'OP_TIMES':([9,22,25,28,29,31,32,33,36,37,39,40,41,43,49,77,84,90,],[-39,-41,-42,-33,-31,-43,-44,-32,-30,54,-31,-30,54,54,54,54,54,-35,]),'KEYWORD_FUN':([24,],[46,]),'KEYWORD_FALSE':([18,19,20,21,35,51,52,53,54,55,56,57,58,59,60,61,75,],[31,31,31,31,31,-48,-46,-51,-47,-50,-49,-52,-45,-54,31,-53,31,]),'KEYWORD_REF':([18,20,38,62,],[27,27,62,62,]),'COMMA':([9,48,50,71,72,73,74,76,81,89,],[-39,-1,-1,-1,-38,-37,83,83,83,-36,]),'IDENTIFIER':([0,1,2,3,5,6,13,14,18,19,20,21,23,27,35,45,48,50,51,52,53,54,55,56,57,58,59,60,61,71,75,83,86,87,93,98,101,103,104,],[-1,-4,9,16,-5,9,22,-3,9,9,9,9,9,47,9,-6,9,9,-48,-46,-51,-47,-50,-49,-52,-45,-54,9,-53,9,9,9,9,9,9,9,-7,9,9,]),'KEYWORD_NEW':([18,20,],[38,38,]),'KEYWORD_WHILE':([0,1,2,5,14,23,45,86,87,93,101,103,104,],[-1,-4,10,-5,-3,10,-6,10,10,10,-7,10,10,]),'$end':([4,7,9,15,17,22,25,26,28,29,30,31,32,33,34,36,37,39,40,42,44,47,63,64,65,66,67,68,77,78,82,85,90,94,107,],[0,-17,-39,-2,-18,-41,-42,-23,-33,-31,-22,-43,-44,-32,-14,-30,-21,-31,-30,-13,-12,-40,-28,-25,-24,-20,-26,-29,-34,-27,-11,-10,-35,-16,-15,]),'KEYWORD_ELSE':([95,],[100,]),'RBRACE':([7,9,17,22,25,26,28,29,30,31,32,33,34,36,37,39,40,42,44,47,63,64,65,66,67,68,77,78,82,85,90,91,92,94,96,97,102,105,106,107,],[-17,-39,-18,-41,-42,-23,-33,-31,-22,-43,-44,-32,-14,-30,-21,-31,-30,-13,-12,-40,-28,-25,-24,-20,-26,-29,-34,-27,-11,-10,-35,94,95,-16,101,-9,-19,-8,107,-15,]),'OP_CMP_NE':([9,22,25,28,29,31,32,33,36,37,39,40,41,43,49,77,84,90,],[-39,-41,-42,-33,-31,-43,-44,-32,-30,53,-31,-30,53,53,53,53,53,-35,]),'OP_CMP_LT':([9,22,25,28,29,31,32,33,36,37,39,40,41,43,49,77,84,90,],[-39,-41,-42,-33,-31,-43,-44,-32,-30,56,-31,-30,56,56,56,56,56,-35,]),'KEYWORD_DEF':([0,1,2,5,14,45,101,],[3,-4,3,-5,-3,-6,-7,]),'KEYWORD_THEN':([70,],[80,]),'OP_BOOL_OR':([9,22,25,28,29,31,32,33,36,37,39,40,41,43,49,77,84,90,],[-39,-41,-42,-33,-31,-43,-44,-32,-30,59,-31,-30,59,59,59,59,59,-35,]),'OP_BOOL_AND':([9,22,25,28,29,31,32,33,36,37,39,40,41,43,49,77,84,90,],[-39,-41,-42,-33,-31,-43,-44,-32,-30,61,-31,-30,61,61,61,61,61,-35,]),'KEYWORD_IF':([0,1,2,5,14,23,45,86,87,93,101,103,104,],[-1,-4,12,-5,-3,12,-6,12,12,12,-7,12,12,]),'OP_DEREF':([0,1,2,5,14,18,19,20,21,23,35,45,51,52,53,54,55,56,57,58,59,60,61,75,86,87,93,101,103,104,],[-1,-4,13,-5,-3,13,13,13,13,13,13,-6,-48,-46,-51,-47,-50,-49,-52,-45,-54,13,-53,13,13,13,13,-7,13,13,]),'KEYWORD_BOOLEAN':([38,62,],[68,68,]),'KEYWORD_TRUE':([18,19,20,21,35,51,52,53,54,55,56,57,58,59,60,61,75,],[25,25,25,25,25,-48,-46,-51,-47,-50,-49,-52,-45,-54,25,-53,25,]),'LBRACE':([79,80,88,100,],[86,87,93,104,]),'OP_ASSIGNMENT':([8,9,11,22,],[18,-39,20,-41,]),'KEYWORD_DO':([69,],[79,]),}
 
-_lr_action = { }
+_lr_action = {}
 for _k, _v in _lr_action_items.items():
    for _x,_y in zip(_v[0],_v[1]):
-      if not _x in _lr_action:  _lr_action[_x] = { }
+      if not _x in _lr_action:  _lr_action[_x] = {}
       _lr_action[_x][_k] = _y
 del _lr_action_items
 
 _lr_goto_items = {'number':([18,19,20,21,35,60,75,],[28,28,28,28,28,28,28,]),'referenced_variable':([18,20,],[30,30,]),'operator':([37,41,43,49,77,84,],[60,60,60,75,60,60,]),'command_return':([93,103,],[97,105,]),'function_body':([93,],[96,]),'dereferenced_variable':([2,18,19,20,21,23,35,60,75,86,87,93,103,104,],[8,29,39,29,39,8,39,39,39,8,8,8,8,8,]),'program':([0,],[4,]),'bool':([18,19,20,21,35,60,75,],[33,33,33,33,33,33,33,]),'int_type':([38,62,],[64,64,]),'ref_type':([38,62,],[65,65,]),'type':([38,62,],[66,78,]),'variable_list':([48,50,71,],[74,76,81,]),'function_declaration_list':([0,],[2,]),'function_definition':([24,],[45,]),'assignment_rhs':([18,20,],[34,42,]),'variable':([2,6,18,19,20,21,23,35,48,50,60,71,75,83,86,87,93,98,103,104,],[11,17,36,40,36,40,11,40,73,73,40,73,40,89,11,11,11,102,11,11,]),'bool_type':([38,62,],[67,67,]),'function_application':([18,20,],[26,26,]),'function_declaration':([0,2,],[1,14,]),'command':([2,23,86,87,93,103,104,],[15,44,91,92,99,44,106,]),'empty':([0,48,50,71,],[5,72,72,72,]),'expression':([18,19,20,21,35,60,75,],[37,41,37,43,49,77,84,]),}
 
-_lr_goto = { }
+_lr_goto = {}
 for _k, _v in _lr_goto_items.items():
-   for _x,_y in zip(_v[0],_v[1]):
-       if not _x in _lr_goto: _lr_goto[_x] = { }
+   for _x, _y in zip(_v[0], _v[1]):
+       if not _x in _lr_goto: _lr_goto[_x] = {}
        _lr_goto[_x][_k] = _y
 del _lr_goto_items
 _lr_productions = [
   ("S' -> program","S'",1,None,None,None),
-  ('empty -> <empty>','empty',0,'p_empty','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',236),
-  ('program -> function_declaration_list command','program',2,'p_program','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',243),
-  ('function_declaration_list -> function_declaration_list function_declaration','function_declaration_list',2,'p_function_declaration_list_list','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',251),
-  ('function_declaration_list -> function_declaration','function_declaration_list',1,'p_function_declaration_list_single','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',255),
-  ('function_declaration_list -> empty','function_declaration_list',1,'p_function_declaration_list_empty','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',259),
-  ('function_declaration -> KEYWORD_DEF IDENTIFIER OP_CMP_EQ function_definition','function_declaration',4,'p_function_declaration','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',263),
-  ('function_definition -> KEYWORD_FUN LPAREN variable_list RPAREN LBRACE function_body RBRACE','function_definition',7,'p_function_definition','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',269),
-  ('function_body -> command SEMI command_return','function_body',3,'p_function_body','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',273),
-  ('function_body -> command_return','function_body',1,'p_function_body','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',274),
-  ('function_application -> variable LPAREN variable_list RPAREN','function_application',4,'p_function_application','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',288),
-  ('function_application -> dereferenced_variable LPAREN variable_list RPAREN','function_application',4,'p_function_application','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',289),
-  ('command -> command SEMI command','command',3,'p_command','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',298),
-  ('command -> variable OP_ASSIGNMENT assignment_rhs','command',3,'p_command_assignment','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',306),
-  ('command -> dereferenced_variable OP_ASSIGNMENT assignment_rhs','command',3,'p_command_assignment','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',307),
-  ('command -> KEYWORD_IF LPAREN expression RPAREN KEYWORD_THEN LBRACE command RBRACE KEYWORD_ELSE LBRACE command RBRACE','command',12,'p_command_if','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',312),
-  ('command -> KEYWORD_WHILE LPAREN expression RPAREN KEYWORD_DO LBRACE command RBRACE','command',8,'p_command_while','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',316),
-  ('command -> KEYWORD_SKIP','command',1,'p_command_skip','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',320),
-  ('command -> KEYWORD_INPUT variable','command',2,'p_command_input','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',324),
-  ('command_return -> KEYWORD_RETURN variable','command_return',2,'p_command_return','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',328),
-  ('assignment_rhs -> KEYWORD_NEW type','assignment_rhs',2,'p_assignment_rhs_new','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',339),
-  ('assignment_rhs -> expression','assignment_rhs',1,'p_assignment_rhs_expression','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',342),
-  ('assignment_rhs -> referenced_variable','assignment_rhs',1,'p_assignment_rhs_referenced_variable','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',347),
-  ('assignment_rhs -> function_application','assignment_rhs',1,'p_assignment_rhs_function_application','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',352),
-  ('type -> ref_type','type',1,'p_type','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',361),
-  ('type -> int_type','type',1,'p_type','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',362),
-  ('type -> bool_type','type',1,'p_type','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',363),
-  ('ref_type -> KEYWORD_REF type','ref_type',2,'p_ref_type','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',367),
-  ('int_type -> KEYWORD_INT','int_type',1,'p_int_type','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',370),
-  ('bool_type -> KEYWORD_BOOLEAN','bool_type',1,'p_bool_type','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',373),
-  ('expression -> variable','expression',1,'p_expression_atom','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',381),
-  ('expression -> dereferenced_variable','expression',1,'p_expression_atom','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',382),
-  ('expression -> bool','expression',1,'p_expression_atom','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',383),
-  ('expression -> number','expression',1,'p_expression_atom','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',384),
-  ('expression -> expression operator expression','expression',3,'p_expression_binary_operation','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',389),
-  ('expression -> LPAREN expression operator expression RPAREN','expression',5,'p_expression_binary_operation','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',390),
-  ('variable_list -> variable_list COMMA variable','variable_list',3,'p_variable_list_list','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',407),
-  ('variable_list -> variable','variable_list',1,'p_variable_list_single','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',410),
-  ('variable_list -> empty','variable_list',1,'p_variable_list_empty','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',413),
-  ('variable -> IDENTIFIER','variable',1,'p_variable','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',416),
-  ('referenced_variable -> KEYWORD_REF IDENTIFIER','referenced_variable',2,'p_referenced_variable','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',420),
-  ('dereferenced_variable -> OP_DEREF IDENTIFIER','dereferenced_variable',2,'p_dereferenced_variable','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',424),
-  ('bool -> KEYWORD_TRUE','bool',1,'p_bool','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',428),
-  ('bool -> KEYWORD_FALSE','bool',1,'p_bool','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',429),
-  ('number -> NUMBER','number',1,'p_number','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',434),
-  ('operator -> OP_PLUS','operator',1,'p_operator','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',438),
-  ('operator -> OP_MINUS','operator',1,'p_operator','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',439),
-  ('operator -> OP_TIMES','operator',1,'p_operator','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',440),
-  ('operator -> OP_DIVIDE','operator',1,'p_operator','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',441),
-  ('operator -> OP_CMP_LT','operator',1,'p_operator','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',443),
-  ('operator -> OP_CMP_EQ','operator',1,'p_operator','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',444),
-  ('operator -> OP_CMP_NE','operator',1,'p_operator','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',445),
-  ('operator -> OP_CMP_LTE','operator',1,'p_operator','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',446),
-  ('operator -> OP_BOOL_AND','operator',1,'p_operator','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',448),
-  ('operator -> OP_BOOL_OR','operator',1,'p_operator','/home/kyleklein/workspace/pysleuth/src/sleuth/lingo/parser.py',449),
+  ('empty -> <empty>','empty',0,'p_empty','parser.py',437),
+  ('program -> function_declaration_list command','program',2,'p_program','parser.py',444),
+  ('function_declaration_list -> function_declaration_list function_declaration','function_declaration_list',2,'p_function_declaration_list_list','parser.py',453),
+  ('function_declaration_list -> function_declaration','function_declaration_list',1,'p_function_declaration_list_single','parser.py',458),
+  ('function_declaration_list -> empty','function_declaration_list',1,'p_function_declaration_list_empty','parser.py',462),
+  ('function_declaration -> KEYWORD_DEF IDENTIFIER OP_CMP_EQ function_definition','function_declaration',4,'p_function_declaration','parser.py',466),
+  ('function_definition -> KEYWORD_FUN LPAREN variable_list RPAREN LBRACE function_body RBRACE','function_definition',7,'p_function_definition','parser.py',472),
+  ('function_body -> command SEMI command_return','function_body',3,'p_function_body','parser.py',476),
+  ('function_body -> command_return','function_body',1,'p_function_body','parser.py',477),
+  ('function_application -> variable LPAREN variable_list RPAREN','function_application',4,'p_function_application','parser.py',491),
+  ('function_application -> dereferenced_variable LPAREN variable_list RPAREN','function_application',4,'p_function_application','parser.py',492),
+  ('command -> command SEMI command','command',3,'p_command','parser.py',501),
+  ('command -> variable OP_ASSIGNMENT assignment_rhs','command',3,'p_command_assignment','parser.py',509),
+  ('command -> dereferenced_variable OP_ASSIGNMENT assignment_rhs','command',3,'p_command_assignment','parser.py',510),
+  ('command -> KEYWORD_IF LPAREN expression RPAREN KEYWORD_THEN LBRACE command RBRACE KEYWORD_ELSE LBRACE command RBRACE','command',12,'p_command_if','parser.py',515),
+  ('command -> KEYWORD_WHILE LPAREN expression RPAREN KEYWORD_DO LBRACE command RBRACE','command',8,'p_command_while','parser.py',519),
+  ('command -> KEYWORD_SKIP','command',1,'p_command_skip','parser.py',523),
+  ('command -> KEYWORD_INPUT variable','command',2,'p_command_input','parser.py',527),
+  ('command_return -> KEYWORD_RETURN variable','command_return',2,'p_command_return','parser.py',531),
+  ('assignment_rhs -> KEYWORD_NEW type','assignment_rhs',2,'p_assignment_rhs_new','parser.py',542),
+  ('assignment_rhs -> expression','assignment_rhs',1,'p_assignment_rhs_expression','parser.py',545),
+  ('assignment_rhs -> referenced_variable','assignment_rhs',1,'p_assignment_rhs_referenced_variable','parser.py',550),
+  ('assignment_rhs -> function_application','assignment_rhs',1,'p_assignment_rhs_function_application','parser.py',555),
+  ('type -> ref_type','type',1,'p_type','parser.py',564),
+  ('type -> int_type','type',1,'p_type','parser.py',565),
+  ('type -> bool_type','type',1,'p_type','parser.py',566),
+  ('ref_type -> KEYWORD_REF type','ref_type',2,'p_ref_type','parser.py',570),
+  ('int_type -> KEYWORD_INT','int_type',1,'p_int_type','parser.py',573),
+  ('bool_type -> KEYWORD_BOOLEAN','bool_type',1,'p_bool_type','parser.py',576),
+  ('expression -> variable','expression',1,'p_expression_atom','parser.py',584),
+  ('expression -> dereferenced_variable','expression',1,'p_expression_atom','parser.py',585),
+  ('expression -> bool','expression',1,'p_expression_atom','parser.py',586),
+  ('expression -> number','expression',1,'p_expression_atom','parser.py',587),
+  ('expression -> expression operator expression','expression',3,'p_expression_binary_operation','parser.py',592),
+  ('expression -> LPAREN expression operator expression RPAREN','expression',5,'p_expression_binary_operation','parser.py',593),
+  ('variable_list -> variable_list COMMA variable','variable_list',3,'p_variable_list_list','parser.py',610),
+  ('variable_list -> variable','variable_list',1,'p_variable_list_single','parser.py',614),
+  ('variable_list -> empty','variable_list',1,'p_variable_list_empty','parser.py',617),
+  ('variable -> IDENTIFIER','variable',1,'p_variable','parser.py',620),
+  ('referenced_variable -> KEYWORD_REF IDENTIFIER','referenced_variable',2,'p_referenced_variable','parser.py',624),
+  ('dereferenced_variable -> OP_DEREF IDENTIFIER','dereferenced_variable',2,'p_dereferenced_variable','parser.py',628),
+  ('bool -> KEYWORD_TRUE','bool',1,'p_bool','parser.py',632),
+  ('bool -> KEYWORD_FALSE','bool',1,'p_bool','parser.py',633),
+  ('number -> NUMBER','number',1,'p_number','parser.py',638),
+  ('operator -> OP_PLUS','operator',1,'p_operator','parser.py',642),
+  ('operator -> OP_MINUS','operator',1,'p_operator','parser.py',643),
+  ('operator -> OP_TIMES','operator',1,'p_operator','parser.py',644),
+  ('operator -> OP_DIVIDE','operator',1,'p_operator','parser.py',645),
+  ('operator -> OP_CMP_LT','operator',1,'p_operator','parser.py',647),
+  ('operator -> OP_CMP_EQ','operator',1,'p_operator','parser.py',648),
+  ('operator -> OP_CMP_NE','operator',1,'p_operator','parser.py',649),
+  ('operator -> OP_CMP_LTE','operator',1,'p_operator','parser.py',650),
+  ('operator -> OP_BOOL_AND','operator',1,'p_operator','parser.py',652),
+  ('operator -> OP_BOOL_OR','operator',1,'p_operator','parser.py',653),
 ]
@@ -0,0 +1,286 @@
+'''
+Provide the call graph of a program.
+
+The procedures of the call graph are those of the Supergraph: the top level
+of the program (numbered 0, named None) and the functions, numbered from 1
+in the order of their names. Every call site (a CALL node) calls the
+functions it may call:
+
+- a call of a declared function by name (f(a)) calls that function;
+- a call of any other variable, or through a pointer (g(a), !p(a)), may
+  call any function whose name is used as a value somewhere in the program
+  (g := f, p := ref f, h(f), return f), that takes as many arguments. If the
+  program was type checked (see the typecheck module), the types inferred
+  for the Variables narrow this down to the functions whose type agrees
+  with the type of the function called; types that weren't inferred agree
+  with anything.
+
+The strongly connected components of the call graph (the functions that
+call each other, recursively) are found with Tarjan's algorithm, which
+finds every component after the components it calls: that's the bottom up
+order summary based analyses want, every function after the functions it
+calls (but for those in its own component).
+'''
+
+from array import array
+
+from sleuth.lingo.components import * #@UnusedWildImport
+from sleuth.lingo.types import Function, Primitive, Reference
+from sleuth.tracks.sparse import reverse_edges
+
+
+class CallGraph(object):
+    '''The functions called by every procedure and call site of a program.
+
+    The callees of the procedure numbered i are
+    callees[callee_offsets[i]:callee_offsets[i + 1]] (by number, once
+    each), and its callers are likewise in callers. The procedures the call
+    site numbered s (that is, the CALL node supergraph.call_ids[s]) may call
+    are targets[target_offsets[s]:target_offsets[s + 1]].
+
+    The components are lists of procedure numbers, in bottom up order; the
+    component of every procedure is in component_numbers, and the level of
+    every component in levels: 0 for components calling no other
+    component, and one more than the highest level of the components it
+    calls for the others.
+    '''
+
+    def __init__(self, supergraph, target_offsets, targets):
+        self.supergraph = supergraph
+        self.procedure_names = supergraph.procedure_names
+        self.target_offsets = target_offsets
+        self.targets = targets
+
+        procedure_count = len(self.procedure_names)
+        rows = [set() for _ in xrange(procedure_count)]
+        procedures = supergraph.procedures
+        for call_site, call_id in enumerate(supergraph.call_ids):
+            rows[procedures[call_id]].update(targets[target_offsets[call_site]:target_offsets[call_site + 1]])
+
+        self.callee_offsets = array('i', [0])
+        self.callees = array('i')
+        for row in rows:
+            self.callees.extend(sorted(row))
+            self.callee_offsets.append(len(self.callees))
+        self.caller_offsets, self.callers = reverse_edges(procedure_count, self.callee_offsets, self.callees)
+
+        self.components, self.component_numbers = find_strongly_connected_components(procedure_count,
+                                                                                    self.callee_offsets, self.callees)
+
+        # Components are found after those they call
+        self.levels = array('i', [0]) * len(self.components)
+        for number, component in enumerate(self.components):
+            level = 0
+            for procedure in component:
+                for index in xrange(self.callee_offsets[procedure], self.callee_offsets[procedure + 1]):
+                    callee_number = self.component_numbers[self.callees[index]]
+                    if callee_number != number and self.levels[callee_number] >= level:
+                        level = self.levels[callee_number] + 1
+            self.levels[number] = level
+
+    def __len__(self):
+        return len(self.procedure_names)
+
+    def _get_names(self, offsets, numbers, number):
+        names = self.procedure_names
+        return [names[numbers[index]] for index in xrange(offsets[number], offsets[number + 1])]
+
+    def _get_number(self, function_name):
+        return self.supergraph._procedure_numbers[function_name]
+
+    def get_callees(self, function_name = None):
+        '''Get the names of the functions a function (or the top level, if function_name is None) may call.'''
+        return self._get_names(self.callee_offsets, self.callees, self._get_number(function_name))
+
+    def get_callers(self, function_name):
+        '''Get the names of the functions that may call a function (None for the top level).'''
+        return self._get_names(self.caller_offsets, self.callers, self._get_number(function_name))
+
+    def get_targets(self, node):
+        '''Get the names of the functions a CALL (or RET) node may call.'''
+        return self._get_names(self.target_offsets, self.targets, self.supergraph._call_sites[node.nodeID])
+
+    def get_component(self, function_name = None):
+        '''Get the names of the functions in the strongly connected component of a function.'''
+        names = self.procedure_names
+        return [names[number] for number in self.components[self.component_numbers[self._get_number(function_name)]]]
+
+    def is_recursive(self, function_name):
+        '''May a function call itself (maybe through other functions)?'''
+        number = self._get_number(function_name)
+        if len(self.components[self.component_numbers[number]]) > 1:
+            return True
+        return number in self.callees[self.callee_offsets[number]:self.callee_offsets[number + 1]]
+
+    def get_bottom_up_order(self):
+        '''Get the components of the call graph, as lists of names, every component after those it calls.
+
+        The top level is named None; functions can't call it, so it's in a
+        component of its own.
+        '''
+        names = self.procedure_names
+        return [[names[number] for number in component] for component in self.components]
+
+    def get_waves(self):
+        '''Get the components of the call graph by level, as lists of components (lists of names).
+
+        The components of a wave only call components of earlier waves (and
+        themselves), so they can be analysed in parallel once the earlier
+        waves are done.
+        '''
+        names = self.procedure_names
+        waves = [[] for _ in xrange(max(self.levels) + 1)]
+        for number, component in enumerate(self.components):
+            waves[self.levels[number]].append([names[procedure] for procedure in component])
+        return waves
+
+
+def find_call_graph(supergraph):
+    '''Make the CallGraph of the program of a Supergraph.'''
+    nodes = supergraph.graph.nodes
+    procedure_numbers = supergraph._procedure_numbers
+
+    # The functions used as values, and their types
+    escaping = set()
+    for node in nodes:
+        # Only the assignments and returns are made (see cfg.FlatCommandNode)
+        command_class = node.get_command_class()
+        if command_class is not AssignmentCommand and command_class is not ReturnCommand:
+            continue
+
+        command = node.command
+        if command_class is AssignmentCommand:
+            expression = command.expression
+            if expression.__class__ is FunctionReturn:
+                continue
+            if expression.__class__ is FunctionCall:
+                if expression.function_variable.__class__ is not Variable:
+                    _add_function_names(expression.function_variable, procedure_numbers, escaping)
+                for parameter in expression.parameter_variables:
+                    _add_function_names(parameter, procedure_numbers, escaping)
+            else:
+                _add_function_names(expression, procedure_numbers, escaping)
+        else:
+            _add_function_names(command.variable, procedure_numbers, escaping)
+
+    candidates = []
+    for number in sorted(escaping):
+        name = supergraph.procedure_names[number]
+        parameters = nodes[supergraph.entry_ids[number]].command.definition.parameters
+        return_types = [node.command.variable.type for node in supergraph.get_exits(name)
+                        if node.get_command_class() is ReturnCommand]
+        return_type = return_types[0] if len(return_types) == 1 else None
+        candidates.append((number, len(parameters), Function([parameter.type for parameter in parameters] + [return_type], 0)))
+
+    # The targets of every call site
+    targets = array('i')
+    target_offsets = array('i', [0])
+    for call_id in supergraph.call_ids:
+        expression = nodes[call_id].command.expression
+        function_variable = expression.function_variable
+        number = procedure_numbers.get(function_variable.name) if function_variable.__class__ is Variable else None
+        if number:
+            targets.append(number)
+        else:
+            function_type = function_variable.type
+            if function_variable.__class__ is DereferencedVariable:
+                function_type = function_type.value if isinstance(function_type, Reference) else None
+            argument_count = len(expression.parameter_variables)
+            targets.extend(candidate_number for candidate_number, parameter_count, candidate_type in candidates
+                           if parameter_count == argument_count and _agree(function_type, candidate_type))
+        target_offsets.append(len(targets))
+
+    return CallGraph(supergraph, target_offsets, targets)
+
+def _add_function_names(expression, procedure_numbers, numbers):
+    '''Add the numbers of the functions whose names are used in an expression.'''
+    stack = [expression]
+    while stack:
+        expression = stack.pop()
+        if isinstance(expression, Variable):
+            number = procedure_numbers.get(expression.name)
+            if number:
+                numbers.add(number)
+        elif isinstance(expression, BinaryExpression):
+            stack.append(expression.left_term)
+            stack.append(expression.right_term)
+
+def _agree(type_a, type_b):
+    '''May two inferred types be the same type? Types that weren't inferred (None) agree with any.'''
+    stack = [(type_a, type_b)]
+    while stack:
+        type_a, type_b = stack.pop()
+        if type_a is None or type_b is None:
+            continue
+        if isinstance(type_a, Function) and isinstance(type_b, Function):
+            if len(type_a.signature) != len(type_b.signature):
+                return False
+            stack.extend(zip(type_a.signature, type_b.signature))
+        elif isinstance(type_a, Reference) and isinstance(type_b, Reference):
+            stack.append((type_a.value, type_b.value))
+        elif isinstance(type_a, Primitive) and isinstance(type_b, Primitive):
+            if type_a.value != type_b.value:
+                return False
+        elif isinstance(type_a, (Function, Reference, Primitive)) and isinstance(type_b, (Function, Reference, Primitive)):
+            return False
+    return True
+
+def find_strongly_connected_components(count, offsets, targets):
+    '''Find the strongly connected components of a graph, with Tarjan's algorithm.
+
+    The vertices are numbered from 0 to count - 1, and the edges of vertex
+    i go to targets[offsets[i]:offsets[i + 1]]. Returns the components, as
+    lists of vertices, every component after the components it has edges to,
+    and the number of the component of every vertex.
+    '''
+    components = []
+    component_numbers = array('i', [-1]) * count
+    indices = array('i', [-1]) * count
+    low_links = array('i', [0]) * count
+    on_stack = bytearray(count)
+    stack = []
+    index = 0
+
+    for root in xrange(count):
+        if indices[root] != -1:
+            continue
+
+        indices[root] = low_links[root] = index
+        index += 1
+        stack.append(root)
+        on_stack[root] = 1
+        work = [(root, offsets[root])]
+        while work:
+            vertex, position = work[-1]
+            if position < offsets[vertex + 1]:
+                work[-1] = (vertex, position + 1)
+                target = targets[position]
+                if indices[target] == -1:
+                    indices[target] = low_links[target] = index
+                    index += 1
+                    stack.append(target)
+                    on_stack[target] = 1
+                    work.append((target, offsets[target]))
+                elif on_stack[target] and indices[target] < low_links[vertex]:
+                    low_links[vertex] = indices[target]
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                if low_links[vertex] < low_links[parent]:
+                    low_links[parent] = low_links[vertex]
+
+            if low_links[vertex] == indices[vertex]:
+                number = len(components)
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = 0
+                    component_numbers[member] = number
+                    component.append(member)
+                    if member == vertex:
+                        break
+                components.append(component)
+
+    return components, component_numbers
@@ -1,19 +1,16 @@
 from sleuth.common.set import Set
 from sleuth.lingo.components import * #@UnusedWildImport
+from sleuth.lingo.flat import FlatProgram, LazyProgram, KIND_CLASSES, BLOCK, ASSIGNMENT_KIND, CALL_KIND
+from sleuth.tracks.callgraph import find_call_graph
+from sleuth.tracks.dependence import find_control_dependences, find_program_dependences
+from sleuth.tracks.dominance import find_dominators, find_post_dominators, find_loops
+from sleuth.tracks.supergraph import Supergraph
+from array import array
+from operator import attrgetter
 import logging
 
 logger = logging.getLogger(__name__)
 
-class Random():
-    def __init__(self):
-        self.no = 0
-
-    def getNo(self):
-        self.no += 1
-        return self.no
-
-RandomGen = Random()
-
 class Block(object):
     '''Converts a sequence of Commands into associated CommandNodes.
     
@@ -22,121 +19,299 @@ class Block(object):
     that eventually are used to create the CFG. 
     '''
 
-    def __init__(self, exit_node = None, block_depth = 0):
+    def __init__(self, exit_node = None, block_depth = 0, node_count = 0, flat = None):
         assert exit_node is None or isinstance(exit_node, CommandNode), exit_node
 
         self.exit_node = exit_node
         self.block_depth = block_depth
 
+        # The number of nodes made so far, and so the nodeID of the next one
+        self.node_count = node_count
+
+        # The FlatProgram whose rows are scanned (into FlatCommandNodes)
+        # instead of commands, if there is one
+        self.flat = flat
+
     def scan(self, command):
         '''Scan this block, creating CommandNodes for each encountered command.
-        
-        This method recursively calls itself to chain together paths of 
-        commands, creating new blocks where necessary.
+
+        The nodes of a sequence of commands are made first, in order; then,
+        from the last command back to the first, the inner blocks of every
+        command are scanned (each a sequence of its own, exiting to the node
+        after the command, or to the command itself for "while" loops), and
+        the command is connected to its blocks and to the next node. This is
+        the order the scan used to recurse in, kept on a stack of its own so
+        sequences and nesting can be as long as they like.
+
+        If the block has a FlatProgram, command is the row of a command in it.
         '''
-        assert isinstance(command, Command), command
-        self._log('Scanning command: {0}', command)
-
-        # Create the node for this command.
-        #    Due to the recursive nature of this scan, this should be the only place
-        #    we need to create CommandNode instances.
-        this_command_node = CommandNode(command)
-
-        # Check to see if there is a node immediately following this node.
-        #    If there is, recursively call scan to get the command node for it.
-        next_command = command.get_next_command()
-        next_command_node = self.scan(next_command) if next_command else None
-
-        # If this command is a "block" command, get the commands that form its inner blocks. 
-        block_commands = command.get_block_commands()
-        for block_command in block_commands:
-            # Create a new block for the command and scan the block.
-            exit_node = next_command_node or self.exit_node
-
-            if isinstance(command, WhileCommand):
-                exit_node = this_command_node
-
-            inner_block = Block(exit_node = exit_node,
-                                block_depth = self.block_depth + 1)
-            block_command_node = inner_block.scan(block_command)
-
-            # Connect this node to the block.
-            this_command_node.add_successor(block_command_node)
-
-        # If this is an "if" command, then it is already connected to it's children, and needs
-        #    no further connections. 
-        if isinstance(command, IfCommand):
-            self._log('IfCommand does not connect to another node directly. (Connection is via child blocks.)')
-            return this_command_node
-
-        # Connect to the next node, if one is available.
-        if next_command_node:
-            this_command_node.add_successor(next_command_node)
-            self._log('Next command -- connecting {0} to command node: {1}', this_command_node, next_command_node)
-
-        # If this command is the last in a block, connect up to the exit node for the block.
-        elif self.exit_node:
-            self._log('End of this block -- connecting {0} to exit node: {1}', this_command_node, self.exit_node)
-            this_command_node.add_successor(self.exit_node)
-
-        # If this is the last node of a function or the top-level scope, we have nothing to connect to.
-        else:
-            self._log('End of this block @ {0} -- exiting a top level or function scope.', this_command_node)
+        assert isinstance(command, Command) or self.flat is not None, command
+        debug = logger.isEnabledFor(logging.DEBUG)
+
+        # Every scan in progress: the nodes of its sequence, its exit node and
+        # depth, the node to connect to its first node, and the index of the
+        # command (and of the block of the command) it's at
+        root = self._scan_sequence(command, self.block_depth, debug)
+        stack = [[root, self.exit_node, self.block_depth, None, len(root) - 1, 0]]
+
+        while stack:
+            frame = stack[-1]
+            nodes, exit_node, block_depth, parent_node, index, block_index = frame
+
+            if index < 0:
+                stack.pop()
+                if parent_node is not None:
+                    # Connect the command to its block
+                    parent_node.add_successor(nodes[0])
+                continue
+
+            this_command_node = nodes[index]
+            command_class, block_commands = this_command_node.get_blocks()
+            next_command_node = nodes[index + 1] if index + 1 < len(nodes) else None
+
+            # Scan the next block of this command, if there is one
+            if block_index < len(block_commands):
+                frame[5] = block_index + 1
+                if issubclass(command_class, WhileCommand):
+                    block_exit_node = this_command_node
+                else:
+                    block_exit_node = next_command_node or exit_node
+                block_nodes = self._scan_sequence(block_commands[block_index], block_depth + 1, debug)
+                stack.append([block_nodes, block_exit_node, block_depth + 1, this_command_node, len(block_nodes) - 1, 0])
+                continue
 
-        # Return this node up the recursive call chain
-        return this_command_node
+            frame[4] = index - 1
+            frame[5] = 0
 
-    def _log(self, format, *format_args, **format_kwargs):
+            # If this is an "if" command, then it is already connected to it's children, and needs
+            #    no further connections.
+            if issubclass(command_class, IfCommand):
+                if debug:
+                    self._log(block_depth, 'IfCommand does not connect to another node directly. (Connection is via child blocks.)')
+
+            # Connect to the next node, if one is available.
+            elif next_command_node:
+                this_command_node.add_successor(next_command_node)
+                if debug:
+                    self._log(block_depth, 'Next command -- connecting {0} to command node: {1}', this_command_node, next_command_node)
+
+            # If this command is the last in a block, connect up to the exit node for the block.
+            elif exit_node:
+                if debug:
+                    self._log(block_depth, 'End of this block -- connecting {0} to exit node: {1}', this_command_node, exit_node)
+                this_command_node.add_successor(exit_node)
+
+            # If this is the last node of a function or the top-level scope, we have nothing to connect to.
+            elif debug:
+                self._log(block_depth, 'End of this block @ {0} -- exiting a top level or function scope.', this_command_node)
+
+        return root[0]
+
+    def get_dominator_tree(self):
+        '''Get the DominatorTree of the CFG (see the dominance module).
+
+        It's found the first time it's asked for, and shared by the
+        ProgramBlock and its FunctionBlocks, as are the trees and loops below.
+        '''
+        return self._get_graph().get_dominator_tree()
+
+    def get_post_dominator_tree(self):
+        '''Get the DominatorTree of the post dominators of the CFG.'''
+        return self._get_graph().get_post_dominator_tree()
+
+    def get_loop_forest(self):
+        '''Get the LoopForest of the CFG.'''
+        return self._get_graph().get_loop_forest()
+
+    def get_control_dependence_graph(self):
+        '''Get the ControlDependenceGraph of the CFG (see the dependence module).'''
+        return self._get_graph().get_control_dependence_graph()
+
+    def get_program_dependence_graph(self):
+        '''Get the ProgramDependenceGraph of the CFG, for slicing it.'''
+        return self._get_graph().get_program_dependence_graph()
+
+    def _get_graph(self):
+        graph = self.command_node.graph
+        assert graph is not None, 'Only the CFGs of ProgramBlocks are compressed.'
+        return graph
+
+    def _scan_sequence(self, command, block_depth, debug):
+        '''Create the CommandNodes of a command and the commands following it.'''
+        if self.flat is not None:
+            return self._scan_rows(command, block_depth, debug)
+
+        nodes = []
+        while command:
+            if debug:
+                self._log(block_depth, 'Scanning command: {0}', command)
+            nodes.append(CommandNode(command, self.node_count))
+            self.node_count += 1
+            command = command.get_next_command()
+        return nodes
+
+    def _scan_rows(self, row, block_depth, debug):
+        '''Create the FlatCommandNodes of the row of a command and the commands following it.'''
+        flat = self.flat
+        kinds = flat.kinds
+        first_children = flat.first_children
+        next_siblings = flat.next_siblings
+
+        # Only the commands of blocks are followed by others (see FlatProgram.get_next_command_row)
+        in_block = kinds[flat.parents[row]] == BLOCK
+
+        nodes = []
+        node_count = self.node_count
+        while row != -1:
+            nodes.append(FlatCommandNode(flat, row, node_count))
+            node_count += 1
+            if kinds[row] == ASSIGNMENT_KIND and kinds[next_siblings[first_children[row]]] == CALL_KIND:
+                nodes.append(FlatCommandNode(flat, row, node_count, is_return = True))
+                node_count += 1
+            if debug:
+                self._log(block_depth, 'Scanning row {0}: {1}', row, nodes[-1].command)
+            row = next_siblings[row] if in_block else -1
+
+        self.node_count = node_count
+        return nodes
+
+    def _log(self, block_depth, format, *format_args, **format_kwargs):
         formatted_message = format.format(*format_args, **format_kwargs)
-        logger.debug('{indent_level}{message}'.format(indent_level = '  ' * self.block_depth,
+        logger.debug('{indent_level}{message}'.format(indent_level = '  ' * block_depth,
                                                       message = formatted_message))
 
 class ProgramBlock(Block):
-    '''Abstracts a Program as a block of CommandNodes.'''
+    '''Abstracts a Program as a block of CommandNodes.
+
+    A FlatProgram is scanned from its rows, into FlatCommandNodes, so
+    building the CFG makes no components; the program is a LazyProgram.
+    '''
 
     def __init__(self, program):
-        assert isinstance(program, Program), program
+        flat = None
+        if isinstance(program, FlatProgram):
+            flat = program
+            program = LazyProgram(flat)
+        assert isinstance(program, (Program, LazyProgram)), program
         self.program = program
 
-        super(ProgramBlock, self).__init__()
-        self.command_node = self.scan(self.program.command)
-        self.functions = dict((f.name, FunctionBlock(f)) for f in program.functions)
+        super(ProgramBlock, self).__init__(flat = flat)
+
+        # The nodes of the functions are numbered on from those of the program
+        self.functions = {}
+        if flat is None:
+            self.command_node = self.scan(self.program.command)
+            for function_declaration in program.functions:
+                function_block = FunctionBlock(function_declaration, self.node_count)
+                self.functions[function_declaration.name] = function_block
+                self.node_count = function_block.node_count
+        else:
+            self.command_node = self.scan(flat.first_children[flat.get_block_row()])
+            for row in flat.get_function_rows():
+                function_block = FunctionBlock(row, self.node_count, flat)
+                self.functions[flat.get_name(row)] = function_block
+                self.node_count = function_block.node_count
+
+        # Every node of the program and its functions, in reverse post order
+        entry_nodes = [self.command_node] + [self.functions[name].command_node for name in sorted(self.functions)]
+        self.nodes = number_reverse_post_order(entry_nodes)
+
+        # The edges, by nodeID
+        self.graph = CompressedGraph(self.nodes, self.node_count, entry_nodes)
+        for node in self.nodes:
+            node.graph = self.graph
+
+        self._edge_pairs = None
+        self._supergraph = None
+        self._call_graph = None
+
+    def get_edge_pairs(self):
+        '''Get the edge pairs of the program and its functions (see CommandNode.get_paths).
+
+        The pairs are made once, and shared by every caller as a tuple, so no
+        caller can change what the others see.
+        '''
+        if self._edge_pairs is None:
+            edge_pairs = list(self.command_node.get_paths())
+            for name in sorted(self.functions):
+                edge_pairs.extend(self.functions[name].command_node.get_paths())
+            self._edge_pairs = tuple(edge_pairs)
 
-        counter = Counter()
-        no_nodes = self.command_node.assign_post_order(counter)
-        for function_block in self.functions.values():
-            no_nodes = function_block.command_node.assign_post_order(counter, no_nodes)
+        return self._edge_pairs
 
-        no_nodes -= 1
-        self.command_node.reverse_the_post_order(no_nodes)
-        for function_block in self.functions.values():
-            function_block.command_node.reverse_the_post_order(no_nodes)
+    def get_supergraph(self):
+        '''Get the Supergraph of the program and its functions (see the supergraph module).
+
+        It's made the first time it's asked for, and shared by every caller.
+        '''
+        if self._supergraph is None:
+            self._supergraph = Supergraph(self)
+        return self._supergraph
+
+    def get_call_graph(self):
+        '''Get the CallGraph of the program (see the callgraph module), made from its Supergraph.
+
+        The types inferred for the Variables are used to match calls through
+        function values and pointers, so type check the program first to
+        get the most out of it.
+        '''
+        if self._call_graph is None:
+            self._call_graph = find_call_graph(self.get_supergraph())
+        return self._call_graph
 
 class FunctionBlock(Block):
-    '''Abstracts a Function as a block of CommandNodes.'''
+    '''Abstracts a Function as a block of CommandNodes.
+
+    With a FlatProgram, the function declaration is given by its row.
+    '''
+
+    def __init__(self, function_declaration, node_count = 0, flat = None):
+        assert isinstance(function_declaration, FunctionDeclaration) or flat is not None, function_declaration
 
-    def __init__(self, function_declaration):
-        assert isinstance(function_declaration, FunctionDeclaration), function_declaration
-        self.function_declaration = function_declaration
+        super(FunctionBlock, self).__init__(node_count = node_count, flat = flat)
+        self.command_node = self.scan(function_declaration)
 
-        super(FunctionBlock, self).__init__()
-        self.command_node = self.scan(self.function_declaration)
+    @property
+    def function_declaration(self):
+        return self.command_node.command
 
 class CommandNode(object):
     '''Represents a single command in a CFG.'''
 
-    def __init__(self, command):
+    def __init__(self, command, node_id = None):
         assert isinstance(command, Command), command
-	global RandomGen
         self.command = command
 
         self.reverse_post_order = None
-        self.flag = 0
-	self.nodeID = RandomGen.getNo();
+
+        # The CompressedGraph of the CFG, once it's built
+        self.graph = None
+
+        # The index of the node in its CFG, in the order the nodes were made
+        # (nodes of a ProgramBlock are numbered 0..N-1, over its functions too)
+        self.nodeID = node_id
 
         self._predecessors = Set()
         self._successors = Set()
 
+    def get_blocks(self):
+        '''Get the class of the command of this node, and the first commands of its blocks.'''
+        command = self.command
+        return command.__class__, command.get_block_commands()
+
+    def is_node_of(self, command):
+        '''Is this the node of a command (as given by get_blocks)?'''
+        return self.command is command
+
+    def get_command_class(self):
+        '''Get the class of the command of this node.'''
+        return self.command.__class__
+
+    def is_call(self):
+        '''Is this the [CALL] node of a function call?'''
+        command = self.command
+        return command.__class__ is AssignmentCommand and command.expression.__class__ is FunctionCall
+
     def get_identifier(self):
         '''Get the canonical identifier for this node.
         
@@ -147,25 +322,21 @@ class CommandNode(object):
 
     def get_predecessors(self):
         '''Get the predecessors of this command node.'''
+        if self.graph is not None:
+            return self.graph.get_predecessors(self.nodeID)
+
         return list(self._predecessors)
 
     def get_successors(self):
-        '''Get the successors for this command node.'''
+        '''Get the successors for this command node.
 
-        # For consistency, always order the True block of if commands first.
-        if isinstance(self.command, IfCommand):
-            return sorted(self._successors,
-                          key = lambda node: node.command == self.command.true_block,
-                          reverse = True)
-
-        # For consistency, always order the block of the while loop first.
-        if isinstance(self.command, WhileCommand):
-            return sorted(self._successors,
-                          key = lambda node: node.command == self.command.loop_block,
-                          reverse = True)
+        The true block of "if" commands, and the block of "while" loops, come
+        first (see get_ordered_successors).
+        '''
+        if self.graph is not None:
+            return self.graph.get_successors(self.nodeID)
 
-        # Other nodes just return the list.
-        return list(self._successors)
+        return get_ordered_successors(self)
 
     def add_successor(self, successor_node):
         '''Add a successor to this node.
@@ -173,92 +344,54 @@ class CommandNode(object):
         This also makes this node a predecessor of the new successor node.
         '''
         assert isinstance(successor_node, CommandNode), successor_node
+        assert self.graph is None and successor_node.graph is None, 'The CFG is already compressed.'
         self._successors.add(successor_node)
         successor_node._predecessors.add(self)
 
     def get_graph_width(self):
         '''Get the "width" of the graph below this node.
-        
-        This is returned as a list of widths of all successor nodes 
-        below this node.
-        '''
-        if not self._successors:
-            return [1]
-
-        return [sum(successor.get_graph_width()) for successor in self._successors]
 
-    def get_paths(self, _visited_pairs = None):
-        '''Generator function to get the paths below this node.
-        
-        This recursively builds a list of "pairs" such that all edge pairs
-        below this node are accounted for.
+        This is returned as a list of widths of all successor nodes
+        below this node. The width of a node is the number of paths from it
+        to the nodes at the bottom of the graph, once the edges back to the
+        top of "while" loops are left out; nodes at the bottom are 1 wide.
         '''
-        _visited_pairs = Set() if _visited_pairs  is None else _visited_pairs
-
-        if len(self._successors) == 0:
-            edge_pair = (self, None)
-            if edge_pair not in _visited_pairs:
-                _visited_pairs.add(edge_pair)
-                yield edge_pair
-
-        for next in self._successors:
-            edge_pair = (self, next)
-
-            if edge_pair in _visited_pairs:
-                continue
+        if self.graph is not None:
+            widths = self.graph.get_widths()
+            successor_widths = [widths[successor_id] for successor_id in self.graph.get_forward_successor_ids(self.nodeID)]
+        else:
+            widths = get_graph_widths(self)
+            successor_widths = [widths[successor] for successor in get_forward_successors(self, widths)]
 
-            _visited_pairs.add(edge_pair)
-            yield edge_pair
+        return successor_widths or [1]
 
-            for pair in next.get_paths(_visited_pairs):
-                yield pair
+    def get_paths(self):
+        '''Generator function to get the paths below this node.
 
-    def assign_post_order(self, counter, no_nodes = 0):
-        '''Assign the reverse post order value for this and successive nodes.
-        
-        This guarantees that any successor that is "below" this node in the 
-        CFG will have a RPO value greater than this node's RPO value. The
-        node at the top of a "while" loop is considered "above" the nodes in
-        the block it gates, even though it is a successor of the last node 
-        in the block.
-        
-        Note that it is NOT guaranteed that numbers will be used sequentially,
-        only that any node that is a transitive-successor (excluding while
-        nodes) will have a higher RPO value than it's predecessors.
-        
-        @param counter: A counter that continuously increments values.
-        @param no_nodes: Number of nodes counted untill reaching this node.
+        Every edge below this node is yielded once, as a (node, successor)
+        pair, depth first and with successors in the order get_successors
+        gives them; nodes without successors are yielded as (node, None).
+        The search keeps its own stack, and enters every node once, so it
+        takes time linear in the size of the graph below this node.
         '''
-        succ = sorted(self._successors, cmp=lambda x,y: cmp(x.nodeID, y.nodeID))
-
-        # Now tell all successors to assign RPOs
-        for successor in succ:
-
-            # But if we've already visited the successor on the current path,
-            # then we're in a loop and shouldn't update the successor
-            if successor.flag == 0:
-	        successor.flag = 1
-                # Increment the no of nodes counter
-                no_nodes = successor.assign_post_order(counter, no_nodes)
-        
-        # Assign the next available value as our RPO
-        self.reverse_post_order = counter.get_value()
-        self.flag = 1
-        no_nodes += 1
-
-        return no_nodes
-
-    def reverse_the_post_order(self, no_nodes):
-        succ = sorted(self._successors, cmp=lambda x,y: cmp(hash(x), hash(y)))
-
-        self.reverse_post_order = no_nodes - self.reverse_post_order
-        self.flag = 0
-
-        # Now tell all successors to assign RPOs
-        for successor in succ:
-            if successor.flag == 1:
-                successor.flag = 0
-                successor.reverse_the_post_order(no_nodes)
+        entered_nodes = set([self])
+        if not self._successors:
+            yield (self, None)
+
+        stack = [(self, iter(self.get_successors()))]
+        while stack:
+            node, successors = stack[-1]
+            for successor in successors:
+                yield (node, successor)
+
+                if successor not in entered_nodes:
+                    entered_nodes.add(successor)
+                    if not successor._successors:
+                        yield (successor, None)
+                    stack.append((successor, iter(successor.get_successors())))
+                    break
+            else:
+                stack.pop()
 
     def __repr__(self):
         '''Provide a presentable representation of the node.
@@ -284,15 +417,319 @@ class CommandNode(object):
     def __hash__(self):
         return hash(self.command)
 
+class FlatCommandNode(CommandNode):
+    '''Represents the command of a row of a FlatProgram in a CFG.
+
+    The command is only made when it's asked for (with everything in it, see
+    FlatProgram.get_component); the CFG itself is built from the rows, and
+    get_command_class and is_call read them too. The [RET] half of a function
+    call has the row of its [CALL] half.
+    '''
+
+    def __init__(self, flat, row, node_id = None, is_return = False):
+        self.flat = flat
+        self.row = row
+        self.is_return = is_return
 
-class Counter(object):
-    '''Helper class providing an ever-incrementing counter.'''
+        self.reverse_post_order = None
+        self.graph = None
+        self.nodeID = node_id
+
+        self._predecessors = Set()
+        self._successors = Set()
 
-    def __init__(self):
-        self._value = 0
+    @property
+    def command(self):
+        command = self.flat.get_component(self.row)
+        if self.is_return:
+            command = command.get_next_command()
+        return command
+
+    def get_blocks(self):
+        '''Get the class of the command of this node, and the rows of the first commands of its blocks.'''
+        if self.is_return:
+            return AssignmentCommand, []
+        return KIND_CLASSES[self.flat.kinds[self.row]], self.flat.get_block_starts(self.row)
+
+    def is_node_of(self, row):
+        return self.row == row and not self.is_return
+
+    def get_command_class(self):
+        if self.is_return:
+            return AssignmentCommand
+        return KIND_CLASSES[self.flat.kinds[self.row]]
+
+    def is_call(self):
+        if self.is_return:
+            return False
+        flat = self.flat
+        kinds = flat.kinds
+        row = self.row
+        return kinds[row] == ASSIGNMENT_KIND and kinds[flat.next_siblings[flat.first_children[row]]] == CALL_KIND
 
-    def get_value(self):
-        try:
-            return self._value
-        finally:
-            self._value += 1
+    def __eq__(self, other):
+        if not isinstance(other, FlatCommandNode):
+            return CommandNode.__eq__(self, other)
+
+        return self.flat is other.flat and self.row == other.row and self.is_return == other.is_return
+
+    def __hash__(self):
+        return self.row << 1 | self.is_return
+
+
+def get_ordered_successors(node):
+    '''Get the successors of a node, in a consistent order.
+
+    The successors are ordered by nodeID, but for the true block of "if"
+    commands and the block of "while" loops, which always come first.
+    '''
+    successors = sorted(node._successors, key = attrgetter('nodeID'))
+
+    command_class, block_commands = node.get_blocks()
+    if not issubclass(command_class, (IfCommand, WhileCommand)):
+        return successors
+
+    first_command = block_commands[0]
+    successors.sort(key = lambda successor: not successor.is_node_of(first_command))
+    return successors
+
+class CompressedGraph(object):
+    '''The edges of a CFG, as compressed sparse rows of nodeIDs.
+
+    The successors of the node with id i are
+    successors[successor_offsets[i]:successor_offsets[i + 1]], in the order of
+    get_ordered_successors; its predecessors are likewise in predecessors,
+    by nodeID. Solvers can run over the ids in the arrays without making
+    any lists.
+    '''
+
+    def __init__(self, nodes, node_count, entry_nodes):
+        self.nodes = [None] * node_count
+        for node in nodes:
+            self.nodes[node.nodeID] = node
+        assert None not in self.nodes, 'Every node of the CFG must be given.'
+
+        # The nodes at the top of the CFG (and the CFGs of its functions)
+        self.entry_ids = [node.nodeID for node in entry_nodes]
+
+        # The dominator trees and loops of the nodes, once they're found
+        self._dominator_tree = None
+        self._post_dominator_tree = None
+        self._loop_forest = None
+
+        # The dependences between the nodes, once they're found
+        self._control_dependence_graph = None
+        self._program_dependence_graph = None
+
+        # The widths and layers of the nodes, once they're worked out
+        self._widths = None
+        self._layers = None
+
+        self.successor_offsets = array('i', [0])
+        self.successors = array('i')
+        self.predecessor_offsets = array('i', [0])
+        self.predecessors = array('i')
+
+        successors = []
+        successor_offsets = self.successor_offsets
+        predecessors = []
+        predecessor_offsets = self.predecessor_offsets
+        for node in self.nodes:
+            # Most nodes have one successor and one predecessor, and need no sorting
+            if len(node._successors) > 1:
+                successors.extend([successor.nodeID for successor in get_ordered_successors(node)])
+            else:
+                successors.extend([successor.nodeID for successor in node._successors])
+            successor_offsets.append(len(successors))
+
+            if len(node._predecessors) > 1:
+                predecessors.extend(sorted([predecessor.nodeID for predecessor in node._predecessors]))
+            else:
+                predecessors.extend([predecessor.nodeID for predecessor in node._predecessors])
+            predecessor_offsets.append(len(predecessors))
+
+        self.successors.fromlist(successors)
+        self.predecessors.fromlist(predecessors)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def get_forward_successor_ids(self, node_id):
+        '''Get the ids of the successors of a node, but for those the node loops back to.
+
+        The edges left are those to nodes later in reverse post order, which
+        make the CFG a DAG.
+        '''
+        nodes = self.nodes
+        reverse_post_order = nodes[node_id].reverse_post_order
+        return [successor_id for successor_id in self.get_successor_ids(node_id)
+                if nodes[successor_id].reverse_post_order > reverse_post_order]
+
+    def get_dominator_tree(self):
+        if self._dominator_tree is None:
+            self._dominator_tree = find_dominators(self, self.entry_ids)
+        return self._dominator_tree
+
+    def get_post_dominator_tree(self):
+        if self._post_dominator_tree is None:
+            self._post_dominator_tree = find_post_dominators(self)
+        return self._post_dominator_tree
+
+    def get_loop_forest(self):
+        if self._loop_forest is None:
+            self._loop_forest = find_loops(self, self.get_dominator_tree())
+        return self._loop_forest
+
+    def get_control_dependence_graph(self):
+        if self._control_dependence_graph is None:
+            self._control_dependence_graph = find_control_dependences(self, self.get_post_dominator_tree())
+        return self._control_dependence_graph
+
+    def get_program_dependence_graph(self):
+        if self._program_dependence_graph is None:
+            self._program_dependence_graph = find_program_dependences(self, self.get_dominator_tree(),
+                                                                      self.get_control_dependence_graph())
+        return self._program_dependence_graph
+
+    def get_widths(self):
+        '''Get the width of every node by nodeID (see CommandNode.get_graph_width).'''
+        if self._widths is None:
+            self._lay_out()
+        return self._widths
+
+    def get_layers(self):
+        '''Get the layer of every node by nodeID.
+
+        The layer of a node is the length of the longest path to it from the
+        top of its graph, once the edges back to the top of "while" loops are
+        left out, so every edge left goes down at least one layer.
+        '''
+        if self._layers is None:
+            self._lay_out()
+        return self._layers
+
+    def _lay_out(self):
+        '''Work out the widths and layers of the nodes, in time linear in the size of the graph.'''
+        node_count = len(self.nodes)
+        reverse_post_orders = [node.reverse_post_order for node in self.nodes]
+        successors = self.successors
+        successor_offsets = self.successor_offsets
+
+        # Reverse post order sorts the DAG topologically
+        node_ids = sorted(xrange(node_count), key = reverse_post_orders.__getitem__)
+
+        layers = [0] * node_count
+        for node_id in node_ids:
+            layer = layers[node_id] + 1
+            reverse_post_order = reverse_post_orders[node_id]
+            for index in xrange(successor_offsets[node_id], successor_offsets[node_id + 1]):
+                successor_id = successors[index]
+                if reverse_post_orders[successor_id] > reverse_post_order and layers[successor_id] < layer:
+                    layers[successor_id] = layer
+
+        widths = [1] * node_count
+        for node_id in reversed(node_ids):
+            width = 0
+            reverse_post_order = reverse_post_orders[node_id]
+            for index in xrange(successor_offsets[node_id], successor_offsets[node_id + 1]):
+                successor_id = successors[index]
+                if reverse_post_orders[successor_id] > reverse_post_order:
+                    width += widths[successor_id]
+            if width:
+                widths[node_id] = width
+
+        self._widths = widths
+        self._layers = layers
+
+    def get_successor_ids(self, node_id):
+        return self.successors[self.successor_offsets[node_id]:self.successor_offsets[node_id + 1]]
+
+    def get_predecessor_ids(self, node_id):
+        return self.predecessors[self.predecessor_offsets[node_id]:self.predecessor_offsets[node_id + 1]]
+
+    def get_successors(self, node_id):
+        nodes = self.nodes
+        successors = self.successors
+        return [nodes[successors[index]]
+                for index in xrange(self.successor_offsets[node_id], self.successor_offsets[node_id + 1])]
+
+    def get_predecessors(self, node_id):
+        nodes = self.nodes
+        predecessors = self.predecessors
+        return [nodes[predecessors[index]]
+                for index in xrange(self.predecessor_offsets[node_id], self.predecessor_offsets[node_id + 1])]
+
+def get_graph_widths(entry_node):
+    '''Get the widths of the nodes below a node of a CFG with no CompressedGraph.
+
+    The nodes are searched depth first, leaving out the edges back to the
+    nodes on the search path (the tops of "while" loops), and every node's
+    width is worked out once, after those of its successors.
+
+    @return: A dict of the width of every node (see CommandNode.get_graph_width).
+    '''
+    widths = {}
+    on_path = set([entry_node])
+    stack = [(entry_node, iter(get_ordered_successors(entry_node)))]
+    while stack:
+        node, successors = stack[-1]
+        for successor in successors:
+            if successor not in widths and successor not in on_path:
+                on_path.add(successor)
+                stack.append((successor, iter(get_ordered_successors(successor))))
+                break
+        else:
+            stack.pop()
+            on_path.remove(node)
+            widths[node] = sum(widths[successor] for successor in get_forward_successors(node, widths)) or 1
+
+    return widths
+
+def get_forward_successors(node, widths):
+    '''Get the successors of a node whose widths are known: all but those it loops back to.'''
+    return [successor for successor in get_ordered_successors(node) if successor in widths]
+
+def number_reverse_post_order(entry_nodes):
+    '''Number the nodes reachable from some entry nodes in reverse post order.
+
+    This guarantees that any successor that is "below" a node in the CFG
+    will have a RPO value greater than the node's RPO value. The node at the
+    top of a "while" loop is considered "above" the nodes in the block it
+    gates, even though it is a successor of the last node in the block.
+
+    The nodes are searched depth first, from the last entry node to the
+    first (so the nodes reachable from the first are numbered first), and
+    successors in the order they were made (by nodeID), so the numbering
+    only depends on the CFG. Numbers are used sequentially from 0, and
+    nothing but the reverse_post_order of the nodes is changed, so CFGs can
+    be numbered side by side.
+
+    @param entry_nodes: The nodes to search from (the first is numbered 0).
+    @return: The nodes, in reverse post order.
+    '''
+    by_node_id = attrgetter('nodeID')
+    visited = set()
+    post_order = []
+
+    for entry_node in reversed(entry_nodes):
+        if entry_node in visited:
+            continue
+        visited.add(entry_node)
+
+        # The nodes on the current path, with the successors left to search
+        stack = [(entry_node, iter(sorted(entry_node._successors, key = by_node_id)))]
+        while stack:
+            node, successors = stack[-1]
+            for successor in successors:
+                if successor not in visited:
+                    visited.add(successor)
+                    stack.append((successor, iter(sorted(successor._successors, key = by_node_id))))
+                    break
+            else:
+                stack.pop()
+                post_order.append(node)
+
+    post_order.reverse()
+    for number, node in enumerate(post_order):
+        node.reverse_post_order = number
+    return post_order
@@ -0,0 +1,404 @@
+'''
+Provide the control dependences and data dependences of the nodes of CFGs.
+
+Like the dominance module, everything here works on the CompressedGraph of
+a ProgramBlock, by nodeID, covering the program and its functions at once,
+and the graphs are made when they're first asked for and kept with it.
+
+A node is control dependent on a node with some successors if one of them
+leads to it for sure and another may not: it's in the post dominance
+frontier of the node. For every edge a -> b, those are the nodes from b up
+the post dominator tree to (but not including) the immediate post
+dominator of a.
+
+A node is data dependent on the nodes whose definitions of the variables it
+uses reach it. They're found by building (a semi pruned) SSA form: phis
+are placed on the iterated dominance frontiers of the definitions of every
+variable used somewhere, and the definitions reaching every use and phi
+operand are found walking the dominator tree. The phis are kept in the
+graph, and looked through when asking for the definitions of a node.
+
+Definitions are assignments to variables (the RET node of a function call
+assigns its variable, not the CALL node), input and the parameters of
+function declarations. Nothing here knows what a pointer points to, so
+assignments through pointers (!p := e and input !p) use p, and may define
+every variable whose address is taken (ref x) in their function (or at the
+top level): a use is reached by the may definitions before it up to the
+last definition for sure, and by that definition too. Likewise, reads
+through pointers (b := !p, and calls of !f) use p and every variable whose
+address is taken. Functions don't see the definitions made by their
+callers (nor the other way around).
+'''
+
+from array import array
+
+from sleuth.lingo.components import * #@UnusedWildImport
+from sleuth.tracks.sparse import compress_edges, reverse_edges
+
+
+class ControlDependenceGraph(object):
+    '''The control dependences between the nodes of a CFG.
+
+    The nodes a node is control dependent on (its controllers) are
+    controllers[controller_offsets[i]:controller_offsets[i + 1]] for the
+    node with id i, and the nodes control dependent on it (its dependents)
+    are likewise in dependents, by nodeID.
+    '''
+
+    def __init__(self, graph, controller_offsets, controllers):
+        self.graph = graph
+        self.controller_offsets = controller_offsets
+        self.controllers = controllers
+        self.dependent_offsets, self.dependents = reverse_edges(len(graph), controller_offsets, controllers)
+
+    def get_controllers(self, node):
+        '''Get the CommandNodes a CommandNode is control dependent on.'''
+        return _get_row(self.graph.nodes, self.controller_offsets, self.controllers, node.nodeID)
+
+    def get_dependents(self, node):
+        '''Get the CommandNodes control dependent on a CommandNode.'''
+        return _get_row(self.graph.nodes, self.dependent_offsets, self.dependents, node.nodeID)
+
+class ProgramDependenceGraph(object):
+    '''The control dependences and data dependences between the nodes of a CFG.
+
+    The data dependences are kept in SSA form, with the phis as vertices
+    after the nodes: phi number p is the vertex numbered node_count + p, at
+    the start of the node numbered phi_nodes[p], for the variable with the
+    id phi_variables[p]. The definitions (or phis) reaching the uses of
+    vertex i are definitions[definition_offsets[i]:definition_offsets[i + 1]]
+    (for a phi, its operands), and the vertices using the definitions of
+    vertex i are likewise in uses. Keeping the phis keeps the graph in
+    proportion to the program: where a variable is defined in a sequence of
+    loops, every definition reaches every use after it.
+    '''
+
+    def __init__(self, graph, control_dependence_graph, phi_nodes, phi_variables, definition_offsets, definitions):
+        self.graph = graph
+        self.control_dependence_graph = control_dependence_graph
+        self.phi_nodes = phi_nodes
+        self.phi_variables = phi_variables
+        self.definition_offsets = definition_offsets
+        self.definitions = definitions
+        self.use_offsets, self.uses = reverse_edges(len(definition_offsets) - 1, definition_offsets, definitions)
+
+    def get_definitions(self, node):
+        '''Get the CommandNodes whose definitions reach the uses of a CommandNode.'''
+        return self._get_nodes(node.nodeID, self.definition_offsets, self.definitions)
+
+    def get_uses(self, node):
+        '''Get the CommandNodes using the definitions of a CommandNode.'''
+        return self._get_nodes(node.nodeID, self.use_offsets, self.uses)
+
+    def get_backward_slice(self, nodes):
+        '''Get the CommandNodes some CommandNodes depend on (them included), in the order they're found.
+
+        Takes time proportional to the size of the slice (and the
+        dependences of its nodes), not of the program.
+        '''
+        control_dependence_graph = self.control_dependence_graph
+        return self._slice(nodes, control_dependence_graph.controller_offsets, control_dependence_graph.controllers,
+                           self.definition_offsets, self.definitions)
+
+    def get_forward_slice(self, nodes):
+        '''Get the CommandNodes depending on some CommandNodes (them included), in the order they're found.'''
+        control_dependence_graph = self.control_dependence_graph
+        return self._slice(nodes, control_dependence_graph.dependent_offsets, control_dependence_graph.dependents,
+                           self.use_offsets, self.uses)
+
+    def _get_nodes(self, node_id, offsets, targets):
+        '''Get the nodes at the ends of the data dependences of a node, looking through the phis.'''
+        node_count = len(self.graph)
+        node_ids = set()
+        seen_phis = set()
+        stack = [node_id]
+        while stack:
+            vertex = stack.pop()
+            for index in xrange(offsets[vertex], offsets[vertex + 1]):
+                target = targets[index]
+                if target < node_count:
+                    node_ids.add(target)
+                elif target not in seen_phis:
+                    seen_phis.add(target)
+                    stack.append(target)
+
+        graph_nodes = self.graph.nodes
+        return [graph_nodes[target] for target in sorted(node_ids)]
+
+    def _slice(self, nodes, control_offsets, control_targets, data_offsets, data_targets):
+        node_count = len(self.graph)
+        reached = []
+        seen = set()
+        for node in nodes:
+            if node.nodeID not in seen:
+                seen.add(node.nodeID)
+                reached.append(node.nodeID)
+
+        index = 0
+        while index < len(reached):
+            vertex = reached[index]
+            index += 1
+            if vertex < node_count:
+                for position in xrange(control_offsets[vertex], control_offsets[vertex + 1]):
+                    target = control_targets[position]
+                    if target not in seen:
+                        seen.add(target)
+                        reached.append(target)
+            for position in xrange(data_offsets[vertex], data_offsets[vertex + 1]):
+                target = data_targets[position]
+                if target not in seen:
+                    seen.add(target)
+                    reached.append(target)
+
+        graph_nodes = self.graph.nodes
+        return [graph_nodes[vertex] for vertex in reached if vertex < node_count]
+
+
+def get_definitions_and_uses(command, address_taken = ()):
+    '''Get the ids of the variables a command defines, and of those it uses (in no particular order).
+
+    @param address_taken: The ids of the variables whose address is taken
+        where the command is, which an assignment through a pointer may
+        define (see is_pointer_store), and a read through a pointer may use.
+    '''
+    defined = ()
+    used = []
+    if isinstance(command, AssignmentCommand):
+        variable = command.assigned_variable
+        if isinstance(variable, DereferencedVariable):
+            used.append(variable.id)
+            if not isinstance(command.expression, FunctionCall):
+                defined = tuple(address_taken)
+        elif not isinstance(command.expression, FunctionCall):
+            defined = (variable.id,)
+        if _add_variables(command.expression, used):
+            used.extend(address_taken)
+    elif isinstance(command, ConditionalCommand):
+        if _add_variables(command.expression, used):
+            used.extend(address_taken)
+    elif isinstance(command, InputCommand):
+        if isinstance(command.variable, DereferencedVariable):
+            used.append(command.variable.id)
+            defined = tuple(address_taken)
+        else:
+            defined = (command.variable.id,)
+    elif isinstance(command, ReturnCommand):
+        used.append(command.variable.id)
+    elif isinstance(command, FunctionDeclaration):
+        defined = tuple(parameter.id for parameter in command.definition.parameters)
+    return defined, used
+
+def is_pointer_store(command):
+    '''Does a command assign through a pointer (so its definitions are only maybe)?'''
+    if isinstance(command, AssignmentCommand):
+        return (isinstance(command.assigned_variable, DereferencedVariable) and
+                not isinstance(command.expression, FunctionCall))
+    return isinstance(command, InputCommand) and isinstance(command.variable, DereferencedVariable)
+
+def get_address_taken(command):
+    '''Get the ids of the variables whose address a command takes.'''
+    ids = []
+    if isinstance(command, (AssignmentCommand, ConditionalCommand)):
+        _add_variables(command.expression, ids, ReferencedVariable)
+    return ids
+
+def _add_variables(expression, ids, variable_class = Variable):
+    '''Add the ids of the variables (of a class) in an expression to a list.
+
+    @return: Whether the expression reads through a pointer.
+    '''
+    dereferences = False
+    stack = [expression]
+    while stack:
+        expression = stack.pop()
+        if isinstance(expression, Variable):
+            if isinstance(expression, variable_class):
+                ids.append(expression.id)
+            if isinstance(expression, DereferencedVariable):
+                dereferences = True
+        elif isinstance(expression, BinaryExpression):
+            stack.append(expression.left_term)
+            stack.append(expression.right_term)
+        elif isinstance(expression, (FunctionCall, FunctionReturn)):
+            stack.append(expression.function_variable)
+            stack.extend(expression.parameter_variables)
+    return dereferences
+
+def _get_row(nodes, offsets, targets, node_id):
+    return [nodes[targets[index]] for index in xrange(offsets[node_id], offsets[node_id + 1])]
+
+def find_control_dependences(graph, post_dominator_tree):
+    '''Make the ControlDependenceGraph of a CompressedGraph, given its post DominatorTree.'''
+    node_count = len(graph)
+    successor_offsets = graph.successor_offsets
+    successors = graph.successors
+    parents = post_dominator_tree.parents
+
+    rows = [[] for _ in xrange(node_count)]
+    for node_id in xrange(node_count):
+        # A node with one successor decides nothing, but for the bottoms
+        # given to endless loops, which may go on or end there
+        start, end = successor_offsets[node_id], successor_offsets[node_id + 1]
+        stop_id = parents[node_id]
+        if end - start < 2 and stop_id != -1:
+            continue
+
+        for index in xrange(start, end):
+            runner_id = successors[index]
+            while runner_id != stop_id and runner_id != -1:
+                rows[runner_id].append(node_id)
+                runner_id = parents[runner_id]
+
+    offsets, controllers = compress_edges(node_count, rows)
+    return ControlDependenceGraph(graph, offsets, controllers)
+
+def find_address_taken(graph, dominator_tree):
+    '''Get the ids of the variables whose address is taken in the function (or top level) of every node of a CompressedGraph.
+
+    @return: The ids as frozensets, by nodeID, shared by the nodes of a
+        function. The functions are told apart by the roots of the
+        DominatorTree; the nodes not reached from them get an empty one.
+    '''
+    nodes = graph.nodes
+    child_offsets = dominator_tree.child_offsets
+    children = dominator_tree.children
+
+    address_taken = [frozenset()] * len(graph)
+    for root_id in dominator_tree.roots:
+        ids = set()
+        node_ids = [root_id]
+        for node_id in node_ids:
+            ids.update(get_address_taken(nodes[node_id].command))
+            node_ids.extend(children[child_offsets[node_id]:child_offsets[node_id + 1]])
+        if ids:
+            ids = frozenset(ids)
+            for node_id in node_ids:
+                address_taken[node_id] = ids
+    return address_taken
+
+def find_dominance_frontiers(graph, dominator_tree):
+    '''Get the dominance frontier of every node of a CompressedGraph, by nodeID, as lists of nodeIDs.'''
+    node_count = len(graph)
+    predecessor_offsets = graph.predecessor_offsets
+    predecessors = graph.predecessors
+    parents = dominator_tree.parents
+
+    frontiers = [[] for _ in xrange(node_count)]
+    for node_id in xrange(node_count):
+        start, end = predecessor_offsets[node_id], predecessor_offsets[node_id + 1]
+        if end - start < 2:
+            continue
+
+        stop_id = parents[node_id]
+        for index in xrange(start, end):
+            runner_id = predecessors[index]
+            while runner_id != stop_id and runner_id != -1:
+                frontier = frontiers[runner_id]
+                if not frontier or frontier[-1] != node_id:
+                    frontier.append(node_id)
+                runner_id = parents[runner_id]
+    return frontiers
+
+def find_program_dependences(graph, dominator_tree, control_dependence_graph):
+    '''Make the ProgramDependenceGraph of a CompressedGraph, given its DominatorTree and ControlDependenceGraph.'''
+    node_count = len(graph)
+    nodes = graph.nodes
+
+    address_taken = find_address_taken(graph, dominator_tree)
+    definitions_and_uses = [get_definitions_and_uses(node.command, address_taken[node.nodeID]) for node in nodes]
+    may_define = array('b', [is_pointer_store(node.command) for node in nodes])
+
+    # The nodes defining every variable used somewhere
+    used_ids = set()
+    for _, used in definitions_and_uses:
+        used_ids.update(used)
+    defining_ids = {}
+    for node_id, (defined, _) in enumerate(definitions_and_uses):
+        for variable_id in defined:
+            if variable_id in used_ids:
+                defining_ids.setdefault(variable_id, []).append(node_id)
+
+    # Place the phis; phi number p is the vertex numbered node_count + p
+    frontiers = find_dominance_frontiers(graph, dominator_tree)
+    phis = [[] for _ in xrange(node_count)]
+    phi_nodes = array('i')
+    phi_variables = array('i')
+    has_phi = array('i', [-1]) * node_count
+    in_work = array('i', [-1]) * node_count
+    for variable_id, node_ids in defining_ids.iteritems():
+        work = list(node_ids)
+        for node_id in work:
+            in_work[node_id] = variable_id
+        while work:
+            for frontier_id in frontiers[work.pop()]:
+                if has_phi[frontier_id] != variable_id:
+                    has_phi[frontier_id] = variable_id
+                    phis[frontier_id].append((variable_id, node_count + len(phi_nodes)))
+                    phi_nodes.append(frontier_id)
+                    phi_variables.append(variable_id)
+                    if in_work[frontier_id] != variable_id:
+                        in_work[frontier_id] = variable_id
+                        work.append(frontier_id)
+
+    # Walk the dominator tree, keeping the definitions (and phis) reaching
+    # the nodes; the rows of the phis are their operands
+    successor_offsets = graph.successor_offsets
+    successors = graph.successors
+    child_offsets = dominator_tree.child_offsets
+    children = dominator_tree.children
+
+    reaching = {}
+    rows = [[] for _ in xrange(node_count + len(phi_nodes))]
+
+    def enter(node_id):
+        pushed = []
+        for variable_id, vertex in phis[node_id]:
+            reaching.setdefault(variable_id, []).append(vertex)
+            pushed.append(variable_id)
+
+        defined, used = definitions_and_uses[node_id]
+        row = rows[node_id]
+        for variable_id in used:
+            vertices = reaching.get(variable_id)
+            if vertices:
+                _add_reaching(row, vertices, may_define, node_count)
+        for variable_id in defined:
+            if variable_id in used_ids:
+                reaching.setdefault(variable_id, []).append(node_id)
+                pushed.append(variable_id)
+
+        for index in xrange(successor_offsets[node_id], successor_offsets[node_id + 1]):
+            for variable_id, vertex in phis[successors[index]]:
+                vertices = reaching.get(variable_id)
+                if vertices:
+                    _add_reaching(rows[vertex], vertices, may_define, node_count)
+        return pushed
+
+    for root_id in dominator_tree.roots:
+        stack = [(root_id, child_offsets[root_id], enter(root_id))]
+        while stack:
+            node_id, index, pushed = stack[-1]
+            if index < child_offsets[node_id + 1]:
+                stack[-1] = (node_id, index + 1, pushed)
+                child_id = children[index]
+                stack.append((child_id, child_offsets[child_id], enter(child_id)))
+            else:
+                stack.pop()
+                for variable_id in pushed:
+                    reaching[variable_id].pop()
+
+    offsets, definitions = compress_edges(len(rows), rows)
+    return ProgramDependenceGraph(graph, control_dependence_graph, phi_nodes, phi_variables, offsets, definitions)
+
+def _add_reaching(row, vertices, may_define, node_count):
+    '''Add the definitions (and phis) of a variable reaching a vertex to its row.
+
+    Those are the last one, and the ones before it while they only may define it.
+    '''
+    index = len(vertices) - 1
+    while index >= 0:
+        vertex = vertices[index]
+        row.append(vertex)
+        if vertex >= node_count or not may_define[vertex]:
+            break
+        index -= 1
@@ -0,0 +1,351 @@
+'''
+Provide dominator trees and loop nesting forests of CFGs.
+
+Everything here works on the CompressedGraph of a ProgramBlock (see the cfg
+module), by nodeID, and covers the program and all its functions at once:
+their CFGs don't share any nodes, so each is a tree (or trees) of its own.
+ProgramBlock and FunctionBlock make them when they're first asked for, and
+keep them with the graph.
+
+Dominators are found with the iterative algorithm of Cooper, Harvey and
+Kennedy ("A Simple, Fast Dominance Algorithm"), over a reverse post order
+of the graph: every node's dominator is the nearest common dominator of its
+predecessors, found by walking up the tree built so far, until nothing
+changes. Post dominators are the dominators of the reversed graph.
+'''
+
+from array import array
+
+
+class DominatorTree(object):
+    '''The immediate dominators (or post dominators) of the nodes of a CFG.
+
+    A node dominates another if every path from the top of their CFG to the
+    other goes through it (post dominates it if every path from the other to
+    the bottom of the CFG does), and its immediate dominator is the nearest
+    of the nodes dominating it but itself. Nodes at the top of their CFGs
+    (the bottom, for post dominators) have no immediate dominator, and are
+    the roots of the tree.
+    '''
+
+    def __init__(self, graph, parents, order):
+        '''
+        @param graph: The CompressedGraph of the nodes.
+        @param parents: The nodeID of the immediate dominator of every node,
+            by nodeID, or -1 for roots.
+        @param order: The nodeIDs, every node after its immediate dominator.
+        '''
+        self.graph = graph
+        self.parents = parents
+        self.order = order
+
+        # The children of every node, as compressed sparse rows
+        node_count = len(parents)
+        child_counts = [0] * (node_count + 1)
+        for parent_id in parents:
+            child_counts[parent_id + 1] += 1
+        offsets = [0] * (node_count + 1)
+        for node_id in xrange(node_count):
+            offsets[node_id + 1] = offsets[node_id] + child_counts[node_id + 1]
+        self.child_offsets = array('i', offsets)
+
+        positions = offsets[:-1]
+        children = [0] * len(order)
+        self.roots = []
+        for node_id in order:
+            parent_id = parents[node_id]
+            if parent_id == -1:
+                self.roots.append(node_id)
+            else:
+                children[positions[parent_id]] = node_id
+                positions[parent_id] += 1
+        self.children = array('i', children[:offsets[-1]])
+
+        # Every node dominates the nodes numbered from its start to its end,
+        # numbering the tree depth first
+        self.starts = array('i', [0]) * node_count
+        self.ends = array('i', [0]) * node_count
+        number = 0
+        for root_id in self.roots:
+            self.starts[root_id] = number
+            number += 1
+            stack = [(root_id, self.child_offsets[root_id])]
+            while stack:
+                node_id, index = stack[-1]
+                if index < self.child_offsets[node_id + 1]:
+                    stack[-1] = (node_id, index + 1)
+                    child_id = self.children[index]
+                    self.starts[child_id] = number
+                    number += 1
+                    stack.append((child_id, self.child_offsets[child_id]))
+                else:
+                    stack.pop()
+                    self.ends[node_id] = number
+
+    def get_immediate_dominator(self, node):
+        '''Get the immediate dominator of a CommandNode, or None at the roots.'''
+        parent_id = self.parents[node.nodeID]
+        return None if parent_id == -1 else self.graph.nodes[parent_id]
+
+    def get_children(self, node):
+        '''Get the nodes a CommandNode is the immediate dominator of.'''
+        nodes = self.graph.nodes
+        children = self.children
+        return [nodes[children[index]]
+                for index in xrange(self.child_offsets[node.nodeID], self.child_offsets[node.nodeID + 1])]
+
+    def get_roots(self):
+        nodes = self.graph.nodes
+        return [nodes[root_id] for root_id in self.roots]
+
+    def dominates(self, node, other_node):
+        '''Does a CommandNode dominate another (or is it the same one)?'''
+        return self.dominates_id(node.nodeID, other_node.nodeID)
+
+    def dominates_id(self, node_id, other_node_id):
+        '''Does the node with one nodeID dominate the node with the other?'''
+        return self.starts[node_id] <= self.starts[other_node_id] and self.ends[other_node_id] <= self.ends[node_id]
+
+class LoopForest(object):
+    '''The loops of a CFG, and how they nest.
+
+    A loop is made of a header, the node all its edges back up the CFG go
+    to (the top of a "while" loop), and the body: the nodes that reach one of
+    those edges without going through the header. The headers form a forest,
+    every loop under the innermost loop around it.
+    '''
+
+    def __init__(self, graph, headers, parents, depths):
+        '''
+        @param graph: The CompressedGraph of the nodes.
+        @param headers: The nodeIDs of the headers, in reverse post order.
+        @param parents: The nodeID of the header of the innermost loop every
+            node is in, by nodeID (for headers, of the loop around their own),
+            or -1 for nodes outside every loop.
+        @param depths: The number of loops every node is in, by nodeID
+            (headers are in their own loops).
+        '''
+        self.graph = graph
+        self.headers = headers
+        self.parents = parents
+        self.depths = depths
+
+        self._is_header = set(headers)
+        self._members = None
+
+    def is_header(self, node):
+        return node.nodeID in self._is_header
+
+    def get_headers(self):
+        nodes = self.graph.nodes
+        return [nodes[header_id] for header_id in self.headers]
+
+    def get_header(self, node):
+        '''Get the header of the innermost loop a CommandNode is in (itself, for headers), or None.'''
+        if node.nodeID in self._is_header:
+            return node
+        parent_id = self.parents[node.nodeID]
+        return None if parent_id == -1 else self.graph.nodes[parent_id]
+
+    def get_parent(self, header):
+        '''Get the header of the loop around the loop of a header, or None.'''
+        parent_id = self.parents[header.nodeID]
+        return None if parent_id == -1 else self.graph.nodes[parent_id]
+
+    def get_depth(self, node):
+        '''Get the number of loops a CommandNode is in.'''
+        return self.depths[node.nodeID]
+
+    def get_body(self, header):
+        '''Get the nodes of the loop of a header: the header, and the nodes of its body, nested loops and all.'''
+        if self._members is None:
+            # The nodes (and headers of nested loops) right in every loop
+            self._members = dict((header_id, []) for header_id in self.headers)
+            for node_id, parent_id in enumerate(self.parents):
+                if parent_id != -1:
+                    self._members[parent_id].append(node_id)
+
+        nodes = self.graph.nodes
+        body = [header]
+        stack = [header.nodeID]
+        while stack:
+            for node_id in self._members[stack.pop()]:
+                body.append(nodes[node_id])
+                if node_id in self._is_header:
+                    stack.append(node_id)
+        return body
+
+
+def find_dominators(graph, entry_ids):
+    '''Make the DominatorTree of a CompressedGraph, whose CFGs start at the nodes with the given ids.'''
+    return _find_dominators(graph, entry_ids, graph.successor_offsets, graph.successors,
+                            graph.predecessor_offsets, graph.predecessors)
+
+def find_post_dominators(graph):
+    '''Make the DominatorTree of the post dominators of the nodes of a CompressedGraph.
+
+    The bottoms of the CFGs are the nodes without successors. Nodes that
+    can't reach any of them (like the nodes of a "while" loop at the end of
+    a program, which never exits) are given bottoms of their own: the last
+    node in reverse post order that can't reach one is made a bottom, until
+    every node reaches one.
+    '''
+    node_count = len(graph)
+    exit_ids = [node_id for node_id in xrange(node_count)
+                if graph.successor_offsets[node_id] == graph.successor_offsets[node_id + 1]]
+
+    # Nodes later in reverse post order first
+    reverse_post_orders = [node.reverse_post_order for node in graph.nodes]
+    candidate_ids = sorted(xrange(node_count), key = reverse_post_orders.__getitem__, reverse = True)
+
+    return _find_dominators(graph, exit_ids, graph.predecessor_offsets, graph.predecessors,
+                            graph.successor_offsets, graph.successors, candidate_ids)
+
+def _find_dominators(graph, root_ids, successor_offsets, successors, predecessor_offsets, predecessors,
+                     candidate_ids = None):
+    '''Find the dominators of the graph with the given edges, reached from the given roots.
+
+    If candidate_ids are given, the nodes not reached from the roots are
+    reached from the first of them that isn't, made a root, and so on.
+    '''
+    node_count = len(graph)
+
+    # Number the nodes in reverse post order, from a root above all the roots;
+    # the root is numbered 0 and the nodes from 1
+    visited = bytearray(node_count)
+    post_order = []
+    root_ids = list(root_ids)
+    candidates = iter(candidate_ids or ())
+    roots = 0
+    while True:
+        for root_id in root_ids[roots:]:
+            if visited[root_id]:
+                continue
+            visited[root_id] = 1
+            stack = [(root_id, successor_offsets[root_id])]
+            while stack:
+                node_id, index = stack[-1]
+                if index < successor_offsets[node_id + 1]:
+                    stack[-1] = (node_id, index + 1)
+                    successor_id = successors[index]
+                    if not visited[successor_id]:
+                        visited[successor_id] = 1
+                        stack.append((successor_id, successor_offsets[successor_id]))
+                else:
+                    stack.pop()
+                    post_order.append(node_id)
+        roots = len(root_ids)
+
+        if len(post_order) == node_count:
+            break
+        for candidate_id in candidates:
+            if not visited[candidate_id]:
+                root_ids.append(candidate_id)
+                break
+        else:
+            raise ValueError('Some nodes of the CFG are not reachable.')
+
+    order = post_order[::-1]
+    numbers = [0] * node_count
+    for number, node_id in enumerate(order):
+        numbers[node_id] = number + 1
+
+    # The dominator of every node, by number
+    dominators = [-1] * (node_count + 1)
+    dominators[0] = 0
+    for root_id in root_ids:
+        dominators[numbers[root_id]] = 0
+    is_root = bytearray(node_count + 1)
+    for root_id in root_ids:
+        is_root[numbers[root_id]] = 1
+
+    changed = True
+    while changed:
+        changed = False
+        for number in xrange(1, node_count + 1):
+            if is_root[number]:
+                continue
+
+            node_id = order[number - 1]
+            dominator = -1
+            for index in xrange(predecessor_offsets[node_id], predecessor_offsets[node_id + 1]):
+                other = numbers[predecessors[index]]
+                if dominators[other] == -1:
+                    continue
+                if dominator == -1:
+                    dominator = other
+                    continue
+
+                # Walk up to the nearest common dominator
+                while other != dominator:
+                    while other > dominator:
+                        other = dominators[other]
+                    while dominator > other:
+                        dominator = dominators[dominator]
+
+            if dominators[number] != dominator:
+                dominators[number] = dominator
+                changed = True
+
+    parents = array('i', [-1]) * node_count
+    for number in xrange(1, node_count + 1):
+        dominator = dominators[number]
+        if dominator:
+            parents[order[number - 1]] = order[dominator - 1]
+
+    return DominatorTree(graph, parents, order)
+
+def find_loops(graph, dominator_tree):
+    '''Make the LoopForest of a CompressedGraph, given its DominatorTree.
+
+    The headers are the nodes that dominate some of their predecessors, and
+    their loops are found from the innermost (the last in reverse post order)
+    out, each taking in the loops already found in it. Lingo CFGs are made of
+    nested blocks, so every edge back up the CFG goes to such a header.
+    '''
+    node_count = len(graph)
+    predecessors = graph.predecessors
+    predecessor_offsets = graph.predecessor_offsets
+    dominates_id = dominator_tree.dominates_id
+
+    order = dominator_tree.order
+    headers = [node_id for node_id in order
+               if any(dominates_id(node_id, predecessors[index])
+                      for index in xrange(predecessor_offsets[node_id], predecessor_offsets[node_id + 1]))]
+
+    parents = array('i', [-1]) * node_count
+
+    # The outermost loop found so far that every node is in (or the node)
+    outermost = range(node_count)
+
+    def find_outermost(node_id):
+        root_id = node_id
+        while outermost[root_id] != root_id:
+            root_id = outermost[root_id]
+        while outermost[node_id] != root_id:
+            outermost[node_id], node_id = root_id, outermost[node_id]
+        return root_id
+
+    for header_id in reversed(headers):
+        stack = [predecessors[index] for index in xrange(predecessor_offsets[header_id], predecessor_offsets[header_id + 1])
+                 if dominates_id(header_id, predecessors[index])]
+        while stack:
+            node_id = find_outermost(stack.pop())
+            if node_id == header_id or parents[node_id] != -1:
+                continue
+
+            parents[node_id] = header_id
+            outermost[node_id] = header_id
+            stack.extend(predecessors[index] for index in xrange(predecessor_offsets[node_id], predecessor_offsets[node_id + 1]))
+
+    # Headers come before the nodes of their loops
+    is_header = bytearray(node_count)
+    for header_id in headers:
+        is_header[header_id] = 1
+    depths = array('i', [0]) * node_count
+    for node_id in order:
+        parent_id = parents[node_id]
+        depth = 0 if parent_id == -1 else depths[parent_id]
+        depths[node_id] = depth + 1 if is_header[node_id] else depth
+
+    return LoopForest(graph, headers, parents, depths)
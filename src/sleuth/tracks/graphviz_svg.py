@@ -39,6 +39,7 @@ class GraphvizSVGRenderer(object):
 
         def add_node(node):
             if node not in unique_nodes:
+                unique_nodes.add(node)
                 attributes = '[id={id},label="{label}"]' \
                 .format(id = node.get_identifier(),
                         label = repr(node))
@@ -55,9 +56,6 @@ class GraphvizSVGRenderer(object):
             add_node(src)
             add_node(dst)
 
-            unique_nodes.add(src)
-            unique_nodes.add(dst)
-
             file.write('{src} -> {dst} {attr}\n' \
                 .format(src = src.get_identifier(),
                         dst = dst.get_identifier(),
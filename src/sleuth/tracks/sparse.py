@@ -0,0 +1,62 @@
+'''
+Provide the compressed sparse rows the graphs of the analyses are kept in.
+
+The edges of a graph whose vertices are numbered from 0 to count - 1 are
+kept in two arrays: those of vertex i go to targets[offsets[i]:offsets[i + 1]].
+Edges may carry labels (like the kinds of the edges of a Supergraph) in a
+third array, at the same indices as their targets.
+'''
+
+from array import array
+
+
+def compress_edges(node_count, rows):
+    '''Make compressed sparse rows of the targets of the edges of every node.
+
+    @param rows: The ids of the targets of the edges of every node, by id,
+        in any order and maybe more than once.
+    @return: The offsets and the targets (sorted, once each), as arrays.
+    '''
+    offsets = array('i', [0])
+    targets = array('i')
+    for row in rows:
+        if len(row) > 1:
+            row = sorted(set(row))
+        targets.extend(row)
+        offsets.append(len(targets))
+    assert len(offsets) == node_count + 1
+    return offsets, targets
+
+def reverse_edges(node_count, offsets, targets, labels = None):
+    '''Make compressed sparse rows of the sources of the edges of every node, given those of their targets.
+
+    The sources of every node are in order of id. If the labels of the edges
+    are given, they're moved along with them, and returned (in an array of
+    the same type) after the offsets and the sources.
+    '''
+    counts = [0] * (node_count + 1)
+    for target in targets:
+        counts[target + 1] += 1
+    reverse_offsets = array('i', [0]) * (node_count + 1)
+    for node_id in xrange(node_count):
+        reverse_offsets[node_id + 1] = reverse_offsets[node_id] + counts[node_id + 1]
+
+    positions = list(reverse_offsets[:-1])
+    sources = array('i', [0]) * len(targets)
+    if labels is None:
+        for node_id in xrange(node_count):
+            for index in xrange(offsets[node_id], offsets[node_id + 1]):
+                target = targets[index]
+                sources[positions[target]] = node_id
+                positions[target] += 1
+        return reverse_offsets, sources
+
+    reverse_labels = array(labels.typecode, [0]) * len(targets)
+    for node_id in xrange(node_count):
+        for index in xrange(offsets[node_id], offsets[node_id + 1]):
+            target = targets[index]
+            position = positions[target]
+            sources[position] = node_id
+            reverse_labels[position] = labels[index]
+            positions[target] = position + 1
+    return reverse_offsets, sources, reverse_labels
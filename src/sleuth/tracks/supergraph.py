@@ -0,0 +1,198 @@
+'''
+Provide the interprocedural supergraph of a program.
+
+A ProgramBlock builds a CFG for the program and one for every function,
+with nothing going from a call to the function it calls. The Supergraph
+joins them: every CALL node (x := f(a)) gets a call edge to the entry of
+f (its declaration) and a call to return edge to its RET node, and every
+exit of f (the nodes without successors, like "return") gets a return
+edge to the RET node of every call of f. The other edges of the CFGs are
+flow edges. The edges are kept by nodeID as compressed sparse rows, like
+the CompressedGraph, with the kind of every edge alongside.
+
+Calls are matched to functions by the name of the function variable, as
+Lingo function names are global (see the symbols module). Calls through
+pointers (!f(a)) and calls of names that aren't declared functions aren't
+matched, and only get their call to return edge.
+'''
+
+from array import array
+
+from sleuth.lingo.components import * #@UnusedWildImport
+from sleuth.tracks.sparse import reverse_edges
+
+
+FLOW_EDGE = 0
+CALL_EDGE = 1
+RETURN_EDGE = 2
+CALL_TO_RETURN_EDGE = 3
+
+EDGE_KIND_NAMES = ('flow', 'call', 'return', 'call to return')
+
+
+class Supergraph(object):
+    '''The CFGs of a program and its functions, joined at the calls.
+
+    The procedures are the top level of the program (numbered 0, named
+    None) and the functions, numbered from 1 in the order of their names.
+    The successors of the node with id i are
+    successors[successor_offsets[i]:successor_offsets[i + 1]], the kinds of
+    the edges to them are at the same places in successor_kinds, and its
+    predecessors are likewise in predecessors and predecessor_kinds.
+    '''
+
+    def __init__(self, program_block):
+        graph = program_block.graph
+        self.graph = graph
+        node_count = len(graph)
+        nodes = graph.nodes
+
+        # The procedures, and their entries (ProgramBlock gives its entries in
+        # the same order)
+        self.procedure_names = [None] + sorted(program_block.functions)
+        self._procedure_numbers = dict((name, number) for number, name in enumerate(self.procedure_names))
+        self.entry_ids = array('i', graph.entry_ids)
+        assert len(self.entry_ids) == len(self.procedure_names)
+
+        # The procedure of every node, and the exits of every procedure
+        graph_offsets = graph.successor_offsets
+        graph_successors = graph.successors
+        self.procedures = array('i', [-1]) * node_count
+        self.exit_ids = [array('i') for _ in self.procedure_names]
+        for number, entry_id in enumerate(self.entry_ids):
+            self.procedures[entry_id] = number
+            stack = [entry_id]
+            while stack:
+                node_id = stack.pop()
+                start, end = graph_offsets[node_id], graph_offsets[node_id + 1]
+                if start == end:
+                    self.exit_ids[number].append(node_id)
+                for index in xrange(start, end):
+                    successor_id = graph_successors[index]
+                    if self.procedures[successor_id] == -1:
+                        self.procedures[successor_id] = number
+                        stack.append(successor_id)
+
+        # The call sites: their CALL and RET nodes, and the procedures they
+        # call (-1 when they aren't matched)
+        self.call_ids = array('i')
+        self.return_ids = array('i')
+        self.callees = array('i')
+        self._call_sites = {}
+        callers = [[] for _ in self.procedure_names]
+        for node_id in xrange(node_count):
+            # Only the commands of calls are made (see cfg.FlatCommandNode)
+            node = nodes[node_id]
+            if not node.is_call():
+                continue
+
+            command = node.command
+            assert graph_offsets[node_id + 1] - graph_offsets[node_id] == 1, 'A CALL node is followed by its RET node.'
+            function_variable = command.expression.function_variable
+            callee = -1
+            if function_variable.__class__ is Variable:
+                callee = self._procedure_numbers.get(function_variable.name, -1)
+                if callee == 0:
+                    callee = -1
+
+            call_site = len(self.call_ids)
+            return_id = graph_successors[graph_offsets[node_id]]
+            self.call_ids.append(node_id)
+            self.return_ids.append(return_id)
+            self.callees.append(callee)
+            self._call_sites[node_id] = self._call_sites[return_id] = call_site
+            if callee != -1:
+                callers[callee].append(call_site)
+        self._callers = callers
+
+        is_exit = bytearray(node_count)
+        for exit_ids in self.exit_ids:
+            for exit_id in exit_ids:
+                is_exit[exit_id] = 1
+
+        # The edges
+        successors = []
+        kinds = []
+        self.successor_offsets = array('i', [0])
+        for node_id in xrange(node_count):
+            call_site = self._call_sites.get(node_id)
+            if call_site is not None and self.call_ids[call_site] == node_id:
+                callee = self.callees[call_site]
+                if callee != -1:
+                    successors.append(self.entry_ids[callee])
+                    kinds.append(CALL_EDGE)
+                successors.append(self.return_ids[call_site])
+                kinds.append(CALL_TO_RETURN_EDGE)
+            else:
+                start, end = graph_offsets[node_id], graph_offsets[node_id + 1]
+                successors.extend(graph_successors[start:end])
+                kinds.extend([FLOW_EDGE] * (end - start))
+
+            if is_exit[node_id]:
+                for call_site in callers[self.procedures[node_id]]:
+                    successors.append(self.return_ids[call_site])
+                    kinds.append(RETURN_EDGE)
+            self.successor_offsets.append(len(successors))
+
+        self.successors = array('i', successors)
+        self.successor_kinds = array('b', kinds)
+
+        # The edges backwards, sources in order of id
+        self.predecessor_offsets, self.predecessors, self.predecessor_kinds = reverse_edges(
+            node_count, self.successor_offsets, self.successors, self.successor_kinds)
+
+    def __len__(self):
+        return len(self.graph)
+
+    def get_successors(self, node):
+        '''Get the successors of a CommandNode, as (CommandNode, edge kind) pairs.'''
+        return self._get_edges(node.nodeID, self.successor_offsets, self.successors, self.successor_kinds)
+
+    def get_predecessors(self, node):
+        '''Get the predecessors of a CommandNode, as (CommandNode, edge kind) pairs.'''
+        return self._get_edges(node.nodeID, self.predecessor_offsets, self.predecessors, self.predecessor_kinds)
+
+    def _get_edges(self, node_id, offsets, targets, kinds):
+        nodes = self.graph.nodes
+        return [(nodes[targets[index]], kinds[index]) for index in xrange(offsets[node_id], offsets[node_id + 1])]
+
+    def get_procedure(self, node):
+        '''Get the name of the function a CommandNode is in, or None at the top level.'''
+        return self.procedure_names[self.procedures[node.nodeID]]
+
+    def get_entry(self, function_name = None):
+        '''Get the entry of a function (its declaration), or of the top level if function_name is None.'''
+        return self.graph.nodes[self.entry_ids[self._procedure_numbers[function_name]]]
+
+    def get_exits(self, function_name = None):
+        '''Get the exits of a function, or of the top level if function_name is None.'''
+        nodes = self.graph.nodes
+        return [nodes[exit_id] for exit_id in self.exit_ids[self._procedure_numbers[function_name]]]
+
+    def get_call_nodes(self, function_name = None):
+        '''Get the CALL nodes calling a function, or every CALL node if function_name is None.'''
+        nodes = self.graph.nodes
+        if function_name is None:
+            return [nodes[call_id] for call_id in self.call_ids]
+        return [nodes[self.call_ids[call_site]] for call_site in self._callers[self._procedure_numbers[function_name]]]
+
+    def is_call(self, node):
+        call_site = self._call_sites.get(node.nodeID)
+        return call_site is not None and self.call_ids[call_site] == node.nodeID
+
+    def is_return(self, node):
+        call_site = self._call_sites.get(node.nodeID)
+        return call_site is not None and self.return_ids[call_site] == node.nodeID
+
+    def get_callee(self, node):
+        '''Get the name of the function a CALL (or RET) node calls, or None if it isn't matched.'''
+        callee = self.callees[self._call_sites[node.nodeID]]
+        return None if callee == -1 else self.procedure_names[callee]
+
+    def get_call_node(self, node):
+        '''Get the CALL node of a RET node (or the CALL node itself).'''
+        return self.graph.nodes[self.call_ids[self._call_sites[node.nodeID]]]
+
+    def get_return_node(self, node):
+        '''Get the RET node of a CALL node (or the RET node itself).'''
+        return self.graph.nodes[self.return_ids[self._call_sites[node.nodeID]]]
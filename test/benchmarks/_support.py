@@ -0,0 +1,105 @@
+'''
+Support for the benchmarks.
+
+Importing this module puts the sources and the test packages on the path, so
+the benchmarks run from a checkout without installing anything. It also has
+the helpers the benchmarks share: timing, measuring the memory of object
+graphs, and generating the programs more than one benchmark runs on.
+'''
+import gc
+import os.path
+import random
+import resource
+import sys
+import time
+import types
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(BENCHMARK_DIR)), 'src'))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+
+from sleuth.lingo.components import LingoComponent
+
+
+def timed(function, *arguments):
+    '''Call a function, after collecting garbage, and get the seconds it took and its result.'''
+    gc.collect()
+    start = time.time()
+    result = function(*arguments)
+    return time.time() - start, result
+
+
+# Objects that are shared with everything else in the process
+SHARED_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, bool, types.NoneType)
+
+def measure(value):
+    '''Get the number of components reachable from a value, and the bytes used by everything reachable from it.'''
+    seen = set()
+    stack = [value]
+    components = 0
+    size = 0
+
+    while stack:
+        value = stack.pop()
+        if id(value) in seen or isinstance(value, SHARED_TYPES):
+            continue
+        if isinstance(value, int) and -5 <= value <= 256:
+            # Small ints are cached by the interpreter
+            continue
+
+        seen.add(id(value))
+        size += sys.getsizeof(value)
+
+        if isinstance(value, LingoComponent):
+            components += 1
+
+        # Every object reachable from the tree is part of it, down to the
+        # strings and ints in its attributes.
+        stack.extend(gc.get_referents(value))
+
+    return components, size
+
+def get_peak_memory():
+    '''Get the peak resident memory of the process (in bytes).'''
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def loops_program(nodes):
+    '''Generate a sequence of loops with about the given number of CFG nodes.'''
+    # Every loop is 5 nodes: the while, the if, its two blocks and a skip
+    return '; '.join('while (x < {0}) do {{ if (x < 5) then {{ x := x + 1 }} else {{ x := x + 2 }}; skip }}'.format(number)
+                     for number in range(nodes // 5))
+
+
+INTEGERS = ['i{0}'.format(index) for index in range(10)]
+BOOLEANS = ['b{0}'.format(index) for index in range(5)]
+
+FUNCTIONS = ('def add = fun(a, b) {\n  c := a + b;\n  return c\n}\n'
+             'def less = fun(a, b) {\n  c := a < b;\n  return c\n}\n')
+
+def well_typed_program(statements, seed = 1):
+    '''Generate a well-typed program with about the given number of statements.'''
+    rand = random.Random(seed)
+    commands = ['{0} := {1}'.format(name, index) for index, name in enumerate(INTEGERS)]
+    commands += ['{0} := true'.format(name) for name in BOOLEANS]
+
+    def command(depth):
+        choice = rand.random()
+        if choice < 0.3:
+            return '{0} := {1} {2} {3}'.format(rand.choice(INTEGERS), rand.choice(INTEGERS),
+                                               rand.choice('+-*'), rand.choice(INTEGERS))
+        if choice < 0.45:
+            return '{0} := ({1} < {2}) && {3}'.format(rand.choice(BOOLEANS), rand.choice(INTEGERS),
+                                                      rand.choice(INTEGERS), rand.choice(BOOLEANS))
+        if choice < 0.6:
+            return '{0} := add({1}, {2})'.format(rand.choice(INTEGERS), rand.choice(INTEGERS), rand.choice(INTEGERS))
+        if choice < 0.7:
+            return '{0} := less({1}, {2})'.format(rand.choice(BOOLEANS), rand.choice(INTEGERS), rand.choice(INTEGERS))
+        if choice < 0.8 or depth > 2:
+            return 'input {0}'.format(rand.choice(INTEGERS))
+        if choice < 0.9:
+            return 'while ({0}) do {{ {1}; {2} }}'.format(rand.choice(BOOLEANS), command(depth + 1), command(depth + 1))
+        return 'if ({0}) then {{ {1} }} else {{ {2} }}'.format(rand.choice(BOOLEANS), command(depth + 1), command(depth + 1))
+
+    commands += [command(0) for _ in range(statements)]
+    return FUNCTIONS + ';\n'.join(commands)
@@ -0,0 +1,60 @@
+'''
+Benchmark loading programs from the on-disk AST cache against parsing them.
+
+Parses a corpus of generated programs and one long program, stores them in a
+fresh ProgramCache, and then loads them back from the cache (as a cold start
+on unchanged sources would).
+
+Usage: python bench_ast_cache.py [number_of_programs]
+'''
+import os.path
+import shutil
+import sys
+import tempfile
+import time
+
+import _support #@UnusedImport
+from sleuth.lingo.cache import ProgramCache
+from sleuth.lingo.parser import LingoParser
+from test_sleuth.support.programs import ProgramGenerator
+
+
+def timed(function, programs):
+    start = time.time()
+    for program in programs:
+        function(program)
+    return time.time() - start
+
+def report(name, programs):
+    directory = tempfile.mkdtemp()
+    try:
+        cache = ProgramCache(directory)
+        parser = LingoParser()
+        parser.parse(programs[0])
+
+        parse_time = timed(parser.parse, programs)
+        store_time = timed(lambda source_text: cache.put(source_text, parser.parse(source_text)), programs)
+        load_time = timed(cache.get, programs)
+
+        entry_size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+        source_size = sum(len(program) for program in programs)
+    finally:
+        shutil.rmtree(directory)
+
+    print(name)
+    print('  parse          {0:8.3f} s'.format(parse_time))
+    print('  parse + store  {0:8.3f} s'.format(store_time))
+    print('  load           {0:8.3f} s  {1:5.2f}x faster than parsing'.format(load_time, parse_time / load_time))
+    print('  cache size     {0:8d} bytes for {1} bytes of source'.format(entry_size, source_size))
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    generator = ProgramGenerator(seed = 1)
+
+    report('generated programs ({0})'.format(count), generator.corpus(count, statements = 10))
+    report('one long program ({0} statements)'.format(count * 10), [generator.program(statements = count * 10,
+                                                                                      functions = 0)])
+
+
+if __name__ == '__main__':
+    main()
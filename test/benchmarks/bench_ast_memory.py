@@ -0,0 +1,41 @@
+'''
+Benchmark the memory used by parsed programs.
+
+Parses one long generated program and reports the number of components and
+the bytes used per component: once by adding up the sizes of every object
+in the tree (the components, their attribute storage, spans, lists and
+types), and once by the growth of the peak memory of the process.
+
+Usage: python bench_ast_memory.py [number_of_statements]
+'''
+import sys
+import time
+
+from _support import measure, get_peak_memory
+from sleuth.lingo.parser import LingoParser, BACKEND_DESCENT
+from test_sleuth.support.programs import ProgramGenerator
+
+
+def main():
+    statements = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    source_text = ProgramGenerator(seed = 1).program(statements = statements, functions = 0)
+    parser = LingoParser(backend = BACKEND_DESCENT)
+    parser.parse('skip')
+
+    peak_memory = get_peak_memory()
+    start = time.time()
+    program = parser.parse(source_text)
+    elapsed = time.time() - start
+    peak_growth = get_peak_memory() - peak_memory
+
+    components, size = measure(program)
+
+    print('one long program ({0} statements, {1} components)'.format(statements, components))
+    print('  object sizes    {0:8.1f} bytes/component  ({1:.1f} MB)'.format(float(size) / components, size / 1e6))
+    print('  peak memory     {0:8.1f} bytes/component  ({1:.1f} MB)'.format(float(peak_growth) / components,
+                                                                            peak_growth / 1e6))
+    print('  parse time      {0:8.3f} s'.format(elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+'''
+Benchmark building CFGs.
+
+Parses one long generated program and reports the time to scan it (and its
+functions) into CommandNodes and the time to number the nodes in reverse
+post order, then the time to compress the edges into a CompressedGraph and
+the time to visit every edge once through the sorted successors of the
+nodes (get_ordered_successors, as get_successors used to) and once through
+the arrays of the CompressedGraph. Last, the time to list the edge pairs
+(CommandNode.get_paths) of the program and its functions, and to work out
+the widths and layers of the nodes.
+
+Usage: python bench_cfg.py [number_of_statements]
+'''
+import sys
+
+from _support import timed
+from sleuth.lingo.parser import LingoParser, BACKEND_DESCENT
+from sleuth.tracks.cfg import Block, CompressedGraph, get_ordered_successors, number_reverse_post_order
+from test_sleuth.support.programs import ProgramGenerator
+
+
+def scan(program):
+    blocks = [Block()]
+    entry_nodes = [blocks[0].scan(program.command)]
+    for declaration in program.functions:
+        blocks.append(Block(node_count = blocks[-1].node_count))
+        entry_nodes.append(blocks[-1].scan(declaration))
+    return blocks, entry_nodes
+
+def count_node_edges(nodes):
+    return sum(len(get_ordered_successors(node)) for node in nodes)
+
+def count_graph_edges(graph):
+    successors = graph.successors
+    offsets = graph.successor_offsets
+    edges = 0
+    for node_id in xrange(len(graph)):
+        for index in xrange(offsets[node_id], offsets[node_id + 1]):
+            successors[index]
+            edges += 1
+    return edges
+
+def list_edge_pairs(entry_nodes):
+    return [edge_pair for entry_node in entry_nodes for edge_pair in entry_node.get_paths()]
+
+def main():
+    statements = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    source_text = ProgramGenerator(seed = 1).program(statements = statements, functions = 20)
+    program = LingoParser(backend = BACKEND_DESCENT).parse(source_text)
+
+    scan_time, (blocks, entry_nodes) = timed(scan, program)
+    number_time, nodes = timed(number_reverse_post_order, entry_nodes)
+    print('one long program ({0} statements, {1} CFG nodes)'.format(statements, len(nodes)))
+    print('  scan      {0:8.3f} s'.format(scan_time))
+    print('  number    {0:8.3f} s'.format(number_time))
+
+    compress_time, graph = timed(CompressedGraph, nodes, blocks[-1].node_count, entry_nodes)
+    node_time, edges = timed(count_node_edges, nodes)
+    graph_time, _ = timed(count_graph_edges, graph)
+    print('  compress  {0:8.3f} s'.format(compress_time))
+    print('  visit {0} edges'.format(edges))
+    print('    sorted successors  {0:8.3f} s'.format(node_time))
+    print('    compressed graph   {0:8.3f} s'.format(graph_time))
+
+    for node in nodes:
+        node.graph = graph
+    paths_time, edge_pairs = timed(list_edge_pairs, entry_nodes)
+    print('  get_paths {0:8.3f} s  ({1} edge pairs)'.format(paths_time, len(edge_pairs)))
+
+    layout_time, _ = timed(graph.get_widths)
+    print('  lay out   {0:8.3f} s  ({1} layers)'.format(layout_time, max(graph.get_layers()) + 1))
+
+
+if __name__ == '__main__':
+    main()
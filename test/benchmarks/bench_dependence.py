@@ -0,0 +1,54 @@
+'''
+Benchmark finding control dependences and data dependences, and slicing.
+
+Builds the CFGs of the two programs of bench_dominance, and reports the
+time to find the control dependence graph and the program dependence graph
+of each (once their dominator trees are found), then the time to take the
+backward and forward slices of a few nodes, with the average size of the
+slices: slicing takes time in proportion to the slices, not the program.
+
+Usage: python bench_dependence.py [number_of_nodes]
+'''
+import sys
+
+from _support import timed, loops_program
+from sleuth.lingo.parser import LingoParser, BACKEND_DESCENT
+from sleuth.tracks.cfg import ProgramBlock
+from test_sleuth.support.programs import ProgramGenerator
+
+
+SLICES = 100
+
+
+def take_slices(get_slice, nodes):
+    return sum(len(get_slice([node])) for node in nodes)
+
+def run(name, source_text):
+    program_block = ProgramBlock(LingoParser(backend = BACKEND_DESCENT).parse(source_text))
+    program_block.get_dominator_tree()
+    program_block.get_post_dominator_tree()
+
+    control_time, control_dependence_graph = timed(program_block.get_control_dependence_graph)
+    program_time, program_dependence_graph = timed(program_block.get_program_dependence_graph)
+
+    print('{0} ({1} CFG nodes)'.format(name, program_block.node_count))
+    print('  control dependences  {0:8.3f} s  ({1} edges)'.format(control_time, len(control_dependence_graph.controllers)))
+    print('  data dependences     {0:8.3f} s  ({1} edges)'.format(program_time, len(program_dependence_graph.definitions)))
+
+    # Nodes spread over the program
+    nodes = program_block.nodes[::max(1, len(program_block.nodes) // SLICES)][:SLICES]
+    for direction, get_slice in (('backward', program_dependence_graph.get_backward_slice),
+                                 ('forward', program_dependence_graph.get_forward_slice)):
+        slice_time, size = timed(take_slices, get_slice, nodes)
+        print('  {0:8} slices      {1:8.3f} ms each  ({2:.0f} nodes each)'.format(direction, slice_time * 1000 / len(nodes),
+                                                                               float(size) / len(nodes)))
+
+def main():
+    nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    run('generated program', ProgramGenerator(seed = 1).program(statements = int(nodes / 4.4), functions = 20))
+    run('sequence of loops', loops_program(nodes))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+'''
+Benchmark the Lingo parser backends against each other.
+
+Parses a corpus of generated programs with the PLY (LALR) backend and the
+descent backend, with each of the tokenizers, and one long program made of
+all the programs' statements.
+
+Usage: python bench_descent.py [number_of_programs]
+'''
+import sys
+import time
+
+import _support #@UnusedImport
+from sleuth.lingo.parser import LingoParser, BACKEND_YACC, BACKEND_DESCENT, \
+    TOKENIZER_PLY, TOKENIZER_REGEX
+from test_sleuth.support.programs import ProgramGenerator
+
+
+CONFIGURATIONS = [
+    (BACKEND_YACC, TOKENIZER_PLY),
+    (BACKEND_YACC, TOKENIZER_REGEX),
+    (BACKEND_DESCENT, TOKENIZER_PLY),
+    (BACKEND_DESCENT, TOKENIZER_REGEX),
+]
+
+def time_parses(programs, backend, tokenizer):
+    parser = LingoParser(tokenizer = tokenizer, backend = backend)
+
+    # Warm up the parser cache
+    parser.parse(programs[0])
+
+    start = time.time()
+    for program in programs:
+        parser.parse(program)
+    return time.time() - start
+
+def report(name, programs):
+    print(name)
+
+    baseline = None
+    for backend, tokenizer in CONFIGURATIONS:
+        elapsed = time_parses(programs, backend, tokenizer)
+        baseline = baseline or elapsed
+        print('  {0:<8} {1:<6} {2:8.3f} s  {3:8.1f} us/program  {4:5.2f}x'.format(backend,
+                                                                               tokenizer,
+                                                                               elapsed,
+                                                                               elapsed / len(programs) * 1e6,
+                                                                               baseline / elapsed))
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    generator = ProgramGenerator(seed = 1)
+
+    report('generated programs ({0})'.format(count), generator.corpus(count, statements = 10))
+    report('one long program ({0} statements)'.format(count * 10), [generator.program(statements = count * 10,
+                                                                                      functions = 0)])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+'''
+Benchmark finding dominators and loops.
+
+Builds the CFGs of two programs of about 100000 nodes each: a long generated
+program, and a long sequence of while loops around if commands. Reports the
+time to build the ProgramBlock, then to find the dominator tree, the post
+dominator tree and the loop nesting forest of each.
+
+Usage: python bench_dominance.py [number_of_nodes]
+'''
+import sys
+
+from _support import timed, loops_program
+from sleuth.lingo.parser import LingoParser, BACKEND_DESCENT
+from sleuth.tracks.cfg import ProgramBlock
+from test_sleuth.support.programs import ProgramGenerator
+
+
+def run(name, source_text):
+    program = LingoParser(backend = BACKEND_DESCENT).parse(source_text)
+    build_time, program_block = timed(ProgramBlock, program)
+    dominators_time, _ = timed(program_block.get_dominator_tree)
+    post_dominators_time, _ = timed(program_block.get_post_dominator_tree)
+    loops_time, loop_forest = timed(program_block.get_loop_forest)
+
+    print('{0} ({1} CFG nodes, {2} loops)'.format(name, program_block.node_count, len(loop_forest.headers)))
+    print('  ProgramBlock     {0:8.3f} s'.format(build_time))
+    print('  dominators       {0:8.3f} s'.format(dominators_time))
+    print('  post dominators  {0:8.3f} s'.format(post_dominators_time))
+    print('  loops            {0:8.3f} s'.format(loops_time))
+
+def main():
+    nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    # Generated programs have about 4.4 CFG nodes per statement
+    run('generated program', ProgramGenerator(seed = 1).program(statements = int(nodes / 4.4), functions = 20))
+    run('sequence of loops', loops_program(nodes))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+'''
+Benchmark flat programs against trees of components.
+
+Parses one long generated program and reports the bytes used per component
+by the tree and by its FlatProgram (adding up the sizes of every object in
+each, as bench_ast_memory does), the time to load each back from its
+encoding (decode_program for the tree, FlatProgram.loads for the flat
+program), the time to make the whole tree from the flat program, and the
+time to build the CFG from each (the flat one makes no components). Then
+type checks a long well-typed program (from bench_typecheck) both ways.
+
+Usage: python bench_flat.py [number_of_statements]
+'''
+import sys
+
+from _support import timed, measure, well_typed_program
+from sleuth.lingo.cache import encode_program, decode_program
+from sleuth.lingo.flat import FlatProgram, flatten
+from sleuth.lingo.parser import LingoParser, BACKEND_DESCENT
+from sleuth.lingo.typecheck import TypeCheck
+from sleuth.tracks.cfg import ProgramBlock
+from test_sleuth.support.programs import ProgramGenerator
+
+
+def main():
+    statements = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    source_text = ProgramGenerator(seed = 1).program(statements = statements, functions = 20)
+    program = LingoParser(backend = BACKEND_DESCENT).parse(source_text)
+
+    flatten_time, flat = timed(flatten, program)
+    components, tree_size = measure(program)
+    _, flat_size = measure(flat)
+
+    print('one long program ({0} statements, {1} components, {2} rows)'.format(statements, components, len(flat)))
+    print('  tree            {0:8.1f} bytes/component  ({1:.1f} MB)'.format(float(tree_size) / components, tree_size / 1e6))
+    print('  flat            {0:8.1f} bytes/component  ({1:.1f} MB, {2:.1f}x smaller)'.format(
+        float(flat_size) / components, flat_size / 1e6, float(tree_size) / flat_size))
+    print('  flatten         {0:8.3f} s'.format(flatten_time))
+
+    encoded = encode_program(program)
+    dumped = flat.dumps()
+    decode_time, _ = timed(decode_program, encoded)
+    loads_time, _ = timed(FlatProgram.loads, dumped)
+    print('  decode_program  {0:8.3f} s  ({1:.1f} MB encoded)'.format(decode_time, len(encoded) / 1e6))
+    print('  loads           {0:8.3f} s  ({1:.1f} MB encoded)'.format(loads_time, len(dumped) / 1e6))
+
+    build_time, _ = timed(FlatProgram.loads(dumped).get_program)
+    print('  get_program     {0:8.3f} s'.format(build_time))
+
+    # (without keeping either CFG while the other is built)
+    tree_cfg_time = timed(ProgramBlock, program)[0]
+    flat = FlatProgram.loads(dumped)
+    flat_cfg_time = timed(ProgramBlock, flat)[0]
+    print('  CFG of tree     {0:8.3f} s'.format(tree_cfg_time))
+    print('  CFG of flat     {0:8.3f} s  ({1} components made)'.format(flat_cfg_time, len(flat._components)))
+
+    program = LingoParser(backend = BACKEND_DESCENT).parse(well_typed_program(statements // 5))
+    flat = flatten(program)
+    tree_time, _ = timed(TypeCheck(False).visit_program, program)
+    flat_time, _ = timed(TypeCheck(False).visit_flat_program, flat)
+    print('one long well-typed program ({0} statements)'.format(statements // 5))
+    print('  typecheck tree  {0:8.3f} s'.format(tree_time))
+    print('  typecheck flat  {0:8.3f} s'.format(flat_time))
+
+
+if __name__ == '__main__':
+    main()
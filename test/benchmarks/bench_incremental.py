@@ -0,0 +1,71 @@
+'''
+Benchmark incremental reparsing against parsing the whole program.
+
+Generates one long program, and times editing it near its start, middle and
+end: renaming the variable assigned by a command (which keeps the length of
+every line) and inserting a new line with a command (which moves everything
+after it). Every edit is undone right away, so the program keeps its size.
+The spans of the commands after an edit are shifted when the program is read,
+so inserting lines is timed both without reading the program and reading it
+after every edit.
+
+Usage: python bench_incremental.py [number_of_statements]
+'''
+import re
+import sys
+import time
+
+import _support #@UnusedImport
+from sleuth.lingo.incremental import IncrementalParser
+from sleuth.lingo.parser import LingoParser, BACKEND_DESCENT
+from test_sleuth.support.programs import ProgramGenerator
+
+
+REPEAT = 20
+
+ASSIGNMENT = re.compile(r'\n([a-z_][a-z_0-9]*) :=')
+
+def time_full_parse(source_text):
+    parser = LingoParser(backend = BACKEND_DESCENT)
+
+    start = time.time()
+    for _ in range(3):
+        parser.parse(source_text)
+    return (time.time() - start) / 3
+
+def time_edits(incremental_parser, edits, read = False):
+    '''Time applying each of the edits, and undoing it (reading the program after each, if read is set).'''
+    start = time.time()
+    for _ in range(REPEAT):
+        for offset, deleted_length, inserted_text in edits:
+            deleted_text = incremental_parser.source_text[offset:offset + deleted_length]
+            incremental_parser.edit(offset, deleted_length, inserted_text)
+            if read:
+                incremental_parser.program
+            incremental_parser.edit(offset, len(inserted_text), deleted_text)
+            if read:
+                incremental_parser.program
+    return (time.time() - start) / (REPEAT * len(edits) * 2)
+
+def main():
+    statements = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    source_text = ProgramGenerator(seed = 1).program(statements = statements, functions = 0)
+
+    full = time_full_parse(source_text)
+    print('one long program ({0} statements, {1} characters)'.format(statements, len(source_text)))
+    print('  full parse             {0:10.3f} ms'.format(full * 1e3))
+
+    incremental_parser = IncrementalParser(source_text)
+
+    for fraction in (0.1, 0.5, 0.9):
+        match = ASSIGNMENT.search(source_text, int(len(source_text) * fraction))
+        rename = [(match.start(1), len(match.group(1)), 'renamed')]
+        insert = [(match.start(1), 0, 'inserted := 1;\n')]
+
+        for name, edits, read in (('rename', rename, False), ('insert line', insert, False), ('insert, read', insert, True)):
+            elapsed = time_edits(incremental_parser, edits, read)
+            print('  {0:<12} at {1:3.0%}   {2:10.3f} ms  {3:7.1f}x'.format(name, fraction, elapsed * 1e3, full / elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+'''
+Benchmark lowering programs to the IR.
+
+Parses one long generated program, builds its CFG and reports the time to
+lower it, the number of instructions and the bytes they use (adding up the
+sizes of every object in the IRProgram but the CFG nodes, as
+bench_ast_memory does), and the time to write the IR out (dumps) and read it
+back (loads).
+
+Usage: python bench_ir.py [number_of_statements]
+'''
+import sys
+
+from _support import timed, measure
+from sleuth.lingo.ir import IRProgram, lower
+from sleuth.lingo.parser import LingoParser, BACKEND_DESCENT
+from sleuth.tracks.cfg import ProgramBlock
+from test_sleuth.support.programs import ProgramGenerator
+
+
+def main():
+    statements = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    source_text = ProgramGenerator(seed = 1).program(statements = statements, functions = 20)
+    program = LingoParser(backend = BACKEND_DESCENT).parse(source_text)
+    program_block = ProgramBlock(program)
+
+    lower_time, ir = timed(lower, program, program_block)
+    nodes, ir.nodes, ir._node_indices = ir.nodes, [], {}
+    _, ir_size = measure(ir)
+    components, tree_size = measure(program)
+
+    print('one long program ({0} statements, {1} CFG nodes, {2} components)'.format(statements, len(nodes), components))
+    print('  lower   {0:8.3f} s  ({1} instructions, {2} temporaries)'.format(lower_time, len(ir), ir.temporary_count))
+    print('  tree    {0:8.1f} bytes/component    ({1:.1f} MB)'.format(float(tree_size) / components, tree_size / 1e6))
+    print('  IR      {0:8.1f} bytes/instruction  ({1:.1f} MB)'.format(float(ir_size) / len(ir), ir_size / 1e6))
+
+    dumps_time, dumped = timed(ir.dumps)
+    loads_time, _ = timed(IRProgram.loads, dumped)
+    print('  dumps   {0:8.3f} s  ({1:.1f} MB encoded)'.format(dumps_time, len(dumped) / 1e6))
+    print('  loads   {0:8.3f} s'.format(loads_time))
+
+
+if __name__ == '__main__':
+    main()
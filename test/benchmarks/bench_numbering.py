@@ -0,0 +1,36 @@
+'''
+Benchmark value numbering.
+
+Numbers every expression of one long generated program, and reports how many
+expression components the program has against how many distinct expressions
+(value numbers) they come to, and the time taken.
+
+Usage: python bench_numbering.py [number_of_statements]
+'''
+import sys
+import time
+
+import _support #@UnusedImport
+from sleuth.lingo.numbering import number_program
+from sleuth.lingo.parser import LingoParser, BACKEND_DESCENT
+from test_sleuth.support.programs import ProgramGenerator
+
+
+def main():
+    statements = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    program = LingoParser(backend = BACKEND_DESCENT).parse(
+        ProgramGenerator(seed = 1).program(statements = statements, functions = 10))
+
+    start = time.time()
+    table = number_program(program)
+    elapsed = time.time() - start
+
+    expressions = len(table._component_numbers)
+    print('one long program ({0} statements)'.format(statements))
+    print('  expressions     {0:8d}  (not counting variables)'.format(expressions))
+    print('  value numbers   {0:8d}  ({1:.1f} expressions each)'.format(len(table), float(expressions) / len(table)))
+    print('  numbering       {0:8.3f} s  ({1:.1f} us/statement)'.format(elapsed, elapsed * 1e6 / statements))
+
+
+if __name__ == '__main__':
+    main()
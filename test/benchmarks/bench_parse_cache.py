@@ -0,0 +1,44 @@
+'''
+Benchmark the per-parse cost of LingoParser with the process-wide parser cache.
+
+Parses a corpus of small generated programs (10k by default) with a warm
+cache, and a small sample with the cache cleared before every parse (which
+is what every parse used to cost).
+
+Usage: python bench_parse_cache.py [number_of_programs]
+'''
+import sys
+import time
+
+import _support #@UnusedImport
+from sleuth.lingo.parser import LingoParser, parser_cache
+from test_sleuth.support.programs import ProgramGenerator
+
+
+def time_parses(programs, clear_cache):
+    start = time.time()
+    for program in programs:
+        if clear_cache:
+            parser_cache.clear()
+        LingoParser().parse(program)
+    return time.time() - start
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    programs = ProgramGenerator(seed = 1, max_depth = 1).corpus(count, statements = 5)
+
+    # Warm the cache so the first parse doesn't count against it
+    LingoParser().parse(programs[0])
+
+    cached = time_parses(programs, clear_cache = False)
+    sample = programs[:max(1, count // 100)]
+    uncached = time_parses(sample, clear_cache = True)
+
+    print('programs parsed:        {0}'.format(count))
+    print('cached total:           {0:.3f} s'.format(cached))
+    print('cached per parse:       {0:.1f} us'.format(cached / count * 1e6))
+    print('uncached per parse:     {0:.1f} us (sample of {1})'.format(uncached / len(sample) * 1e6, len(sample)))
+
+
+if __name__ == '__main__':
+    main()
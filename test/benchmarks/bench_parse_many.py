@@ -0,0 +1,73 @@
+'''
+Benchmark bulk parsing of a directory tree of Lingo source files.
+
+Writes a corpus of generated programs into a temporary directory tree and
+parses it with parse_many, in this process and on pools of worker processes
+of increasing size (up to the number of CPUs), both returning the Programs
+and only returning a summary computed in the workers.
+
+Usage: python bench_parse_many.py [number_of_programs]
+'''
+import multiprocessing
+import os.path
+import shutil
+import sys
+import tempfile
+import time
+
+import _support #@UnusedImport
+from sleuth.lingo.bulk import parse_many
+from test_sleuth.support.programs import ProgramGenerator
+
+
+def write_corpus(directory, count):
+    for index, program in enumerate(ProgramGenerator(seed = 1).corpus(count, statements = 10)):
+        group_directory = os.path.join(directory, 'group{0}'.format(index // 1000))
+        if not os.path.isdir(group_directory):
+            os.makedirs(group_directory)
+
+        with open(os.path.join(group_directory, 'program{0}.lingo'.format(index)), 'wb') as source_file:
+            source_file.write(program)
+
+def count_functions(path, program):
+    return len(program.functions)
+
+def time_parse_many(directory, workers, process):
+    start = time.time()
+    errors = sum(1 for _, result in parse_many([directory], workers = workers, process = process)
+                 if isinstance(result, Exception))
+    return time.time() - start, errors
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    directory = tempfile.mkdtemp()
+
+    try:
+        write_corpus(directory, count)
+
+        # Always include a pool of two workers, to show the overhead of the pool
+        worker_counts = [1, 2]
+        while worker_counts[-1] * 2 <= multiprocessing.cpu_count():
+            worker_counts.append(worker_counts[-1] * 2)
+
+        print('{0} programs, {1} CPUs'.format(count, multiprocessing.cpu_count()))
+
+        for name, process in (('programs', None), ('summaries', count_functions)):
+            print(name)
+
+            baseline = None
+            for workers in worker_counts:
+                elapsed, errors = time_parse_many(directory, workers, process)
+                baseline = baseline or elapsed
+
+                print('  {0:>3} workers  {1:8.3f} s  {2:8.1f} programs/s  {3:5.2f}x  ({4} errors)'.format(workers,
+                                                                                                       elapsed,
+                                                                                                       count / elapsed,
+                                                                                                       baseline / elapsed,
+                                                                                                       errors))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
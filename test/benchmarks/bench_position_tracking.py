@@ -0,0 +1,51 @@
+'''
+Benchmark parsing with and without position tracking.
+
+Parses a corpus of generated programs, and one long program made of all the
+programs' statements, with the PLY backend tracking complete positions and
+tracking only where components start.
+
+Usage: python bench_position_tracking.py [number_of_programs]
+'''
+import sys
+import time
+
+import _support #@UnusedImport
+from sleuth.lingo.parser import LingoParser, TOKENIZER_PLY, TOKENIZER_REGEX
+from test_sleuth.support.programs import ProgramGenerator
+
+
+def time_parses(programs, tokenizer, track_positions):
+    parser = LingoParser(tokenizer = tokenizer, track_positions = track_positions)
+
+    # Warm up the parser cache
+    parser.parse(programs[0])
+
+    start = time.time()
+    for program in programs:
+        parser.parse(program)
+    return time.time() - start
+
+def report(name, programs):
+    print(name)
+
+    for tokenizer in (TOKENIZER_PLY, TOKENIZER_REGEX):
+        tracked = time_parses(programs, tokenizer, True)
+        untracked = time_parses(programs, tokenizer, False)
+
+        print('  {0:<6} tracked {1:8.3f} s  untracked {2:8.3f} s  saving {3:5.1f}%'.format(tokenizer,
+                                                                                          tracked,
+                                                                                          untracked,
+                                                                                          (1 - untracked / tracked) * 100))
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    generator = ProgramGenerator(seed = 1)
+
+    report('generated programs ({0})'.format(count), generator.corpus(count, statements = 10))
+    report('one long program ({0} statements)'.format(count * 10), [generator.program(statements = count * 10,
+                                                                                      functions = 0)])
+
+
+if __name__ == '__main__':
+    main()
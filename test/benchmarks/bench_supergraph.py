@@ -0,0 +1,47 @@
+'''
+Benchmark building the interprocedural supergraph and the call graph.
+
+Builds the ProgramBlocks of generated programs with many functions calling
+each other, of a given number of statements and of twice and four times as
+many, and reports the time to build their Supergraphs and then their
+CallGraphs (with the strongly connected components and the bottom up
+order), which should grow in proportion to the programs.
+
+Usage: python bench_supergraph.py [number_of_statements]
+'''
+import sys
+
+from _support import timed
+from sleuth.lingo.parser import LingoParser, BACKEND_DESCENT
+from sleuth.tracks.cfg import ProgramBlock
+from test_sleuth.support.programs import ProgramGenerator
+
+
+FUNCTIONS = 100
+
+
+def calls_program(statements):
+    '''Make a generated program, with a call of some function every few statements.'''
+    source_text = ProgramGenerator(seed = 1).program(statements = statements, functions = FUNCTIONS)
+    calls = '; '.join('r{0} := f{1}(r{0})'.format(number, number % FUNCTIONS) for number in xrange(statements // 4))
+    return source_text + '; ' + calls
+
+def main():
+    statements = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    for scale in (1, 2, 4):
+        program = LingoParser(backend = BACKEND_DESCENT).parse(calls_program(statements * scale))
+        program_block = ProgramBlock(program)
+        supergraph_time, supergraph = timed(program_block.get_supergraph)
+        matched = len([callee for callee in supergraph.callees if callee != -1])
+        print('{0} statements ({1} CFG nodes, {2} calls, {3} matched)'.format(statements * scale, len(supergraph),
+                                                                             len(supergraph.call_ids), matched))
+        print('  supergraph  {0:8.3f} s  ({1} edges)'.format(supergraph_time, len(supergraph.successors)))
+
+        call_graph_time, call_graph = timed(program_block.get_call_graph)
+        print('  call graph  {0:8.3f} s  ({1} edges, {2} components, {3} waves)'.format(
+            call_graph_time, len(call_graph.callees), len(call_graph.components), len(call_graph.get_waves())))
+
+
+if __name__ == '__main__':
+    main()
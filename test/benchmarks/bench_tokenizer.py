@@ -0,0 +1,50 @@
+'''
+Benchmark the throughput of the Lingo tokenizers in tokens per second.
+
+Tokenizes a corpus of generated programs, and a program made of long
+multi-line comments, with both the PLY lexer and the hand-written
+LingoTokenizer.
+
+Usage: python bench_tokenizer.py [number_of_programs]
+'''
+import sys
+import time
+
+import _support #@UnusedImport
+from sleuth.lingo.parser import LingoParser, TOKENIZER_PLY, TOKENIZER_REGEX
+from test_sleuth.support.programs import ProgramGenerator
+
+
+def time_tokenize(tokenizer, source_text):
+    lexer = LingoParser(tokenizer = tokenizer).lexer.clone()
+
+    start = time.time()
+    lexer.input(source_text)
+    lexer.lineno = 1
+    token_count = 0
+    while lexer.token() is not None:
+        token_count += 1
+    return token_count, time.time() - start
+
+def report(name, source_text):
+    print(name)
+    for tokenizer in (TOKENIZER_PLY, TOKENIZER_REGEX):
+        token_count, elapsed = time_tokenize(tokenizer, source_text)
+        print('  {0:<8} {1:>9} tokens  {2:8.3f} s  {3:>12.0f} tokens/s'.format(tokenizer,
+                                                                              token_count,
+                                                                              elapsed,
+                                                                              token_count / elapsed))
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    corpus = '\n'.join(ProgramGenerator(seed = 1).corpus(count, statements = 10))
+
+    comment = '/* ' + ' * '.join(['long comment'] * 200) + ' */'
+    comments = ';\n'.join('{0} a{1} := {1}'.format(comment, index) for index in range(count))
+
+    report('generated programs ({0})'.format(count), corpus)
+    report('long comments ({0})'.format(count), comments)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+'''
+Benchmark type checking.
+
+Generates one long well-typed program (integer and boolean assignments,
+function calls and nested if and while commands) and times type checking
+it, which renames every variable, infers the types, and renames them back
+(annotating their types), and times the two rename passes on their own.
+Then type checks a program whose blocks are nested far deeper than the
+recursion limit.
+
+Usage: python bench_typecheck.py [number_of_statements]
+'''
+import sys
+import time
+
+from _support import well_typed_program
+from sleuth.lingo.parser import LingoParser, BACKEND_DESCENT
+from sleuth.lingo.typecheck import TypeCheck, Rename
+
+
+def nested_program(depth):
+    '''Generate a well-typed program with while commands nested depth deep.'''
+    return 'b := true;\n' + 'while (b) do { ' * depth + 'b := false' + ' }' * depth
+
+def time_typecheck(program):
+    start = time.time()
+    TypeCheck(False).visit_program(program)
+    return time.time() - start
+
+def time_rename(program):
+    rename = Rename({})
+    start = time.time()
+    rename.visit_program(program)
+    middle = time.time()
+    rename.visit_program(program)
+    return middle - start, time.time() - middle
+
+def main():
+    statements = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    parser = LingoParser(backend = BACKEND_DESCENT)
+
+    program = parser.parse(well_typed_program(statements))
+    elapsed = min(time_typecheck(program) for _ in range(3))
+    print('one long program ({0} statements)'.format(statements))
+    print('  typecheck       {0:8.3f} s  ({1:.1f} us/statement)'.format(elapsed, elapsed * 1e6 / statements))
+    rename, rename_back = [min(times) for times in zip(*[time_rename(program) for _ in range(3)])]
+    print('  rename          {0:8.3f} s'.format(rename))
+    print('  rename back     {0:8.3f} s'.format(rename_back))
+
+    depth = sys.getrecursionlimit() * 2
+    try:
+        elapsed = time_typecheck(parser.parse(nested_program(depth)))
+        print('blocks nested {0} deep'.format(depth))
+        print('  typecheck       {0:8.3f} s'.format(elapsed))
+    except RuntimeError as e:
+        print('blocks nested {0} deep: {1}'.format(depth, e))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+from sleuth.lingo.bulk import parse_many, find_sources, read_source
+from sleuth.lingo.components import * #@UnusedWildImport
+from sleuth.lingo.parser import LingoParser, LingoParsingException, BACKEND_DESCENT
+from test_sleuth.lingo.test_descent import describe
+from test_sleuth.support.programs import ProgramGenerator
+from test_sleuth.support.testcase import TestCase
+import os
+import shutil
+import tempfile
+
+
+def count_commands(path, program):
+    count = 0
+    command = program.command
+    while command is not None:
+        count += 1
+        command = command.get_next_command()
+    return count
+
+def count_commands_but_p0(path, program):
+    if path.endswith('p0.lingo'):
+        raise ValueError(path)
+    return count_commands(path, program)
+
+
+class ParseManyTest(TestCase):
+
+    def setUp(self):
+        super(ParseManyTest, self).setUp()
+
+        self.directory = tempfile.mkdtemp()
+        self.sources = {}
+
+        generator = ProgramGenerator(seed = 41)
+        for index in range(12):
+            self.write(os.path.join('programs', 'group{0}'.format(index % 3), 'p{0}.lingo'.format(index)),
+                       generator.program(statements = 6, functions = 1))
+
+        self.write('broken.lingo', 'a := ')
+        self.write('empty.lingo', '')
+        self.write('notes.txt', 'not a program')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+        super(ParseManyTest, self).tearDown()
+
+    def write(self, relative_path, source_text):
+        path = os.path.join(self.directory, relative_path)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+
+        with open(path, 'wb') as source_file:
+            source_file.write(source_text)
+
+        self.sources[path] = source_text
+
+    def assertParsedAll(self, results, **parser_arguments):
+        results = dict(results)
+
+        self.assertEqual(sorted(results), sorted(path for path in self.sources if path.endswith('.lingo')))
+
+        for path, result in results.items():
+            if path.endswith('broken.lingo'):
+                self.assertTrue(isinstance(result, LingoParsingException))
+            elif path.endswith('empty.lingo'):
+                self.assertTrue(isinstance(result, LingoParsingException))
+            else:
+                expected = LingoParser(**parser_arguments).parse(self.sources[path])
+                self.assertEqual(describe(result), describe(expected))
+
+    def test_find_sources(self):
+        sources = list(find_sources(self.directory))
+
+        self.assertEqual(sources, sorted(sources))
+        self.assertEqual(len(sources), 14)
+
+    def test_read_source(self):
+        for path, source_text in self.sources.items():
+            self.assertEqual(read_source(path), source_text)
+
+    def test_in_process(self):
+        self.assertParsedAll(parse_many([self.directory], workers = 1))
+
+    def test_worker_processes(self):
+        self.assertParsedAll(parse_many([self.directory], workers = 3))
+
+    def test_parser_configuration(self):
+        self.assertParsedAll(parse_many([self.directory], workers = 2, backend = BACKEND_DESCENT),
+                             backend = BACKEND_DESCENT)
+
+    def test_process_in_workers(self):
+        for workers in (1, 2):
+            results = dict(parse_many([self.directory], workers = workers, process = count_commands))
+
+            for path, source_text in self.sources.items():
+                if path.endswith('p0.lingo'):
+                    self.assertEqual(results[path], count_commands(path, LingoParser().parse(source_text)))
+
+            self.assertTrue(isinstance(results[os.path.join(self.directory, 'broken.lingo')], LingoParsingException))
+
+    def test_process_errors(self):
+        # Any exception is the result of its file, and the other files go on
+        for workers in (1, 2):
+            results = dict(parse_many([self.directory], workers = workers, process = count_commands_but_p0))
+
+            for path, source_text in self.sources.items():
+                if path.endswith('p0.lingo'):
+                    self.assertTrue(isinstance(results[path], ValueError))
+                elif path.endswith('p1.lingo'):
+                    self.assertEqual(results[path], count_commands(path, LingoParser().parse(source_text)))
+            self.assertEqual(len(results), len([path for path in self.sources if path.endswith('.lingo')]))
+
+    def test_files_and_missing_files(self):
+        missing_path = os.path.join(self.directory, 'missing.lingo')
+        broken_path = os.path.join(self.directory, 'broken.lingo')
+
+        results = dict(parse_many([missing_path, broken_path], workers = 2))
+
+        self.assertTrue(isinstance(results[missing_path], IOError))
+        self.assertTrue(isinstance(results[broken_path], LingoParsingException))
+
+    def test_stop_early(self):
+        results = parse_many([self.directory], workers = 2)
+        path, _ = next(results)
+        results.close()
+
+        self.assertTrue(path.endswith('.lingo'))
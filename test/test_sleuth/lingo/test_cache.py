@@ -0,0 +1,149 @@
+from sleuth.lingo.cache import ProgramCache, encode_program, decode_program
+from sleuth.lingo.components import * #@UnusedWildImport
+from sleuth.lingo.parser import LingoParser, LingoException
+from test_sleuth.lingo.test_descent import describe
+from test_sleuth.support.programs import ProgramGenerator
+from test_sleuth.support.testcase import TestCase
+import os
+import shutil
+import tempfile
+
+
+class FailingParser(LingoParser):
+    '''A parser that fails the test if it is ever asked to parse.'''
+
+    def parse(self, source_text):
+        raise AssertionError('Unexpected parse of: {0}'.format(source_text))
+
+
+class ProgramEncodingTest(TestCase):
+
+    def assertRoundTrip(self, source_text):
+        program = LingoParser().parse(source_text)
+        decoded = decode_program(encode_program(program))
+
+        self.assertEqual(describe(decoded), describe(program))
+        return decoded
+
+    def test_round_trip(self):
+        program = self.assertRoundTrip('def f = fun(a, b) { c := a + b; return c }\n'
+                                       'x := f(a, b); y := new ref ref integer;\n'
+                                       'if (x < 3) then { input z } else { skip };\n'
+                                       'while (!y) do { !y := ref x }')
+
+        # Links between the components are kept as links, not copies
+        self.assertTrue(program.command.assigned_variable.parent is program.command.assigned_variable)
+        self.assertTrue(program.command._next_command.get_previous_command() is program.command)
+        self.assertTrue(program.functions[0].definition.body.get_parent_command() is None)
+
+    def test_generated_programs(self):
+        generator = ProgramGenerator(seed = 21)
+
+        for _ in range(50):
+            self.assertRoundTrip(generator.program(statements = 8, functions = 2))
+
+    def test_long_sequence(self):
+        program = self.assertRoundTrip(';\n'.join('a{0} := {0}'.format(index) for index in range(5000)))
+
+        self.assertEqual(repr(program.command.get_last_command()), 'a4999 := 4999')
+
+    def test_symbols(self):
+        program = self.assertRoundTrip('def f = fun(a) { b := a; return b }\nx := f(y); z := x')
+        symbols = program.symbols
+
+        # The decoded table can still add and drop symbols, and gives out
+        # the ids of dropped ones again
+        self.assertEqual(symbols.add('x', None), symbols.lookup('x'))
+        symbol_id = symbols.add('w', None)
+        self.assertEqual(symbol_id, len(symbols) - 1)
+        symbols.drop(symbol_id)
+        self.assertEqual(symbols.add('v', 'f'), symbol_id)
+        self.assertEqual(symbols.lookup('v', 'f'), symbol_id)
+
+    def test_invalid_encoding(self):
+        self.assertRaises(ValueError, decode_program, 'not a program')
+
+
+class ProgramCacheTest(TestCase):
+
+    def setUp(self):
+        super(ProgramCacheTest, self).setUp()
+
+        self.directory = tempfile.mkdtemp()
+        self.cache = ProgramCache(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+        super(ProgramCacheTest, self).tearDown()
+
+    def entries(self):
+        return sorted(name for name in os.listdir(self.directory))
+
+    def test_miss_then_hit(self):
+        source_text = 'a := 1; b := a + 2'
+
+        self.assertEqual(self.cache.get(source_text), None)
+
+        program = self.cache.parse(source_text)
+        self.assertEqual(len(self.entries()), 1)
+
+        # Unchanged sources are never parsed again, in this process or another
+        cached = ProgramCache(self.directory).parse(source_text, FailingParser())
+        self.assertEqual(describe(cached), describe(program))
+
+    def test_key_is_content_hash(self):
+        self.assertEqual(self.cache.get_key('a := 1'), ProgramCache(self.directory).get_key('a := 1'))
+        self.assertEqual(self.cache.get_key('a := 1;\r\nb := 2'), self.cache.get_key('a := 1;\nb := 2'))
+        self.assertNotEqual(self.cache.get_key('a := 1'), self.cache.get_key('a := 2'))
+
+    def test_key_covers_grammar(self):
+        class ExtendedParser(LingoParser):
+            def p_command_skip(self, p):
+                '''command : KEYWORD_SKIP
+                           | KEYWORD_SKIP KEYWORD_SKIP'''
+
+        self.assertNotEqual(ProgramCache(self.directory, parser_class = ExtendedParser).get_key('skip'),
+                            self.cache.get_key('skip'))
+
+    def test_parse_errors_are_not_cached(self):
+        self.assertRaises(LingoException, self.cache.parse, 'a := ')
+        self.assertEqual(self.entries(), [])
+
+    def test_unreadable_entry(self):
+        self.cache.parse('skip')
+        entry_path = os.path.join(self.directory, self.entries()[0])
+
+        with open(entry_path, 'wb') as entry_file:
+            entry_file.write('garbage')
+
+        self.assertEqual(self.cache.get('skip'), None)
+        self.assertEqual(self.entries(), [])
+
+    def test_least_recently_used_eviction(self):
+        sources = ['a{0} := {0}'.format(index) for index in range(8)]
+
+        for index, source_text in enumerate(sources):
+            self.cache.parse(source_text)
+            # Make the order of use unambiguous despite the mtime resolution
+            path = self.cache.get_path(self.cache.get_key(source_text))
+            os.utime(path, (index, index))
+
+        entry_size = os.path.getsize(path)
+
+        # Use the oldest entry, so the second oldest is evicted first
+        self.cache.get(sources[0])
+
+        cache = ProgramCache(self.directory, max_size = entry_size * 8)
+        cache.parse('b := 1')
+
+        self.assertEqual(cache.get(sources[1]), None)
+        self.assertNotEqual(cache.get(sources[0]), None)
+        self.assertNotEqual(cache.get('b := 1'), None)
+        self.assertTrue(len(self.entries()) <= 6)
+
+    def test_clear(self):
+        self.cache.parse('skip')
+        self.cache.clear()
+
+        self.assertEqual(self.entries(), [])
@@ -0,0 +1,68 @@
+from sleuth.lingo.components import * #@UnusedWildImport
+from sleuth.lingo.parser import LingoParser
+from test_sleuth.support.testcase import TestCase
+import copy
+
+
+class CompactComponentTest(TestCase):
+
+    def iterate_components(self, program):
+        seen = set()
+        stack = [program]
+        while stack:
+            component = stack.pop()
+            if id(component) in seen:
+                continue
+
+            seen.add(id(component))
+            yield component
+
+            for value in get_attributes(component).values():
+                values = value if isinstance(value, list) else [value]
+                stack.extend(item for item in values if isinstance(item, LingoComponent))
+
+    def test_no_instance_dicts(self):
+        program = LingoParser().parse('def f = fun(a) { return a }\n'
+                                      'x := f(y); z := new ref integer; b := true || 1 < 2;\n'
+                                      'if (!z) then { input b } else { skip }; while (b) do { b := false }')
+
+        classes = set()
+        for component in self.iterate_components(program):
+            self.assertFalse(hasattr(component, '__dict__'), component.__class__)
+            classes.add(component.__class__)
+
+        self.assertTrue(len(classes) >= 15)
+
+    def test_spans(self):
+        variable = Variable('a', line_span = (3, 7), lex_span = (12, 4000000000))
+        self.assertEqual(variable.line_span, (3, 7))
+        self.assertEqual(variable.lex_span, (12, 4000000000))
+        self.assertEqual(variable.line_number, 3)
+
+        variable.line_span = (8, 9)
+        variable.lex_span = (0, 0)
+        self.assertEqual(variable.line_span, (8, 9))
+        self.assertEqual(variable.lex_span, (0, 0))
+
+        self.assertEqual(unpack_span(pack_span((123456, 654321))), (123456, 654321))
+
+    def test_attributes(self):
+        number = Number(5, line_span = (1, 1), lex_span = (2, 3))
+        attributes = get_attributes(number)
+
+        self.assertEqual(sorted(attributes), ['_lex_span', '_line_span', 'parent', 'rank', 'type', 'value'])
+        self.assertTrue(attributes['parent'] is number)
+        self.assertEqual(unpack_span(attributes['_lex_span']), (2, 3))
+
+        # Attributes that aren't part of a component can't be added by accident
+        self.assertRaises(AttributeError, setattr, number, 'values', 6)
+
+    def test_copy(self):
+        variable = Variable('a', line_span = (1, 1), lex_span = (4, 5))
+        variable.type = Variable('_t0', line_span = (1, 1), lex_span = (4, 5))
+
+        copied = copy.deepcopy(variable)
+        self.assertEqual(copied, variable)
+        self.assertEqual(copied.lex_span, (4, 5))
+        self.assertTrue(copied.parent is copied)
+        self.assertEqual(copied.type.name, '_t0')
@@ -0,0 +1,184 @@
+from sleuth.lingo.components import * #@UnusedWildImport
+from sleuth.lingo.parser import LingoParser, LingoException, \
+    BACKEND_YACC, BACKEND_DESCENT, TOKENIZER_PLY, TOKENIZER_REGEX
+from test_sleuth.lingo import test_parser
+from test_sleuth.support.programs import ProgramGenerator
+from test_sleuth.support.testcase import TestCase
+import random
+import sys
+
+
+class DescentLanguageTest(test_parser.LanguageTest):
+    '''Run all the parser tests against the descent backend.'''
+
+    def setUp(self):
+        super(DescentLanguageTest, self).setUp()
+
+        self.parser = LingoParser(backend = BACKEND_DESCENT)
+
+
+def describe(component):
+    '''Describe a component tree as a flat list.
+
+    Every component is described by its class, spans and attributes, and
+    commands are followed by the commands after them. Links back up the tree
+    are described only by the class and spans of the command they point to.
+    Variables are described by the scope and name of their symbol, which
+    doesn't depend on the order the ids were given out in.
+    '''
+    symbols = getattr(component, 'symbols', None)
+
+    def reference(node):
+        if node is None:
+            return None
+        return (node.__class__.__name__, node.line_span, node.lex_span)
+
+    description = []
+    stack = [component]
+
+    while stack:
+        node = stack.pop()
+
+        if isinstance(node, list):
+            description.append(('list', len(node)))
+            stack.extend(reversed(node))
+            continue
+
+        if not isinstance(node, LingoComponent):
+            description.append(repr(node))
+            continue
+
+        description.append(reference(node))
+
+        children = []
+        for name, value in sorted(get_attributes(node).items()):
+            if name in ('_line_span', '_lex_span', 'type', 'rank', 'parent', '_last_command', 'symbols'):
+                continue
+
+            if name == 'id':
+                if symbols is not None and value is not None:
+                    description.append((name, symbols.scopes[value], symbols.names[value]))
+                continue
+
+            if name in ('_previous_command', '_parent_command'):
+                description.append((name, reference(value)))
+                continue
+
+            description.append(name)
+            children.append(value)
+
+        stack.extend(reversed(children))
+
+    return description
+
+
+class BackendEquivalenceTest(TestCase):
+
+    def parse(self, source_text, backend, tokenizer = TOKENIZER_PLY, start = 'program'):
+        parser = LingoParser(tokenizer = tokenizer, backend = backend)
+        parser.start = start
+
+        try:
+            return describe(parser.parse(source_text))
+        except LingoException as e:
+            return (e.__class__, str(e))
+
+    def assertSameParse(self, source_text, start = 'program'):
+        expected = self.parse(source_text, BACKEND_YACC, start = start)
+
+        for tokenizer in (TOKENIZER_PLY, TOKENIZER_REGEX):
+            actual = self.parse(source_text, BACKEND_DESCENT, tokenizer, start = start)
+            self.assertEqual(actual, expected)
+
+    def test_spans(self):
+        self.assertSameParse('\n\n  abc := 1;\n b := 0123')
+        self.assertSameParse('x := f(); y := (a + b + c) * d; z := new ref integer;\n'
+                             'if (a) then { skip } else { input b }; while (!p) do { !p := ref q }')
+        self.assertSameParse('def f = fun() { return x }\n\n'
+                             'def g = fun(a, b) {\n  c := a + b;\n  return c\n}\n'
+                             'x := g(f, !f)')
+
+    def test_expressions(self):
+        self.assertSameParse('a := 1 + 2 * 3 - 4 / 5 < 6 = 7 != 8 <= 9 && true || false')
+        self.assertSameParse('a := ((1 + 2) * (3 - (4 / 5))) + (6 < 7 + 8)')
+        self.assertSameParse('a := (1 + 2 + 3 + 4)')
+
+    def test_start_symbols(self):
+        self.assertSameParse('a := 1; if (a) then { b := 2 } else { skip }', start = 'command')
+        self.assertSameParse('fun(a, b) { skip; return a }', start = 'function_definition')
+        self.assertSameParse('def f = fun(a) { return a }', start = 'function_declaration')
+        self.assertSameParse('f(a, b)', start = 'assignment_rhs')
+        self.assertSameParse('new ref ref boolean', start = 'assignment_rhs')
+        self.assertSameParse('(a + 2) <= b', start = 'expression')
+        self.assertSameParse('ref a', start = 'referenced_variable')
+        self.assertSameParse('!a', start = 'dereferenced_variable')
+        self.assertSameParse('false', start = 'bool')
+        self.assertSameParse('007', start = 'number')
+        self.assertSameParse('<=', start = 'operator')
+
+    def test_syntax_errors(self):
+        for source_text in ['',
+                            'a := 1;',
+                            'a := 1 b := 2',
+                            'a := (1)',
+                            'a := f(1)',
+                            'a := f(a,)',
+                            'a := f(, a)',
+                            'a := f(,)',
+                            'a := f(,, a)',
+                            'def f = fun(, a, b) { return a }\nskip',
+                            'a := b + f(c)',
+                            'a := ref b + 1',
+                            'a := new ref',
+                            'if (a) then { skip }',
+                            'while (a) do { skip; }',
+                            'def f = fun() { skip }\nskip',
+                            'def f = fun() { return a; skip }\nskip',
+                            'skip; def f = fun() { return a }',
+                            'if (a) then { return a } else { skip }',
+                            'a := 1 $ 2']:
+            self.assertSameParse(source_text)
+
+    def test_generated_programs(self):
+        generator = ProgramGenerator(seed = 11)
+
+        for _ in range(100):
+            self.assertSameParse(generator.program(statements = 8, functions = 2))
+
+    def test_generated_syntax_errors(self):
+        generator = ProgramGenerator(seed = 12)
+        rand = random.Random(12)
+
+        for _ in range(200):
+            source_text = generator.program(statements = 5, functions = 1)
+
+            # Delete or duplicate a random character
+            index = rand.randrange(len(source_text))
+            if rand.random() < 0.5:
+                source_text = source_text[:index] + source_text[index + 1:]
+            else:
+                source_text = source_text[:index] + source_text[index] + source_text[index:]
+
+            self.assertSameParse(source_text)
+
+    def test_deep_nesting(self):
+        # The descent parser doesn't recurse, so nesting may be much deeper
+        # than the recursion limit.
+        depth = sys.getrecursionlimit() * 2
+
+        source_text = 'while (a) do { ' * depth + 'skip' + ' }' * depth
+        program = LingoParser(backend = BACKEND_DESCENT).parse(source_text)
+        self.assertTrue(isinstance(program.command, WhileCommand))
+
+        source_text = 'a := ' + '(1 + ' * depth + '2' + ')' * depth
+        program = LingoParser(backend = BACKEND_DESCENT).parse(source_text)
+        self.assertTrue(isinstance(program.command.expression, BinaryExpression))
+
+    def test_unsupported_start_symbol(self):
+        parser = LingoParser(backend = BACKEND_DESCENT)
+        parser.start = 'empty'
+
+        self.assertRaises(ValueError, parser.parse, '')
+
+    def test_unknown_backend(self):
+        self.assertRaises(ValueError, LingoParser, backend = 'unknown')
@@ -0,0 +1,121 @@
+from sleuth.common.exception import TypeException
+from sleuth.lingo.components import * #@UnusedWildImport
+from sleuth.lingo.flat import FlatProgram, LazyProgram, flatten, BLOCK
+from sleuth.lingo.parser import LingoParser
+from sleuth.lingo.typecheck import TypeCheck
+from sleuth.tracks.cfg import ProgramBlock
+from test_sleuth.lingo.test_descent import describe
+from test_sleuth.support.programs import ProgramGenerator
+from test_sleuth.support.testcase import TestCase
+import StringIO
+import sys
+
+
+SOURCE_TEXT = ('def f = fun(a) { r := new ref integer; b := a * 2; return b }\n'
+               'def g = fun() { c := true; return c }\n'
+               'x := f(y); p := ref x; q := !p; h := g();\n'
+               'if (h || 1 <= x) then { skip } else { input z; x := f(z) };\n'
+               'while (x < 10) do { x := x + 1 }')
+
+
+class FlatProgramTest(TestCase):
+
+    def setUp(self):
+        self.parser = LingoParser()
+
+    def test_round_trip(self):
+        texts = [SOURCE_TEXT] + ProgramGenerator(seed = 5).corpus(20, statements = 10, functions = 2)
+        for text in texts:
+            program = self.parser.parse(text)
+            flat = flatten(program)
+            self.assertEqual(describe(flat.get_program()), describe(program))
+
+            flat = FlatProgram.loads(flat.dumps())
+            self.assertEqual(describe(flat.get_program()), describe(program))
+            self.assertEqual(flat.symbols.names, program.symbols.names)
+
+    def test_columns(self):
+        flat = flatten(self.parser.parse('a := 1; x := f(a)'))
+
+        self.assertEqual(flat.get_class(0), Program)
+        self.assertEqual(flat.parents[0], -1)
+        self.assertEqual(flat.get_function_rows(), [])
+
+        # The [RET] half of the function call isn't kept
+        block = flat.get_block_row()
+        self.assertEqual(flat.kinds[block], BLOCK)
+        commands = flat.get_command_rows()
+        self.assertEqual([flat.get_class(row) for row in commands], [AssignmentCommand, AssignmentCommand])
+        self.assertEqual(flat.get_lex_span(block), (flat.get_lex_span(commands[0])[0], flat.get_lex_span(commands[1])[1]))
+
+        # Rows come before the rows in them
+        for row in range(1, len(flat)):
+            self.assertTrue(flat.parents[row] < row)
+            self.assertTrue(row in flat.get_children(flat.parents[row]))
+
+        variable, number = flat.get_children(commands[0])
+        self.assertEqual(flat.get_name(variable), 'a')
+        self.assertEqual(flat.symbol_ids[variable], flat.symbols.lookup('a'))
+        self.assertEqual(flat.get_value(number), 1)
+        self.assertEqual(flat.get_line_span(number), (1, 1))
+
+    def test_lazy_program(self):
+        flat = flatten(self.parser.parse(SOURCE_TEXT))
+        program = LazyProgram(flat)
+        self.assertEqual(len(program.functions), 2)
+        self.assertEqual(flat._components, {})
+
+        # Touching one function makes only it
+        declaration = program.functions[1]
+        self.assertEqual(declaration.name, 'g')
+        self.assertTrue(declaration is flat.get_component(flat.get_function_rows()[1]))
+        self.assertFalse(flat.get_function_rows()[0] in flat._components)
+        self.assertFalse(flat.get_block_row() in flat._components)
+
+        command = program.command
+        self.assertEqual(repr(command), 'x := f([y]) [CALL]')
+        self.assertEqual(repr(command.get_next_command()), 'x := f([y]) [RET]')
+        self.assertFalse(flat.get_function_rows()[0] in flat._components)
+
+        # The whole program shares the components made so far
+        self.assertTrue(flat.get_program().command is command)
+        self.assertTrue(flat.get_program().functions[1] is declaration)
+
+    def test_typecheck(self):
+        typecheck = TypeCheck(False)
+        typecheck.visit_flat_program(flatten(self.parser.parse(SOURCE_TEXT)))
+        self.assertEqual(repr(typecheck.find(typecheck.variables['f_b'])), 'integer')
+        self.assertEqual(repr(typecheck.find(typecheck.variables['q'])), 'integer')
+
+        error, sys.stderr = sys.stderr, StringIO.StringIO()
+        try:
+            self.assertRaises(TypeException, TypeCheck(False).visit_flat_program,
+                              flatten(self.parser.parse('a := 1; b := a && true')))
+        finally:
+            sys.stderr = error
+
+    def test_cfg(self):
+        def describe_cfg(program_block):
+            nodes = [program_block.command_node] + [block.command_node for _, block in sorted(program_block.functions.items())]
+            # The reverse post order numbers depend on the hashes of the nodes
+            return sorted((repr(node.command), sorted(repr(successor.command) for successor in node.get_successors()))
+                          for start in nodes for node, _ in start.get_paths())
+
+        self.assertEqual(describe_cfg(ProgramBlock(flatten(self.parser.parse(SOURCE_TEXT)))),
+                         describe_cfg(ProgramBlock(self.parser.parse(SOURCE_TEXT))))
+        for text in ProgramGenerator(seed = 5).corpus(20, statements = 12, functions = 2):
+            self.assertEqual(describe_cfg(ProgramBlock(flatten(self.parser.parse(text)))),
+                             describe_cfg(ProgramBlock(self.parser.parse(text))))
+
+        # The CFG is built from the rows, and the commands made as they're asked for
+        flat = flatten(self.parser.parse(SOURCE_TEXT))
+        program_block = ProgramBlock(flat)
+        program_block.get_dominator_tree()
+        self.assertEqual(flat._components, {})
+        node = program_block.functions['f'].command_node
+        self.assertEqual(repr(node.command), 'f = fun([a])')
+        self.assertIs(program_block.functions['f'].function_declaration, node.command)
+        # (and only the commands of that node)
+        components = {}
+        flat.build(flat.get_function_rows()[0], components)
+        self.assertEqual(sorted(flat._components), sorted(components))
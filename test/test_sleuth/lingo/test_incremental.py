@@ -0,0 +1,228 @@
+from sleuth.lingo.components import * #@UnusedWildImport
+from sleuth.lingo.incremental import IncrementalParser, MAX_PENDING_SHIFTS
+from sleuth.lingo.parser import LingoParser, LingoException, BACKEND_DESCENT
+from test_sleuth.lingo.test_descent import describe
+from test_sleuth.support.programs import ProgramGenerator
+from test_sleuth.support.testcase import TestCase
+import random
+import re
+
+
+class IncrementalParserTest(TestCase):
+
+    def assertSameAsFullParse(self, incremental_parser):
+        program = LingoParser(backend = BACKEND_DESCENT).parse(incremental_parser.source_text)
+        self.assertEqual(describe(incremental_parser.program), describe(program))
+
+    def edit(self, incremental_parser, old, new, occurrence = 0):
+        '''Replace an occurrence of old in the source text with new.'''
+        offset = -1
+        for _ in range(occurrence + 1):
+            offset = incremental_parser.source_text.index(old, offset + 1)
+
+        incremental_parser.edit(offset, len(old), new)
+        self.assertSameAsFullParse(incremental_parser)
+        return incremental_parser.program
+
+    def test_edit_within_command(self):
+        parser = IncrementalParser('a := 1;\nb := a + 2;\nc := b')
+        program = parser.program
+        first, second, third = program.command, program.command._next_command, program.command.get_last_command()
+
+        self.assertTrue(self.edit(parser, 'a + 2', 'a * 20') is program)
+
+        # Only the edited command is replaced
+        self.assertTrue(program.command is first)
+        self.assertTrue(first._next_command is not second)
+        self.assertTrue(first._next_command._next_command is third)
+        self.assertTrue(third.get_previous_command() is first._next_command)
+        self.assertEqual(repr(first._next_command), 'b := a * 20')
+        self.assertEqual(third.lex_span, (21, 27))
+
+    def test_edit_moves_lines(self):
+        parser = IncrementalParser('def f = fun(a) {\n  skip;\n  return a\n}\n'
+                                   'x := new ref integer;\ny := f(x)')
+
+        self.edit(parser, 'skip', 'skip;\n  input a')
+        self.edit(parser, 'x :=', '\n\nx :=')
+
+        allocate_type = parser.program.command.expression.allocate_type
+        self.assertEqual(allocate_type.line_number, 8)
+        self.assertEqual(parser.program.command.line_span, (8, 8))
+
+    def test_edit_adds_commands(self):
+        parser = IncrementalParser('if (a) then { b := 1 } else { skip };\nc := 2')
+        if_command = parser.program.command
+
+        self.edit(parser, 'b := 1', 'b := 1; d := 3')
+        self.edit(parser, 'skip', 'input e; skip')
+        self.edit(parser, 'c := 2', 'c := 2;\nwhile (c) do { c := 0 }')
+
+        self.assertTrue(parser.program.command is if_command)
+        self.assertEqual(repr(if_command.true_block.get_last_command()), 'd := 3')
+        self.assertTrue(if_command.false_block.get_parent_command() is if_command)
+        self.assertTrue(if_command.false_block._next_command.get_parent_command() is if_command)
+
+    def test_edit_first_command(self):
+        parser = IncrementalParser('skip;\nwhile (a) do { a := 0 }')
+
+        self.edit(parser, 'skip', '  input b; skip')
+        self.edit(parser, 'a := 0', 'skip; a := 0')
+        self.edit(parser, 'skip', 'skip; skip', occurrence = 1)
+
+    def test_edit_function(self):
+        parser = IncrementalParser('def f = fun(a) {\n  return a\n}\n'
+                                   'def g = fun() {\n  b := 1;\n  return b\n}\n'
+                                   'skip')
+        f, g = parser.program.functions
+
+        # Return commands are reparsed with the function declaring them
+        self.edit(parser, 'return a', 'return c')
+        self.assertTrue(parser.program.functions[0] is not f)
+        self.assertTrue(parser.program.functions[1] is g)
+
+        self.edit(parser, 'b := 1', 'b := 2')
+        self.assertTrue(parser.program.functions[1] is g)
+
+        self.edit(parser, 'fun()', 'fun(d)')
+        self.assertTrue(parser.program.functions[1] is not g)
+
+    def test_edit_function_call(self):
+        parser = IncrementalParser('a := f(b);\nc := a')
+        call = parser.program.command
+
+        # The [RET] half of the call follows it
+        self.assertTrue(isinstance(call.get_next_command().expression, FunctionReturn))
+
+        last_command = call.get_last_command()
+        self.edit(parser, 'f(b)', 'g(b)')
+
+        # The removed command and its [RET] half are detached, and the
+        # commands remembering them as the last of their sequence look again
+        self.assertEqual(call.get_next_command(), None)
+        self.assertEqual(call.get_previous_command(), None)
+        self.assertTrue(parser.program.command.get_last_command() is last_command)
+        self.assertEqual(repr(last_command), 'c := a')
+
+    def test_edit_last_command(self):
+        parser = IncrementalParser('a := 1;\nb := f(a)')
+        first = parser.program.command
+        self.assertEqual(repr(first.get_last_command()), 'b := f([a]) [RET]')
+
+        self.edit(parser, 'f(a)', '2')
+        self.assertEqual(repr(first.get_last_command()), 'b := 2')
+
+    def test_drop_symbols(self):
+        parser = IncrementalParser('def f = fun(a) {\n  b := a;\n  return b\n}\nc := 1;\nd := f(c)')
+        symbols = parser.program.symbols
+        c = symbols.lookup('c')
+        self.assertEqual(symbols.lookup('e'), None)
+
+        self.edit(parser, 'c := 1', 'e := 1')
+        self.assertTrue(parser.program.symbols is symbols)
+        self.assertNotEqual(symbols.lookup('c'), None)
+        self.edit(parser, 'f(c)', 'f(e)')
+        self.assertEqual(symbols.lookup('c'), None)
+        self.assertEqual(symbols.get_name(c), None)
+
+        # Dropped ids are given out again, and function names are kept
+        self.edit(parser, 'e := 1', 'g := 1')
+        self.edit(parser, 'f(e)', 'f(g)')
+        self.assertEqual(symbols.lookup('g'), c)
+        self.edit(parser, 'd := f(g)', 'd := g')
+        self.assertNotEqual(symbols.lookup('f'), None)
+
+        self.edit(parser, 'b := a', 'b := a + 1')
+        self.assertNotEqual(symbols.lookup('a', 'f'), None)
+
+    def test_lazy_shifts(self):
+        parser = IncrementalParser(ProgramGenerator(seed = 7).program(statements = 40, functions = 2))
+        program = parser.program
+        last_command = program.command.get_last_command()
+        lex_span = last_command.lex_span
+
+        # Edits and the edits undoing them shift the commands after them back
+        # where they were, when the program is read again
+        for _ in range(3 * MAX_PENDING_SHIFTS):
+            parser.edit(0, 0, '\n  ')
+            parser.edit(0, 3, '')
+        self.assertTrue(parser.program is program)
+        self.assertEqual(last_command.lex_span, lex_span)
+        self.assertSameAsFullParse(parser)
+
+        # Many edits before the program is read again
+        rand = random.Random(7)
+        for _ in range(20):
+            source_text = parser.source_text
+            if rand.random() < 0.5:
+                offset = rand.choice([match.end() for match in re.finditer(r';\n', source_text)])
+                parser.edit(offset, 0, rand.choice(['skip;\n', 'x := f(y);\n', 'while (a) do {\n input b\n};\n']))
+            else:
+                match = rand.choice(list(re.finditer(r'\n *(\w+) :=', source_text)))
+                parser.edit(match.start(1), len(match.group(1)), rand.choice(['a', 'b_2']))
+        self.assertSameAsFullParse(parser)
+
+    def test_edit_within_comment(self):
+        parser = IncrementalParser('a := 1 / 2;\nb := 3')
+
+        # The single line comment runs on into the next line
+        self.assertRaises(LingoException, parser.edit, 7, 0, '/')
+        self.assertEqual(parser.source_text, 'a := 1 // 2;\nb := 3')
+
+        self.edit(parser, '// 2;', '// 2;\n;')
+        self.edit(parser, '// 2;\n', '/* 2; */')
+
+    def test_syntax_errors(self):
+        parser = IncrementalParser('a := 1;\nb := 2')
+        program = parser.program
+
+        self.assertRaises(LingoException, parser.edit, 0, 1, '')
+        self.assertRaises(LingoException, parser.edit, 0, 0, '(')
+
+        # The program is kept until the source text is fixed
+        self.assertTrue(parser.program is program)
+        self.assertEqual(repr(program.command), 'a := 1')
+        self.assertEqual(parser.source_text, '( := 1;\nb := 2')
+
+        self.edit(parser, '(', 'c')
+        self.assertTrue(parser.program is program)
+
+    def test_generated_edits(self):
+        generator = ProgramGenerator(seed = 31)
+        rand = random.Random(31)
+        keywords = set(LingoParser.keywords)
+        full_parser = LingoParser(backend = BACKEND_DESCENT)
+
+        for _ in range(30):
+            parser = IncrementalParser(generator.program(statements = 8, functions = 2))
+
+            for _ in range(10):
+                source_text = parser.source_text
+
+                if rand.random() < 0.5:
+                    # Rename a variable or change a number
+                    names = [match for match in re.finditer(r'[_A-Za-z][_A-Za-z0-9]*|\d+', source_text)
+                             if match.group() not in keywords]
+                    match = rand.choice(names)
+                    offset, deleted_length = match.start(), len(match.group())
+                    inserted_text = rand.choice(['a', 'b_2', '7'])
+                else:
+                    # Insert a command at the start of another one
+                    starts = [match.end() for match in re.finditer(r';\n|\{ ', source_text)]
+                    offset, deleted_length = rand.choice(starts), 0
+                    inserted_text = rand.choice(['skip;\n', 'x := f(y);\n', 'while (a) do { input b };\n'])
+
+                new_source_text = source_text[:offset] + inserted_text + source_text[offset + deleted_length:]
+                try:
+                    expected = describe(full_parser.parse(new_source_text))
+                except LingoException:
+                    expected = None
+
+                try:
+                    parser.edit(offset, deleted_length, inserted_text)
+                    actual = describe(parser.program)
+                except LingoException:
+                    actual = None
+
+                self.assertEqual(parser.source_text, new_source_text)
+                self.assertEqual(actual, expected)
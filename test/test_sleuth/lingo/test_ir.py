@@ -0,0 +1,88 @@
+from sleuth.lingo.components import * #@UnusedWildImport
+from sleuth.lingo.ir import * #@UnusedWildImport
+from sleuth.lingo.parser import LingoParser
+from sleuth.tracks.cfg import ProgramBlock
+from test_sleuth.lingo.test_flat import SOURCE_TEXT
+from test_sleuth.support.programs import ProgramGenerator
+from test_sleuth.support.testcase import TestCase
+
+
+class IRTest(TestCase):
+
+    def setUp(self):
+        self.parser = LingoParser()
+
+    def describe(self, ir):
+        return [ir.format_instruction(instruction) for instruction in range(len(ir))]
+
+    def test_lower(self):
+        ir = lower(self.parser.parse('x := a + b * 2; p := ref x; !p := g(x); if (!p < 3) then { skip } else { input y }'))
+        instructions = self.describe(ir)
+        self.assertEqual(instructions[:9], ['%0 := multiply b, 2',
+                                             'x := add a, %0',
+                                             'p := ref x',
+                                             'call g, x',
+                                             '%1 := result g, x',
+                                             '!p := store %1',
+                                             '%2 := load p',
+                                             '%3 := less %2, 3',
+                                             'if %3'])
+        # The order of the branches depends on the hashes of the nodes
+        self.assertEqual(sorted(instructions[9:]), ['nop', 'y := input'])
+
+        self.assertEqual(ir.temporary_count, 4)
+        self.assertTrue(ir.is_temporary(ir.destinations[0]))
+        self.assertFalse(ir.is_temporary(ir.destinations[1]))
+        self.assertEqual(ir.get_constant(ir.operands_b[0]), 2)
+        self.assertTrue(is_constant(ir.operands_b[0]))
+        self.assertFalse(is_constant(NO_OPERAND))
+
+    def test_nodes(self):
+        program = self.parser.parse(SOURCE_TEXT)
+        program_block = ProgramBlock(program)
+        ir = lower(program, program_block)
+
+        # Every CFG node has its instructions, in reverse post order
+        self.assertEqual([node.reverse_post_order for node in ir.nodes], sorted(node.reverse_post_order for node in ir.nodes))
+        self.assertEqual(ir.nodes, program_block.nodes)
+        self.assertIs(ir.nodes[0], program_block.command_node)
+        for node in ir.nodes:
+            instructions = ir.get_instructions(node)
+            self.assertTrue(len(instructions) > 0)
+            for instruction in instructions:
+                self.assertTrue(ir.get_node(instruction) is node)
+
+            # The last instruction has the span of the command
+            self.assertEqual(ir.get_lex_span(instructions[-1]), node.command.lex_span)
+            self.assertEqual(ir.get_line_span(instructions[-1]), node.command.line_span)
+
+        # Temporaries have the spans of their expressions
+        condition = [node for node in ir.nodes if isinstance(node.command, IfCommand)][0]
+        instruction = ir.get_instructions(condition)[0]
+        self.assertEqual(ir.format_instruction(instruction), '%0 := less_equal 1, x')
+        self.assertEqual(ir.get_lex_span(instruction), condition.command.expression.right_term.lex_span)
+
+    def test_functions(self):
+        program = self.parser.parse(SOURCE_TEXT)
+        program_block = ProgramBlock(program)
+        ir = lower(program, program_block)
+
+        instruction = ir.get_instructions(program_block.functions['f'].command_node)[0]
+        self.assertEqual(self.describe(ir)[instruction:instruction + 4],
+                         ['f := function a', 'r := new ref (integer)', 'b := multiply a, 2', 'return b'])
+        self.assertEqual(ir.get_arguments(ir.operands_b[instruction]), [ir.symbols.lookup('a', 'f')])
+
+    def test_dumps(self):
+        texts = [SOURCE_TEXT] + ProgramGenerator(seed = 3).corpus(20, statements = 10, functions = 2)
+        for text in texts:
+            ir = lower(self.parser.parse(text))
+            loaded = IRProgram.loads(ir.dumps())
+            self.assertEqual(self.describe(loaded), self.describe(ir))
+            for name in COLUMN_NAMES:
+                self.assertEqual(getattr(loaded, name), getattr(ir, name))
+                # Columns of four byte ints (or bytes) read back the same on any platform
+                self.assertTrue(getattr(ir, name).typecode in 'bi')
+            self.assertEqual([loaded.get_line_span(index) for index in xrange(len(loaded))],
+                             [ir.get_line_span(index) for index in xrange(len(ir))])
+            self.assertEqual(loaded.symbols.names, ir.symbols.names)
+            self.assertEqual(loaded.node_starts, ir.node_starts)
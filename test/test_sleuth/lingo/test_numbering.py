@@ -0,0 +1,92 @@
+from sleuth.lingo.components import * #@UnusedWildImport
+from sleuth.lingo.numbering import ExpressionTable, number_program, MEMORY
+from sleuth.lingo.parser import LingoParser, BACKEND_DESCENT
+from test_sleuth.support.testcase import TestCase
+
+
+class ExpressionTableTest(TestCase):
+
+    def setUp(self):
+        self.parser = LingoParser()
+
+    def get_expressions(self, program):
+        '''Get the expressions assigned by the top level commands.'''
+        expressions = []
+        command = program.command
+        while command is not None:
+            expressions.append(command.expression)
+            command = command.get_next_command()
+        return expressions
+
+    def test_equal_expressions(self):
+        program = self.parser.parse('x := a + 1; y := a + 1; z := 1 + a; w := a - 1; v := 1 - a; u := (a + 1) * b')
+        table = number_program(program)
+        numbers = [table.lookup(expression) for expression in self.get_expressions(program)]
+
+        # Commutative operands are ordered, others aren't
+        self.assertEqual(numbers[0], numbers[1])
+        self.assertEqual(numbers[0], numbers[2])
+        self.assertNotEqual(numbers[3], numbers[4])
+        self.assertNotEqual(numbers[0], numbers[3])
+
+        # Equal expressions share one canonical component
+        expressions = self.get_expressions(program)
+        self.assertTrue(table.get_expression(numbers[1]) is expressions[0])
+        self.assertTrue(table.get_canonical(expressions[2]) is expressions[0])
+        self.assertEqual(table.number(expressions[5].left_term), numbers[0])
+
+        self.assertEqual(table.get_variables(numbers[5]),
+                         frozenset([program.symbols.lookup('a'), program.symbols.lookup('b')]))
+
+    def test_atoms(self):
+        program = self.parser.parse('def f = fun(a) { b := a; return b }\n'
+                                    'x := a; y := a; z := 1; w := true; v := ref a; u := !a')
+        table = number_program(program)
+        numbers = [table.lookup(expression) for expression in self.get_expressions(program)]
+
+        self.assertEqual(numbers[0], numbers[1])
+        self.assertEqual(len(set(numbers[1:])), 5)
+        self.assertTrue(table.is_constant(numbers[2]))
+        self.assertTrue(table.is_constant(numbers[3]))
+        self.assertFalse(table.is_constant(numbers[0]))
+
+        # A variable of a function isn't the global with the same name
+        parameter = program.functions[0].definition.parameters[0]
+        self.assertNotEqual(table.lookup(parameter), numbers[0])
+
+    def test_effects(self):
+        program = self.parser.parse('x := f(a); y := f(a); p := new integer; q := new integer')
+        table = number_program(program)
+        numbers = [table.lookup(expression) for expression in self.get_expressions(program)]
+
+        # Calls (and their returns) and allocations are never the same
+        self.assertEqual(len(set(numbers)), len(numbers))
+        self.assertEqual(table.get_variables(numbers[0]),
+                         frozenset([program.symbols.lookup('f'), program.symbols.lookup('a')]))
+        self.assertFalse(table.is_constant(numbers[-1]))
+
+    def test_pointers(self):
+        program = self.parser.parse('x := !p + 1; y := p + 1; z := !f(a); w := !p')
+        table = number_program(program)
+        numbers = [table.lookup(expression) for expression in self.get_expressions(program)]
+        p, f, a = [program.symbols.lookup(name) for name in ('p', 'f', 'a')]
+
+        # Reading through a pointer may read anything whose address is taken
+        self.assertEqual(table.get_variables(numbers[0]), frozenset([p, MEMORY]))
+        self.assertEqual(table.get_variables(numbers[1]), frozenset([p]))
+        self.assertEqual(table.get_variables(numbers[2]), frozenset([f, a, MEMORY]))
+        self.assertEqual(table.get_variables(numbers[-1]), frozenset([p, MEMORY]))
+        self.assertFalse(table.is_constant(numbers[-1]))
+
+    def test_constant(self):
+        table = ExpressionTable()
+        program = self.parser.parse('x := (1 + 2) < 4')
+        number = table.number(program.command.expression)
+        self.assertTrue(table.is_constant(number))
+        self.assertEqual(len(table), 5)
+
+    def test_long_expression(self):
+        terms = 5000
+        program = LingoParser(backend = BACKEND_DESCENT).parse('x := ' + ' + '.join(['a', 'b'] * terms))
+        table = number_program(program)
+        self.assertEqual(len(table.get_variables(table.lookup(program.command.expression))), 2)
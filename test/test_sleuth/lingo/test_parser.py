@@ -6,6 +6,7 @@ from sleuth.lingo.parser import LingoParser, LingoLexingException, \
 from test_sleuth.support.testcase import TestCase
 import logging
 import sys
+import threading
 
 
 class LanguageTest(TestCase):
@@ -289,7 +290,7 @@ class LanguageTest(TestCase):
         self.parser.start = 'function_definition'
         result = self.parser.parse('fun (foo) { a := 1; return a }')
         self.assertIsInstance(result, FunctionDefinition)
-        self.assertEqual(result.parameter.name, 'foo')
+        self.assertEqual(result.parameters[0].name, 'foo')
         self.assertIsInstance(result.body, AssignmentCommand)
 
     #
@@ -357,7 +358,7 @@ class LanguageTest(TestCase):
         result = self.parser.parse('foo(bar)')
         self.assertIsInstance(result, FunctionCall)
         self.assertEqual(result.function_variable.name, 'foo')
-        self.assertEqual(result.parameter_variable.name, 'bar')
+        self.assertEqual(result.parameter_variables[0].name, 'bar')
 
     #
     # Expression Production Rule Tests
@@ -560,6 +561,25 @@ class LanguageTest(TestCase):
 
         self.assertEqual(len(program.functions), 2)
 
+    def test_program_long_sequence(self):
+        # Sequences are chained without recursion, so they may be much longer
+        # than the recursion limit.
+        statement_count = sys.getrecursionlimit() * 5
+        program_text = ';\n'.join('a{0} := {0}'.format(index) for index in range(statement_count))
+
+        program = self.parser.parse(program_text)
+
+        commands = []
+        command = program.command
+        while command is not None:
+            commands.append(command)
+            command = command.get_next_command()
+
+        self.assertEqual(len(commands), statement_count)
+        self.assertEqual(commands[-1].assigned_variable.name, 'a{0}'.format(statement_count - 1))
+        self.assertIs(commands[-1].get_previous_command(), commands[-2])
+        self.assertIs(program.command.get_last_command(), commands[-1])
+
 
     def test_program_all_parse_symbols(self):
         # Lengthy test demonstrating all Lingo syntax features
@@ -694,32 +714,32 @@ class LanguageTest(TestCase):
         self.assertIsInstance(l_call_cmd.expression, FunctionCall)
         self.assertIsInstance(l_call_cmd.expression.function_variable, Variable)
         self.assertEqual(l_call_cmd.expression.function_variable.name, 'foo')
-        self.assertIsInstance(l_call_cmd.expression.parameter_variable, Variable)
-        self.assertEqual(l_call_cmd.expression.parameter_variable.name, 'a')
+        self.assertIsInstance(l_call_cmd.expression.parameter_variables[0], Variable)
+        self.assertEqual(l_call_cmd.expression.parameter_variables[0].name, 'a')
 
         l_ret_cmd = l_call_cmd.get_next_command()
         self.assertIsInstance(l_ret_cmd, AssignmentCommand)
         self.assertIsInstance(l_ret_cmd.expression, FunctionReturn)
         self.assertIsInstance(l_ret_cmd.expression.function_variable, Variable)
         self.assertEqual(l_ret_cmd.expression.function_variable.name, 'foo')
-        self.assertIsInstance(l_ret_cmd.expression.parameter_variable, Variable)
-        self.assertEqual(l_ret_cmd.expression.parameter_variable.name, 'a')
+        self.assertIsInstance(l_ret_cmd.expression.parameter_variables[0], Variable)
+        self.assertEqual(l_ret_cmd.expression.parameter_variables[0].name, 'a')
 
         m_call_cmd = l_ret_cmd.get_next_command()
         self.assertIsInstance(m_call_cmd, AssignmentCommand)
         self.assertIsInstance(m_call_cmd.expression, FunctionCall)
         self.assertIsInstance(m_call_cmd.expression.function_variable, DereferencedVariable)
         self.assertEqual(m_call_cmd.expression.function_variable.name, 'l')
-        self.assertIsInstance(m_call_cmd.expression.parameter_variable, Variable)
-        self.assertEqual(m_call_cmd.expression.parameter_variable.name, 'a')
+        self.assertIsInstance(m_call_cmd.expression.parameter_variables[0], Variable)
+        self.assertEqual(m_call_cmd.expression.parameter_variables[0].name, 'a')
 
         m_ret_cmd = m_call_cmd.get_next_command()
         self.assertIsInstance(m_ret_cmd, AssignmentCommand)
         self.assertIsInstance(m_ret_cmd.expression, FunctionReturn)
         self.assertIsInstance(m_ret_cmd.expression.function_variable, DereferencedVariable)
         self.assertEqual(m_ret_cmd.expression.function_variable.name, 'l')
-        self.assertIsInstance(m_ret_cmd.expression.parameter_variable, Variable)
-        self.assertEqual(m_ret_cmd.expression.parameter_variable.name, 'a')
+        self.assertIsInstance(m_ret_cmd.expression.parameter_variables[0], Variable)
+        self.assertEqual(m_ret_cmd.expression.parameter_variables[0].name, 'a')
 
         n_cmd = m_ret_cmd.get_next_command()
         self.assertIsInstance(n_cmd, IfCommand)
@@ -773,3 +793,39 @@ class LanguageTest(TestCase):
         self.assertIsInstance(or_if_cmd, IfCommand)
         self.assertIsInstance(or_if_cmd.expression, BinaryExpression)
         self.assertIsInstance(or_if_cmd.expression.operator, OperatorOr)
+
+    def test_customized_instance(self):
+        # Parsers share their tables, but call the methods of their own
+        # LingoParser
+        self.parser.parse('skip')
+
+        custom_parser = LingoParser()
+        class SkipAssignment(Exception):
+            pass
+        def p_command_assignment(p):
+            raise SkipAssignment()
+        custom_parser.p_command_assignment = p_command_assignment
+        self.assertRaises(SkipAssignment, custom_parser.parse, 'x := 1')
+
+        self.assertIsInstance(self.parser.parse('x := 1').command, AssignmentCommand)
+
+    def test_change_start(self):
+        self.parser.parse('skip')
+        self.parser.start = 'function_definition'
+        self.assertIsInstance(self.parser.parse('fun(a) { return a }'), FunctionDefinition)
+
+    def test_concurrent_parses(self):
+        source_texts = ['x := {0}; while (x < {1}) do {{ x := x + 1 }}'.format(number, number * 2) for number in xrange(40)]
+        results = [None] * len(source_texts)
+
+        def parse(index):
+            results[index] = self.parser.parse(source_texts[index])
+
+        threads = [threading.Thread(target = parse, args = (index,)) for index in xrange(len(source_texts))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for index, result in enumerate(results):
+            self.assertEqual(result.command.expression.value, index)
@@ -0,0 +1,71 @@
+from sleuth.lingo.components import * #@UnusedWildImport
+from sleuth.lingo.parser import LingoParser, TOKENIZER_PLY, TOKENIZER_REGEX
+from test_sleuth.lingo import test_parser
+from test_sleuth.lingo.test_descent import describe
+from test_sleuth.support.programs import ProgramGenerator
+from test_sleuth.support.testcase import TestCase
+
+
+class UntrackedLanguageTest(test_parser.LanguageTest):
+    '''Run all the parser tests without position tracking.'''
+
+    def setUp(self):
+        super(UntrackedLanguageTest, self).setUp()
+
+        self.parser = LingoParser(track_positions = False)
+
+
+def starts_only(description):
+    '''Reduce every span in a component tree description to its start.'''
+    def reduce(item):
+        if isinstance(item, tuple) and len(item) == 3 and isinstance(item[1], tuple):
+            name, line_span, lex_span = item
+            return (name, (line_span[0], line_span[0]), (lex_span[0], lex_span[0]))
+
+        if isinstance(item, tuple) and len(item) == 2 and isinstance(item[1], tuple):
+            return (item[0], reduce(item[1]))
+
+        return item
+
+    return [reduce(item) for item in description]
+
+
+class UntrackedPositionsTest(TestCase):
+
+    def assertStartsOnly(self, source_text, tokenizer = TOKENIZER_PLY):
+        tracked = LingoParser(tokenizer = tokenizer).parse(source_text)
+        untracked = LingoParser(tokenizer = tokenizer, track_positions = False).parse(source_text)
+
+        self.assertEqual(describe(untracked), starts_only(describe(tracked)))
+        return untracked
+
+    def test_spans(self):
+        program = self.assertStartsOnly('def f = fun(a) { return a }\n'
+                                        'x := f(b);\n  y := (a + b) * c;\n'
+                                        'if (x < 1) then { input z } else { skip };\n'
+                                        'while (!p) do { !p := ref q }; r := new ref integer')
+
+        assignment = program.command.get_next_command().get_next_command()
+        self.assertEqual(repr(assignment), 'y := a + b * c')
+        self.assertEqual(assignment.line_span, (3, 3))
+        self.assertEqual(assignment.lex_span, (41, 41))
+
+    def test_program_without_functions(self):
+        # The command is the first thing in the program
+        program = LingoParser(track_positions = False).parse('\n\n  a := 1')
+
+        self.assertEqual(program.line_span, (3, 3))
+        self.assertEqual(program.lex_span, (4, 4))
+
+    def test_generated_programs(self):
+        generator = ProgramGenerator(seed = 31)
+
+        for index in range(100):
+            tokenizer = TOKENIZER_REGEX if index % 2 else TOKENIZER_PLY
+            self.assertStartsOnly(generator.program(statements = 8, functions = 2), tokenizer)
+
+    def test_tracking_parsers_are_not_shared(self):
+        LingoParser(track_positions = False).parse('a := 1')
+        program = LingoParser().parse('a := 1')
+
+        self.assertEqual(program.command.lex_span, (0, 6))
@@ -0,0 +1,189 @@
+from sleuth.lingo.cache import encode_program, decode_program
+from sleuth.lingo.components import * #@UnusedWildImport
+from sleuth.lingo.incremental import IncrementalParser
+from sleuth.lingo.parser import LingoParser, BACKEND_DESCENT, BACKEND_YACC
+from sleuth.lingo.symbols import SymbolTable
+from sleuth.lingo.typecheck import TypeCheck
+from test_sleuth.support.testcase import TestCase
+
+
+SOURCE_TEXT = ('def f = fun(a) { b := a + x; return b }\n'
+               'def g = fun(a, h) { b := f(a); c := h(b); return c }\n'
+               'a := 1; x := g(a, f); input b; b := !y')
+
+
+def get_variables(program):
+    '''Get the Variables of the program, by their name and the name of the function using them.'''
+    variables = {}
+    seen = set()
+    roots = [(declaration, declaration.name) for declaration in program.functions] + [(program.command, None)]
+
+    for root, function_name in roots:
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            if id(node) in seen:
+                # The [RET] half of a function call shares its variables
+                continue
+            seen.add(id(node))
+
+            if isinstance(node, Variable):
+                variables.setdefault((function_name, node.name), []).append(node)
+                continue
+
+            for name in get_child_names(node):
+                value = getattr(node, name)
+                if isinstance(value, list):
+                    stack.extend(value)
+                elif value is not None:
+                    stack.append(value)
+
+    return variables
+
+
+class SymbolTableTest(TestCase):
+
+    def test_scopes(self):
+        for backend in (BACKEND_DESCENT, BACKEND_YACC):
+            program = LingoParser(backend = backend).parse(SOURCE_TEXT)
+            symbols = program.symbols
+            variables = get_variables(program)
+
+            # Every use of a symbol has its id, and the ids are dense
+            ids = set()
+            for (function_name, name), uses in variables.iteritems():
+                symbol_id = symbols.lookup(name, function_name)
+                self.assertEqual([variable.id for variable in uses], [symbol_id] * len(uses))
+                self.assertEqual(symbols.get_name(symbol_id), name)
+                ids.add(symbol_id)
+            self.assertEqual(sorted(ids), range(len(symbols)))
+
+            # Parameters and assigned variables are local to their function
+            self.assertEqual(symbols.scopes[symbols.lookup('a', 'f')], 'f')
+            self.assertNotEqual(symbols.lookup('a', 'f'), symbols.lookup('a', 'g'))
+            self.assertNotEqual(symbols.lookup('a', 'f'), symbols.lookup('a'))
+            self.assertNotEqual(symbols.lookup('b', 'f'), symbols.lookup('b', 'g'))
+
+            # Function names are global, wherever they are used
+            self.assertEqual(symbols.lookup('f', 'g'), symbols.lookup('f'))
+            self.assertEqual(symbols.scopes[symbols.lookup('f')], None)
+            self.assertEqual(symbols.lookup('h', 'g'), symbols.lookup('h', 'g'))
+            self.assertEqual(symbols.scopes[symbols.lookup('h', 'g')], 'g')
+
+            self.assertEqual(symbols.lookup('y'), variables[(None, 'y')][0].id)
+            self.assertEqual(symbols.lookup('z'), None)
+
+    def test_variables(self):
+        program = LingoParser().parse(SOURCE_TEXT)
+        variables = get_variables(program)
+        a_f, a_g, a = variables[('f', 'a')][0], variables[('g', 'a')][0], variables[(None, 'a')][0]
+
+        # Variables of the same symbol are equal, and share their name
+        first, second = variables[(None, 'a')]
+        self.assertEqual(first, second)
+        self.assertEqual(hash(first), hash(second))
+        self.assertTrue(first.name is second.name)
+
+        # Variables with the same name in different scopes are not
+        self.assertNotEqual(a_f, a_g)
+        self.assertNotEqual(a_f, a)
+        self.assertEqual(len(set([a_f, a_g, a, first, second])), 3)
+
+        # Renaming a variable keeps its symbol, and its place in sets
+        found = set([a_f])
+        a_f.name = 'f_a'
+        self.assertEqual(a_f, variables[('f', 'a')][1])
+        self.assertEqual(hash(a_f), a_f.id)
+        self.assertIn(a_f, found)
+        self.assertFalse(a_f != variables[('f', 'a')][1])
+
+        # Variables without a symbol are compared by name
+        unresolved = Variable('a', line_span = (1, 1), lex_span = (0, 0))
+        self.assertEqual(unresolved.id, None)
+        self.assertEqual(unresolved, a)
+        self.assertEqual(hash(unresolved), hash(Variable('a', line_span = (2, 2), lex_span = (5, 5))))
+
+    def test_arrays(self):
+        program = LingoParser().parse('a := 1; b := a; a := b + a')
+        symbols = program.symbols
+
+        assignments = symbols.new_array(0)
+        self.assertEqual(len(assignments), len(symbols))
+
+        command = program.command
+        while command is not None:
+            assignments[command.assigned_variable.id] += 1
+            command = command.get_next_command()
+
+        self.assertEqual(assignments[symbols.lookup('a')], 2)
+        self.assertEqual(assignments[symbols.lookup('b')], 1)
+
+    def test_add(self):
+        symbols = SymbolTable(['main'])
+        self.assertEqual(len(symbols), 1)
+        self.assertEqual(symbols.add('x', None), 1)
+        self.assertEqual(symbols.add('x', 'main'), 2)
+        self.assertEqual(symbols.add('x', None), 1)
+        self.assertEqual(symbols.lookup('x', 'main'), 2)
+        self.assertEqual(symbols.lookup('y', 'main'), None)
+        self.assertEqual(symbols.lookup('main', 'main'), 0)
+
+    def test_typecheck(self):
+        program = LingoParser().parse('def f = fun(a) { b := a + 1; return b }\n'
+                                      'a := 1; b := f(a); c := b < a')
+        ids = dict((key, set(variable.id for variable in uses)) for key, uses in get_variables(program).iteritems())
+
+        # Typecheck renames the variables while it runs
+        TypeCheck(False).visit_program(program)
+
+        self.assertEqual(dict((key, set(variable.id for variable in uses))
+                              for key, uses in get_variables(program).iteritems()), ids)
+        self.assertTrue(all(len(symbol_ids) == 1 for symbol_ids in ids.values()))
+
+    def test_cache(self):
+        program = decode_program(encode_program(LingoParser().parse(SOURCE_TEXT)))
+        symbols = program.symbols
+
+        self.assertTrue(isinstance(symbols, SymbolTable))
+        self.assertEqual(symbols.lookup('f', 'g'), symbols.lookup('f'))
+        for (function_name, name), uses in get_variables(program).iteritems():
+            for variable in uses:
+                self.assertEqual(variable.id, symbols.lookup(name, function_name))
+
+    def test_drop(self):
+        symbols = SymbolTable(['f'])
+        a, b, c = symbols.add('a', None), symbols.add('b', 'f'), symbols.add('c', None)
+
+        symbols.drop(b)
+        self.assertEqual(symbols.lookup('b', 'f'), None)
+        self.assertEqual(symbols.get_name(b), None)
+
+        # Rebuilding a table written out keeps the ids, and the dropped ones
+        rebuilt = SymbolTable.rebuild(symbols.names, symbols.scopes, symbols.function_names)
+        self.assertEqual(rebuilt.names, symbols.names)
+        self.assertEqual(rebuilt.scopes, symbols.scopes)
+        self.assertEqual((rebuilt.lookup('f'), rebuilt.lookup('a'), rebuilt.lookup('c')), (0, a, c))
+
+        for table in (symbols, rebuilt):
+            self.assertEqual(table.add('d', None), b)
+            self.assertEqual(table.add('e', None), len(table) - 1)
+            self.assertEqual(table.get_name(b), 'd')
+
+    def test_incremental(self):
+        parser = IncrementalParser(SOURCE_TEXT)
+        symbols = parser.program.symbols
+
+        parser.edit(SOURCE_TEXT.index('input b'), len('input b'), 'input d')
+        self.assertTrue(parser.program.symbols is symbols)
+        self.assertEqual(parser.program.command.get_last_command().get_previous_command().variable.id,
+                         symbols.lookup('d'))
+
+        offset = parser.source_text.index('b := a + x')
+        parser.edit(offset, len('b := a + x'), 'b := a + e')
+        self.assertEqual(parser.program.functions[0].definition.body.expression.right_term.id,
+                         symbols.lookup('e', 'f'))
+
+        # Renaming a function changes the scope of the variables using its name
+        parser.edit(parser.source_text.index('def f'), len('def f'), 'def e')
+        symbols = parser.program.symbols
+        self.assertEqual(symbols.scopes[parser.program.functions[0].definition.body.expression.right_term.id], None)
@@ -0,0 +1,86 @@
+from sleuth.lingo.parser import LingoParser, LingoLexingException, \
+    TOKENIZER_PLY, TOKENIZER_REGEX
+from sleuth.lingo.tokenizer import LingoTokenizer
+from test_sleuth.support.programs import ProgramGenerator
+from test_sleuth.support.testcase import TestCase
+
+
+class LingoTokenizerTest(TestCase):
+
+    def setUp(self):
+        super(LingoTokenizerTest, self).setUp()
+
+        self.ply_lexer = LingoParser(tokenizer = TOKENIZER_PLY).lexer.clone()
+        self.tokenizer = LingoTokenizer(LingoParser.keywords)
+
+    def tokenize(self, lexer, source_text):
+        lexer.input(source_text)
+        lexer.lineno = 1
+        return [(t.type, t.value, t.lineno, t.lexpos) for t in iter(lexer.token, None)]
+
+    def assertSameTokens(self, source_text):
+        expected = self.tokenize(self.ply_lexer, source_text)
+        actual = self.tokenize(self.tokenizer, source_text)
+
+        self.assertSameElements(actual, expected)
+
+    def test_all_tokens(self):
+        self.assertSameTokens('a := b + c - d * e / f;\n'
+                              'if (a < b = c != d <= e && f || g) then { skip } else { input x };\n'
+                              'while (true) do { !p := ref q; r := new ref integer; s := false };\n'
+                              'def f = fun(a, b) { return a }\n'
+                              'x := f(y, z); boolean')
+
+    def test_keyword_prefixes(self):
+        self.assertSameTokens('iffy := while_1; do2 := _skip; returned := skip')
+
+    def test_numbers(self):
+        self.assertSameTokens('a := 0; b := 0123; c := 1a')
+
+    def test_line_numbers(self):
+        self.assertSameTokens('\n\na := 1;\n\n\n  b := 2\t;\n\nc := 3\n\n')
+
+    def test_single_line_comment(self):
+        self.assertSameTokens('// comment\na := 1; // another comment\n// ///\nb := 2 // at end\n')
+
+    def test_single_line_comment_without_newline(self):
+        self.assertSameTokens('a := 1 // no newline at the end')
+
+    def test_multi_line_comment(self):
+        self.assertSameTokens('/* one */ a := /**/ 1 /***/;\n'
+                              '/* two\n lines */ b := 2;\n'
+                              '/* stars ** and / slashes **/ c := 3 /* / */\n'
+                              '/*\n\n\n*/ d := 4')
+
+    def test_unterminated_multi_line_comment(self):
+        self.assertSameTokens('a := 1 /*/ b := 2')
+        self.assertSameTokens('a := 1 /* b := 2 /* c := 3')
+
+    def test_long_comment(self):
+        comment = '/* ' + ('* ' * 10000) + '\n' * 100 + ' */'
+        self.assertSameTokens(comment + '\na := 1')
+
+    def test_generated_programs(self):
+        for program in ProgramGenerator(seed = 3).corpus(50):
+            self.assertSameTokens(program)
+
+    def test_unrecognized_character(self):
+        self.assertRaises(LingoLexingException, self.tokenize, self.tokenizer, 'a := 1;\nb := $')
+
+        try:
+            self.tokenize(self.tokenizer, 'a := 1;\nb := $')
+        except LingoLexingException as e:
+            self.assertEqual(str(e), "Unrecognized character for tokenizer on line 2: '$'")
+
+    def test_parse_with_tokenizer(self):
+        source_text = ProgramGenerator(seed = 5).program(statements = 20)
+
+        expected = LingoParser(tokenizer = TOKENIZER_PLY).parse(source_text)
+        actual = LingoParser(tokenizer = TOKENIZER_REGEX).parse(source_text)
+
+        self.assertEqual(repr(actual.command), repr(expected.command))
+        self.assertEqual(actual.lex_span, expected.lex_span)
+        self.assertEqual(actual.line_span, expected.line_span)
+
+    def test_unknown_tokenizer(self):
+        self.assertRaises(ValueError, LingoParser, tokenizer = 'unknown')
@@ -0,0 +1,85 @@
+from sleuth.lingo.components import * #@UnusedWildImport
+from sleuth.lingo.parser import LingoParser, BACKEND_DESCENT
+from sleuth.lingo.traversal import walk, get_method_name, PRUNE
+from sleuth.lingo.typecheck import TypeCheck
+from test_sleuth.support.testcase import TestCase
+import sys
+
+
+class Recorder(object):
+    '''Record the Variables and commands walked, and the blocks left.'''
+
+    def __init__(self):
+        self.events = []
+
+    def visit_variable(self, variable):
+        self.events.append(variable.name)
+
+    def visit_command(self, command):
+        self.events.append(command.__class__.__name__)
+
+    def leave_while_command(self, while_command):
+        self.events.append('end while')
+
+
+class Enterer(Recorder):
+    '''Record the commands entered, with methods of their own.'''
+
+    def enter_command(self, command):
+        self.events.append('enter ' + command.__class__.__name__)
+
+
+class Pruner(Recorder):
+
+    def visit_if_command(self, if_command):
+        self.events.append('IfCommand')
+        return PRUNE
+
+
+class TraversalTest(TestCase):
+
+    def setUp(self):
+        self.parser = LingoParser(backend = BACKEND_DESCENT)
+
+    def walk(self, visitor, source_text, commands_only = False, prefix = 'visit_'):
+        walk(self.parser.parse(source_text).command, visitor, commands_only, prefix)
+        return visitor.events
+
+    def test_method_names(self):
+        self.assertEqual(get_method_name('visit_', IfCommand), 'visit_if_command')
+        self.assertEqual(get_method_name('leave_', FunctionDeclaration), 'leave_function_declaration')
+
+    def test_order(self):
+        events = self.walk(Recorder(), 'a := b + c; while (a < d) do { input e; skip }; f := a')
+        self.assertEqual(events, ['AssignmentCommand', 'a', 'b', 'c',
+                                  'WhileCommand', 'a', 'd', 'InputCommand', 'e', 'SkipCommand', 'end while',
+                                  'AssignmentCommand', 'f', 'a'])
+
+    def test_commands_only(self):
+        events = self.walk(Recorder(), 'a := b; if (a) then { input c } else { skip }', commands_only = True)
+        self.assertEqual(events, ['AssignmentCommand', 'IfCommand', 'InputCommand', 'SkipCommand'])
+
+    def test_prune(self):
+        events = self.walk(Pruner(), 'if (a) then { input c } else { skip }; d := e')
+        self.assertEqual(events, ['IfCommand', 'AssignmentCommand', 'd', 'e'])
+
+    def test_prefix(self):
+        events = self.walk(Enterer(), 'a := b; while (a) do { skip }', commands_only = True, prefix = 'enter_')
+        self.assertEqual(events, ['enter AssignmentCommand', 'enter WhileCommand', 'enter SkipCommand', 'end while'])
+
+    def test_function_call(self):
+        # The [RET] half shares its variables with the [CALL] half
+        events = self.walk(Recorder(), 'x := f(y, z); input x')
+        self.assertEqual(events, ['AssignmentCommand', 'x', 'f', 'y', 'z', 'AssignmentCommand', 'InputCommand', 'x'])
+
+    def test_deep_nesting(self):
+        depth = sys.getrecursionlimit() * 2
+        program = self.parser.parse('b := true;\n' + 'while (b) do { ' * depth + 'b := false' + ' }' * depth)
+
+        visitor = Recorder()
+        walk(program.command, visitor)
+        self.assertEqual(visitor.events.count('end while'), depth)
+
+        checker = TypeCheck(False)
+        checker.visit_program(program)
+        self.assertEqual(checker.find(checker.variables['b']).value, 'BOOLEAN')
@@ -1,6 +1,6 @@
 import unittest
 from sleuth.lingo.parser import LingoParser
-from sleuth.lingo.typecheck import TypeCheck
+from sleuth.lingo.typecheck import TypeCheck, Rename
 from sleuth.lingo.types import *
 from sleuth.common.exception import TypeException
 
@@ -710,6 +710,29 @@ class TestTypeCheck(unittest.TestCase):
         '''.strip()
         program = self.parser.parse(program_text)
         self.assertRaises(TypeException, self.typecheck.visit_program, program)
+    def testAccept(self):
+        program_text = '''
+            def f = fun(a) {
+                b := a + 1;
+                return b
+            }
+            x := 1;
+            skip;
+            if (x < 2) then { y := f(x) } else { skip };
+            while (false) do { input x }
+        '''.strip()
+        program = self.parser.parse(program_text)
+        # Commands and declarations can still be visited one at a time
+        self.typecheck.visit_program(self.parser.parse(program_text))
+        expected = dict((name, self.get_type(name)) for name in ('f', 'x', 'y'))
+        self.typecheck = TypeCheck(False)
+        for function_declaration in program.functions:
+            function_declaration.accept(self.typecheck)
+        self.typecheck.visit_command_block(program.command)
+        self.typecheck.rename = Rename(self.typecheck.variables)
+        self.assertEqual(dict((name, self.get_type(name)) for name in expected), expected)
+        self.assertEqual(expected['y'], Primitive("INTEGER"))
+        program.command.get_next_command().accept(TypeCheck(False))
         
 if __name__=='__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,95 @@
+'''
+Generate random (but syntactically valid) Lingo programs.
+
+The generated programs exercise every production of the grammar and are
+used both by tests that compare parser implementations and by the
+benchmarks, which need large corpora of realistic programs.
+'''
+import random
+
+
+class ProgramGenerator(object):
+    '''Build Lingo source text from a seeded random number generator.'''
+
+    OPERATORS = ['+', '-', '*', '/', '<', '=', '!=', '<=', '&&', '||']
+
+    def __init__(self, seed = 0, max_depth = 3):
+        self.random = random.Random(seed)
+        self.max_depth = max_depth
+
+    def program(self, statements = 10, functions = 1):
+        '''Generate a complete program with the given number of top-level statements.'''
+        declarations = [self.function_declaration(index) for index in range(functions)]
+        body = self.sequence(statements, depth = 0)
+        return '\n'.join(declarations + [body])
+
+    def corpus(self, count, statements = 10, functions = 1):
+        '''Generate a list of programs.'''
+        return [self.program(statements, functions) for _ in range(count)]
+
+    def function_declaration(self, index):
+        parameters = ', '.join(self.name() for _ in range(self.random.randint(0, 3)))
+        body = self.sequence(self.random.randint(0, 3), depth = 1)
+        if body:
+            body += ';\n'
+        return '// f{0}\ndef f{0} = fun({1}) {{\n{2}return {3}\n}}'.format(index, parameters, body, self.name())
+
+    def sequence(self, statements, depth):
+        return ';\n'.join(self.command(depth) for _ in range(statements))
+
+    def command(self, depth):
+        choice = self.random.randint(0, 9 if depth < self.max_depth else 6)
+
+        if choice <= 3:
+            return '{0} := {1}'.format(self.lhs(), self.rhs())
+        if choice == 4:
+            return 'skip'
+        if choice == 5:
+            return 'input {0}'.format(self.name())
+        if choice == 6:
+            return '{0} := {1}({2})'.format(self.name(),
+                                           self.random.choice([self.name(), '!' + self.name()]),
+                                           ', '.join(self.name() for _ in range(self.random.randint(0, 3))))
+        if choice <= 8:
+            return 'if ({0}) then {{ {1} }} else {{ {2} }}'.format(self.expression(depth),
+                                                                   self.sequence(self.random.randint(1, 3), depth + 1),
+                                                                   self.sequence(self.random.randint(1, 3), depth + 1))
+
+        return 'while ({0}) do {{ /* loop */ {1} }}'.format(self.expression(depth),
+                                                            self.sequence(self.random.randint(1, 3), depth + 1))
+
+    def lhs(self):
+        return self.random.choice([self.name(), self.name(), '!' + self.name()])
+
+    def rhs(self):
+        choice = self.random.randint(0, 5)
+
+        if choice == 0:
+            return 'ref {0}'.format(self.name())
+        if choice == 1:
+            return 'new {0}'.format(self.random.choice(['integer', 'boolean', 'ref integer', 'ref ref boolean']))
+
+        return self.expression(0)
+
+    def expression(self, depth):
+        choice = self.random.randint(0, 6 if depth < self.max_depth else 3)
+
+        if choice == 0:
+            return self.name()
+        if choice == 1:
+            return '!' + self.name()
+        if choice == 2:
+            return str(self.random.randint(0, 1000))
+        if choice == 3:
+            return self.random.choice(['true', 'false'])
+        if choice == 4:
+            return '({0} {1} {2})'.format(self.expression(depth + 1),
+                                          self.random.choice(self.OPERATORS),
+                                          self.expression(depth + 1))
+
+        return '{0} {1} {2}'.format(self.expression(depth + 1),
+                                    self.random.choice(self.OPERATORS),
+                                    self.expression(depth + 1))
+
+    def name(self):
+        return self.random.choice('abcdefgh') + self.random.choice(['', '1', '_x', 'yz'])
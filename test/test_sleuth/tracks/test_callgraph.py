@@ -0,0 +1,116 @@
+from sleuth.lingo.components import IfCommand, WhileCommand
+from sleuth.lingo.flat import flatten
+from sleuth.lingo.parser import LingoParser
+from sleuth.lingo.typecheck import TypeCheck
+from sleuth.tracks.cfg import ProgramBlock
+from test_sleuth.support.programs import ProgramGenerator
+from test_sleuth.support.testcase import TestCase
+
+
+SOURCE_TEXT = ('def f = fun(a) { if (a < 1) then { b := a } else { b := g(a) }; return b }\n'
+               'def g = fun(c) { c1 := c - 1; d := f(c1); return d }\n'
+               'def h = fun(e) { e1 := e < 1; return e1 }\n'
+               'def k = fun(m) { n := m + 1; return n }\n'
+               'def r = fun(s) { t := s - 1; if (t < 1) then { u := t } else { u := r(t) }; return u }\n'
+               'x := 1; w := f(x); q := k; y := q(x); p := ref h; z := !p(x)')
+
+
+def reach(name, call_graph):
+    '''Get the names of the functions a function calls, and those they call, and so on (and the function).'''
+    reached = set([name])
+    stack = [name]
+    while stack:
+        for callee in call_graph.get_callees(stack.pop()):
+            if callee not in reached:
+                reached.add(callee)
+                stack.append(callee)
+    return reached
+
+
+class CallGraphTest(TestCase):
+
+    def setUp(self):
+        self.parser = LingoParser()
+
+    def find_node(self, program_block, text):
+        nodes = [node for node in program_block.nodes if repr(node.command) == text]
+        self.assertEqual(len(nodes), 1)
+        return nodes[0]
+
+    def check_order(self, call_graph):
+        # Components are mutually reachable functions, after those they call
+        names = call_graph.procedure_names
+        seen = set()
+        for component in call_graph.get_bottom_up_order():
+            for name in component:
+                reached = reach(name, call_graph)
+                self.assertEqual(set(component), set(other for other in reached if name in reach(other, call_graph)))
+                self.assertTrue(reached - set(component) <= seen)
+            seen.update(component)
+        self.assertEqual(sorted(seen), sorted(names))
+
+        # Components in a wave only call those in earlier waves
+        seen = set()
+        for wave in call_graph.get_waves():
+            wave_names = set(name for component in wave for name in component)
+            for component in wave:
+                for name in component:
+                    self.assertTrue(set(call_graph.get_callees(name)) - set(component) <= seen)
+            seen.update(wave_names)
+
+    def test_untyped(self):
+        program_block = ProgramBlock(self.parser.parse(SOURCE_TEXT + '; v := u(x)'))
+        call_graph = program_block.get_call_graph()
+        self.assertIs(program_block.get_call_graph(), call_graph)
+
+        # Calls of values may call the functions used as values, with as many parameters
+        self.assertEqual(call_graph.get_targets(self.find_node(program_block, 'w := f([x]) [CALL]')), ['f'])
+        self.assertEqual(call_graph.get_targets(self.find_node(program_block, 'y := q([x]) [CALL]')), ['h', 'k'])
+        self.assertEqual(call_graph.get_targets(self.find_node(program_block, 'z := !p([x]) [RET]')), ['h', 'k'])
+        self.assertEqual(call_graph.get_targets(self.find_node(program_block, 'v := u([x]) [CALL]')), ['h', 'k'])
+        self.assertEqual(call_graph.get_callees(), ['f', 'h', 'k'])
+        self.assertEqual(call_graph.get_callers('f'), [None, 'g'])
+
+        self.assertEqual(sorted(call_graph.get_component('g')), ['f', 'g'])
+        self.assertTrue(call_graph.is_recursive('f'))
+        self.assertTrue(call_graph.is_recursive('r'))
+        self.assertFalse(call_graph.is_recursive('h'))
+        order = call_graph.get_bottom_up_order()
+        self.assertTrue(order.index([None]) > order.index(call_graph.get_component('f')))
+        self.assertEqual(call_graph.get_waves()[1], [[None]])
+        self.check_order(call_graph)
+
+    def test_typed(self):
+        program = self.parser.parse(SOURCE_TEXT)
+        TypeCheck(False).visit_program(program)
+        program_block = ProgramBlock(program)
+        call_graph = program_block.get_call_graph()
+
+        # The types tell the functions apart
+        self.assertEqual(call_graph.get_targets(self.find_node(program_block, 'y := q([x]) [CALL]')), ['k'])
+        self.assertEqual(call_graph.get_targets(self.find_node(program_block, 'z := !p([x]) [CALL]')), ['h'])
+        self.check_order(call_graph)
+
+    def test_flat(self):
+        flat = flatten(self.parser.parse(SOURCE_TEXT + '; while (x < 3) do { if (x < 2) then { x := f(x) } else { skip } }'))
+        call_graph = ProgramBlock(flat).get_call_graph()
+        self.assertEqual([call_graph.get_callees(name) for name in call_graph.procedure_names],
+                         [['f', 'h', 'k'], ['g'], ['f'], [], [], ['r']])
+
+        # The loops and branches aren't made (but in the functions used as values)
+        made = set(flat.get_class(row) for row in flat._components)
+        self.assertFalse(IfCommand in made)
+        self.assertFalse(WhileCommand in made)
+
+    def test_generated(self):
+        for text in ProgramGenerator(seed = 3).corpus(20, statements = 15, functions = 4):
+            program_block = ProgramBlock(self.parser.parse(text))
+            call_graph = program_block.get_call_graph()
+            supergraph = program_block.get_supergraph()
+
+            for call_node in supergraph.get_call_nodes():
+                callee = supergraph.get_callee(call_node)
+                if callee is not None:
+                    self.assertEqual(call_graph.get_targets(call_node), [callee])
+                    self.assertTrue(callee in call_graph.get_callees(supergraph.get_procedure(call_node)))
+            self.check_order(call_graph)
@@ -1,5 +1,6 @@
 from sleuth.lingo.components import * #@UnusedWildImport
-from sleuth.tracks.cfg import Block, CommandNode
+from sleuth.lingo.parser import LingoParser
+from sleuth.tracks.cfg import Block, CommandNode, ProgramBlock, number_reverse_post_order
 from test_sleuth.support.testcase import TestCase
 
 
@@ -79,6 +80,168 @@ class CFGNodeTest(TestCase):
         self.assertSameElements([command_node_c_true, command_node_c_false], command_node_d._predecessors)
         self.assertSameElements([], command_node_d._successors)
 
+    def test_traverse_function_call(self):
+        command_a = self.create(AssignmentCommand, ('a', self.create(FunctionCall, ('f', [self.convert_arg('b')]))))
+        command_c = self.create(AssignmentCommand, ('c', 'a'), after = command_a)
+
+        # The [RET] half of the call is made along with it
+        command_a_return = command_a.get_next_command()
+        self.assertIs(command_a.get_next_command(), command_a_return)
+        self.assertIsInstance(command_a_return.expression, FunctionReturn)
+        self.assertIs(command_a_return.assigned_variable, command_a.assigned_variable)
+        self.assertIs(command_a_return.get_previous_command(), command_a)
+        self.assertIs(command_a_return.get_next_command(), command_c)
+
+        # Scanning doesn't change the commands, so the graph is the same every time
+        for _ in range(2):
+            command_node_a = Block().scan(command_a)
+            self.assertIs(command_node_a.command, command_a)
+
+            command_node_a_return = command_node_a._successors.get()
+            self.assertIs(command_node_a_return.command, command_a_return)
+            self.assertSameElements([command_node_a], command_node_a_return._predecessors)
+
+            command_node_c = command_node_a_return._successors.get()
+            self.assertIs(command_node_c.command, command_c)
+            self.assertSameElements([], command_node_c._successors)
+
+    def test_scan_long_sequence(self):
+        commands = [self.create(AssignmentCommand, ('a', 1))]
+        for number in range(1, 5000):
+            commands.append(self.create(AssignmentCommand, ('a', number), after = commands[-1]))
+
+        command_node = Block().scan(commands[0])
+        for command in commands:
+            self.assertIs(command_node.command, command)
+            command_node = command_node._successors.get() if command_node._successors else None
+        self.assertIsNone(command_node)
+
+    def test_scan_deep_nesting(self):
+        # Every loop is the body of the one before, and exits back to it
+        command = self.create(AssignmentCommand, ('a', 1))
+        for _ in range(2000):
+            command = self.create(WhileCommand, (True, command))
+
+        command_node = Block().scan(command)
+        outer_nodes = []
+        for _ in range(2000):
+            self.assertIs(command_node.command, command)
+            self.assertSameElements([CommandNode(command.loop_block)] + outer_nodes, command_node._successors)
+            outer_nodes = [command_node]
+            command_node = [node for node in command_node._successors if node.command is command.loop_block][0]
+            command = command.loop_block
+        self.assertSameElements(outer_nodes, command_node._successors)
+
+    def test_number_reverse_post_order(self):
+        command_a = self.create(AssignmentCommand, ('a', 1))
+        command_b_true = self.create(AssignmentCommand, ('b', 2))
+        command_b_false = self.create(AssignmentCommand, ('b', 3))
+        command_b = self.create(IfCommand, (True, command_b_true, command_b_false), after = command_a)
+        command_c_loop = self.create(AssignmentCommand, ('c', 4))
+        command_c = self.create(WhileCommand, (True, command_c_loop), after = command_b)
+        command_d = self.create(AssignmentCommand, ('d', 5), after = command_c)
+
+        command_node_a = Block().scan(command_a)
+        nodes = number_reverse_post_order([command_node_a])
+        self.assertEqual([node.reverse_post_order for node in nodes], range(7))
+        self.assertIs(nodes[0], command_node_a)
+
+        # Successors come after their nodes, but for the loop back to the while
+        for node in nodes:
+            for successor in node._successors:
+                if successor.command is not command_c:
+                    self.assertTrue(node.reverse_post_order < successor.reverse_post_order)
+
+        # Successors are searched in the order they were made, so the numbering is always the same
+        self.assertEqual([node.command for node in nodes],
+                         [command_a, command_b, command_b_false, command_b_true, command_c, command_c_loop, command_d])
+        self.assertEqual([node.command for node in number_reverse_post_order([command_node_a])],
+                         [node.command for node in nodes])
+
+    def test_node_ids(self):
+        source_text = ('def f = fun(a) { b := a * 2; return b }\n'
+                       'x := f(y); if (x < 3) then { skip } else { while (x < 9) do { x := x + 1 } }')
+
+        # Nodes are numbered densely by every CFG, the same way every time
+        describe = lambda program_block: sorted((node.nodeID, repr(node)) for node in program_block.nodes)
+        first = describe(ProgramBlock(LingoParser().parse(source_text)))
+        self.assertEqual([node_id for node_id, _ in first], range(len(first)))
+        self.assertEqual(describe(ProgramBlock(LingoParser().parse(source_text))), first)
+
+        program_block = ProgramBlock(LingoParser().parse(source_text))
+        self.assertEqual(program_block.node_count, len(first))
+        self.assertEqual(program_block.command_node.nodeID, 0)
+        self.assertEqual(program_block.functions['f'].command_node.nodeID, len(first) - 3)
+
+    def test_compressed_graph(self):
+        program_block = ProgramBlock(LingoParser().parse(
+            'x := 1; if (x < 3) then { skip } else { while (x < 9) do { x := x + 1 } }; y := x'))
+        graph = program_block.graph
+        self.assertEqual(len(graph), program_block.node_count)
+
+        for node in program_block.nodes:
+            self.assertIs(graph.nodes[node.nodeID], node)
+            self.assertEqual(sorted(successor.nodeID for successor in node._successors),
+                             sorted(graph.get_successor_ids(node.nodeID)))
+            self.assertEqual(list(graph.get_predecessor_ids(node.nodeID)),
+                             sorted(predecessor.nodeID for predecessor in node._predecessors))
+            self.assertEqual(node.get_successors(), graph.get_successors(node.nodeID))
+            self.assertEqual(node.get_predecessors(), graph.get_predecessors(node.nodeID))
+
+        # The true block of ifs, and the block of loops, come first
+        if_node, while_node = [node for node in program_block.nodes if isinstance(node.command, ConditionalCommand)]
+        self.assertEqual([repr(node.command) for node in if_node.get_successors()], ['skip', 'x < 9'])
+        self.assertEqual([repr(node.command) for node in while_node.get_successors()], ['x := x + 1', 'y := x'])
+
+    def test_get_paths_deep_nesting(self):
+        command = self.create(AssignmentCommand, ('a', 1))
+        for _ in range(2000):
+            command = self.create(WhileCommand, (True, command))
+            self.create(SkipCommand, (), after = command)
+
+        # Every edge once, and the nodes with no successors with None
+        edge_pairs = list(Block().scan(command).get_paths())
+        self.assertEqual(len(edge_pairs), len(set(edge_pairs)))
+        self.assertEqual(len([pair for pair in edge_pairs if pair[1] is None]), 1)
+        self.assertEqual(len(edge_pairs), 3 * 2000 + 1)
+
+    def test_get_edge_pairs(self):
+        program_block = ProgramBlock(LingoParser().parse(
+            'def f = fun(a) { return a }\n'
+            'x := f(y); if (x < 3) then { skip } else { while (x < 9) do { x := x + 1 } }'))
+
+        edge_pairs = program_block.get_edge_pairs()
+        self.assertIs(program_block.get_edge_pairs(), edge_pairs)
+        self.assertIsInstance(edge_pairs, tuple)
+        self.assertEqual(edge_pairs[0][0], program_block.command_node)
+        describe = lambda node: None if node is None else node.nodeID
+        self.assertEqual(sorted([(node.nodeID, successor.nodeID) for node in program_block.nodes for successor in node.get_successors()] +
+                                [(node.nodeID, None) for node in program_block.nodes if not node.get_successors()]),
+                         sorted((describe(node), describe(successor)) for node, successor in edge_pairs))
+
+    def test_get_graph_width(self):
+        # A chain of 40 diamonds has 2 ** 40 paths through it
+        source_text = '; '.join(['if (x < {0}) then {{ x := 1 }} else {{ x := 2 }}'.format(number) for number in range(40)])
+        program_block = ProgramBlock(LingoParser().parse(source_text))
+        self.assertEqual(program_block.command_node.get_graph_width(), [2 ** 39, 2 ** 39])
+
+        # The edge back to the top of a loop is left out, so the end of the body is at the bottom
+        source_text = 'while (x < 9) do { x := x + 1; if (x < 5) then { skip } else { y := x } }; y := x'
+        program_block = ProgramBlock(LingoParser().parse(source_text))
+        self.assertEqual(program_block.command_node.get_graph_width(), [2, 1])
+
+        # The same widths are worked out without a CompressedGraph
+        self.assertEqual(Block().scan(LingoParser().parse(source_text).command).get_graph_width(), [2, 1])
+
+    def test_get_layers(self):
+        program_block = ProgramBlock(LingoParser().parse(
+            'x := 1; if (x < 3) then { skip } else { while (x < 9) do { x := x + 1 } }; y := x'))
+        layers = program_block.graph.get_layers()
+        describe = lambda node: (repr(node.command), layers[node.nodeID])
+        self.assertEqual(sorted(describe(node) for node in program_block.nodes),
+                         [('skip', 2), ('x := 1', 0), ('x := x + 1', 3), ('x < 3', 1), ('x < 9', 2), ('y := x', 3)])
+
+
 
     def test_get_paths_simple_duo(self):
         command_a = self.create(AssignmentCommand, ('a', 1))
@@ -0,0 +1,153 @@
+from sleuth.lingo.parser import LingoParser
+from sleuth.tracks.cfg import CommandNode, ProgramBlock
+from sleuth.tracks.dependence import get_definitions_and_uses, is_pointer_store, find_address_taken
+from test_sleuth.support.programs import ProgramGenerator
+from test_sleuth.support.testcase import TestCase
+from test_sleuth.tracks.test_dominance import reach
+
+
+SOURCE_TEXT = ('def f = fun(a) { while (a < 3) do { a := a + 1 }; return a }\n'
+               'input x; y := 0; if (x < 3) then { y := f(x) } else { while (x < 9) do { x := x + 1; y := y + x } };\n'
+               'z := x + y; w := 2')
+
+
+class DependenceTest(TestCase):
+
+    def setUp(self):
+        self.parser = LingoParser()
+        self.programs = [self.parser.parse(text)
+                         for text in [SOURCE_TEXT] + ProgramGenerator(seed = 11).corpus(20, statements = 12, functions = 2)]
+
+    def describe(self, nodes):
+        return sorted(repr(node.command) for node in nodes)
+
+    def find_node(self, program_block, text):
+        nodes = [node for node in program_block.nodes if repr(node.command) == text]
+        self.assertEqual(len(nodes), 1)
+        return nodes[0]
+
+    def test_control_dependences(self):
+        for program in self.programs:
+            program_block = ProgramBlock(program)
+            control_dependence_graph = program_block.get_control_dependence_graph()
+            self.assertIs(program_block.get_control_dependence_graph(), control_dependence_graph)
+            post_dominator_tree = program_block.get_post_dominator_tree()
+
+            # A node is control dependent on another if it post dominates one
+            # of its successors, but doesn't strictly post dominate it
+            for node in program_block.nodes:
+                for other_node in program_block.nodes:
+                    dependent = (any(post_dominator_tree.dominates(node, successor)
+                                     for successor in other_node.get_successors()) and
+                                 (node is other_node or not post_dominator_tree.dominates(node, other_node)))
+                    self.assertEqual(other_node in control_dependence_graph.get_controllers(node), dependent)
+                    self.assertEqual(node in control_dependence_graph.get_dependents(other_node), dependent)
+
+    def test_data_dependences(self):
+        for program in self.programs:
+            program_block = ProgramBlock(program)
+            program_dependence_graph = program_block.get_program_dependence_graph()
+
+            address_taken = find_address_taken(program_block.command_node.graph, program_block.get_dominator_tree())
+            variables = dict((node, get_definitions_and_uses(node.command, address_taken[node.nodeID]))
+                             for node in program_block.nodes)
+            must_define = dict((node, not is_pointer_store(node.command)) for node in program_block.nodes)
+
+            # A definition reaches a use if a path gets there from it without
+            # going through another definition of the variable for sure
+            for node in program_block.nodes:
+                reaching = set()
+                for variable_id in variables[node][1]:
+                    for other_node in program_block.nodes:
+                        if variable_id not in variables[other_node][0]:
+                            continue
+                        get_next = lambda next_node: ([] if next_node is not other_node and must_define[next_node] and
+                                                      variable_id in variables[next_node][0] else
+                                                      next_node.get_successors())
+                        if node in reach(other_node.get_successors(), get_next):
+                            reaching.add(other_node)
+                self.assertEqual(set(program_dependence_graph.get_definitions(node)), reaching)
+
+                for other_node in reaching:
+                    self.assertTrue(node in program_dependence_graph.get_uses(other_node))
+
+    def test_pointer_stores(self):
+        program_block = ProgramBlock(self.parser.parse('a := 1; p := ref a; !p := 5; input c; !p := c; b := a + c; d := a'))
+        program_dependence_graph = program_block.get_program_dependence_graph()
+
+        # Stores through p may define a (but nothing else), and don't hide
+        # the definitions of a before them
+        self.assertEqual(self.describe(program_dependence_graph.get_definitions(self.find_node(program_block, 'b := a + c'))),
+                         ['!p := 5', '!p := c', 'a := 1', 'input c'])
+        self.assertEqual(self.describe(program_dependence_graph.get_uses(self.find_node(program_block, '!p := 5'))),
+                         ['b := a + c', 'd := a'])
+
+        # Without a definition of a before them, the stores are all that reach
+        program_block = ProgramBlock(self.parser.parse('p := ref a; !p := 5; b := a'))
+        program_dependence_graph = program_block.get_program_dependence_graph()
+        self.assertEqual(self.describe(program_dependence_graph.get_definitions(self.find_node(program_block, 'b := a'))),
+                         ['!p := 5'])
+
+        # Only the addresses taken in the same function count
+        program_block = ProgramBlock(self.parser.parse('def f = fun(q) { !q := 1; r := a; return r }\n'
+                                                       'p := ref a; a := 2; x := f(p)'))
+        self.assertEqual(program_block.get_program_dependence_graph().get_definitions(self.find_node(program_block, 'r := a')), [])
+
+    def test_pointer_loads(self):
+        # A read through p may use a, whose definitions reach it and get
+        # into the slices
+        program_block = ProgramBlock(self.parser.parse('p := ref a; a := 5; b := !p; c := b'))
+        program_dependence_graph = program_block.get_program_dependence_graph()
+        self.assertEqual(self.describe(program_dependence_graph.get_definitions(self.find_node(program_block, 'b := !p'))),
+                         ['a := 5', 'p := ref a'])
+        self.assertEqual(self.describe(program_dependence_graph.get_backward_slice([self.find_node(program_block, 'c := b')])),
+                         ['a := 5', 'b := !p', 'c := b', 'p := ref a'])
+
+        # After a store through p, the load sees both the store and the
+        # definition before it
+        program_block = ProgramBlock(self.parser.parse('a := 1; p := ref a; !p := 5; b := !p + 1; if (!p < 3) then { skip } else { skip }'))
+        program_dependence_graph = program_block.get_program_dependence_graph()
+        self.assertEqual(self.describe(program_dependence_graph.get_definitions(self.find_node(program_block, 'b := !p + 1'))),
+                         ['!p := 5', 'a := 1', 'p := ref a'])
+        self.assertEqual(self.describe(program_dependence_graph.get_definitions(self.find_node(program_block, '!p < 3'))),
+                         ['!p := 5', 'a := 1', 'p := ref a'])
+
+    def test_slices(self):
+        for program in self.programs:
+            program_block = ProgramBlock(program)
+            program_dependence_graph = program_block.get_program_dependence_graph()
+            control_dependence_graph = program_block.get_control_dependence_graph()
+
+            get_depended = lambda node: (control_dependence_graph.get_controllers(node) +
+                                         program_dependence_graph.get_definitions(node))
+            get_depending = lambda node: (control_dependence_graph.get_dependents(node) +
+                                          program_dependence_graph.get_uses(node))
+            for node in program_block.nodes:
+                backward_slice = program_dependence_graph.get_backward_slice([node])
+                self.assertEqual(len(backward_slice), len(set(backward_slice)))
+                self.assertEqual(set(backward_slice), reach([node], get_depended))
+                self.assertIs(backward_slice[0], node)
+                self.assertEqual(set(program_dependence_graph.get_forward_slice([node])), reach([node], get_depending))
+
+    def test_example(self):
+        program_block = ProgramBlock(self.parser.parse(SOURCE_TEXT))
+        program_dependence_graph = program_block.get_program_dependence_graph()
+        control_dependence_graph = program_block.get_control_dependence_graph()
+
+        # The RET node defines y, not the CALL node
+        self.assertEqual(self.describe(program_dependence_graph.get_definitions(self.find_node(program_block, 'z := x + y'))),
+                         ['input x', 'x := x + 1', 'y := 0', 'y := f([x]) [RET]', 'y := y + x'])
+        self.assertEqual(self.describe(control_dependence_graph.get_controllers(self.find_node(program_block, 'y := y + x'))),
+                         ['x < 9'])
+        self.assertEqual(self.describe(control_dependence_graph.get_controllers(self.find_node(program_block, 'x < 9'))),
+                         ['x < 3', 'x < 9'])
+        self.assertEqual(control_dependence_graph.get_controllers(self.find_node(program_block, 'z := x + y')), [])
+
+        # The parameter of f is defined by its declaration
+        self.assertEqual(self.describe(program_dependence_graph.get_definitions(self.find_node(program_block, 'a < 3'))),
+                         ['a := a + 1', 'f = fun([a])'])
+
+        self.assertEqual(self.describe(program_dependence_graph.get_backward_slice([self.find_node(program_block, 'y := y + x')])),
+                         ['input x', 'x := x + 1', 'x < 3', 'x < 9', 'y := 0', 'y := y + x'])
+        self.assertEqual(self.describe(program_dependence_graph.get_forward_slice([self.find_node(program_block, 'w := 2')])),
+                         ['w := 2'])
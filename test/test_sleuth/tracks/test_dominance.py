@@ -0,0 +1,118 @@
+from sleuth.lingo.components import * #@UnusedWildImport
+from sleuth.lingo.parser import LingoParser
+from sleuth.tracks.cfg import CommandNode, ProgramBlock
+from test_sleuth.support.programs import ProgramGenerator
+from test_sleuth.support.testcase import TestCase
+
+
+SOURCE_TEXT = ('def f = fun(a) { while (a < 3) do { a := a + 1 }; return a }\n'
+               'x := 1; if (x < 3) then { y := f(x) } else { while (x < 9) do { x := x + 1; while (y < 2) do { y := y + 1 } } };\n'
+               'z := x')
+
+
+def reach(start_nodes, get_next, without = None):
+    '''Get the nodes reached from some nodes, not going through a node.'''
+    reached = set(node for node in start_nodes if node is not without)
+    stack = list(reached)
+    while stack:
+        for next_node in get_next(stack.pop()):
+            if next_node is not without and next_node not in reached:
+                reached.add(next_node)
+                stack.append(next_node)
+    return reached
+
+
+class DominanceTest(TestCase):
+
+    def setUp(self):
+        self.parser = LingoParser()
+        self.programs = [self.parser.parse(text)
+                         for text in [SOURCE_TEXT] + ProgramGenerator(seed = 7).corpus(20, statements = 12, functions = 2)]
+
+    def get_entry_nodes(self, program_block):
+        return [program_block.command_node] + [block.command_node for block in program_block.functions.values()]
+
+    def test_dominators(self):
+        for program in self.programs:
+            program_block = ProgramBlock(program)
+            dominator_tree = program_block.get_dominator_tree()
+            self.assertIs(program_block.get_dominator_tree(), dominator_tree)
+            self.assertEqual(set(self.get_entry_nodes(program_block)), set(dominator_tree.get_roots()))
+
+            # A node dominates the nodes that can't be reached from the top without it
+            for entry_node in self.get_entry_nodes(program_block):
+                nodes = reach([entry_node], CommandNode.get_successors)
+                for node in nodes:
+                    dominated = nodes - reach([entry_node], CommandNode.get_successors, without = node)
+                    for other_node in nodes:
+                        self.assertEqual(dominator_tree.dominates(node, other_node), other_node in dominated)
+
+                    parent = dominator_tree.get_immediate_dominator(node)
+                    if parent is not None:
+                        self.assertTrue(node in dominator_tree.get_children(parent))
+
+    def test_post_dominators(self):
+        for program in self.programs:
+            program_block = ProgramBlock(program)
+            post_dominator_tree = program_block.get_post_dominator_tree()
+            roots = post_dominator_tree.get_roots()
+
+            # The bottoms of the CFGs are roots
+            for node in program_block.nodes:
+                if not node.get_successors():
+                    self.assertTrue(node in roots)
+
+            # A node post dominates the nodes that can't get to the roots without it
+            for node in program_block.nodes:
+                reaching = reach(roots, CommandNode.get_predecessors, without = node)
+                for other_node in program_block.nodes:
+                    self.assertEqual(post_dominator_tree.dominates(node, other_node),
+                                     other_node is node or other_node not in reaching)
+
+    def test_loops(self):
+        for program in self.programs:
+            program_block = ProgramBlock(program)
+            loop_forest = program_block.get_loop_forest()
+            dominator_tree = program_block.get_dominator_tree()
+
+            # The loops are the while loops
+            headers = loop_forest.get_headers()
+            self.assertEqual(set(node for node in program_block.nodes if isinstance(node.command, WhileCommand)),
+                             set(headers))
+
+            # The body of a loop is the nodes that get back to the header without going through it
+            for header in headers:
+                back_nodes = [node for node in header.get_predecessors() if dominator_tree.dominates(header, node)]
+                body = reach(back_nodes, CommandNode.get_predecessors, without = header) | set([header])
+                self.assertEqual(body, set(loop_forest.get_body(header)))
+
+            for node in program_block.nodes:
+                self.assertEqual(loop_forest.get_depth(node),
+                                 len([header for header in headers if node in loop_forest.get_body(header)]))
+
+    def test_nesting(self):
+        program_block = ProgramBlock(self.parser.parse(SOURCE_TEXT))
+        loop_forest = program_block.get_loop_forest()
+        describe = lambda node: None if node is None else repr(node.command)
+
+        self.assertEqual(sorted((describe(header), describe(loop_forest.get_parent(header)))
+                                for header in loop_forest.get_headers()),
+                         [('a < 3', None), ('x < 9', None), ('y < 2', 'x < 9')])
+        self.assertEqual(sorted((describe(node), loop_forest.get_depth(node), describe(loop_forest.get_header(node)))
+                                for node in program_block.nodes if loop_forest.get_depth(node)),
+                         [('a := a + 1', 1, 'a < 3'), ('a < 3', 1, 'a < 3'),
+                          ('x := x + 1', 1, 'x < 9'), ('x < 9', 1, 'x < 9'),
+                          ('y := y + 1', 2, 'y < 2'), ('y < 2', 2, 'y < 2')])
+
+        # The trees are shared by the program and its functions
+        function_block = program_block.functions['f']
+        self.assertIs(function_block.get_loop_forest(), loop_forest)
+        self.assertEqual(describe(function_block.get_dominator_tree().get_immediate_dominator(function_block.command_node)),
+                         None)
+
+    def test_endless_loop(self):
+        # The loop at the end never exits, so the end of its body is made a bottom of the CFG
+        program_block = ProgramBlock(self.parser.parse('x := 1; while (true) do { x := x + 1 }'))
+        post_dominator_tree = program_block.get_post_dominator_tree()
+        self.assertEqual([repr(node.command) for node in post_dominator_tree.get_roots()], ['x := x + 1'])
+        self.assertEqual(repr(post_dominator_tree.get_immediate_dominator(program_block.command_node).command), 'True')
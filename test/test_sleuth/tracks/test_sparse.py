@@ -0,0 +1,46 @@
+import random
+from array import array
+
+from sleuth.tracks.sparse import compress_edges, reverse_edges
+from test_sleuth.support.testcase import TestCase
+
+
+def get_rows(offsets, targets):
+    return [list(targets[offsets[index]:offsets[index + 1]]) for index in range(len(offsets) - 1)]
+
+
+class SparseTest(TestCase):
+
+    def test_compress_edges(self):
+        offsets, targets = compress_edges(4, [[2, 1, 2], [], [3], [0, 1]])
+        self.assertEqual((offsets.typecode, targets.typecode), ('i', 'i'))
+        self.assertEqual(get_rows(offsets, targets), [[1, 2], [], [3], [0, 1]])
+
+    def test_reverse_edges(self):
+        offsets, targets = compress_edges(4, [[1, 2], [], [3], [0, 1, 2]])
+        reverse_offsets, sources = reverse_edges(4, offsets, targets)
+        self.assertEqual(get_rows(reverse_offsets, sources), [[3], [0, 3], [0, 3], [2]])
+        self.assertEqual(reverse_edges(0, array('i', [0]), array('i')), (array('i', [0]), array('i')))
+
+    def test_reverse_labelled_edges(self):
+        rand = random.Random(3)
+        rows = [[rand.randrange(50) for _ in range(rand.randrange(4))] for _ in range(50)]
+        offsets = array('i', [0])
+        targets = array('i')
+        for row in rows:
+            targets.extend(row)
+            offsets.append(len(targets))
+        labels = array('b', [rand.randrange(4) for _ in targets])
+
+        reverse_offsets, sources, reverse_labels = reverse_edges(50, offsets, targets, labels)
+        self.assertEqual(reverse_labels.typecode, 'b')
+        self.assertEqual(reverse_edges(50, offsets, targets), (reverse_offsets, sources))
+
+        # Every edge is there backwards once, with its label, sources in order
+        expected = [[] for _ in rows]
+        for source, row in enumerate(rows):
+            for index, target in enumerate(row):
+                expected[target].append((source, labels[offsets[source] + index]))
+        self.assertEqual([zip(sources_row, labels_row) for sources_row, labels_row in
+                          zip(get_rows(reverse_offsets, sources), get_rows(reverse_offsets, reverse_labels))],
+                         expected)
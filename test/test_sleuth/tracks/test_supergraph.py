@@ -0,0 +1,113 @@
+from sleuth.lingo.components import * #@UnusedWildImport
+from sleuth.lingo.flat import flatten, BLOCK
+from sleuth.lingo.parser import LingoParser
+from sleuth.tracks.cfg import ProgramBlock
+from sleuth.tracks.supergraph import FLOW_EDGE, CALL_EDGE, RETURN_EDGE, CALL_TO_RETURN_EDGE
+from test_sleuth.support.programs import ProgramGenerator
+from test_sleuth.support.testcase import TestCase
+
+
+SOURCE_TEXT = ('def f = fun(a) { if (a < 3) then { b := g(a) } else { b := a }; return b }\n'
+               'def g = fun(c) { d := c + 1; return d }\n'
+               'x := 1; y := f(x); z := g(y); w := h(z); v := !p(w)')
+
+
+class SupergraphTest(TestCase):
+
+    def setUp(self):
+        self.parser = LingoParser()
+
+    def describe(self, edges):
+        return sorted((repr(node.command), kind) for node, kind in edges)
+
+    def find_node(self, program_block, text):
+        nodes = [node for node in program_block.nodes if repr(node.command) == text]
+        self.assertEqual(len(nodes), 1)
+        return nodes[0]
+
+    def test_example(self):
+        program_block = ProgramBlock(self.parser.parse(SOURCE_TEXT))
+        supergraph = program_block.get_supergraph()
+        self.assertIs(program_block.get_supergraph(), supergraph)
+
+        self.assertEqual(supergraph.procedure_names, [None, 'f', 'g'])
+        self.assertIs(supergraph.get_entry(), program_block.command_node)
+        self.assertIs(supergraph.get_entry('g'), program_block.functions['g'].command_node)
+        self.assertEqual([repr(node.command) for node in supergraph.get_exits('g')], ['return d'])
+        self.assertEqual([repr(node.command) for node in supergraph.get_exits()], ['v := !p([w]) [RET]'])
+
+        call_node = self.find_node(program_block, 'z := g([y]) [CALL]')
+        return_node = self.find_node(program_block, 'z := g([y]) [RET]')
+        self.assertEqual(self.describe(supergraph.get_successors(call_node)),
+                         [('g = fun([c])', CALL_EDGE), ('z := g([y]) [RET]', CALL_TO_RETURN_EDGE)])
+        self.assertEqual(self.describe(supergraph.get_predecessors(return_node)),
+                         [('return d', RETURN_EDGE), ('z := g([y]) [CALL]', CALL_TO_RETURN_EDGE)])
+        self.assertEqual(self.describe(supergraph.get_successors(return_node)),
+                         [('w := h([z]) [CALL]', FLOW_EDGE)])
+        self.assertTrue(supergraph.is_call(call_node))
+        self.assertFalse(supergraph.is_call(return_node))
+        self.assertTrue(supergraph.is_return(return_node))
+        self.assertIs(supergraph.get_return_node(call_node), return_node)
+        self.assertIs(supergraph.get_call_node(return_node), call_node)
+        self.assertEqual(supergraph.get_callee(return_node), 'g')
+
+        # g returns to both its calls
+        self.assertEqual(self.describe(supergraph.get_successors(self.find_node(program_block, 'return d'))),
+                         [('b := g([a]) [RET]', RETURN_EDGE), ('z := g([y]) [RET]', RETURN_EDGE)])
+        self.assertEqual(sorted(repr(node.command) for node in supergraph.get_call_nodes('g')),
+                         ['b := g([a]) [CALL]', 'z := g([y]) [CALL]'])
+        self.assertEqual(supergraph.get_procedure(self.find_node(program_block, 'b := a')), 'f')
+        self.assertEqual(supergraph.get_procedure(call_node), None)
+
+        # Calls of things that aren't functions only go on to their RET nodes
+        for text in ['w := h([z]) [CALL]', 'v := !p([w]) [CALL]']:
+            node = self.find_node(program_block, text)
+            self.assertEqual(supergraph.get_callee(node), None)
+            self.assertEqual([kind for _, kind in supergraph.get_successors(node)], [CALL_TO_RETURN_EDGE])
+
+    def test_edges(self):
+        for text in ProgramGenerator(seed = 5).corpus(20, statements = 12, functions = 3):
+            program_block = ProgramBlock(self.parser.parse(text))
+            supergraph = program_block.get_supergraph()
+
+            for node in program_block.nodes:
+                successors = supergraph.get_successors(node)
+
+                # The edges of the CFGs stay, and the new edges are at the calls
+                flow_successors = [successor for successor, kind in successors if kind in (FLOW_EDGE, CALL_TO_RETURN_EDGE)]
+                self.assertEqual(flow_successors, node.get_successors())
+
+                if supergraph.is_call(node):
+                    callee = node.command.expression.function_variable.name
+                    if callee in program_block.functions and node.command.expression.function_variable.__class__ is Variable:
+                        self.assertEqual(supergraph.get_callee(node), callee)
+                        self.assertTrue((supergraph.get_entry(callee), CALL_EDGE) in successors)
+                        for exit_node in supergraph.get_exits(callee):
+                            self.assertTrue((supergraph.get_return_node(node), RETURN_EDGE) in
+                                            supergraph.get_successors(exit_node))
+                    else:
+                        self.assertEqual(supergraph.get_callee(node), None)
+                else:
+                    self.assertTrue(all(kind in (FLOW_EDGE, RETURN_EDGE) for _, kind in successors))
+
+                for successor, kind in successors:
+                    self.assertTrue((node, kind) in supergraph.get_predecessors(successor))
+                    if kind != CALL_EDGE and kind != RETURN_EDGE:
+                        self.assertEqual(supergraph.get_procedure(successor), supergraph.get_procedure(node))
+
+            self.assertEqual(sum(len(supergraph.get_predecessors(node)) for node in program_block.nodes),
+                             len(supergraph.successors))
+
+    def test_flat(self):
+        for text in [SOURCE_TEXT] + ProgramGenerator(seed = 7).corpus(10, statements = 12, functions = 3):
+            flat = flatten(self.parser.parse(text))
+            supergraph = ProgramBlock(flat).get_supergraph()
+            expected = ProgramBlock(self.parser.parse(text)).get_supergraph()
+            for name in ('call_ids', 'return_ids', 'callees', 'successor_offsets', 'successors', 'successor_kinds',
+                         'predecessor_offsets', 'predecessors', 'predecessor_kinds'):
+                self.assertEqual(getattr(supergraph, name), getattr(expected, name))
+
+            # Only the commands of the calls are made
+            made = [row for row in flat._components if flat.kinds[row] != BLOCK and
+                    issubclass(flat.get_class(row), (Program, FunctionDeclaration, Command))]
+            self.assertEqual(sorted(made), sorted(supergraph.graph.nodes[call_id].row for call_id in supergraph.call_ids))